@@ -0,0 +1,168 @@
+"""
+Redis-backed cache for rendered REST API data.
+
+Entries are keyed by the requesting view, the full request path, the permission
+context of the user and the current *generation* of every model the view depends
+on. Each database change notification (relayed by rodan/notify_relay.py) increments
+the generation of the changed model, which makes every entry that depends on it
+unreachable at once; unreachable entries are evicted by the size bound (least
+recently used first) or by their expiry time.
+
+Keys in Redis:
+
+- `rodan:cache:entry:<digest>` -- pickled response data.
+- `rodan:cache:lru` -- sorted set of entry keys scored by last access time.
+- `rodan:cache:gen` -- hash of model name => generation.
+- `rodan:cache:stats` -- hash of hit/miss counters, in total and per view.
+"""
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+import redis
+from six.moves import cPickle as pickle
+
+logger = logging.getLogger("rodan")
+
+ENTRY_PREFIX = "rodan:cache:entry:"
+LRU_KEY = "rodan:cache:lru"
+GENERATION_KEY = "rodan:cache:gen"
+STATS_KEY = "rodan:cache:stats"
+
+_redis_connection = None
+
+
+def get_redis_connection():
+    """
+    Return a Redis client for the server configured in `WS4REDIS_CONNECTION`.
+    The client keeps its own connection pool, so it is shared by the process.
+    """
+    global _redis_connection
+    if _redis_connection is None:
+        _redis_connection = redis.StrictRedis(
+            host=settings.WS4REDIS_CONNECTION["host"],
+            port=int(settings.WS4REDIS_CONNECTION["port"] or 6379),
+            db=int(settings.WS4REDIS_CONNECTION["db"] or 0),
+        )
+    return _redis_connection
+
+
+class ResponseCache(object):
+    """
+    Any Redis error is logged and treated as a cache miss, so the API keeps
+    working (uncached) if Redis goes away.
+    """
+
+    def __init__(self, connection=None):
+        self._connection = connection
+
+    @property
+    def enabled(self):
+        return getattr(settings, "RODAN_RESPONSE_CACHE", False)
+
+    @property
+    def redis(self):
+        return self._connection or get_redis_connection()
+
+    def make_key(self, scope, parts, depends_on):
+        """
+        Build the entry key for `parts` (path, permission context...) under the
+        current generations of the models in `depends_on`. Returns None if Redis
+        cannot be reached.
+        """
+        depends_on = sorted(depends_on)
+        try:
+            generations = self.redis.hmget(GENERATION_KEY, depends_on) if depends_on else []
+        except redis.RedisError as e:
+            logger.warning("Response cache unavailable: %s", e)
+            return None
+        generations = [
+            "{0}={1}".format(m, (g or b"0").decode("ascii"))
+            for m, g in zip(depends_on, generations)
+        ]
+        digest = hashlib.sha1(
+            "|".join([scope] + list(parts) + generations).encode("utf-8")
+        ).hexdigest()
+        return ENTRY_PREFIX + digest
+
+    def get(self, key, scope):
+        """
+        Return the cached data, or None on a miss.
+        """
+        if key is None:
+            return None
+        try:
+            value = self.redis.get(key)
+            pipe = self.redis.pipeline(transaction=False)
+            if value is not None:
+                pipe.zadd(LRU_KEY, time.time(), key)
+                pipe.hincrby(STATS_KEY, "hits", 1)
+                pipe.hincrby(STATS_KEY, "hits:{0}".format(scope), 1)
+            else:
+                pipe.hincrby(STATS_KEY, "misses", 1)
+                pipe.hincrby(STATS_KEY, "misses:{0}".format(scope), 1)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning("Response cache unavailable: %s", e)
+            return None
+        if value is None:
+            return None
+        return pickle.loads(value)
+
+    def set(self, key, data):
+        if key is None:
+            return
+        max_entries = getattr(settings, "RODAN_RESPONSE_CACHE_MAX_ENTRIES", 10000)
+        timeout = getattr(settings, "RODAN_RESPONSE_CACHE_TIMEOUT", 3600)
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.set(key, pickle.dumps(data, 2), ex=timeout)
+            pipe.zadd(LRU_KEY, time.time(), key)
+            pipe.zcard(LRU_KEY)
+            size = pipe.execute()[-1]
+            if size > max_entries:
+                self._evict(size - max_entries)
+        except redis.RedisError as e:
+            logger.warning("Response cache unavailable: %s", e)
+
+    def _evict(self, count):
+        keys = self.redis.zrange(LRU_KEY, 0, count - 1)
+        if keys:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.delete(*keys)
+            pipe.zrem(LRU_KEY, *keys)
+            pipe.hincrby(STATS_KEY, "evictions", len(keys))
+            pipe.execute()
+
+    def invalidate(self, *models):
+        """
+        Make all entries that depend on any of `models` unreachable.
+        """
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for model in set(models):
+                pipe.hincrby(GENERATION_KEY, model, 1)
+            pipe.hincrby(STATS_KEY, "invalidations", len(set(models)))
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning("Response cache unavailable: %s", e)
+
+    def clear(self):
+        keys = self.redis.zrange(LRU_KEY, 0, -1)
+        pipe = self.redis.pipeline(transaction=False)
+        if keys:
+            pipe.delete(*keys)
+        pipe.delete(LRU_KEY, STATS_KEY)
+        pipe.execute()
+
+    def stats(self):
+        stats = dict(
+            (k.decode("utf-8"), int(v))
+            for k, v in self.redis.hgetall(STATS_KEY).items()
+        )
+        stats["entries"] = self.redis.zcard(LRU_KEY)
+        return stats
+
+
+response_cache = ResponseCache()
@@ -22,12 +22,22 @@ from rodan.jobs.core import (  # noqa
     retry_workflowrun,
     send_email,
 )
+from rodan.jobs.fusion import run_fused_chain  # noqa
+from rodan.jobs.garbage import collect_garbage  # noqa
 from rodan.jobs.master_task import master_task  # noqa
+from rodan.jobs.monitoring import collect_metrics  # noqa  (and task signal handlers)
+from rodan.jobs.supervisor import supervise_runjobs  # noqa
+from rodan.jobs import placement  # noqa  (worker signal handlers)
+from rodan.jobs import tracing  # noqa  (signal handlers)
 
 
 # Core Rodan Tasks
 app.tasks.register(create_resource())
 app.tasks.register(create_workflowrun())
+app.tasks.register(collect_garbage())
+app.tasks.register(collect_metrics())
+app.tasks.register(run_fused_chain())
+app.tasks.register(supervise_runjobs())
 
 app.tasks.register(cancel_workflowrun)
 app.tasks.register(create_diva)
@@ -17,3 +17,15 @@ class task_status:
     REQUEST_RETRYING = 31  # only for WorkflowRun
 
     NOT_APPLICABLE = None
+
+
+class profiling:
+    """
+    Profiling modes of RunJobs (see `rodan.jobs.profiling`).
+    """
+
+    OFF = ""
+    JOB = "job"  # `run_my_task` only
+    TASK = "task"  # the whole of `RodanTask.run`, with the bookkeeping around the job
+
+    CHOICES = [(OFF, "Off"), (JOB, "Job"), (TASK, "Task")]
@@ -0,0 +1,248 @@
+"""
+Admission control of RunJobs, between the master task and the broker.
+
+The master task asks `admit` which of the runnable RunJobs of a WorkflowRun it may send
+to the broker. In-flight RunJobs (status PROCESSING, i.e. queued or running) are capped:
+
+- per user and job queue, at `RODAN_ADMISSION_USER_QUEUE_LIMITS[queue]` (or
+  `RODAN_ADMISSION_USER_QUEUE_LIMIT`) times the weight of the user in
+  `RODAN_ADMISSION_WEIGHTS` (default 1);
+- per project, at `RODAN_ADMISSION_PROJECT_LIMIT`.
+
+A limit of None means no limit, and all of them are None by default. The RunJobs that
+do not fit stay SCHEDULED, and their WorkflowRun is recorded in the Redis sorted set
+`rodan:admission:held`. Whenever RunJobs leave PROCESSING, `release` calls the master
+task of as many held WorkflowRuns as slots were freed, those of the users with the
+smallest weighted share of in-flight RunJobs first (weighted fair queuing); the master
+task admits what fits and holds the rest again.
+
+Decisions are taken under a Redis lock, so that concurrent master tasks do not both
+take the last slot; it is only taken when admission control or placement (see
+`rodan.jobs.placement`) applies. If Redis is unavailable, everything is admitted.
+"""
+from contextlib import contextmanager
+import logging
+import time
+import uuid
+
+from celery import registry
+from django.conf import settings
+from django.db.models import Count
+import redis
+
+from rodan.cache import get_redis_connection
+from rodan.constants import task_status
+from rodan.models import RunJob, WorkflowRun
+
+logger = logging.getLogger("rodan")
+
+HELD_KEY = "rodan:admission:held"
+LOCK_KEY = "rodan:admission:lock"
+
+
+def enabled():
+    return bool(
+        getattr(settings, "RODAN_ADMISSION_USER_QUEUE_LIMIT", None)
+        or getattr(settings, "RODAN_ADMISSION_USER_QUEUE_LIMITS", None)
+        or getattr(settings, "RODAN_ADMISSION_PROJECT_LIMIT", None)
+    )
+
+
+def weight(username):
+    return getattr(settings, "RODAN_ADMISSION_WEIGHTS", {}).get(username, 1)
+
+
+def user_queue_limit(username, job_queue):
+    limit = getattr(settings, "RODAN_ADMISSION_USER_QUEUE_LIMITS", {}).get(
+        job_queue, getattr(settings, "RODAN_ADMISSION_USER_QUEUE_LIMIT", None)
+    )
+    if limit is None:
+        return None
+    return max(int(limit * weight(username)), 1)
+
+
+@contextmanager
+def lock(needed=True):
+    """
+    Hold the admission lock, unless it is not `needed`: nothing to admit or place.
+    """
+    if not needed:
+        yield
+        return
+    try:
+        admission_lock = get_redis_connection().lock(LOCK_KEY, timeout=30, sleep=0.01)
+        admission_lock.acquire()
+    except redis.RedisError as e:
+        logger.warning("Cannot lock the admission of RunJobs: %s", e)
+        yield
+        return
+    try:
+        yield
+    finally:
+        try:
+            admission_lock.release()
+        except redis.RedisError as e:
+            logger.warning("Cannot unlock the admission of RunJobs: %s", e)
+
+
+def in_flight(**filters):
+    """
+    Returns the number of in-flight RunJobs matching the filters, per job queue.
+    """
+    return dict(
+        RunJob.objects.filter(status=task_status.PROCESSING, **filters)
+        .values_list("job_queue")
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+
+
+def admit(workflow_run_id, runjobs):
+    """
+    Split `runjobs` (dictionaries with at least `job_queue`, in order of preference)
+    into the ones that can be sent to the broker now and the ones that are held. Must
+    be called under `lock()`, and the admitted RunJobs set to PROCESSING before it is
+    released.
+    """
+    if not enabled() or not runjobs:
+        return runjobs, []
+
+    project_id, creator_id, username = WorkflowRun.objects.filter(
+        uuid=workflow_run_id
+    ).values_list("project_id", "creator_id", "creator__username")[0]
+    user_counts = in_flight(workflow_run__creator_id=creator_id) if creator_id else {}
+    project_count = sum(in_flight(workflow_run__project_id=project_id).values())
+    project_limit = getattr(settings, "RODAN_ADMISSION_PROJECT_LIMIT", None)
+
+    admitted, held = [], []
+    for rj in runjobs:
+        queue = rj["job_queue"]
+        limit = user_queue_limit(username, queue) if creator_id else None
+        if (limit is not None and user_counts.get(queue, 0) >= limit) or (
+            project_limit is not None and project_count >= project_limit
+        ):
+            held.append(rj)
+            continue
+        admitted.append(rj)
+        user_counts[queue] = user_counts.get(queue, 0) + 1
+        project_count += 1
+
+    try:
+        hold(workflow_run_id, bool(held))
+    except redis.RedisError as e:
+        logger.warning("Cannot record the held RunJobs of %s: %s", workflow_run_id, e)
+        return runjobs, []
+    return admitted, held
+
+
+def hold(workflow_run_id, held=True):
+    """
+    Record whether the WorkflowRun has RunJobs waiting for `release`.
+    """
+    conn = get_redis_connection()
+    if not held:
+        conn.zrem(HELD_KEY, str(workflow_run_id))
+    elif conn.zscore(HELD_KEY, str(workflow_run_id)) is None:
+        # Keep the time at which the WorkflowRun was first held.
+        conn.zadd(HELD_KEY, **{str(workflow_run_id): time.time()})
+
+
+def held_workflow_runs():
+    """
+    Returns the UUIDs of the WorkflowRuns with held RunJobs, first held first.
+    """
+    return [uuid.UUID(w.decode() if isinstance(w, bytes) else w) for w in (
+        get_redis_connection().zrange(HELD_KEY, 0, -1)
+    )]
+
+
+def release(exclude=None, slots=1):
+    """
+    Call the master task of `slots` WorkflowRuns with held RunJobs (except `exclude`),
+    in weighted fair queuing order, after as many in-flight RunJobs have finished.
+    """
+    if slots < 1:
+        return
+    try:
+        held = [w for w in held_workflow_runs() if str(w) != str(exclude)]
+    except redis.RedisError as e:
+        logger.warning("Cannot release the held RunJobs: %s", e)
+        return
+    if not held:
+        return
+
+    rows = WorkflowRun.objects.filter(
+        uuid__in=held, status__in=(task_status.PROCESSING, task_status.RETRYING)
+    ).values_list("uuid", "creator_id", "creator__username")
+    shares = {}
+    for _, creator_id, username in rows:
+        if creator_id not in shares:
+            count = sum(in_flight(workflow_run__creator_id=creator_id).values())
+            shares[creator_id] = count / float(weight(username))
+    position = dict((w, i) for i, w in enumerate(held))
+    rows = sorted(rows, key=lambda row: (shares[row[1]], position[row[0]]))
+
+    master_task = registry.tasks["rodan.core.master_task"]
+    conn = get_redis_connection()
+    try:
+        # The WorkflowRuns that have ended do not wait anymore.
+        ended = set(held).difference(row[0] for row in rows)
+        if ended:
+            conn.zrem(HELD_KEY, *[str(w) for w in ended])
+        for wfrun_id, _, _ in rows:
+            if not slots:
+                break
+            # Another release() may have taken it already.
+            if not conn.zrem(HELD_KEY, str(wfrun_id)):
+                continue
+            master_task.si(str(wfrun_id)).apply_async(queue="celery")
+            slots -= 1
+    except redis.RedisError as e:
+        logger.warning("Cannot release the held RunJobs: %s", e)
+
+
+def snapshot():
+    """
+    Limits, in-flight RunJobs per user and job queue and per project, and held
+    WorkflowRuns with their number of held RunJobs.
+    """
+    users = {}
+    for username, queue, count in (
+        RunJob.objects.filter(status=task_status.PROCESSING)
+        .values_list("workflow_run__creator__username", "job_queue")
+        .annotate(count=Count("pk"))
+        .order_by()
+    ):
+        users.setdefault(username, {})[queue] = count
+    projects = dict(
+        (str(project_id), count)
+        for project_id, count in RunJob.objects.filter(status=task_status.PROCESSING)
+        .values_list("workflow_run__project_id")
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    try:
+        held = held_workflow_runs()
+    except redis.RedisError as e:
+        logger.warning("Cannot read the held RunJobs: %s", e)
+        held = []
+    held_counts = dict(
+        RunJob.objects.filter(workflow_run__in=held, status=task_status.SCHEDULED)
+        .values_list("workflow_run_id")
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    return {
+        "enabled": enabled(),
+        "limits": {
+            "user_queue": getattr(settings, "RODAN_ADMISSION_USER_QUEUE_LIMIT", None),
+            "user_queues": getattr(settings, "RODAN_ADMISSION_USER_QUEUE_LIMITS", {}),
+            "project": getattr(settings, "RODAN_ADMISSION_PROJECT_LIMIT", None),
+            "weights": getattr(settings, "RODAN_ADMISSION_WEIGHTS", {}),
+        },
+        "in_flight": {"users": users, "projects": projects},
+        "held": [
+            {"workflow_run": str(w), "scheduled_runjobs": held_counts.get(w, 0)}
+            for w in held
+        ],
+    }
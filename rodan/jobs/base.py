@@ -10,17 +10,16 @@ import os
 # import re
 import shutil
 import sys
-import time
 import uuid
 
 from celery import Task, registry
 from celery.app.task import TaskType
 from django.conf import settings as rodan_settings
 from django.core.files import File
-from django.db import transaction
 from django.template import Template
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
 from rest_framework import status
 
 from rodan.constants import task_status
@@ -38,6 +37,14 @@ from rodan.models import (
 )
 from rodan.jobs.deep_eq import deep_eq
 from rodan.jobs.convert_to_unicode import convert_to_unicode
+from rodan.jobs import admission
+from rodan.jobs import catalogue
+from rodan.jobs import metrics
+from rodan.jobs import placement
+from rodan.jobs import profiling
+from rodan.jobs import progress
+from rodan.jobs import supervisor
+from rodan.jobs import tracing
 
 import logging
 
@@ -97,421 +104,442 @@ class RodanTaskType(TaskType):
         if "test_my_task" in attrs:
             argspec = inspect.getargspec(attrs["test_my_task"])
             assert len(argspec.args) == 2, "test_my_task"
+        if attrs.get("fusible"):
+            assert not attrs.get("interactive"), "fusible"
+        if "resource_hints" in attrs:
+            assert set(attrs["resource_hints"]) <= set(placement.HINTS), "resource_hints"
 
         # not the abstract class
         if attrs.get("_abstract") is True:
             return
-        else:
-
-            # Set base settings schema if they do not already exist in the job.
-            schema = attrs.get("settings", {"job_queue": "celery", "type": "object"})
+        if catalogue.collect(attrs):
+            return  # checked by `rodan.jobs.load` only if the catalogue has changed
+        RodanTaskType.register(attrs)
 
-            if not Job.objects.filter(name=attrs["name"]).exists():
-                if (not getattr(settings, "_update_rodan_jobs", None) and not settings.TEST):
-                    raise ImproperlyConfigured(
-                        (
-                            "The catalogue of local jobs does not match the ones in "
-                            "database: local job `{0}` has not been registered. Please"
-                            " run `manage.py migrate` on Rodan server to update the database."
-                        ).format(attrs["name"])
-                    )
+    @staticmethod
+    def register(attrs):
+        """
+        Register the job defined by the class attributes `attrs` in the database, or
+        check that the database matches it (and update it if demanded).
+        """
+        # Set base settings schema if they do not already exist in the job.
+        schema = attrs.get("settings", {"job_queue": "celery", "type": "object"})
 
-                try:
-                    # verify the schema
-                    jsonschema.Draft4Validator.check_schema(attrs["settings"])
-                except jsonschema.exceptions.SchemaError as e:
-                    raise e
-
-                j = Job(
-                    name=attrs["name"],
-                    author=attrs["author"],
-                    description=attrs["description"],
-                    settings=schema,
-                    enabled=attrs["enabled"],
-                    category=attrs["category"],
-                    interactive=attrs["interactive"],
-                    # Check for the presence of job_queue in the rodan job's settings, if
-                    # not use the default 'celery'
-                    job_queue=schema.get("job_queue", "celery"),
+        if not Job.objects.filter(name=attrs["name"]).exists():
+            if (not getattr(settings, "_update_rodan_jobs", None) and not settings.TEST):
+                raise ImproperlyConfigured(
+                    (
+                        "The catalogue of local jobs does not match the ones in "
+                        "database: local job `{0}` has not been registered. Please"
+                        " run `manage.py migrate` on Rodan server to update the database."
+                    ).format(attrs["name"])
                 )
-                j.save()
 
-                try:
-                    for ipt in attrs["input_port_types"]:
-                        i = InputPortType(
-                            job=j,
-                            name=ipt["name"],
-                            minimum=ipt["minimum"],
-                            maximum=ipt["maximum"],
-                            is_list=ipt.get("is_list", False),
+            try:
+                # verify the schema
+                jsonschema.Draft4Validator.check_schema(attrs["settings"])
+            except jsonschema.exceptions.SchemaError as e:
+                raise e
+
+            j = Job(
+                name=attrs["name"],
+                author=attrs["author"],
+                description=attrs["description"],
+                settings=schema,
+                enabled=attrs["enabled"],
+                category=attrs["category"],
+                interactive=attrs["interactive"],
+                fusible=attrs.get("fusible", False),
+                resource_hints=attrs.get("resource_hints", {}),
+                # Check for the presence of job_queue in the rodan job's settings, if
+                # not use the default 'celery'
+                job_queue=schema.get("job_queue", "celery"),
+            )
+            j.save()
+
+            try:
+                for ipt in attrs["input_port_types"]:
+                    i = InputPortType(
+                        job=j,
+                        name=ipt["name"],
+                        minimum=ipt["minimum"],
+                        maximum=ipt["maximum"],
+                        is_list=ipt.get("is_list", False),
+                    )
+                    i.save()
+                    resource_types = RodanTaskType._resolve_resource_types(
+                        ipt["resource_types"]
+                    )
+                    if len(resource_types) == 0:
+                        raise ValueError(
+                            (
+                                "No available resource types found for "
+                                "this InputPortType: {0}"
+                            ).format(ipt["resource_types"])
                         )
-                        i.save()
-                        resource_types = RodanTaskType._resolve_resource_types(
-                            ipt["resource_types"]
+                    i.resource_types.add(*resource_types)
+
+                for opt in attrs["output_port_types"]:
+                    o = OutputPortType(
+                        job=j,
+                        name=opt["name"],
+                        minimum=opt["minimum"],
+                        maximum=opt["maximum"],
+                        is_list=opt.get("is_list", False),
+                    )
+                    o.save()
+                    resource_types = RodanTaskType._resolve_resource_types(
+                        opt["resource_types"]
+                    )
+                    if len(resource_types) == 0:
+                        raise ValueError(
+                            (
+                                "No available resource types found for this"
+                                " OutputPortType: {0}"
+                            ).format(opt["resource_types"])
                         )
-                        if len(resource_types) == 0:
-                            raise ValueError(
-                                (
-                                    "No available resource types found for "
-                                    "this InputPortType: {0}"
-                                ).format(ipt["resource_types"])
+                    o.resource_types.add(*resource_types)
+            except Exception as e:
+                j.delete()  # clean the job
+                raise e
+
+            if not settings.TEST:
+                print("Added: {0}".format(j.name))
+        else:
+            UPDATE_JOBS = getattr(rodan_settings, "_update_rodan_jobs", False)
+            # perform an integrity check, and update jobs if demanded.
+            j = Job.objects.get(name=attrs["name"])
+
+            def check_field(
+                field_name,
+                original_value,
+                new_value,
+                compare_fn=lambda x, y: x == y,
+            ):
+                if not compare_fn(original_value, new_value):
+                    if not UPDATE_JOBS:
+                        raise ImproperlyConfigured(
+                            (
+                                "The field `{0}` of Job `{1}` seems to be updated: {2} --> {3}."
+                                " Try to run `manage.py migrate` to confirm this update."
+                            ).format(
+                                field_name,
+                                j.name,
+                                convert_to_unicode(original_value),
+                                convert_to_unicode(new_value),
                             )
-                        i.resource_types.add(*resource_types)
-
-                    for opt in attrs["output_port_types"]:
-                        o = OutputPortType(
-                            job=j,
-                            name=opt["name"],
-                            minimum=opt["minimum"],
-                            maximum=opt["maximum"],
-                            is_list=opt.get("is_list", False),
-                        )
-                        o.save()
-                        resource_types = RodanTaskType._resolve_resource_types(
-                            opt["resource_types"]
-                        )
-                        if len(resource_types) == 0:
-                            raise ValueError(
-                                (
-                                    "No available resource types found for this"
-                                    " OutputPortType: {0}"
-                                ).format(opt["resource_types"])
+                        )  # noqa
+                    else:
+                        confirm_update = confirm(
+                            (
+                                "The field `{0}` of Job `{1}` seems to be updated: \n{2}\n  "
+                                "-->\n{3}\n\nConfirm (y/N)? "
+                            ).format(
+                                field_name,
+                                j.name,
+                                convert_to_unicode(original_value),
+                                convert_to_unicode(new_value),
                             )
-                        o.resource_types.add(*resource_types)
-                except Exception as e:
-                    j.delete()  # clean the job
-                    raise e
-
-                if not settings.TEST:
-                    print("Added: {0}".format(j.name))
-            else:
-                UPDATE_JOBS = getattr(rodan_settings, "_update_rodan_jobs", False)
-                # perform an integrity check, and update jobs if demanded.
-                j = Job.objects.get(name=attrs["name"])
-
-                def check_field(
-                    field_name,
-                    original_value,
-                    new_value,
-                    compare_fn=lambda x, y: x == y,
-                ):
-                    if not compare_fn(original_value, new_value):
-                        if not UPDATE_JOBS:
-                            raise ImproperlyConfigured(
-                                (
-                                    "The field `{0}` of Job `{1}` seems to be updated: {2} --> {3}."
-                                    " Try to run `manage.py migrate` to confirm this update."
-                                ).format(
-                                    field_name,
-                                    j.name,
-                                    convert_to_unicode(original_value),
-                                    convert_to_unicode(new_value),
-                                )
-                            )  # noqa
+                        )  # noqa
+                        if confirm_update:
+                            setattr(j, field_name, new_value)
+                            j.save()
+                            print("  ..updated.\n\n")
                         else:
-                            confirm_update = confirm(
-                                (
-                                    "The field `{0}` of Job `{1}` seems to be updated: \n{2}\n  "
-                                    "-->\n{3}\n\nConfirm (y/N)? "
-                                ).format(
-                                    field_name,
-                                    j.name,
-                                    convert_to_unicode(original_value),
-                                    convert_to_unicode(new_value),
-                                )
-                            )  # noqa
-                            if confirm_update:
-                                setattr(j, field_name, new_value)
-                                j.save()
-                                print("  ..updated.\n\n")
-                            else:
-                                print("  ..not updated.\n\n")
+                            print("  ..not updated.\n\n")
+
+            check_field("author", j.author, attrs["author"])
+            check_field("description", j.description, attrs["description"])
+            check_field(
+                "settings",
+                j.settings,
+                schema,
+                compare_fn=lambda x, y: deep_eq(x, y),
+            )
+            check_field("enabled", j.enabled, attrs["enabled"])
+            check_field("category", j.category, attrs["category"])
+            check_field("interactive", j.interactive, attrs["interactive"])
+            check_field("fusible", j.fusible, attrs.get("fusible", False))
+            check_field("job_queue", j.job_queue, schema.get("job_queue", "celery"))
+            check_field(
+                "resource_hints",
+                j.resource_hints,
+                attrs.get("resource_hints", {}),
+                compare_fn=lambda x, y: deep_eq(x, y),
+            )
 
-                check_field("author", j.author, attrs["author"])
-                check_field("description", j.description, attrs["description"])
-                check_field(
-                    "settings",
-                    j.settings,
-                    schema,
-                    compare_fn=lambda x, y: deep_eq(x, y),
-                )
-                check_field("enabled", j.enabled, attrs["enabled"])
-                check_field("category", j.category, attrs["category"])
-                check_field("interactive", j.interactive, attrs["interactive"])
-                check_field("job_queue", j.job_queue, schema.get("job_queue", "celery"))
-
-                # Input Port Types
-                def check_port_types(which):
-                    "which == 'in' or 'out'"
-                    if which == "in":
-                        attrs_pts = list(copy.deepcopy(attrs["input_port_types"]))
-                        db_pts = list(j.input_port_types.all())
-                        msg = "Input"
-                    elif which == "out":
-                        attrs_pts = list(copy.deepcopy(attrs["output_port_types"]))
-                        db_pts = list(j.output_port_types.all())
-                        msg = "Output"
-
-                    for pt in db_pts:
-                        pt_name = pt.name
-
-                        idx = next(
-                            (
-                                i
-                                for (i, this_pt) in enumerate(attrs_pts)
-                                if (this_pt["name"] == pt_name)
-                            ),
-                            None,
-                        )
-                        if (
-                            idx is not None
-                        ):  # pt exists in database and in code. Check values
-                            attrs_pt = attrs_pts[idx]
-
-                            # Compare values
-                            if attrs_pt["minimum"] != pt.minimum:
-                                if not UPDATE_JOBS:
-                                    raise ImproperlyConfigured(
-                                        (
-                                            "The field `{0}` of {5} Port Type `{1}` of Job "
-                                            "`{2}` seems to be updated: {3} --> {4}. Try to"
-                                            " run `manage.py migrate` to confirm this update."
-                                        ).format(
-                                            "minimum",
-                                            pt_name,
-                                            j.name,
-                                            pt.minimum,
-                                            attrs_pt["minimum"],
-                                            msg,
-                                        )
-                                    )
-                                else:
-                                    confirm_update = confirm(
-                                        (
-                                            "The field `{0}` of {5} Port Type `{1}` of Job `{2}`"
-                                            " seems to be updated: \n{3}\n  -->\n{4}\n\nConfirm "
-                                            "(y/N)? "
-                                        ).format(
-                                            "minimum",
-                                            pt_name,
-                                            j.name,
-                                            pt.minimum,
-                                            attrs_pt["minimum"],
-                                            msg,
-                                        )
-                                    )
-                                    if confirm_update:
-                                        pt.minimum = attrs_pt["minimum"]
-                                        pt.save()
-                                        print("  ..updated.\n\n")
-                                    else:
-                                        print("  ..not updated.\n\n")
-
-                            if attrs_pt["maximum"] != pt.maximum:
-                                if not UPDATE_JOBS:
-                                    raise ImproperlyConfigured(
-                                        (
-                                            "The field `{0}` of {5} Port Type `{1}` of Job `{2}`"
-                                            " seems to be updated: {3} --> {4}. Try to run "
-                                            "`manage.py migrate` to confirm this update."
-                                        ).format(
-                                            "maximum",
-                                            pt_name,
-                                            j.name,
-                                            pt.maximum,
-                                            attrs_pt["maximum"],
-                                            msg,
-                                        )
-                                    )
-                                else:
-                                    confirm_update = confirm(
-                                        (
-                                            "The field `{0}` of {5} Port Type `{1}` of Job `{2}`"
-                                            " seems to be updated: \n{3}\n  -->\n{4}\n\nConfirm "
-                                            "(y/N)? "
-                                        ).format(
-                                            "maximum",
-                                            pt_name,
-                                            j.name,
-                                            pt.maximum,
-                                            attrs_pt["maximum"],
-                                            msg,
-                                        )
-                                    )
-                                    if confirm_update:
-                                        pt.maximum = attrs_pt["maximum"]
-                                        pt.save()
-                                        print("  ..updated.\n\n")
-                                    else:
-                                        print("  ..not updated.\n\n")
-
-                            attrs_is_list = bool(attrs_pt.get("is_list", False))
-                            if attrs_is_list != pt.is_list:
-                                if not UPDATE_JOBS:
-                                    raise ImproperlyConfigured(
-                                        (
-                                            "The field `{0}` of {5} Port Type `{1}` of Job `{2}`"
-                                            " seems to be updated: {3} --> {4}. Try to run "
-                                            "`manage.py migrate` to confirm this update."
-                                        ).format(
-                                            "is_list",
-                                            pt_name,
-                                            j.name,
-                                            pt.is_list,
-                                            attrs_is_list,
-                                            msg,
-                                        )
+            # Input Port Types
+            def check_port_types(which):
+                "which == 'in' or 'out'"
+                if which == "in":
+                    attrs_pts = list(copy.deepcopy(attrs["input_port_types"]))
+                    db_pts = list(j.input_port_types.all())
+                    msg = "Input"
+                elif which == "out":
+                    attrs_pts = list(copy.deepcopy(attrs["output_port_types"]))
+                    db_pts = list(j.output_port_types.all())
+                    msg = "Output"
+
+                for pt in db_pts:
+                    pt_name = pt.name
+
+                    idx = next(
+                        (
+                            i
+                            for (i, this_pt) in enumerate(attrs_pts)
+                            if (this_pt["name"] == pt_name)
+                        ),
+                        None,
+                    )
+                    if (
+                        idx is not None
+                    ):  # pt exists in database and in code. Check values
+                        attrs_pt = attrs_pts[idx]
+
+                        # Compare values
+                        if attrs_pt["minimum"] != pt.minimum:
+                            if not UPDATE_JOBS:
+                                raise ImproperlyConfigured(
+                                    (
+                                        "The field `{0}` of {5} Port Type `{1}` of Job "
+                                        "`{2}` seems to be updated: {3} --> {4}. Try to"
+                                        " run `manage.py migrate` to confirm this update."
+                                    ).format(
+                                        "minimum",
+                                        pt_name,
+                                        j.name,
+                                        pt.minimum,
+                                        attrs_pt["minimum"],
+                                        msg,
                                     )
-                                else:
-                                    confirm_update = confirm(
-                                        (
-                                            "The field `{0}` of {5} Port Type `{1}` of Job `{2}`"
-                                            " seems to be updated: \n{3}\n  -->\n{4}\n\nConfirm "
-                                            "(y/N)? "
-                                        ).format(
-                                            "is_list",
-                                            pt_name,
-                                            j.name,
-                                            pt.is_list,
-                                            attrs_is_list,
-                                            msg,
-                                        )
-                                    )  # noqa
-                                    if confirm_update:
-                                        pt.is_list = attrs_is_list
-                                        pt.save()
-                                        print("  ..updated.\n\n")
-                                    else:
-                                        print("  ..not updated.\n\n")
-
-                            resource_types = RodanTaskType._resolve_resource_types(
-                                attrs_pt["resource_types"]
-                            )
-                            rt_code = set(map(lambda rt: rt.mimetype, resource_types))
-                            rt_db = set(
-                                map(lambda rt: rt.mimetype, pt.resource_types.all())
-                            )
-                            if rt_code != rt_db:
-                                if not UPDATE_JOBS:
-                                    raise ImproperlyConfigured(
-                                        (
-                                            "The field `{0}` of {5} Port Type `{1}` of Job `{2}`"
-                                            " seems to be updated: {3} --> {4}. Try to run. "
-                                            "`manage.py migrate` to confirm this update."
-                                        ).format(
-                                            "resource_types",
-                                            pt_name,
-                                            j.name,
-                                            rt_db,
-                                            rt_code,
-                                            msg,
-                                        )
+                                )
+                            else:
+                                confirm_update = confirm(
+                                    (
+                                        "The field `{0}` of {5} Port Type `{1}` of Job `{2}`"
+                                        " seems to be updated: \n{3}\n  -->\n{4}\n\nConfirm "
+                                        "(y/N)? "
+                                    ).format(
+                                        "minimum",
+                                        pt_name,
+                                        j.name,
+                                        pt.minimum,
+                                        attrs_pt["minimum"],
+                                        msg,
                                     )
+                                )
+                                if confirm_update:
+                                    pt.minimum = attrs_pt["minimum"]
+                                    pt.save()
+                                    print("  ..updated.\n\n")
                                 else:
-                                    confirm_update = confirm(
-                                        (
-                                            "The field `{0}` of {5} Port Type `{1}` of Job `{2}` "
-                                            "seems to be updated: \n{3}\n  -->\n{4}\n\nConfirm "
-                                            "(y/N)? "
-                                        ).format(
-                                            "resource_types",
-                                            pt_name,
-                                            j.name,
-                                            rt_db,
-                                            rt_code,
-                                            msg,
-                                        )
-                                    )  # noqa
-                                    if confirm_update:
-                                        pt.resource_types.clear()
-                                        pt.resource_types.add(*resource_types)
-                                        print("  ..updated.\n\n")
-                                    else:
-                                        print("  ..not updated.\n\n")
-
-                            del attrs_pts[idx]
+                                    print("  ..not updated.\n\n")
 
-                        else:  # pt exists in database but not in code. Should be deleted.
+                        if attrs_pt["maximum"] != pt.maximum:
                             if not UPDATE_JOBS:
                                 raise ImproperlyConfigured(
                                     (
-                                        "The {2} Port Type `{0}` of Job `{1}` seems to be "
-                                        "deleted. Try to run `manage.py migrate` to confirm this"
-                                        " deletion."
-                                    ).format(pt_name, j.name, msg)
+                                        "The field `{0}` of {5} Port Type `{1}` of Job `{2}`"
+                                        " seems to be updated: {3} --> {4}. Try to run "
+                                        "`manage.py migrate` to confirm this update."
+                                    ).format(
+                                        "maximum",
+                                        pt_name,
+                                        j.name,
+                                        pt.maximum,
+                                        attrs_pt["maximum"],
+                                        msg,
+                                    )
                                 )
                             else:
-                                confirm_delete = confirm(
+                                confirm_update = confirm(
                                     (
-                                        "The {2} Port Type `{0}` of Job `{1}` seems to be"
-                                        " deleted. Confirm (y/N)? "
-                                    ).format(pt_name, j.name, msg)
+                                        "The field `{0}` of {5} Port Type `{1}` of Job `{2}`"
+                                        " seems to be updated: \n{3}\n  -->\n{4}\n\nConfirm "
+                                        "(y/N)? "
+                                    ).format(
+                                        "maximum",
+                                        pt_name,
+                                        j.name,
+                                        pt.maximum,
+                                        attrs_pt["maximum"],
+                                        msg,
+                                    )
                                 )
-                                if confirm_delete:
-                                    try:
-                                        pt.delete()
-                                        print("  ..deleted.\n\n")
-                                    except Exception as e:
-                                        print(
-                                            (
-                                                "  ..not deleted because of an exception: {0}."
-                                                " Please fix it manually.\n\n"
-                                            ).format(str(e))
-                                        )
+                                if confirm_update:
+                                    pt.maximum = attrs_pt["maximum"]
+                                    pt.save()
+                                    print("  ..updated.\n\n")
                                 else:
-                                    print("  ..not deleted.\n\n")
+                                    print("  ..not updated.\n\n")
 
-                    # ipt exists in code but not in database. Should be added to the database.
-                    if attrs_pts:
-                        for pt in attrs_pts:
+                        attrs_is_list = bool(attrs_pt.get("is_list", False))
+                        if attrs_is_list != pt.is_list:
                             if not UPDATE_JOBS:
                                 raise ImproperlyConfigured(
-                                    "The {2} Port Type `{0}` of Job `{1}` seems to be newly added. Try to run `manage.py migrate` to confirm this update.".format(  # noqa
-                                        pt["name"], j.name, msg
+                                    (
+                                        "The field `{0}` of {5} Port Type `{1}` of Job `{2}`"
+                                        " seems to be updated: {3} --> {4}. Try to run "
+                                        "`manage.py migrate` to confirm this update."
+                                    ).format(
+                                        "is_list",
+                                        pt_name,
+                                        j.name,
+                                        pt.is_list,
+                                        attrs_is_list,
+                                        msg,
                                     )
                                 )
                             else:
                                 confirm_update = confirm(
-                                    "The {2} Port Type `{0}` of Job `{1}` seems to be newly added. Confirm (y/N)? ".format(  # noqa
-                                        pt["name"], j.name, msg
+                                    (
+                                        "The field `{0}` of {5} Port Type `{1}` of Job `{2}`"
+                                        " seems to be updated: \n{3}\n  -->\n{4}\n\nConfirm "
+                                        "(y/N)? "
+                                    ).format(
+                                        "is_list",
+                                        pt_name,
+                                        j.name,
+                                        pt.is_list,
+                                        attrs_is_list,
+                                        msg,
                                     )
-                                )
+                                )  # noqa
                                 if confirm_update:
-                                    if which == "in":
-                                        Model = InputPortType
-                                    elif which == "out":
-                                        Model = OutputPortType
-                                    i = Model(
-                                        job=j,
-                                        name=pt["name"],
-                                        minimum=pt["minimum"],
-                                        maximum=pt["maximum"],
-                                        is_list=bool(pt.get("is_list", False)),
+                                    pt.is_list = attrs_is_list
+                                    pt.save()
+                                    print("  ..updated.\n\n")
+                                else:
+                                    print("  ..not updated.\n\n")
+
+                        resource_types = RodanTaskType._resolve_resource_types(
+                            attrs_pt["resource_types"]
+                        )
+                        rt_code = set(map(lambda rt: rt.mimetype, resource_types))
+                        rt_db = set(
+                            map(lambda rt: rt.mimetype, pt.resource_types.all())
+                        )
+                        if rt_code != rt_db:
+                            if not UPDATE_JOBS:
+                                raise ImproperlyConfigured(
+                                    (
+                                        "The field `{0}` of {5} Port Type `{1}` of Job `{2}`"
+                                        " seems to be updated: {3} --> {4}. Try to run. "
+                                        "`manage.py migrate` to confirm this update."
+                                    ).format(
+                                        "resource_types",
+                                        pt_name,
+                                        j.name,
+                                        rt_db,
+                                        rt_code,
+                                        msg,
                                     )
-                                    i.save()
-                                    resource_types = RodanTaskType._resolve_resource_types(
-                                        pt["resource_types"]
+                                )
+                            else:
+                                confirm_update = confirm(
+                                    (
+                                        "The field `{0}` of {5} Port Type `{1}` of Job `{2}` "
+                                        "seems to be updated: \n{3}\n  -->\n{4}\n\nConfirm "
+                                        "(y/N)? "
+                                    ).format(
+                                        "resource_types",
+                                        pt_name,
+                                        j.name,
+                                        rt_db,
+                                        rt_code,
+                                        msg,
                                     )
-                                    if len(resource_types) == 0:
-                                        raise ValueError(
-                                            (
-                                                "No available resource types found"
-                                                " for this {1}PortType: {0}"
-                                            ).format(pt["resource_types"], msg)
-                                        )
-                                    i.resource_types.add(*resource_types)
+                                )  # noqa
+                                if confirm_update:
+                                    pt.resource_types.clear()
+                                    pt.resource_types.add(*resource_types)
                                     print("  ..updated.\n\n")
                                 else:
                                     print("  ..not updated.\n\n")
 
-                check_port_types("in")
-                check_port_types("out")
+                        del attrs_pts[idx]
+
+                    else:  # pt exists in database but not in code. Should be deleted.
+                        if not UPDATE_JOBS:
+                            raise ImproperlyConfigured(
+                                (
+                                    "The {2} Port Type `{0}` of Job `{1}` seems to be "
+                                    "deleted. Try to run `manage.py migrate` to confirm this"
+                                    " deletion."
+                                ).format(pt_name, j.name, msg)
+                            )
+                        else:
+                            confirm_delete = confirm(
+                                (
+                                    "The {2} Port Type `{0}` of Job `{1}` seems to be"
+                                    " deleted. Confirm (y/N)? "
+                                ).format(pt_name, j.name, msg)
+                            )
+                            if confirm_delete:
+                                try:
+                                    pt.delete()
+                                    print("  ..deleted.\n\n")
+                                except Exception as e:
+                                    print(
+                                        (
+                                            "  ..not deleted because of an exception: {0}."
+                                            " Please fix it manually.\n\n"
+                                        ).format(str(e))
+                                    )
+                            else:
+                                print("  ..not deleted.\n\n")
+
+                # ipt exists in code but not in database. Should be added to the database.
+                if attrs_pts:
+                    for pt in attrs_pts:
+                        if not UPDATE_JOBS:
+                            raise ImproperlyConfigured(
+                                "The {2} Port Type `{0}` of Job `{1}` seems to be newly added. Try to run `manage.py migrate` to confirm this update.".format(  # noqa
+                                    pt["name"], j.name, msg
+                                )
+                            )
+                        else:
+                            confirm_update = confirm(
+                                "The {2} Port Type `{0}` of Job `{1}` seems to be newly added. Confirm (y/N)? ".format(  # noqa
+                                    pt["name"], j.name, msg
+                                )
+                            )
+                            if confirm_update:
+                                if which == "in":
+                                    Model = InputPortType
+                                elif which == "out":
+                                    Model = OutputPortType
+                                i = Model(
+                                    job=j,
+                                    name=pt["name"],
+                                    minimum=pt["minimum"],
+                                    maximum=pt["maximum"],
+                                    is_list=bool(pt.get("is_list", False)),
+                                )
+                                i.save()
+                                resource_types = RodanTaskType._resolve_resource_types(
+                                    pt["resource_types"]
+                                )
+                                if len(resource_types) == 0:
+                                    raise ValueError(
+                                        (
+                                            "No available resource types found"
+                                            " for this {1}PortType: {0}"
+                                        ).format(pt["resource_types"], msg)
+                                    )
+                                i.resource_types.add(*resource_types)
+                                print("  ..updated.\n\n")
+                            else:
+                                print("  ..not updated.\n\n")
+
+            check_port_types("in")
+            check_port_types("out")
 
-            # Process done
-            from rodan.jobs.load import job_list
+        # Process done
+        from rodan.jobs.load import job_list
 
-            if attrs["name"] in job_list:
-                job_list.remove(attrs["name"])
+        if attrs["name"] in job_list:
+            job_list.remove(attrs["name"])
 
     @staticmethod
     def _resolve_resource_types(value):
@@ -634,7 +662,7 @@ class RodanTask(Task):
 
     def _settings(self, runjob):
         rj_settings = runjob.job_settings
-        j_settings = Job.objects.get(name=runjob.job_name).settings
+        j_settings = catalogue.cache.job(runjob.job_name).settings
 
         for properti, definition in j_settings.get("properties", {}).items():
             if "enum" in definition:  # convert enum to integers
@@ -707,10 +735,16 @@ class RodanTask(Task):
     #############################################
     # Automatic phase -- running in Celery thread
     #############################################
-    def run(self, runjob_id):
+    def run(self, runjob_id, chain=None):
         """
         Code here are run asynchronously in Celery thread.
 
+        `chain` is the `rodan.jobs.fusion.FusedChain` when the RunJob is run in a chain of
+        fusible jobs.
+
+        With a profiling mode (`RunJob.profile`), the job or the whole of this method is
+        run in a `rodan.jobs.profiling.Profiler`.
+
         To prevent re-creating a deleted object, any write to database should use
         one of the following:
         + `queryset.update()`
@@ -722,13 +756,31 @@ class RodanTask(Task):
         + `obj.file_field.save(..., save=True)`
         """
         runjob = RunJob.objects.get(uuid=runjob_id)
+        if runjob.profile == profiling.TASK:
+            with profiling.Profiler(runjob):
+                return self._run(runjob_id, runjob, chain)
+        return self._run(runjob_id, runjob, chain)
+
+    def _run(self, runjob_id, runjob, chain):
+        previous_status = runjob.status
+        if chain is None:
+            task_id, hostname = self.request.id, self.request.hostname
+        else:
+            task_id, hostname = chain.task_id, chain.hostname
+        supervisor.started(runjob_id, task_id, hostname, runjob.updated)
         settings = self._settings(runjob)
-        inputs = self._inputs(runjob)
+        with tracing.span("RodanTask._inputs", run_job=str(runjob_id)):
+            inputs = self._inputs(runjob)
+        if chain is not None:
+            chain.localize(inputs)
 
-        start_time = time.time()
+        usage_before = metrics.usage(reset_peak_rss=True)
+        # The master task sets `updated` when it dispatches the RunJob.
+        queued_at = runjob.updated if previous_status == task_status.PROCESSING else None
 
-        with self.tempdir() as temp_dir:
-            outputs = self._outputs(runjob)
+        with (self.tempdir() if chain is None else chain.tempdir()) as temp_dir:
+            with tracing.span("RodanTask._outputs", run_job=str(runjob_id)):
+                outputs = self._outputs(runjob)
 
             # build argument for run_my_task and mapping dictionary
             arg_outputs = {}
@@ -768,7 +820,17 @@ class RodanTask(Task):
                         output["resource_temp_folder"] = output_res_tempfolder
                         temppath_map[output_res_tempfolder] = output
 
-            retval = self.run_my_task(inputs, settings, arg_outputs)
+            with tracing.span(
+                "RodanTask.run_my_task", run_job=str(runjob_id), job_name=self.name
+            ):
+                if runjob.profile == profiling.JOB:
+                    with profiling.Profiler(runjob):
+                        retval = self.run_my_task(inputs, settings, arg_outputs)
+                else:
+                    retval = self.run_my_task(inputs, settings, arg_outputs)
+            if not supervisor.claim(runjob_id, task_id):
+                # Another copy of this RunJob ended first (see rodan.jobs.supervisor).
+                return "SUPERSEDED"
 
             if isinstance(retval, self.WAITING_FOR_INPUT):
                 settings.update(retval.settings_update)
@@ -778,6 +840,7 @@ class RodanTask(Task):
                 runjob.error_summary = None
                 runjob.error_details = None
                 runjob.celery_task_id = None
+                runjob.lock = None
                 runjob.save(
                     update_fields=[
                         "status",
@@ -785,8 +848,24 @@ class RodanTask(Task):
                         "error_summary",
                         "error_details",
                         "celery_task_id",
+                        "lock",
+                        "updated",
                     ]
                 )
+                progress.record(
+                    runjob.workflow_run_id,
+                    [(runjob.job_name, previous_status, task_status.WAITING_FOR_INPUT)],
+                )
+                metrics.record(
+                    runjob,
+                    task_status.WAITING_FOR_INPUT,
+                    usage_before,
+                    queued_at,
+                    hostname,
+                )
+                placement.unreserve([runjob_id])
+                # The master task is not called here: release this WorkflowRun too.
+                admission.release()
 
                 # Send an email to owner of WorkflowRun
                 wfrun_id = RunJob.objects.filter(pk=runjob_id).values_list(
@@ -850,128 +929,115 @@ class RodanTask(Task):
                                     ).format(opt_name)
                                 )
 
-                for temppath, output in temppath_map.items():
-                    if output["is_list"] is False:
-                        with open(temppath, "rb") as f:
-                            resource = Output.objects.get(uuid=output["uuid"]).resource
-                            # Django will resolve the path according to upload_to
-                            resource.resource_file.save(temppath, File(f), save=False)
-                            resource.save(update_fields=["resource_file"])
-                            if resource.resource_type.mimetype.startswith("image"):
-                                # call synchronously
-                                # registry.tasks['rodan.core.create_thumbnails'].run(resource.uuid.hex)
-
-                                # call synchronously
-                                # registry.tasks['rodan.core.create_diva'].run(resource.uuid.hex)
-
-                                # call asynchronously
-                                registry.tasks["rodan.core.create_diva"].si(
-                                    resource.uuid.hex
-                                ).apply_async(
-                                    queue="celery"
-                                )  # noqa
-                    else:
-                        files = [
-                            ff
-                            for ff in os.listdir(output["resource_temp_folder"])
-                            if os.path.isfile(
-                                os.path.join(output["resource_temp_folder"], f)
-                            )
-                        ]
-                        files.sort()  # alphabetical order
-
-                        resourcelist = Output.objects.get(
-                            uuid=output["uuid"]
-                        ).resource_list
-                        for index, ff in enumerate(files):
-                            with open(
-                                os.path.join(output["resource_temp_folder"], ff), "rb"
-                            ) as f:
-                                resource = Resource(
-                                    project=resourcelist.project,
-                                    resource_type=resourcelist.resource_type,
-                                    name=ff,
-                                    description="Order #{0} in ResourceList {1}".format(
-                                        index, resourcelist.name
-                                    ),
-                                    origin=resourcelist.origin,
-                                )
-                                resource.save()
-
+                with tracing.span("RodanTask.ingest_outputs", run_job=str(runjob_id)):
+                    for temppath, output in temppath_map.items():
+                        if output["is_list"] is False:
+                            with open(temppath, "rb") as f:
+                                resource = Output.objects.select_related(
+                                    "resource__resource_type"
+                                ).get(uuid=output["uuid"]).resource
                                 # Django will resolve the path according to upload_to
-                                resource.resource_file.save(ff, File(f), save=False)
+                                resource.resource_file.save(temppath, File(f), save=False)
                                 resource.save(update_fields=["resource_file"])
+                                if chain is not None:
+                                    chain.produced(resource, temppath)
                                 if resource.resource_type.mimetype.startswith("image"):
                                     # call synchronously
-                                    # registry.tasks['rodan.core.create_thumbnails'].run(resource.uuid.hex)
+                                    # registry.tasks['rodan.core.create_thumbnails'].run(
+                                    #     resource.uuid.hex)
 
                                     # call synchronously
-                                    registry.tasks["rodan.core.create_diva"].run(
+                                    # registry.tasks['rodan.core.create_diva'].run(
+                                    #     resource.uuid.hex)
+
+                                    # call asynchronously
+                                    registry.tasks["rodan.core.create_diva"].si(
                                         resource.uuid.hex
+                                    ).apply_async(
+                                        queue="celery"
+                                    )  # noqa
+                        else:
+                            files = [
+                                ff
+                                for ff in os.listdir(output["resource_temp_folder"])
+                                if os.path.isfile(
+                                    os.path.join(output["resource_temp_folder"], f)
+                                )
+                            ]
+                            files.sort()  # alphabetical order
+
+                            resourcelist = Output.objects.get(
+                                uuid=output["uuid"]
+                            ).resource_list
+                            for index, ff in enumerate(files):
+                                with open(
+                                    os.path.join(output["resource_temp_folder"], ff), "rb"
+                                ) as f:
+                                    resource = Resource(
+                                        project=resourcelist.project,
+                                        resource_type=resourcelist.resource_type,
+                                        name=ff,
+                                        description="Order #{0} in ResourceList {1}".format(
+                                            index, resourcelist.name
+                                        ),
+                                        origin=resourcelist.origin,
                                     )
+                                    resource.save()
+
+                                    # Django will resolve the path according to upload_to
+                                    resource.resource_file.save(ff, File(f), save=False)
+                                    resource.save(update_fields=["resource_file"])
+                                    if chain is not None:
+                                        chain.produced(
+                                            resource,
+                                            os.path.join(output["resource_temp_folder"], ff),
+                                        )
+                                    if resource.resource_type.mimetype.startswith("image"):
+                                        # call synchronously
+                                        # registry.tasks['rodan.core.create_thumbnails'].run(
+                                        #     resource.uuid.hex)
+
+                                        # call synchronously
+                                        registry.tasks["rodan.core.create_diva"].run(
+                                            resource.uuid.hex
+                                        )
 
-                                    # call synchronously
-                                    # registry.tasks['rodan.core.create_diva'].si(resource.uuid.hex).apply_async(queue="celery")  # noqa
-                            resourcelist.resources.add(resource)
+                                        # call synchronously
+                                        # registry.tasks['rodan.core.create_diva'].si(resource.uuid.hex).apply_async(queue="celery")  # noqa
+                                resourcelist.resources.add(resource)
 
                 runjob.status = task_status.FINISHED
                 runjob.error_summary = None
                 runjob.error_details = None
                 runjob.celery_task_id = None
+                runjob.lock = None
                 runjob.save(
                     update_fields=[
                         "status",
                         "error_summary",
                         "error_details",
                         "celery_task_id",
+                        "lock",
+                        "updated",
                     ]
                 )
+                progress.record(
+                    runjob.workflow_run_id,
+                    [(runjob.job_name, previous_status, task_status.FINISHED)],
+                )
 
-                # Update workflow run description with job info
-                wall_time = time.time() - start_time
-                try:
-                    snapshot_info = "\n\n{0}:\n    name: \"{1}\"\n    wall_time: \"{2}\"\n".format(
-                        str(runjob.uuid),
-                        runjob.job_name,
-                        time.strftime("%H:%M:%S", time.gmtime(wall_time))
-                    )
-
-                    if len(settings) > 0:
-                        snapshot_info += "    settings:\n"
-                        for key, value in settings.iteritems():
-                            snapshot_info += "        {0}: {1}\n".format(str(key), str(value))
-
-                    input_qs = Input.objects.filter(run_job=runjob)
-                    if input_qs.count() > 0:
-                        snapshot_info += "    inputs:\n"
-                        for input in input_qs:
-                            snapshot_info += "        - uuid: {0}\n" \
-                                .format(str(input.resource.uuid))
-                            snapshot_info += "          name: \"{0}\"\n" \
-                                .format(input.resource.name)
-
-                    output_qs = Output.objects.filter(run_job=runjob)
-                    if output_qs.count() > 0:
-                        snapshot_info += "    outputs:\n"
-                        for output in Output.objects.filter(run_job=runjob):
-                            snapshot_info += "        - uuid: {0}\n" \
-                                .format(str(output.resource.uuid))
-                            snapshot_info += "          name: \"{0}\"\n" \
-                                .format(input.resource.name)
-
-                    snapshot_info += "\n"
-
-                    with transaction.atomic():
-                        atomic_wfrun = WorkflowRun.objects.select_for_update() \
-                            .get(uuid=runjob.workflow_run.uuid)
-                        if atomic_wfrun.description is None:
-                            atomic_wfrun.description = ""
-                        atomic_wfrun.description += snapshot_info
-                        atomic_wfrun.save(update_fields=["description"])
-                except AttributeError:  # This happens during tests where not all fields are set
-                    pass
-                except Exception as e:
-                    print(e)
+                metrics.record(
+                    runjob,
+                    task_status.FINISHED,
+                    usage_before,
+                    queued_at,
+                    hostname,
+                )
+                placement.unreserve([runjob_id])
+                admission.release(exclude=runjob.workflow_run_id)
+                if chain is not None:
+                    # run_fused_chain calls the master task at the end of the chain.
+                    return "FINISHED"
 
                 # Call master task.
                 master_task = registry.tasks["rodan.core.master_task"]
@@ -987,15 +1053,25 @@ class RodanTask(Task):
 
     def on_failure(self, exc, task_id, args, kwargs, einfo):
         runjob_id = args[0]
+        if not supervisor.claim(runjob_id, task_id):
+            # Another copy of this RunJob ended first (see rodan.jobs.supervisor).
+            return
+        previous_status, job_name, wfrun_id = RunJob.objects.filter(pk=runjob_id).values_list(
+            "status", "job_name", "workflow_run__uuid"
+        )[0]
 
         update = self._add_error_information_to_runjob(exc, einfo)
         update["status"] = task_status.FAILED
         update["celery_task_id"] = None
+        update["lock"] = None
+        update["updated"] = timezone.now()
         RunJob.objects.filter(pk=runjob_id).update(**update)
-        wfrun_id = RunJob.objects.filter(pk=runjob_id).values_list(
-            "workflow_run__uuid", flat=True
-        )[0]
-        WorkflowRun.objects.filter(uuid=wfrun_id).update(status=task_status.FAILED)
+        progress.record(wfrun_id, [(job_name, previous_status, task_status.FAILED)])
+        WorkflowRun.objects.filter(uuid=wfrun_id).update(
+            status=task_status.FAILED, updated=timezone.now()
+        )
+        placement.unreserve([runjob_id])
+        admission.release(exclude=wfrun_id)
 
         # Send an email to owner of WorkflowRun
         workflowrun = WorkflowRun.objects.get(uuid=wfrun_id)
@@ -1013,6 +1089,9 @@ class RodanTask(Task):
                 to = [user.email]
                 registry.tasks["rodan.core.send_email"].apply_async((subject, body, to))
 
+    def after_return(self, status, retval, task_id, args, kwargs, einfo):
+        supervisor.ended(task_id)
+
     def _add_error_information_to_runjob(self, exc, einfo):
         # Any job using the default_on_failure method can define an error_information
         # method, which will take in an exception and a traceback string,
@@ -0,0 +1,271 @@
+"""
+Manifest of the catalogue of ResourceTypes and Jobs defined in the code.
+
+Checking the catalogue against the database, as `rodan.jobs.load` and `RodanTaskType`
+do, costs several queries per ResourceType and per Job, in every process that imports
+the jobs. Instead, while `rodan.jobs.load` imports the job packages, `RodanTaskType`
+only collects the definitions of the Jobs. Their digest, with the ResourceTypes and the
+versions of the packages, is then looked up among the `CatalogueManifest`s: if it is
+there, the database was found to match this very catalogue before, and nothing else is
+checked (one query).
+
+Otherwise, and always during `manage.py migrate`, the ResourceTypes and the collected
+Jobs go through the full integrity checks (which update the database when migrating),
+and the digest is recorded. `manage.py migrate` forgets the other manifests, as the
+catalogues they describe may no longer match the database.
+
+As the catalogue only changes with its manifest, `cache` keeps the Jobs (with their port
+types) and ResourceTypes read from the database, the validators of the settings of the
+Jobs, and the API responses that list them, for the life of the process. It is
+versioned by the latest `CatalogueManifest`, which it checks at most every
+`RODAN_CATALOGUE_CACHE_TTL` seconds.
+"""
+from contextlib import contextmanager
+import hashlib
+import json
+import threading
+import time
+
+from django.conf import settings
+import jsonschema
+from rest_framework import status
+from rest_framework.response import Response
+
+from rodan.models import CatalogueManifest, Job, ResourceType
+
+# Bump when the integrity checks change, so that they run again.
+MANIFEST_VERSION = 2
+
+_collecting = False
+_definitions = []  # class attributes of the Jobs collected by `RodanTaskType`
+_mimetypes = None  # mimetypes of the catalogue, once `rodan.jobs.load` has read them
+
+
+@contextmanager
+def collecting():
+    """
+    Collect the Jobs defined in the block instead of checking them; yields the list of
+    their class attributes.
+    """
+    global _collecting
+    _collecting = True
+    try:
+        yield _definitions
+    finally:
+        _collecting = False
+
+
+def collect(attrs):
+    """
+    Called by `RodanTaskType` with the class attributes of a Job. Returns False if the
+    Job has to be checked now.
+    """
+    if not _collecting:
+        return False
+    _definitions.append(attrs)
+    return True
+
+
+def set_resource_types(resourcetypes):
+    global _mimetypes
+    _mimetypes = sorted(resourcetypes)
+
+
+def mimetypes():
+    """
+    Returns the sorted mimetypes of the catalogue, from the database if `rodan.jobs.load`
+    has not read them yet.
+    """
+    if _mimetypes is not None:
+        return list(_mimetypes)
+    return [
+        str(m) for m in ResourceType.objects.order_by("mimetype").values_list(
+            "mimetype", flat=True
+        )
+    ]
+
+
+def _port_types(port_types):
+    result = []
+    for pt in port_types:
+        try:
+            resource_types = [m for m in mimetypes() if pt["resource_types"](m)]
+        except TypeError:
+            resource_types = sorted(pt["resource_types"])
+        result.append({
+            "name": pt["name"],
+            "minimum": pt["minimum"],
+            "maximum": pt["maximum"],
+            "is_list": bool(pt.get("is_list", False)),
+            "resource_types": resource_types,
+        })
+    return sorted(result, key=lambda pt: pt["name"])
+
+
+def definition(attrs):
+    """
+    Returns what the database records of the Job defined by the class attributes `attrs`.
+    """
+    schema = attrs.get("settings", {"job_queue": "celery", "type": "object"})
+    return {
+        "name": attrs["name"],
+        "author": attrs["author"],
+        "description": attrs["description"],
+        "settings": schema,
+        "enabled": attrs["enabled"],
+        "category": attrs["category"],
+        "interactive": attrs["interactive"],
+        "fusible": attrs.get("fusible", False),
+        "resource_hints": attrs.get("resource_hints", {}),
+        "job_queue": schema.get("job_queue", "celery"),
+        "input_port_types": _port_types(attrs["input_port_types"]),
+        "output_port_types": _port_types(attrs["output_port_types"]),
+    }
+
+
+def digest(resourcetypes, definitions, package_versions):
+    """
+    Returns the SHA-256 digest of the catalogue: the ResourceTypes (mimetype => list of
+    definitions), the class attributes of the Jobs and the versions of the packages.
+    """
+    catalogue = {
+        "version": MANIFEST_VERSION,
+        "resource_types": resourcetypes,
+        "jobs": sorted(
+            (definition(attrs) for attrs in definitions), key=lambda j: j["name"]
+        ),
+        "packages": package_versions,
+    }
+    # Objects that JSON cannot encode end up as their repr, which at worst changes the
+    # digest at every start: the checks are then never skipped, but still run.
+    encoded = json.dumps(catalogue, sort_keys=True, default=repr)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def verified(catalogue_digest):
+    return CatalogueManifest.objects.filter(digest=catalogue_digest).exists()
+
+
+def record(catalogue_digest, package_versions, definitions, replace=False):
+    """
+    Record that the database matches the catalogue. If `replace`, forget the manifests
+    of the other catalogues.
+    """
+    if replace:
+        CatalogueManifest.objects.exclude(digest=catalogue_digest).delete()
+    CatalogueManifest.objects.get_or_create(
+        digest=catalogue_digest,
+        defaults={
+            "package_versions": package_versions,
+            "jobs": dict((attrs["name"], attrs["_package_name"]) for attrs in definitions),
+        },
+    )
+
+
+class CatalogueCache(object):
+    """
+    Process-level cache of the catalogue. The cached model instances are shared: do not
+    modify them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked = 0
+        self.clear()
+
+    @property
+    def enabled(self):
+        return getattr(settings, "RODAN_CATALOGUE_CACHE", False)
+
+    def clear(self):
+        self._jobs = {}
+        self._resource_types = {}
+        self._validators = {}
+        self._responses = {}
+
+    def _revalidate(self):
+        # Under the lock.
+        now = time.time()
+        if now - self._checked < getattr(settings, "RODAN_CATALOGUE_CACHE_TTL", 60):
+            return
+        self._checked = now
+        version = list(
+            CatalogueManifest.objects.order_by("-created").values_list("uuid", flat=True)[:1]
+        )
+        if version != self._version:
+            self.clear()
+            self._version = version
+
+    def jobs(self, names):
+        """
+        Returns the Jobs among `names`: Job name => Job.
+        """
+        names = set(str(name) for name in names)
+        if not self.enabled:
+            return dict((j.name, j) for j in Job.objects.filter(name__in=names))
+        with self._lock:
+            self._revalidate()
+            missing = names.difference(self._jobs)
+            if missing:
+                self._jobs.update(
+                    (j.name, j)
+                    for j in Job.objects.filter(name__in=missing).prefetch_related(
+                        "input_port_types__resource_types",
+                        "output_port_types__resource_types",
+                    )
+                )
+            return dict((name, self._jobs[name]) for name in names if name in self._jobs)
+
+    def job(self, name):
+        try:
+            return self.jobs([name])[str(name)]
+        except KeyError:
+            raise Job.DoesNotExist("Job {0} does not exist.".format(name))
+
+    def resource_type(self, mimetype):
+        if not self.enabled:
+            return ResourceType.objects.get(mimetype=mimetype)
+        with self._lock:
+            self._revalidate()
+            if mimetype not in self._resource_types:
+                self._resource_types[mimetype] = ResourceType.objects.get(mimetype=mimetype)
+            return self._resource_types[mimetype]
+
+    def settings_validator(self, job):
+        """
+        Returns the jsonschema validator of the settings of `job`.
+        """
+        if not self.enabled:
+            # convert JSONDict object to Python dict object.
+            return jsonschema.Draft4Validator(dict(job.settings))
+        with self._lock:
+            self._revalidate()
+            if job.name not in self._validators:
+                self._validators[job.name] = jsonschema.Draft4Validator(dict(job.settings))
+            return self._validators[job.name]
+
+    def response(self, key, get_response):
+        """
+        Returns the cached response data of `key`, or calls `get_response` and caches its
+        data if it succeeds.
+        """
+        if not self.enabled:
+            return get_response()
+        with self._lock:
+            self._revalidate()
+            data = self._responses.get(key)
+        if data is not None:
+            return Response(data)
+        response = get_response()
+        if response.status_code == status.HTTP_200_OK:
+            with self._lock:
+                if len(self._responses) >= getattr(
+                    settings, "RODAN_CATALOGUE_CACHE_MAX_RESPONSES", 1000
+                ):
+                    self._responses.clear()
+                self._responses[key] = response.data
+        return response
+
+
+cache = CatalogueCache()
@@ -15,14 +15,14 @@ from celery.task.control import revoke
 from django.conf import settings
 from django.core.mail import EmailMessage
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Q, Case, Value, When, BooleanField
+from django.db.models import Q, Case, Value, When, BooleanField, UUIDField
+from django.utils import timezone
 from pybagit.bagit import BagIt
 import six
 
 import rodan  # noqa
 from rodan.models import (
     Resource,
-    ResourceType,
     ResultsPackage,
     Workflow,
     WorkflowRun,
@@ -39,7 +39,15 @@ from rodan.models.resultspackage import get_package_path
 from rodan.constants import task_status
 from rodan.jobs.base import TemporaryDirectory
 from rodan.jobs.diva_generate_json import GenerateJson
+from rodan.jobs.estimator import Estimator
+from rodan.jobs.garbage import Collector
 from rodan.jobs.resource_identification import fileparse
+from rodan.jobs import admission
+from rodan.jobs import catalogue
+from rodan.jobs import placement
+from rodan.jobs import progress
+from rodan.jobs import supervisor
+from rodan.jobs import tracing
 # from rodan.celery import app
 
 
@@ -49,7 +57,7 @@ class create_resource(Task):
 
     def run(self, resource_id, claimed_mimetype=None):
         resource_query = Resource.objects.filter(uuid=resource_id)
-        resource_query.update(processing_status=task_status.PROCESSING)
+        resource_query.update(processing_status=task_status.PROCESSING, updated=timezone.now())
         resource_info = resource_query.values("resource_type__mimetype", "resource_file")[0]
 
         with TemporaryDirectory() as tmpdir:
@@ -69,21 +77,19 @@ class create_resource(Task):
             shutil.copy(infile_path, tmpfile)
 
             try:
-                resource_query.update(
-                    resource_type=ResourceType.objects.get(mimetype=mimetype)
-                )
+                resource_query.update(resource_type=catalogue.cache.resource_type(mimetype))
             except ObjectDoesNotExist:
                 resource_query.update(
-                    resource_type=ResourceType.objects.get(
-                        mimetype="application/octet-stream"
-                    )
+                    resource_type=catalogue.cache.resource_type("application/octet-stream")
                 )
             new_processing_status = task_status.NOT_APPLICABLE
 
             if mimetype.startswith("image"):
                 registry.tasks["rodan.core.create_diva"].si(resource_id).apply_async(queue="celery")
 
-            resource_query.update(processing_status=new_processing_status)
+            resource_query.update(
+                processing_status=new_processing_status, updated=timezone.now()
+            )
         return True
 
     def on_failure(self, exc, task_id, args, kwargs, einfo):
@@ -93,6 +99,7 @@ class create_resource(Task):
         if hasattr(self, "_task"):
             update = self._task._add_error_information_to_runjob(exc, einfo)
             update["processing_status"] = task_status.FAILED
+            update["updated"] = timezone.now()
             resource_query.update(**update)
             del self._task
         else:
@@ -100,6 +107,7 @@ class create_resource(Task):
                 processing_status=task_status.FAILED,
                 error_summary="{0}: {1}".format(type(exc).__name__, str(exc)),
                 error_details=einfo.traceback,
+                updated=timezone.now(),
             )
 
 
@@ -187,16 +195,17 @@ def create_diva(resource_id):
         retries = 3
         while retries > 0:
             try:
-                subprocess.check_call(
-                    args=[
-                        BIN_GM,
-                        "convert",
-                        "-depth", "8",  # output RGB
-                        "-compress", "None",
-                        task_image,  # image file input
-                        tmp_file.name  # tiff file output
-                    ]
-                )
+                with tracing.span("create_diva.gm_convert", resource=str(resource_id)):
+                    subprocess.check_call(
+                        args=[
+                            BIN_GM,
+                            "convert",
+                            "-depth", "8",  # output RGB
+                            "-compress", "None",
+                            task_image,  # image file input
+                            tmp_file.name  # tiff file output
+                        ]
+                    )
                 retries = -1
             except subprocess.CalledProcessError as e:
                 print(e)
@@ -208,23 +217,24 @@ def create_diva(resource_id):
             raise Exception("Maximum number of retries exceeded")
 
         # With Kakadu
-        subprocess.check_call(
-            args=[
-                BIN_KDU_COMPRESS,
-                "-i", tmp_file.name,
-                "-o", name + ".jp2",
-                "-quiet",
-                "Clevels=5",
-                "Cblk={64,64}",
-                "Cprecincts={256,256},{256,256},{128,128}",
-                "Creversible=yes",
-                "Cuse_sop=yes",
-                "Corder=LRCP",
-                "ORGgen_plt=yes",
-                "ORGtparts=R",
-                "-rate", "-,1,0.5,0.25"
-            ]
-        )
+        with tracing.span("create_diva.kdu_compress", resource=str(resource_id)):
+            subprocess.check_call(
+                args=[
+                    BIN_KDU_COMPRESS,
+                    "-i", tmp_file.name,
+                    "-o", name + ".jp2",
+                    "-quiet",
+                    "Clevels=5",
+                    "Cblk={64,64}",
+                    "Cprecincts={256,256},{256,256},{128,128}",
+                    "Creversible=yes",
+                    "Cuse_sop=yes",
+                    "Corder=LRCP",
+                    "ORGgen_plt=yes",
+                    "ORGtparts=R",
+                    "-rate", "-,1,0.5,0.25"
+                ]
+            )
 
     # With OpenJPEG
     # creates a dark red tint on the image, it literally replaces the color profile.
@@ -648,6 +658,7 @@ class create_workflowrun(Task):
                 job_name=wfjob.job.name,
                 job_settings=wfjob.job_settings,
                 job_queue=wfjob.job.job_queue,
+                profile=workflow_run.profile or wfjob.profile,
             )
             run_job.save()
 
@@ -665,9 +676,7 @@ class create_workflowrun(Task):
 
                 r = model(
                     project=workflow_run.workflow.project,
-                    resource_type=ResourceType.objects.get(
-                        mimetype="application/octet-stream"
-                    ),
+                    resource_type=catalogue.cache.resource_type("application/octet-stream"),
                 )  # ResourceType will be determined later (see method _create_runjobs)
                 r.save()
 
@@ -847,13 +856,196 @@ class create_workflowrun(Task):
         else:
             runjob_creation_loop(OrderedDict({}))
 
+        if workflow_run.base_workflow_run_id:
+            self._reuse_base_outputs(workflow_run)
+        self._assign_remaining_work(workflow_run)
+
         # ready to process
         workflow_run.status = task_status.PROCESSING
-        workflow_run.save(update_fields=["status"])
+        workflow_run.save(update_fields=["status", "updated"])
+        progress.rebuild(wfrun_id)
 
         # call master_task
         registry.tasks["rodan.core.master_task"].apply_async((wfrun_id,))
 
+    def _reuse_base_outputs(self, workflow_run):
+        """
+        Incremental re-execution: mark as FINISHED the RunJobs of the WorkflowRun that
+        have a FINISHED counterpart in its base WorkflowRun -- same WorkflowJob, same
+        settings (ignoring the "@" settings of interactive jobs) and same inputs -- and
+        let their Outputs share the Resources of the counterpart instead of recomputing
+        them.
+
+        RunJobs are visited upstream first: once a RunJob is reused, the Inputs of its
+        downstream RunJobs point to the shared Resources and can match in turn. A
+        RunJob whose settings changed keeps its own outputs, so everything downstream
+        of it is executed.
+        """
+        def strip(job_settings):
+            return dict((k, v) for k, v in job_settings.items() if not k.startswith("@"))
+
+        base_runjobs = list(
+            RunJob.objects.filter(
+                workflow_run_id=workflow_run.base_workflow_run_id,
+                status=task_status.FINISHED,
+            ).values_list("uuid", "workflow_job_id", "job_settings")
+        )
+        base_inputs = {}
+        for rj_id, ip_id, res_id, resl_id in Input.objects.filter(
+            run_job__in=[rj[0] for rj in base_runjobs]
+        ).values_list("run_job_id", "input_port_id", "resource_id", "resource_list_id"):
+            base_inputs.setdefault(rj_id, set()).add((ip_id, res_id or resl_id))
+        base_outputs = {}
+        for rj_id, op_id, res_id, resl_id in Output.objects.filter(
+            run_job__in=[rj[0] for rj in base_runjobs]
+        ).values_list("run_job_id", "output_port_id", "resource_id", "resource_list_id"):
+            base_outputs.setdefault(rj_id, {})[op_id] = (res_id, resl_id)
+        base_index = {}  # (WorkflowJob, inputs) => [(RunJob, settings)]
+        for rj_id, wfjob_id, job_settings in base_runjobs:
+            key = (wfjob_id, frozenset(base_inputs.get(rj_id, ())))
+            base_index.setdefault(key, []).append((rj_id, job_settings))
+
+        runjobs = dict(
+            (rj_id, (wfjob_id, job_settings))
+            for rj_id, wfjob_id, job_settings in RunJob.objects.filter(
+                workflow_run=workflow_run
+            ).values_list("uuid", "workflow_job_id", "job_settings")
+        )
+        inputs = {}  # RunJob => [[InputPort, Resource or ResourceList]]
+        consumers = {}  # Resource or ResourceList => the rows of `inputs` taking it
+        for rj_id, ip_id, res_id, resl_id in Input.objects.filter(
+            run_job__workflow_run=workflow_run
+        ).values_list("run_job_id", "input_port_id", "resource_id", "resource_list_id"):
+            row = [ip_id, res_id or resl_id]
+            inputs.setdefault(rj_id, []).append(row)
+            consumers.setdefault(row[1], []).append(row)
+        outputs = {}  # RunJob => [(Output, OutputPort, Resource, ResourceList)]
+        producer = {}  # Resource or ResourceList => RunJob
+        for o in Output.objects.filter(run_job__workflow_run=workflow_run).values_list(
+            "uuid", "run_job_id", "output_port_id", "resource_id", "resource_list_id"
+        ):
+            outputs.setdefault(o[1], []).append((o[0], o[2], o[3], o[4]))
+            producer[o[3] or o[4]] = o[1]
+
+        # Upstream first (Kahn's algorithm)
+        upstream = dict(
+            (rj_id, set(producer[r] for _, r in inputs.get(rj_id, ()) if r in producer))
+            for rj_id in runjobs
+        )
+        downstream = {}
+        for rj_id, ups in upstream.items():
+            for up in ups:
+                downstream.setdefault(up, []).append(rj_id)
+        order = []
+        ready = [rj_id for rj_id, ups in upstream.items() if not ups]
+        while ready:
+            rj_id = ready.pop()
+            order.append(rj_id)
+            for other in downstream.get(rj_id, ()):
+                upstream[other].discard(rj_id)
+                if not upstream[other]:
+                    ready.append(other)
+
+        reused = {}  # RunJob => settings of its counterpart
+        output_resources = {}  # Output => Resource of the counterpart
+        output_resource_lists = {}  # Output => ResourceList of the counterpart
+        replaced_resources = {}  # Resource of this WorkflowRun => the one that replaces it
+        replaced_resource_lists = {}  # same for ResourceLists
+        for rj_id in order:
+            wfjob_id, job_settings = runjobs[rj_id]
+            key = (wfjob_id, frozenset(tuple(row) for row in inputs.get(rj_id, ())))
+            for base_rj_id, base_settings in base_index.get(key, ()):
+                if strip(base_settings) == strip(job_settings) and set(
+                    base_outputs.get(base_rj_id, {})
+                ) == set(o[1] for o in outputs.get(rj_id, ())):
+                    break
+            else:
+                continue
+
+            for output_id, op_id, res_id, resl_id in outputs.get(rj_id, ()):
+                base_res_id, base_resl_id = base_outputs[base_rj_id][op_id]
+                if res_id:
+                    output_resources[output_id] = base_res_id
+                    replaced_resources[res_id] = base_res_id
+                else:
+                    output_resource_lists[output_id] = base_resl_id
+                    replaced_resource_lists[resl_id] = base_resl_id
+                for row in consumers.get(res_id or resl_id, ()):
+                    row[1] = base_res_id or base_resl_id
+            reused[rj_id] = base_settings
+
+        run_inputs = Input.objects.filter(run_job__workflow_run=workflow_run)
+        _remap(Output.objects.all(), "uuid", "resource_id", output_resources)
+        _remap(Output.objects.all(), "uuid", "resource_list_id", output_resource_lists)
+        _remap(run_inputs, "resource_id", "resource_id", replaced_resources)
+        _remap(run_inputs, "resource_list_id", "resource_list_id", replaced_resource_lists)
+
+        RunJob.objects.filter(uuid__in=list(reused)).update(
+            status=task_status.FINISHED, updated=timezone.now()
+        )
+        for rj_id, base_settings in reused.items():
+            if base_settings != runjobs[rj_id][1]:
+                # keep the user input of interactive jobs
+                RunJob.objects.filter(uuid=rj_id).update(job_settings=base_settings)
+
+        # The Resources created for the reused Outputs are not referenced anymore.
+        Collector().collect_resources(
+            Resource.objects.filter(uuid__in=list(replaced_resources))
+        )
+        ResourceList.objects.filter(uuid__in=list(replaced_resource_lists)).delete()
+
+    def _assign_remaining_work(self, workflow_run):
+        """
+        Set the `remaining_work` of the RunJobs: their estimated duration (see
+        `rodan.jobs.estimator`) plus the largest `remaining_work` of the RunJobs that
+        take their outputs. Without history, every job has the same default duration
+        and this is the depth of the longest chain below the RunJob. FINISHED RunJobs
+        (reused from a base run) count for nothing.
+        """
+        estimator = Estimator()
+        runjobs = RunJob.objects.filter(workflow_run=workflow_run).values_list(
+            "uuid", "job_name", "job_settings", "status"
+        )
+        duration = dict(
+            (
+                rj_id,
+                0 if status == task_status.FINISHED
+                else estimator.estimate_job(job_name, job_settings)["duration"],
+            )
+            for rj_id, job_name, job_settings, status in runjobs
+        )
+        producer = {}  # Resource or ResourceList => RunJob
+        for rj_id, res_id, resl_id in Output.objects.filter(
+            run_job__workflow_run=workflow_run
+        ).values_list("run_job_id", "resource_id", "resource_list_id"):
+            producer[res_id or resl_id] = rj_id
+        downstream = dict((rj_id, set()) for rj_id in duration)
+        for rj_id, res_id, resl_id in Input.objects.filter(
+            run_job__workflow_run=workflow_run
+        ).values_list("run_job_id", "resource_id", "resource_list_id"):
+            if (res_id or resl_id) in producer:
+                downstream[producer[res_id or resl_id]].add(rj_id)
+
+        remaining = {}
+        for root in duration:
+            stack = [root]
+            while stack:  # depth-first, computing a RunJob after its downstream ones
+                rj_id = stack[-1]
+                pending = [d for d in downstream[rj_id] if d not in remaining]
+                if pending:
+                    stack.extend(pending)
+                    continue
+                stack.pop()
+                remaining[rj_id] = duration[rj_id] + max(
+                    [remaining[d] for d in downstream[rj_id]] or [0]
+                )
+
+        by_value = {}
+        for rj_id, value in remaining.items():
+            by_value.setdefault(value, []).append(rj_id)
+        for value, rj_ids in by_value.items():
+            RunJob.objects.filter(uuid__in=rj_ids).update(remaining_work=value)
+
     def _endpoint_workflow_jobs(self, workflow):
         workflow_jobs = WorkflowJob.objects.filter(workflow=workflow)
         endpoint_workflowjobs = []
@@ -904,6 +1096,143 @@ def process_workflowrun(wfrun_id):
 """
 
 
+def _remap(queryset, key, field, mapping):
+    """
+    Set `field` to `mapping[key]` on the rows of `queryset` whose `key` is in `mapping`,
+    in one query.
+    """
+    if not mapping:
+        return
+    queryset.filter(**{key + "__in": list(mapping)}).update(
+        **{
+            field: Case(
+                *[
+                    When(**{key: k, "then": Value(v, output_field=UUIDField())})
+                    for k, v in mapping.items()
+                ],
+                output_field=UUIDField()
+            )
+        }
+    )
+
+
+def _unshare_outputs(wfrun, runjob_ids):
+    """
+    Copy-on-write before the RunJobs are run again: the Outputs that share their Resource
+    or ResourceList with another WorkflowRun (see `create_workflowrun._reuse_base_outputs`)
+    get new ones, which the Inputs of this WorkflowRun take instead, so that the results
+    of the other WorkflowRun are not overwritten.
+    """
+    outputs = list(
+        Output.objects.filter(run_job__in=runjob_ids).values_list(
+            "uuid", "resource_id", "resource_list_id"
+        )
+    )
+    output_ids = [o[0] for o in outputs]
+    shared_resources = set(
+        Output.objects.filter(resource__in=[o[1] for o in outputs if o[1]])
+        .exclude(uuid__in=output_ids)
+        .values_list("resource_id", flat=True)
+    )
+    shared_resource_lists = set(
+        Output.objects.filter(resource_list__in=[o[2] for o in outputs if o[2]])
+        .exclude(uuid__in=output_ids)
+        .values_list("resource_list_id", flat=True)
+    )
+    if not shared_resources and not shared_resource_lists:
+        return
+
+    originals = dict(
+        (r.uuid, r)
+        for r in list(Resource.objects.filter(uuid__in=list(shared_resources)))
+        + list(ResourceList.objects.filter(uuid__in=list(shared_resource_lists)))
+    )
+    output_resources = {}  # Output => its new Resource
+    output_resource_lists = {}  # Output => its new ResourceList
+    resources = {}  # shared Resource => the new one
+    resource_lists = {}  # shared ResourceList => the new one
+    for output_id, res_id, resl_id in outputs:
+        original = originals.get(res_id or resl_id)
+        if original is None:
+            continue
+        # Saved one by one: the permissions on the new rows are assigned on post_save.
+        r = type(original)(
+            name=original.name,
+            description=original.description,
+            project_id=original.project_id,
+            resource_type_id=original.resource_type_id,
+            creator_id=original.creator_id,
+            origin_id=output_id,
+        )
+        r.save()
+        if res_id:
+            output_resources[output_id] = r.uuid
+            resources[res_id] = r.uuid
+        else:
+            output_resource_lists[output_id] = r.uuid
+            resource_lists[resl_id] = r.uuid
+
+    run_inputs = Input.objects.filter(run_job__workflow_run=wfrun)
+    _remap(Output.objects.all(), "uuid", "resource_id", output_resources)
+    _remap(Output.objects.all(), "uuid", "resource_list_id", output_resource_lists)
+    _remap(run_inputs, "resource_id", "resource_id", resources)
+    _remap(run_inputs, "resource_list_id", "resource_list_id", resource_lists)
+
+
+def _reset_interactive_settings(runjob_ids):
+    """
+    Remove the settings set by interactive jobs (keys starting with "@") from the
+    RunJobs. Only the RunJobs that have such settings are written.
+    """
+    rows = RunJob.objects.filter(uuid__in=runjob_ids).values_list("uuid", "job_settings")
+    for rj_id, job_settings in rows:
+        if any(k.startswith("@") for k in job_settings):
+            original_settings = dict(
+                (k, v) for k, v in job_settings.items() if not k.startswith("@")
+            )
+            RunJob.objects.filter(uuid=rj_id).update(job_settings=original_settings)
+
+
+def _revoke_runjobs(celery_task_ids):
+    celery_task_ids = [c for c in celery_task_ids if c is not None]
+    if celery_task_ids:
+        revoke(celery_task_ids, terminate=True)  # one broadcast for all tasks
+
+
+def _downstream_runjobs(wfrun, root_id):
+    """
+    Return the UUIDs of the RunJob `root_id` and of all the RunJobs of the WorkflowRun
+    that depend on its outputs, not following the RunJobs that are still SCHEDULED.
+
+    The Output -> Input adjacency of the whole WorkflowRun is loaded in three queries and
+    traversed in memory.
+    """
+    statuses = dict(RunJob.objects.filter(workflow_run=wfrun).values_list("uuid", "status"))
+    produced = {}  # RunJob => resources or resource lists of its outputs
+    for rj_id, res_id, resl_id in Output.objects.filter(
+        run_job__workflow_run=wfrun
+    ).values_list("run_job_id", "resource_id", "resource_list_id"):
+        if res_id or resl_id:
+            produced.setdefault(rj_id, []).append(res_id or resl_id)
+    consumers = {}  # resource or resource list => RunJobs taking it as input
+    for rj_id, res_id, resl_id in Input.objects.filter(
+        run_job__workflow_run=wfrun
+    ).values_list("run_job_id", "resource_id", "resource_list_id"):
+        if res_id or resl_id:
+            consumers.setdefault(res_id or resl_id, []).append(rj_id)
+
+    closure = set([root_id])
+    queue = [root_id]
+    while queue:
+        rj_id = queue.pop()
+        for r in produced.get(rj_id, ()):
+            for consumer in consumers.get(r, ()):
+                if consumer not in closure and statuses[consumer] != task_status.SCHEDULED:
+                    closure.add(consumer)
+                    queue.append(consumer)
+    return closure
+
+
 @task(name="rodan.core.cancel_workflowrun")
 def cancel_workflowrun(wfrun_id):
     wfrun = WorkflowRun.objects.get(uuid=wfrun_id)
@@ -915,15 +1244,22 @@ def cancel_workflowrun(wfrun_id):
             task_status.WAITING_FOR_INPUT,
         ),
     )
-    runjobs_to_revoke_celery_id = runjobs_to_revoke_query.values_list(
-        "celery_task_id", flat=True
+    statuses = dict(runjobs_to_revoke_query.values_list("uuid", "status"))
+    runjob_ids = list(statuses)
+    copies = supervisor.copies_of(runjob_ids)
+    _revoke_runjobs(
+        list(runjobs_to_revoke_query.values_list("celery_task_id", flat=True)) + copies
     )
-    for celery_id in runjobs_to_revoke_celery_id:
-        if celery_id is not None:
-            revoke(celery_id, terminate=True)
-    runjobs_to_revoke_query.update(status=task_status.CANCELLED)
+    supervisor.ended(*copies)
+    placement.unreserve(runjob_ids)
+    runjobs_to_revoke_query.update(status=task_status.CANCELLED, updated=timezone.now())
     wfrun.status = task_status.CANCELLED
-    wfrun.save(update_fields=["status"])
+    wfrun.save(update_fields=["status", "updated"])
+    progress.rebuild(wfrun_id)
+    admission.release(
+        exclude=wfrun_id,
+        slots=list(statuses.values()).count(task_status.PROCESSING),
+    )
 
 
 @task(name="rodan.core.retry_workflowrun")
@@ -932,21 +1268,19 @@ def retry_workflowrun(wfrun_id):
     runjobs_to_retry_query = RunJob.objects.filter(
         workflow_run=wfrun, status__in=(task_status.FAILED, task_status.CANCELLED)
     )
-    for rj in runjobs_to_retry_query:
-        rj.status = task_status.SCHEDULED
-        rj.error_summary = ""
-        rj.error_details = ""
-        original_settings = {}
-        for k, v in rj.job_settings.items():
-            if not k.startswith("@"):
-                original_settings[k] = v
-        rj.job_settings = original_settings
-        rj.save(
-            update_fields=["status", "job_settings", "error_summary", "error_details"]
-        )
+    runjob_ids = list(runjobs_to_retry_query.values_list("uuid", flat=True))
+    _reset_interactive_settings(runjob_ids)
+    _unshare_outputs(wfrun, runjob_ids)
+    RunJob.objects.filter(uuid__in=runjob_ids).update(
+        status=task_status.SCHEDULED,
+        error_summary="",
+        error_details="",
+        updated=timezone.now(),
+    )
 
     wfrun.status = task_status.RETRYING
-    wfrun.save(update_fields=["status"])
+    wfrun.save(update_fields=["status", "updated"])
+    progress.rebuild(wfrun_id)
     registry.tasks["rodan.core.master_task"].apply_async((wfrun_id,))
 
 
@@ -958,40 +1292,23 @@ def redo_runjob_tree(rj_id):
     rj = RunJob.objects.get(uuid=rj_id)
     wfrun = rj.workflow_run
 
-    def inner_redo(rj):
-        if rj.celery_task_id is not None:
-            revoke(rj.celery_task_id, terminate=True)
-
-        # 1. Revoke all downstream runjobs
-        for o in rj.outputs.all():
-            r = o.resource or o.resource_list
-            for i in r.inputs.filter(
-                Q(run_job__workflow_run=rj.workflow_run)
-                & ~Q(run_job__status=task_status.SCHEDULED)
-            ):
-                inner_redo(i.run_job)
-
-            # 2. Clear output resources
-            if isinstance(r, Resource):
-                rs = [r]
-            else:
-                rs = r.resources.all()
+    # 1. Find the RunJob and all downstream runjobs
+    runjob_ids = _downstream_runjobs(wfrun, rj.uuid)
+    runjobs_query = RunJob.objects.filter(uuid__in=runjob_ids)
 
-            for rr in rs:
-                rr.has_thumb = False
+    # 2. Revoke them
+    copies = supervisor.copies_of(runjob_ids)
+    _revoke_runjobs(list(runjobs_query.values_list("celery_task_id", flat=True)) + copies)
+    supervisor.ended(*copies)
 
-        # 3. Reset status and clear interactive data
-        original_settings = {}
-        for k, v in rj.job_settings.items():
-            if not k.startswith("@"):
-                original_settings[k] = v
-        rj.job_settings = original_settings
-        rj.status = task_status.SCHEDULED
-        rj.save(update_fields=["status", "job_settings"])
+    # 3. Reset status and clear interactive data
+    _reset_interactive_settings(runjob_ids)
+    _unshare_outputs(wfrun, runjob_ids)
+    runjobs_query.update(status=task_status.SCHEDULED, updated=timezone.now())
 
-    inner_redo(rj)
     wfrun.status = task_status.RETRYING
-    wfrun.save(update_fields=["status"])
+    wfrun.save(update_fields=["status", "updated"])
+    progress.rebuild(wfrun.uuid)
     registry.tasks["rodan.core.master_task"].apply_async((wfrun.uuid.hex,))
 
 
@@ -0,0 +1,235 @@
+"""
+Runtime estimates of Workflows, from the execution metrics of past RunJobs (see
+`rodan.jobs.metrics`).
+
+The duration of a WorkflowJob is the median wall time of the last
+`RODAN_ESTIMATOR_HISTORY` finished runs of its job, restricted to the runs with the same
+settings when there are at least `RODAN_ESTIMATOR_MIN_SAMPLES` of them. For the
+WorkflowJobs that take the assigned resources, it is scaled by the size of the inputs
+(median wall time per input byte). Jobs that never ran are assumed to take
+`RODAN_ESTIMATOR_DEFAULT_DURATION` seconds.
+
+The RunJobs created for the elements of a resource collection run in parallel, so they
+count once in the critical path and once per element in the total work.
+"""
+import json
+import math
+from collections import defaultdict
+
+from django.conf import settings
+
+from rodan.constants import task_status
+from rodan.jobs.metrics import resource_sizes
+from rodan.models import Connection, InputPort, RunJobMetrics
+
+
+def _median(values):
+    values = sorted(values)
+    n = len(values)
+    if n == 0:
+        return None
+    if n % 2:
+        return values[n // 2]
+    return (values[n // 2 - 1] + values[n // 2]) / 2.0
+
+
+def settings_key(job_settings):
+    """
+    Canonical form of job settings. Interactive settings (`@` keys) are left out.
+    """
+    if isinstance(job_settings, str):
+        job_settings = json.loads(job_settings)
+    return json.dumps(
+        dict((k, v) for k, v in (job_settings or {}).items() if not k.startswith("@")),
+        sort_keys=True,
+    )
+
+
+class Estimator(object):
+    """
+    Estimates the duration of jobs and Workflows. The history of each job is queried
+    once per `Estimator`.
+    """
+
+    def __init__(self):
+        self.history = getattr(settings, "RODAN_ESTIMATOR_HISTORY", 100)
+        self.min_samples = getattr(settings, "RODAN_ESTIMATOR_MIN_SAMPLES", 3)
+        self.default_duration = getattr(settings, "RODAN_ESTIMATOR_DEFAULT_DURATION", 60)
+        self._samples = {}
+
+    def samples(self, job_name):
+        """
+        Returns the (settings key, wall time, input bytes) of the last finished runs of
+        the job.
+        """
+        if job_name not in self._samples:
+            rows = (
+                RunJobMetrics.objects.filter(job_name=job_name, status=task_status.FINISHED)
+                .order_by("-started")
+                .values_list("run_job__job_settings", "wall_time", "input_bytes")
+            )[:self.history]
+            self._samples[job_name] = [
+                (settings_key(job_settings), wall_time, input_bytes)
+                for job_settings, wall_time, input_bytes in rows
+            ]
+        return self._samples[job_name]
+
+    def percentile(self, job_name, q):
+        """
+        Returns the `q`-th percentile (nearest rank) of the wall time of the last
+        finished runs of the job, or None if there are fewer than
+        `RODAN_ESTIMATOR_MIN_SAMPLES` of them.
+        """
+        wall_times = sorted(wall_time for _, wall_time, _ in self.samples(job_name))
+        if not wall_times or len(wall_times) < self.min_samples:
+            return None
+        rank = int(math.ceil(q / 100.0 * len(wall_times)))
+        return wall_times[min(max(rank, 1), len(wall_times)) - 1]
+
+    def estimate_job(self, job_name, job_settings=None, input_bytes=None):
+        """
+        Returns a dictionary with the estimated `duration` in seconds, the number of
+        `samples` it is based on, and its `basis`: `settings` (runs with the same
+        settings), `job` (all runs of the job) or `default`.
+        """
+        samples = self.samples(job_name)
+        key = settings_key(job_settings)
+        matching = [s for s in samples if s[0] == key]
+        if len(matching) >= self.min_samples:
+            chosen, basis = matching, "settings"
+        elif samples:
+            chosen, basis = samples, "job"
+        else:
+            return {"duration": self.default_duration, "samples": 0, "basis": "default"}
+
+        duration = _median([wall_time for _, wall_time, _ in chosen])
+        if input_bytes:
+            rates = [wall_time / b for _, wall_time, b in chosen if b]
+            if len(rates) >= self.min_samples:
+                duration = _median(rates) * input_bytes
+        return {"duration": duration, "samples": len(chosen), "basis": basis}
+
+    def estimate_workflow(self, workflow, resource_assignments=None):
+        """
+        Estimates a run of the Workflow (which must be valid) over the resource
+        assignments, a dictionary of InputPort UUIDs to lists of Resource or
+        ResourceList UUIDs as validated for the creation of a WorkflowRun.
+
+        Returns a dictionary with:
+
+        - `duration` -- the length of the critical path, in seconds.
+        - `total_work` -- the sum of the durations of all RunJobs, in seconds.
+        - `queues` -- the total work per job queue.
+        - `critical_path` -- the UUIDs of the WorkflowJobs on the critical path, in
+          order of execution.
+        - `workflow_jobs` -- per WorkflowJob UUID: `job_name`, `job_queue`, the number
+          of `copies` (RunJobs), their `duration`, `samples` and `basis`, the
+          `earliest_start` and the `remaining` duration of the longest path from the
+          start of the WorkflowJob to the end of the run.
+        """
+        resource_assignments = resource_assignments or {}
+        wfjobs = dict(
+            (wfjob.uuid, wfjob) for wfjob in workflow.workflow_jobs.select_related("job")
+        )
+        downstream = defaultdict(set)
+        upstream = defaultdict(set)
+        for output_wfjob, input_wfjob in Connection.objects.filter(
+            input_port__workflow_job__workflow=workflow
+        ).values_list("output_port__workflow_job_id", "input_port__workflow_job_id"):
+            downstream[output_wfjob].add(input_wfjob)
+            upstream[input_wfjob].add(output_wfjob)
+
+        # Topological order (Kahn's algorithm).
+        indegree = dict((uuid, len(upstream[uuid])) for uuid in wfjobs)
+        order = [uuid for uuid, d in indegree.items() if d == 0]
+        for uuid in order:
+            for d in downstream[uuid]:
+                indegree[d] -= 1
+                if indegree[d] == 0:
+                    order.append(d)
+
+        # Size of the entry inputs of each WorkflowJob, per element of the collection.
+        port_wfjobs = dict(
+            (str(ip_uuid), wfjob_uuid)
+            for ip_uuid, wfjob_uuid in InputPort.objects.filter(
+                uuid__in=list(resource_assignments)
+            ).values_list("uuid", "workflow_job_id")
+        )
+        sizes = resource_sizes(
+            [r for ress in resource_assignments.values() for r in ress]
+        )
+        copies = max([len(ress) for ress in resource_assignments.values()] or [1])
+        entry_bytes = defaultdict(lambda: [0] * copies)
+        collection_wfjobs = set()
+        for ip_uuid, ress in resource_assignments.items():
+            wfjob_uuid = port_wfjobs[str(ip_uuid)]
+            if len(ress) > 1:
+                collection_wfjobs.add(wfjob_uuid)
+            for i in range(copies):
+                r = ress[i] if len(ress) > 1 else ress[0]
+                entry_bytes[wfjob_uuid][i] += sizes.get(str(r), 0)
+
+        # The WorkflowJobs downstream of a collection have one RunJob per element.
+        multiplied = set(collection_wfjobs)
+        for uuid in order:
+            if uuid in multiplied:
+                multiplied.update(downstream[uuid])
+
+        result_wfjobs = {}
+        queues = defaultdict(float)
+        total_work = 0
+        earliest_finish = {}
+        critical_predecessor = {}
+        for uuid in order:
+            wfjob = wfjobs[uuid]
+            n = copies if uuid in multiplied else 1
+            if uuid in entry_bytes:
+                estimates = [
+                    self.estimate_job(wfjob.job.name, wfjob.job_settings, b or None)
+                    for b in entry_bytes[uuid][:n]
+                ]
+            else:
+                estimates = [self.estimate_job(wfjob.job.name, wfjob.job_settings)] * n
+            estimate = max(estimates, key=lambda e: e["duration"])
+            work = sum(e["duration"] for e in estimates)
+            total_work += work
+            queues[wfjob.job.job_queue] += work
+
+            start = 0
+            for u in upstream[uuid]:
+                if uuid not in critical_predecessor or earliest_finish[u] > start:
+                    start = earliest_finish[u]
+                    critical_predecessor[uuid] = u
+            earliest_finish[uuid] = start + estimate["duration"]
+            result_wfjobs[str(uuid)] = {
+                "job_name": wfjob.job.name,
+                "job_queue": wfjob.job.job_queue,
+                "copies": n,
+                "duration": estimate["duration"],
+                "samples": estimate["samples"],
+                "basis": estimate["basis"],
+                "earliest_start": start,
+            }
+
+        remaining = {}
+        for uuid in reversed(order):
+            remaining[uuid] = result_wfjobs[str(uuid)]["duration"] + max(
+                [remaining[d] for d in downstream[uuid]] or [0]
+            )
+            result_wfjobs[str(uuid)]["remaining"] = remaining[uuid]
+
+        critical_path = []
+        if earliest_finish:
+            uuid = max(earliest_finish, key=lambda u: earliest_finish[u])
+            while uuid is not None:
+                critical_path.append(str(uuid))
+                uuid = critical_predecessor.get(uuid)
+            critical_path.reverse()
+
+        return {
+            "duration": max(earliest_finish.values() or [0]),
+            "total_work": total_work,
+            "queues": dict(queues),
+            "critical_path": critical_path,
+            "workflow_jobs": result_wfjobs,
+        }
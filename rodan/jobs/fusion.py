@@ -0,0 +1,192 @@
+"""
+Fusion of chains of trivial RunJobs.
+
+Jobs whose automatic phase is cheap (copying or labelling a file) may declare
+`fusible = True`. When the master task dispatches a RunJob of a fusible job, it looks
+for the linear chain that follows it: the only RunJob that consumes its outputs, if it
+is SCHEDULED, of a fusible job of the same job queue, and takes all its inputs from
+them; then the one that follows that RunJob, and so on, up to
+`RODAN_FUSED_CHAIN_MAX_LENGTH` RunJobs in total.
+
+The chain is sent as one `rodan.core.run_fused_chain` task, which runs the RunJobs back
+to back in one temporary directory. Each RunJob records its status, Outputs and metrics
+as usual, but reads the outputs of the previous ones from the temporary directory, and
+the master task is only called at the end of the chain.
+
+The next RunJob of a chain is only taken (set to PROCESSING) when the previous one has
+finished, with a conditional UPDATE like the one of the master task: if the master task
+got it first, or it was cancelled, the chain stops there. So only one RunJob of a chain
+is PROCESSING at a time.
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+
+from billiard.einfo import ExceptionInfo
+from celery import registry
+from celery import Task
+from django.conf import settings
+from django.utils import timezone
+
+from rodan.constants import task_status
+from rodan.jobs import catalogue
+from rodan.jobs import lazy
+from rodan.jobs import progress
+from rodan.jobs import supervisor
+from rodan.jobs.base import TemporaryDirectory
+from rodan.models import Input, Output, RunJob
+
+
+def chains(workflow_run_id, runjobs):
+    """
+    Returns the chains that follow the given RunJobs of the WorkflowRun (dictionaries
+    with at least `uuid` and `job_name`): RunJob UUID => list of the UUIDs of the RunJobs
+    to run after it in the same task (often empty).
+    """
+    def fusible_jobs(job_names):
+        return set(name for name, job in catalogue.cache.jobs(job_names).items() if job.fusible)
+
+    result = dict((rj["uuid"], []) for rj in runjobs)
+    fusible = fusible_jobs(rj["job_name"] for rj in runjobs)
+    heads = [rj["uuid"] for rj in runjobs if rj["job_name"] in fusible]
+    if not heads:
+        return result
+
+    runjobs = dict(
+        (rj[0], rj[1:])
+        for rj in RunJob.objects.filter(workflow_run_id=workflow_run_id).values_list(
+            "uuid", "job_name", "job_queue", "status"
+        )
+    )
+    fusible = fusible_jobs(rj[0] for rj in runjobs.values())
+
+    produced = defaultdict(set)  # RunJob => resources and resource lists of its outputs
+    for rj_id, r, rl in Output.objects.filter(
+        run_job__workflow_run_id=workflow_run_id
+    ).values_list("run_job_id", "resource_id", "resource_list_id"):
+        if r or rl:
+            produced[rj_id].add(r or rl)
+    consumed = defaultdict(set)  # RunJob => resources and resource lists of its inputs
+    consumers = defaultdict(set)  # resource or resource list => RunJobs
+    for rj_id, r, rl in Input.objects.filter(
+        run_job__workflow_run_id=workflow_run_id
+    ).values_list("run_job_id", "resource_id", "resource_list_id"):
+        if r or rl:
+            consumed[rj_id].add(r or rl)
+            consumers[r or rl].add(rj_id)
+
+    def follower(rj_id):
+        following = set(c for r in produced[rj_id] for c in consumers[r])
+        if len(following) != 1:
+            return None
+        nxt = following.pop()
+        job_name, job_queue, status = runjobs[nxt]
+        if (
+            job_name in fusible
+            and job_queue == runjobs[rj_id][1]
+            and status == task_status.SCHEDULED
+            and consumed[nxt] <= produced[rj_id]
+        ):
+            return nxt
+        return None
+
+    max_length = getattr(settings, "RODAN_FUSED_CHAIN_MAX_LENGTH", 10)
+    for rj_id in heads:
+        nxt = follower(rj_id)
+        while nxt is not None and len(result[rj_id]) + 1 < max_length:
+            result[rj_id].append(nxt)
+            nxt = follower(nxt)
+    return result
+
+
+class FusedChain(object):
+    """
+    What the RunJobs of a chain share in `RodanTask.run`: the Celery task and worker,
+    the temporary directory, and the files that the previous RunJobs produced in it.
+    """
+
+    def __init__(self, task_id, hostname, temp_dir):
+        self.task_id = task_id
+        self.hostname = hostname
+        self.temp_dir = temp_dir
+        self.local_paths = {}  # path of a Resource file => its copy in temp_dir
+
+    @contextmanager
+    def tempdir(self):
+        # Not removed after each RunJob: the next ones read their inputs from it.
+        yield self.temp_dir
+
+    def produced(self, resource, temp_path):
+        self.local_paths[str(resource.resource_file.path)] = temp_path
+
+    def localize(self, inputs):
+        """
+        Point the inputs produced by the previous RunJobs to their copy in the temporary
+        directory.
+        """
+
+        def localize_one(i):
+            i["resource_path"] = self.local_paths.get(i["resource_path"], i["resource_path"])
+            return i
+
+        for ipt_name, ipt_list in inputs.items():
+            inputs[ipt_name] = [
+                localize_one(i) if isinstance(i, dict) else [localize_one(ii) for ii in i]
+                for i in ipt_list
+            ]
+        return inputs
+
+
+def take(runjob_id, task_id):
+    """
+    Set the next RunJob of a chain to PROCESSING, unless it is no longer SCHEDULED or
+    a master task has locked it. Returns whether it was taken.
+    """
+    taken = RunJob.objects.filter(
+        uuid=runjob_id, status=task_status.SCHEDULED, lock__isnull=True
+    ).update(status=task_status.PROCESSING, celery_task_id=task_id, updated=timezone.now())
+    if taken:
+        workflow_run_id, job_name = RunJob.objects.filter(uuid=runjob_id).values_list(
+            "workflow_run_id", "job_name"
+        )[0]
+        progress.record(
+            workflow_run_id, [(job_name, task_status.SCHEDULED, task_status.PROCESSING)]
+        )
+    return bool(taken)
+
+
+class run_fused_chain(Task):
+    name = "rodan.core.run_fused_chain"
+
+    def run(self, runjob_ids):
+        workflow_run_id = RunJob.objects.filter(uuid=runjob_ids[0]).values_list(
+            "workflow_run_id", flat=True
+        )[0]
+        finished = 0
+        with TemporaryDirectory() as temp_dir:
+            chain = FusedChain(self.request.id, self.request.hostname, temp_dir)
+            for i, runjob_id in enumerate(runjob_ids):
+                if i > 0 and not take(runjob_id, self.request.id):
+                    break
+                job_name = RunJob.objects.filter(uuid=runjob_id).values_list(
+                    "job_name", flat=True
+                )[0]
+                job_task = lazy.job_task(job_name)
+                try:
+                    job_task.run(runjob_id, chain=chain)
+                except Exception as exc:
+                    job_task.on_failure(
+                        exc, self.request.id, (runjob_id,), {}, ExceptionInfo()
+                    )
+                    break
+                if not RunJob.objects.filter(
+                    uuid=runjob_id, status=task_status.FINISHED
+                ).exists():
+                    break  # superseded by another copy
+                finished += 1
+        supervisor.ended(self.request.id)
+
+        master_task = registry.tasks["rodan.core.master_task"]
+        mt_retval = master_task.si(str(workflow_run_id)).apply_async(queue="celery")
+        return "FINISHED {0}/{1}  |  master_task: {2}".format(
+            finished, len(runjob_ids), mt_retval
+        )
@@ -0,0 +1,217 @@
+"""
+Garbage collection of deleted Projects, WorkflowRuns and Resources.
+
+Deleting one of them through the API only flags it as `tombstoned` and creates a
+`Tombstone` (see `bury`); the `rodan.core.collect_garbage` task then does the actual
+work in the background, in bounded steps:
+
+- the Celery tasks of the unfinished RunJobs are revoked with one broadcast per chunk
+  of task ids, instead of one broadcast per RunJob;
+- rows are deleted with one query per chunk of `RODAN_GC_CHUNK_SIZE` primary keys,
+  RunJobs first so that the protected links from Inputs and Outputs to Resources are
+  gone before the Resources are deleted;
+- resource directories are removed one at a time, at most one every
+  `RODAN_GC_REMOVAL_INTERVAL` seconds, so that a large project does not saturate the
+  disk.
+
+The counters of the `Tombstone` are updated after each step.
+"""
+import errno
+import logging
+import os
+import shutil
+import time
+from socket import error as socket_error
+
+from celery import registry
+from celery import Task
+from celery.task.control import revoke
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.db.models import F
+from django.utils import timezone
+
+from rodan.constants import task_status
+from rodan.models import (
+    Project,
+    Resource,
+    ResourceLabel,
+    RunJob,
+    Tombstone,
+    TraceSpan,
+    WorkflowRun,
+)
+
+logger = logging.getLogger("rodan")
+
+
+def bury(obj, user):
+    """
+    Flag a `Project`, `WorkflowRun` or `Resource` as tombstoned and schedule its
+    collection. Returns the `Tombstone`.
+    """
+    type(obj).objects.filter(pk=obj.pk).update(tombstoned=True, updated=timezone.now())
+    tombstone = Tombstone.objects.create(
+        model=obj._meta.model_name,
+        object_uuid=obj.pk,
+        object_name=obj.name,
+        creator=user if user.is_authenticated() else None,
+    )
+    registry.tasks["rodan.core.collect_garbage"].apply_async((str(tombstone.uuid),))
+    return tombstone
+
+
+def resource_path(project_uuid, resource_uuid):
+    # Same as `Resource.resource_path`, without fetching the Project of each Resource.
+    return os.path.join(
+        settings.MEDIA_ROOT, "projects", project_uuid.hex, "resources", resource_uuid.hex
+    )
+
+
+class Collector(object):
+    """
+    Deletes objects and everything that depends on them, in chunks. If a `Tombstone`
+    is given, its counters are kept up to date.
+    """
+
+    def __init__(self, tombstone=None):
+        self.tombstone = tombstone
+        self.chunk_size = getattr(settings, "RODAN_GC_CHUNK_SIZE", 500)
+        self.removal_interval = getattr(settings, "RODAN_GC_REMOVAL_INTERVAL", 0)
+
+    def _count(self, counter, n):
+        if self.tombstone is not None and n:
+            Tombstone.objects.filter(pk=self.tombstone.pk).update(
+                **{counter: F(counter) + n, "updated": timezone.now()}
+            )
+
+    def _chunks(self, queryset):
+        queryset = queryset.order_by("pk").values_list("pk", flat=True)
+        while True:
+            pks = list(queryset[:self.chunk_size])
+            if not pks:
+                return
+            yield pks
+
+    def revoke_runjobs(self, runjobs):
+        """
+        Revoke the Celery tasks of the RunJobs that are still scheduled or processing.
+        """
+        celery_ids = list(
+            runjobs.filter(status__in=(task_status.SCHEDULED, task_status.PROCESSING))
+            .exclude(celery_task_id=None)
+            .values_list("celery_task_id", flat=True)
+        )
+        for i in range(0, len(celery_ids), self.chunk_size):
+            chunk = celery_ids[i:i + self.chunk_size]
+            try:
+                revoke(chunk, terminate=True, signal="SIGTERM")
+            except socket_error as serr:
+                if str(errno.ECONNREFUSED) not in repr(serr):
+                    raise
+                logger.warning("Cannot revoke Celery tasks, the broker is unreachable.")
+                return
+            self._count("revoked_tasks", len(chunk))
+
+    def delete(self, queryset):
+        """
+        Delete the rows of the queryset (and their cascades), one chunk at a time.
+        """
+        model = queryset.model
+        for pks in self._chunks(queryset):
+            deleted, _ = model.objects.filter(pk__in=pks).delete()
+            self._count("deleted_rows", deleted)
+
+    def remove_directories(self, paths):
+        for path in paths:
+            if os.path.exists(path):
+                try:
+                    shutil.rmtree(path)
+                except OSError as e:
+                    logger.warning("Deleting folder failed: {0} ({1})".format(path, e))
+                    continue
+                self._count("removed_directories", 1)
+                if self.removal_interval:
+                    time.sleep(self.removal_interval)
+
+    def collect_resources(self, queryset):
+        through = Resource.labels.through
+        for pks in self._chunks(queryset):
+            rows = Resource.objects.filter(pk__in=pks).values_list("uuid", "project_id")
+            paths = [resource_path(project_uuid, uuid) for uuid, project_uuid in rows]
+            label_ids = set(
+                through.objects.filter(resource_id__in=pks).values_list(
+                    "resourcelabel_id", flat=True
+                )
+            )
+            deleted, _ = Resource.objects.filter(pk__in=pks).delete()
+            self._count("deleted_rows", deleted)
+            if label_ids:
+                # Delete labels that no longer are associated to any resource
+                deleted, _ = ResourceLabel.objects.filter(
+                    pk__in=label_ids, resource__isnull=True
+                ).delete()
+                self._count("deleted_rows", deleted)
+            self.remove_directories(paths)
+
+    def collect_resource(self, resource_uuid):
+        self.collect_resources(Resource.objects.filter(pk=resource_uuid))
+
+    def collect_workflowrun(self, wfrun_uuid):
+        runjobs = RunJob.objects.filter(workflow_run_id=wfrun_uuid)
+        profiles = list(
+            runjobs.filter(profile_resource__isnull=False).values_list(
+                "profile_resource_id", flat=True
+            )
+        )
+        self.revoke_runjobs(runjobs)
+        self.delete(runjobs)
+        self.delete(TraceSpan.objects.filter(trace_id=wfrun_uuid))
+        self.delete(WorkflowRun.objects.filter(pk=wfrun_uuid))
+        # The profiles of the RunJobs (see rodan.jobs.profiling) go with them.
+        self.collect_resources(Resource.objects.filter(pk__in=profiles))
+
+    def collect_project(self, project_uuid):
+        project = Project.objects.filter(pk=project_uuid).first()
+        if project is None:
+            return
+        runjobs = RunJob.objects.filter(workflow_run__project_id=project_uuid)
+        self.revoke_runjobs(runjobs)
+        self.delete(runjobs)
+        self.delete(
+            TraceSpan.objects.filter(
+                trace_id__in=WorkflowRun.objects.filter(project_id=project_uuid).values("pk")
+            )
+        )
+        self.delete(WorkflowRun.objects.filter(project_id=project_uuid))
+        self.collect_resources(Resource.objects.filter(project_id=project_uuid))
+        self.delete(Project.objects.filter(pk=project_uuid))  # cascade deletion of workflows
+        Group.objects.filter(pk__in=(project.admin_group_id, project.worker_group_id)).delete()
+        logger.info("Deleting: {0}".format(project.project_path))
+        self.remove_directories([project.project_path])
+
+
+class collect_garbage(Task):
+    name = "rodan.core.collect_garbage"
+    queue = "celery"
+
+    def run(self, tombstone_id):
+        tombstone = Tombstone.objects.get(uuid=tombstone_id)
+        Tombstone.objects.filter(uuid=tombstone_id).update(
+            status=task_status.PROCESSING, updated=timezone.now()
+        )
+        collector = Collector(tombstone)
+        getattr(collector, "collect_{0}".format(tombstone.model))(tombstone.object_uuid)
+        Tombstone.objects.filter(uuid=tombstone_id).update(
+            status=task_status.FINISHED, updated=timezone.now()
+        )
+        return True
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        tombstone_id = args[0]
+        Tombstone.objects.filter(uuid=tombstone_id).update(
+            status=task_status.FAILED,
+            error_summary="{0}: {1}".format(type(exc).__name__, str(exc)),
+            error_details=einfo.traceback,
+            updated=timezone.now(),
+        )
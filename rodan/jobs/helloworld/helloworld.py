@@ -9,6 +9,7 @@ class HelloWorld(RodanTask):
     enabled = True
     category = "Test"
     interactive = False
+    fusible = True
 
     input_port_types = (
         {'name': 'Text input', 'minimum': 0, 'maximum': 1, 'resource_types': ['text/plain']},
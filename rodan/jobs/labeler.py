@@ -24,6 +24,7 @@ class Labeler(RodanTask):
     enabled = True
     category = "Utility"
     interactive = False
+    fusible = True
 
     input_port_types = [
         {
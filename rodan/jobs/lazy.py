@@ -0,0 +1,141 @@
+"""
+Lazy loading of the job packages.
+
+With `RODAN_LAZY_JOB_LOADING`, `rodan.jobs.load` does not import the job packages.
+Instead, it registers a `LazyJob` stub in Celery for every Job of the latest
+`CatalogueManifest` of the same packages (see `rodan.jobs.catalogue`). A stub can be
+sent to the broker like the job it stands for; the package that defines the job is only
+imported when the stub is first executed, or when `job_task` is asked for the job (e.g.
+for the interface of an interactive job). So the workers of a queue, and the web
+process, only hold the code of the jobs they actually run.
+
+As the packages are not imported, their code is not checked against the manifest: the
+latest manifest of the packages is trusted. Without one, the packages are loaded eagerly,
+checked, and their manifest is recorded. After changing the code of a job, run
+`manage.py migrate`, which forgets the manifests of the previous code.
+"""
+import logging
+import threading
+
+from celery import registry
+from celery import Task
+from django.conf import settings
+
+from rodan.jobs import catalogue
+from rodan.jobs import module_loader
+from rodan.models import CatalogueManifest
+
+logger = logging.getLogger("rodan")
+
+_lock = threading.RLock()
+_loaded = {}  # job package => {job name => the job task it defines}
+
+
+def enabled():
+    return getattr(settings, "RODAN_LAZY_JOB_LOADING", False)
+
+
+def manifest(packages):
+    """
+    Returns the latest `CatalogueManifest` of exactly these packages, or None.
+    """
+    for m in CatalogueManifest.objects.order_by("-created"):
+        if set(m.package_versions) == set(packages) and m.jobs:
+            return m
+    return None
+
+
+def register(jobs):
+    """
+    Register a `LazyJob` for every job of `jobs` (job name => package).
+    """
+    for job_name, package_name in jobs.items():
+        stub = type(str(job_name), (LazyJob,), {
+            "name": job_name,
+            "package_name": package_name,
+            "autoregister": False,
+        })
+        registry.tasks.register(stub)
+
+
+def load(package_name):
+    """
+    Import the job package, once. Returns the job tasks it defines: job name => task.
+    """
+    with _lock:
+        if package_name not in _loaded:
+            stubs = dict(
+                (name, task) for name, task in registry.tasks.items()
+                if isinstance(task, LazyJob) and task.package_name == package_name
+            )
+            # Celery would not register the job classes under the names of their stubs.
+            for name in stubs:
+                del registry.tasks[name]
+            logger.info("Loading the job package %s", package_name)
+            try:
+                # Checked against the manifest already: only collect the jobs.
+                with catalogue.collecting() as definitions:
+                    collected = len(definitions)
+                    module_loader(package_name)
+                    del definitions[collected:]
+                _loaded[package_name] = dict(
+                    (name, registry.tasks[name]) for name in stubs if name in registry.tasks
+                )
+                for name, task in _loaded[package_name].items():
+                    if not task.__bound__:
+                        task.bind(stubs[name].app)  # sets up its request stack
+            finally:
+                # The stubs stay registered: Celery workers keep the task objects they
+                # started with.
+                for name, stub in stubs.items():
+                    registry.tasks[name] = stub
+        return _loaded[package_name]
+
+
+def job_task(job_name):
+    """
+    Returns the task of the job, importing its package if it has not been yet.
+    """
+    task = registry.tasks[str(job_name)]
+    if isinstance(task, LazyJob):
+        return task.resolve()
+    return task
+
+
+class LazyJob(Task):
+    """
+    Stands for a job task whose package has not been imported. Executing it imports
+    the package and runs the job task, in the context of the stub.
+    """
+
+    abstract = True
+    package_name = None
+
+    def resolve(self):
+        try:
+            return load(self.package_name)[self.name]
+        except KeyError:
+            raise LookupError(
+                "Job package {0} does not define the job {1}. Run `manage.py migrate` to "
+                "update the catalogue.".format(self.package_name, self.name)
+            )
+
+    def run(self, *args, **kwargs):
+        job = self.resolve()
+        job.request_stack.push(self.request)
+        try:
+            return job.run(*args, **kwargs)
+        finally:
+            job.request_stack.pop()
+
+    def on_success(self, *args, **kwargs):
+        return self.resolve().on_success(*args, **kwargs)
+
+    def on_retry(self, *args, **kwargs):
+        return self.resolve().on_retry(*args, **kwargs)
+
+    def on_failure(self, *args, **kwargs):
+        return self.resolve().on_failure(*args, **kwargs)
+
+    def after_return(self, *args, **kwargs):
+        return self.resolve().after_return(*args, **kwargs)
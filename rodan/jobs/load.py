@@ -10,6 +10,11 @@ import a module if it is not installed will prevent Rodan from starting. The try
 allow a graceful degradation with a message that a particular set of modules could not be
 loaded.
 
+The Jobs and ResourceTypes are only checked against the database when the catalogue has
+changed since it was last found to match it, or during `manage.py migrate`: see
+`rodan.jobs.catalogue`. With `RODAN_LAZY_JOB_LOADING`, the job packages are only
+imported when their jobs are first used: see `rodan.jobs.lazy`.
+
 
 # How to write Rodan jobs?
 
@@ -43,9 +48,12 @@ from rodan.models import (  # noqa
 import rodan.jobs.core  # noqa
 import rodan.jobs.master_task  # noqa
 from rodan.jobs import (
+    catalogue,
+    lazy,
     module_loader,
     package_versions
 )
+from rodan.jobs.base import RodanTaskType
 
 if sys.version_info.major == 2:
     input = raw_input  # noqa
@@ -273,202 +281,241 @@ for package_name in settings.RODAN_JOB_PACKAGES:
                 })
                 logger.info("resource type " + rt['mimetype'] + " found")
 
-# check database for updating registered ones
-registered_rts = {}
-for rt in ResourceType.objects.all():
-    registered_rts[rt.mimetype] = {
-        "description": rt.description,
-        "extension": rt.extension,
-    }
-
 
 def multiple_choice(field_name):
     print("  Multiple {0}s are found")
 
 
-for mimetype, definitions in resourcetypes.items():
-    if len(definitions) == 0:
-        continue
+def check_resource_types():
+    """
+    Check the ResourceTypes of the catalogue against the database, and update it if
+    demanded.
+    """
+    # check database for updating registered ones
+    registered_rts = {}
+    for rt in ResourceType.objects.all():
+        registered_rts[rt.mimetype] = {
+            "description": rt.description,
+            "extension": rt.extension,
+        }
+
+    for mimetype, definitions in resourcetypes.items():
+        if len(definitions) == 0:
+            continue
+
+        # If not yet exist in DB:
+        if mimetype not in registered_rts:
+            if not UPDATE_JOBS:
+                raise ImproperlyConfigured(
+                    (
+                        "The catalogue of local ResourceTypes does not match the ones in "
+                        "database: local ResourceType `{0}` has not been registered. Please"
+                        " run `manage.py migrate` on Rodan server to update the database."
+                    ).format(mimetype)
+                )  # noqa
+            else:
+                print("Adding {0}...  ".format(mimetype))
+                possible_descriptions = {}
+                possible_extensions = {}
+                for d in definitions:
+                    if d['description']:
+                        if d['description'] not in possible_descriptions:
+                            possible_descriptions[d['description']] = []
+                        possible_descriptions[d['description']].append(d['package_name'])
+                    if d['extension']:
+                        if d['extension'] not in possible_extensions:
+                            possible_extensions[d['extension']] = []
+                        possible_extensions[d['extension']].append(d['package_name'])
+
+                if len(possible_descriptions.keys()) == 0:
+                    description = ''
+                elif len(possible_descriptions.keys()) == 1:
+                    description = possible_descriptions.keys()[0]
+                else:
+                    print("\n  Multiple descriptions found for {0}:".format(mimetype))
+                    choices = []
+                    for idx, tup in enumerate(possible_descriptions.items()):
+                        desc, packages = tup
+                        choices.append(desc)
+                        print("    #{0}: {1} (from {2})".format(idx + 1, desc, ", ".join(packages)))
+                    answer = input("  Choose a description (#1, #2, ...) or enter yours: ")
+                    if (
+                        answer.startswith('#') and
+                        answer[1:].isdigit() and
+                        0 < int(answer[1:]) <= len(choices)
+                    ):
+                        description = choices[int(answer[1:]) - 1]
+                        print("Your choice: {0}".format(description))
+                    else:
+                        description = answer
+
+                if len(possible_extensions.keys()) == 0:
+                    extension = ''
+                elif len(possible_extensions.keys()) == 1:
+                    extension = possible_extensions.keys()[0]
+                else:
+                    print("\n  Multiple extensions found for {0}:".format(mimetype))
+                    choices = []
+                    for idx, tup in enumerate(possible_extensions.items()):
+                        ext, packages = tup
+                        choices.append(ext)
+                        print("    #{0}: {1} (from {2})".format(idx + 1, ext, ", ".join(packages)))
+                    answer = input("  Choose an extension (#1, #2, ...) or enter yours: ")
+                    if (answer.startswith('#') and
+                            answer[1:].isdigit() and
+                            0 < int(answer[1:]) <= len(choices)):
+                        extension = choices[int(answer[1:]) - 1]
+                        print("Your choice: {0}".format(extension))
+                    else:
+                        extension = answer
+
+                r = ResourceType.objects.create(mimetype=mimetype,
+                                                description=description,
+                                                extension=extension)
+                print("Added {0} with description='{1}' and extension='{2}'".format(
+                    r.mimetype,
+                    r.description,
+                    r.extension
+                ))
+        else:
+            # exist in DB. Don't touch
+            # ([TODO]: for now, perhaps we want the server maintainer to change it somehow...)
+            del registered_rts[mimetype]
 
-    # If not yet exist in DB:
-    if mimetype not in registered_rts:
+    # delete removed ones
+    if registered_rts:  # if there are still registered ones
+        # To keep docker images small, only the main celery queue NEEDS all jobs.
+        # if os.environ["CELERY_JOB_QUEUE"] != "celery":
+        #     pass
         if not UPDATE_JOBS:
             raise ImproperlyConfigured(
                 (
-                    "The catalogue of local ResourceTypes does not match the ones in "
-                    "database: local ResourceType `{0}` has not been registered. Please"
-                    " run `manage.py migrate` on Rodan server to update the database."
-                ).format(mimetype)
-            )  # noqa
+                    "The following ResourceTypes are in database but not registered"
+                    " in the code. Perhaps they have been deleted in the code but "
+                    "not in the database. Try to run `manage.py migrate` to confirm "
+                    "deleting them:\n{0}"
+                ).format('\n'.join(registered_rts.keys())))
         else:
-            print("Adding {0}...  ".format(mimetype))
-            possible_descriptions = {}
-            possible_extensions = {}
-            for d in definitions:
-                if d['description']:
-                    if d['description'] not in possible_descriptions:
-                        possible_descriptions[d['description']] = []
-                    possible_descriptions[d['description']].append(d['package_name'])
-                if d['extension']:
-                    if d['extension'] not in possible_extensions:
-                        possible_extensions[d['extension']] = []
-                    possible_extensions[d['extension']].append(d['package_name'])
-
-            if len(possible_descriptions.keys()) == 0:
-                description = ''
-            elif len(possible_descriptions.keys()) == 1:
-                description = possible_descriptions.keys()[0]
-            else:
-                print("\n  Multiple descriptions found for {0}:".format(mimetype))
-                choices = []
-                for idx, tup in enumerate(possible_descriptions.items()):
-                    desc, packages = tup
-                    choices.append(desc)
-                    print("    #{0}: {1} (from {2})".format(idx + 1, desc, ", ".join(packages)))
-                answer = input("  Choose a description (#1, #2, ...) or enter yours: ")
-                if (
-                    answer.startswith('#') and
-                    answer[1:].isdigit() and
-                    0 < int(answer[1:]) <= len(choices)
-                ):
-                    description = choices[int(answer[1:]) - 1]
-                    print("Your choice: {0}".format(description))
+            for mimetype, info in registered_rts.items():
+                confirm_delete = input(
+                    (
+                        "ResourceType `{0}` is in database but not registered in the "
+                        "code. Perhaps it has been deleted in the code but not yet in"
+                        " the database. Confirm deletion (y/N)? "
+                    ).format(mimetype))
+                if confirm_delete.lower() == 'y':
+                    try:
+                        ResourceType.objects.get(mimetype=mimetype).delete()
+                        print("  ..deleted.\n\n")
+                    except Exception as e:
+                        confirm_delete = input(
+                            (
+                                "  ..not deleted because of an exception: {0}. Perhaps "
+                                "there are Resources or ResourceLists using this "
+                                "ResourceType. Confirm deletion of related Resources (y/N)? "
+                            ).format(str(e)))
+                        if confirm_delete.lower() == 'y':
+                            try:
+                                Resource.objects.filter(resource_type__mimetype=mimetype).delete()
+                                ResourceType.objects.get(mimetype=mimetype).delete()
+                                print("  ..deleted. OK\n\n")
+                            except Exception as e:
+                                print(
+                                    (
+                                        "  ..not deleted because of an exception: {0}. Please"
+                                        " fix it manually.\n\n"
+                                    ).format(str(e)))
+                        else:
+                            print("  ..not deleted.\n\n")
                 else:
-                    description = answer
+                    print("  ..not deleted.\n\n")
 
-            if len(possible_extensions.keys()) == 0:
-                extension = ''
-            elif len(possible_extensions.keys()) == 1:
-                extension = possible_extensions.keys()[0]
-            else:
-                print("\n  Multiple extensions found for {0}:".format(mimetype))
-                choices = []
-                for idx, tup in enumerate(possible_extensions.items()):
-                    ext, packages = tup
-                    choices.append(ext)
-                    print("    #{0}: {1} (from {2})".format(idx + 1, ext, ", ".join(packages)))
-                answer = input("  Choose an extension (#1, #2, ...) or enter yours: ")
-                if (answer.startswith('#') and
-                        answer[1:].isdigit() and
-                        0 < int(answer[1:]) <= len(choices)):
-                    extension = choices[int(answer[1:]) - 1]
-                    print("Your choice: {0}".format(extension))
-                else:
-                    extension = answer
-
-            r = ResourceType.objects.create(mimetype=mimetype,
-                                            description=description,
-                                            extension=extension)
-            print("Added {0} with description='{1}' and extension='{2}'".format(
-                r.mimetype,
-                r.description,
-                r.extension
-            ))
-    else:
-        # exist in DB. Don't touch
-        # ([TODO]: for now, perhaps we want the server maintainer to change it somehow...)
-        del registered_rts[mimetype]
-
-# delete removed ones
-if registered_rts:  # if there are still registered ones
-    # To keep docker images small, only the main celery queue NEEDS all jobs.
-    # if os.environ["CELERY_JOB_QUEUE"] != "celery":
-    #     pass
-    if not UPDATE_JOBS:
-        raise ImproperlyConfigured(
-            (
-                "The following ResourceTypes are in database but not registered"
-                " in the code. Perhaps they have been deleted in the code but "
-                "not in the database. Try to run `manage.py migrate` to confirm "
-                "deleting them:\n{0}"
-            ).format('\n'.join(registered_rts.keys())))
-    else:
-        for mimetype, info in registered_rts.items():
-            confirm_delete = input(
+
+def check_removed_jobs():
+    """
+    Check that the Jobs in the database are all in the catalogue (after their
+    registration has removed them from `job_list`), and delete them if demanded.
+    """
+    if job_list:  # there are database jobs that are not registered. Should delete them.
+        # To keep docker images small, only the main celery queue NEEDS all jobs.
+        if os.environ["CELERY_JOB_QUEUE"] != "celery" and os.environ["CELERY_JOB_QUEUE"] != "None":
+            pass
+        elif not UPDATE_JOBS:
+            raise ImproperlyConfigured(
                 (
-                    "ResourceType `{0}` is in database but not registered in the "
-                    "code. Perhaps it has been deleted in the code but not yet in"
-                    " the database. Confirm deletion (y/N)? "
-                ).format(mimetype))
-            if confirm_delete.lower() == 'y':
-                try:
-                    ResourceType.objects.get(mimetype=mimetype).delete()
-                    print("  ..deleted.\n\n")
-                except Exception as e:
-                    confirm_delete = input(
-                        (
-                            "  ..not deleted because of an exception: {0}. Perhaps "
-                            "there are Resources or ResourceLists using this "
-                            "ResourceType. Confirm deletion of related Resources (y/N)? "
-                        ).format(str(e)))
-                    if confirm_delete.lower() == 'y':
-                        try:
-                            Resource.objects.filter(resource_type__mimetype=mimetype).delete()
-                            ResourceType.objects.get(mimetype=mimetype).delete()
-                            print("  ..deleted. OK\n\n")
-                        except Exception as e:
-                            print(
-                                (
-                                    "  ..not deleted because of an exception: {0}. Please"
-                                    " fix it manually.\n\n"
-                                ).format(str(e)))
-                    else:
-                        print("  ..not deleted.\n\n")
-            else:
-                print("  ..not deleted.\n\n")
+                    "The following jobs are in database but not registered in the code. Perhaps"
+                    " they have been deleted in the code but not in the database. Try to run "
+                    "`manage.py migrate` to confirm deleting them:\n{0}"
+                ).format('\n'.join(job_list)))
+        else:
+            for j_name in job_list:
+                confirm_delete = input(
+                    (
+                        "Job `{0}` is in database but not registered in the code. Perhaps it has "
+                        "been deleted in the code but not yet in the database. Confirm deletion "
+                        "(y/N)? "
+                    ).format(j_name))
+                if confirm_delete.lower() == 'y':
+                    try:
+                        Job.objects.get(name=j_name).delete()
+                        print("  ..deleted.\n\n")
+                    except Exception as e:
+                        confirm_delete = input(
+                            (
+                                "  ..not deleted because of an exception: {0}. Perhaps there are "
+                                "WorkflowJobs using this Job. Confirm deletion of related "
+                                "WorkflowJobs (y/N)? "
+                            ).format(str(e)))
+                        if confirm_delete.lower() == 'y':
+                            try:
+                                WorkflowJob.objects.filter(job__name=j_name).delete()
+                                Job.objects.get(name=j_name).delete()
+                                print("  ..deleted. OK\n\n")
+                            except Exception as e:
+                                print(
+                                    (
+                                        "  ..not deleted because of an exception: {0}. Please fix"
+                                        " it manually.\n\n"
+                                    ).format(str(e)))
+                        else:
+                            print("  ..not deleted.\n\n")
+                else:
+                    print("  ..not deleted.\n\n")
 
 
+catalogue.set_resource_types(resourcetypes)
+
 # Setup Jobs
 logger.warning("Loading Rodan Jobs")
 
-job_list = list(Job.objects.all().values_list("name", flat=True))
-for package_name in settings.RODAN_JOB_PACKAGES:
-    def set_version(module):
-        package_versions[package_name] = getattr(module, '__version__', 'n/a')
-    module_loader(package_name, set_version)  # RodanTaskType will update `job_list`
-
-if job_list:  # there are database jobs that are not registered. Should delete them.
-    # To keep docker images small, only the main celery queue NEEDS all jobs.
-    if os.environ["CELERY_JOB_QUEUE"] != "celery" and os.environ["CELERY_JOB_QUEUE"] != "None":
-        pass
-    elif not UPDATE_JOBS:
-        raise ImproperlyConfigured(
-            (
-                "The following jobs are in database but not registered in the code. Perhaps"
-                " they have been deleted in the code but not in the database. Try to run "
-                "`manage.py migrate` to confirm deleting them:\n{0}"
-            ).format('\n'.join(job_list)))
-    else:
-        for j_name in job_list:
-            confirm_delete = input(
-                (
-                    "Job `{0}` is in database but not registered in the code. Perhaps it has "
-                    "been deleted in the code but not yet in the database. Confirm deletion "
-                    "(y/N)? "
-                ).format(j_name))
-            if confirm_delete.lower() == 'y':
-                try:
-                    Job.objects.get(name=j_name).delete()
-                    print("  ..deleted.\n\n")
-                except Exception as e:
-                    confirm_delete = input(
-                        (
-                            "  ..not deleted because of an exception: {0}. Perhaps there are "
-                            "WorkflowJobs using this Job. Confirm deletion of related "
-                            "WorkflowJobs (y/N)? "
-                        ).format(str(e)))
-                    if confirm_delete.lower() == 'y':
-                        try:
-                            WorkflowJob.objects.filter(job__name=j_name).delete()
-                            Job.objects.get(name=j_name).delete()
-                            print("  ..deleted. OK\n\n")
-                        except Exception as e:
-                            print(
-                                (
-                                    "  ..not deleted because of an exception: {0}. Please fix it"
-                                    " manually.\n\n"
-                                ).format(str(e)))
-                    else:
-                        print("  ..not deleted.\n\n")
-            else:
-                print("  ..not deleted.\n\n")
+job_list = []
+lazy_manifest = None
+if lazy.enabled() and not UPDATE_JOBS:
+    lazy_manifest = lazy.manifest(settings.RODAN_JOB_PACKAGES)
+
+if lazy_manifest is not None:
+    # Stubs of the Jobs of the latest manifest: their packages are imported on first use
+    # (see `rodan.jobs.lazy`).
+    package_versions.update(lazy_manifest.package_versions)
+    lazy.register(lazy_manifest.jobs)
+else:
+    # RodanTaskType only collects the Jobs defined while the packages are imported. They
+    # are checked against the database, with the ResourceTypes, only if the catalogue has
+    # changed since it was last found to match the database (see `rodan.jobs.catalogue`).
+    with catalogue.collecting() as job_definitions:
+        for package_name in settings.RODAN_JOB_PACKAGES:
+            def set_version(module):
+                package_versions[package_name] = getattr(module, '__version__', 'n/a')
+            module_loader(package_name, set_version)
+
+    catalogue_digest = catalogue.digest(resourcetypes, job_definitions, package_versions)
+    if UPDATE_JOBS or not catalogue.verified(catalogue_digest):
+        logger.warning("Checking the catalogue of Rodan ResourceTypes and Jobs")
+        check_resource_types()
+        job_list.extend(Job.objects.all().values_list("name", flat=True))
+        for attrs in job_definitions:
+            RodanTaskType.register(attrs)  # removes the job from `job_list`
+        check_removed_jobs()
+        catalogue.record(
+            catalogue_digest, package_versions, job_definitions, replace=UPDATE_JOBS
+        )
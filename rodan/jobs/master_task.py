@@ -6,8 +6,13 @@ from rodan.models import (
     Input
 )
 from rodan.constants import task_status
-from django.db.models import Q
+from rodan.jobs import admission
+from rodan.jobs import fusion
+from rodan.jobs import placement
+from rodan.jobs import progress
+from django.db.models import Max, Q
 from django.conf import settings
+from django.utils import timezone
 
 import sys
 if sys.version_info.major == 2:
@@ -20,6 +25,22 @@ else:
 # Read more on Django queries: https://docs.djangoproject.com/en/dev/topics/db/queries/
 
 
+def task_priority(wfrun_priority, remaining_work, longest):
+    """
+    Broker priority of a RunJob: the priority of its WorkflowRun, raised by up to
+    `RODAN_CRITICAL_PATH_PRIORITY_LEVELS` for the RunJobs with the most remaining work
+    in the WorkflowRun, capped at `RODAN_MAX_TASK_PRIORITY`.
+
+    RabbitMQ only honours it on queues declared with `x-max-priority`: the job queues of
+    `CELERY_QUEUES`, not the direct queues of the workers.
+    """
+    levels = getattr(settings, "RODAN_CRITICAL_PATH_PRIORITY_LEVELS", 0)
+    priority = wfrun_priority
+    if levels and longest:
+        priority += int(round(levels * remaining_work / longest))
+    return min(priority, getattr(settings, "RODAN_MAX_TASK_PRIORITY", 9))
+
+
 @task(name="rodan.core.master_task")
 def master_task(workflow_run_id):
     """
@@ -76,8 +97,9 @@ def master_task(workflow_run_id):
         ).exists():
             # WorkflowRun has finished!
             WorkflowRun.objects.filter(uuid=workflow_run_id).update(
-                status=task_status.FINISHED
+                status=task_status.FINISHED, updated=timezone.now()
             )
+            progress.rebuild(workflow_run_id)
 
             # Send an email to owner of WorkflowRun
             workflowrun = WorkflowRun.objects.get(uuid=workflow_run_id)
@@ -104,20 +126,70 @@ def master_task(workflow_run_id):
             return "wfRun {0} NO RUNABLE RUNJOBS NOW".format(workflow_run_id)
     else:
         runable_runjobs_query = RunJob.objects.filter(lock=thread_id)
+        # The RunJobs with the longest chain of work ahead of them go first.
         runable_runjobs = list(
-            runable_runjobs_query.values("uuid", "job_name", "job_queue")
+            runable_runjobs_query.values(
+                "uuid", "job_name", "job_queue", "remaining_work"
+            ).order_by("-remaining_work")
         )  # immediate evaluation
-        runable_runjobs_query.update(
-            status=task_status.PROCESSING, lock=None
-        )  # unlock now because the task status has been changed
+        placing = placement.applies(runable_runjobs)
+        with admission.lock(admission.enabled() or placing):
+            runable_runjobs, held_runjobs = admission.admit(workflow_run_id, runable_runjobs)
+            runable_runjobs, waiting_runjobs = (
+                placement.place(runable_runjobs) if placing else (runable_runjobs, [])
+            )
+            if waiting_runjobs:
+                # No worker has room for them yet: wait like the held RunJobs.
+                held_runjobs += waiting_runjobs
+                admission.hold(workflow_run_id)
+            RunJob.objects.filter(
+                uuid__in=[rj_value["uuid"] for rj_value in runable_runjobs]
+            ).update(
+                status=task_status.PROCESSING, lock=None, updated=timezone.now()
+            )  # unlock now because the task status has been changed
+        if held_runjobs:
+            # Stay SCHEDULED until admission.release() calls the master task again.
+            runable_runjobs_query.update(lock=None)
+            if not runable_runjobs:
+                return "wfRun {0} HELD BY ADMISSION CONTROL".format(workflow_run_id)
+        progress.record(
+            workflow_run_id,
+            [
+                (rj_value["job_name"], task_status.SCHEDULED, task_status.PROCESSING)
+                for rj_value in runable_runjobs
+            ],
+        )
+
+        wfrun_priority = WorkflowRun.objects.filter(uuid=workflow_run_id).values_list(
+            "priority", flat=True
+        ).first() or 0
+        longest = RunJob.objects.filter(workflow_run__uuid=workflow_run_id).aggregate(
+            longest=Max("remaining_work")
+        )["longest"]
+
+        chains = fusion.chains(workflow_run_id, runable_runjobs)
 
         for rj_value in runable_runjobs:
-            task = registry.tasks[str(rj_value["job_name"])]
             queue = str(rj_value["job_queue"])
             runjob_id = str(rj_value["uuid"])
+            chain = chains[rj_value["uuid"]]
+            if chain:
+                # run the RunJobs that follow it in the same task (see rodan.jobs.fusion)
+                task = registry.tasks["rodan.core.run_fused_chain"].si(
+                    [runjob_id] + [str(rj_id) for rj_id in chain]
+                )
+            else:
+                task = registry.tasks[str(rj_value["job_name"])].si(runjob_id)
             # task will call master_task synchronously. Don't use Celery's chain,
             # it's hard to revoke.
-            async_task = task.si(runjob_id).apply_async(queue=queue)
+            priority = task_priority(wfrun_priority, rj_value["remaining_work"], longest)
+            if rj_value.get("worker"):
+                # the direct queue of the worker chosen by placement.place()
+                async_task = task.apply_async(
+                    exchange="C.dq", routing_key=rj_value["worker"], priority=priority
+                )
+            else:
+                async_task = task.apply_async(queue=queue, priority=priority)
             RunJob.objects.filter(uuid=runjob_id).update(
                 celery_task_id=async_task.task_id
             )
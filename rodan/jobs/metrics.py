@@ -0,0 +1,173 @@
+"""
+Execution metrics of RunJobs (see `rodan.models.RunJobMetrics`).
+
+`RodanTask.run` takes a `usage()` snapshot before running the job, and calls `record`
+when the automatic phase ends. The record is a plain INSERT: unlike the snapshot that
+used to be appended to `WorkflowRun.description`, it does not lock the WorkflowRun, so
+RunJobs finishing in parallel do not wait for each other.
+"""
+import resource
+import socket
+import sys
+import time
+
+from django.core.files.storage import default_storage
+from django.db.models import Avg, Count, Max, Sum
+from django.utils import timezone
+
+from rodan.jobs import monitoring
+from rodan.jobs import tracing
+from rodan.jobs.profiling import _reset_peak_rss
+from rodan.models import Input, Output, Resource, ResourceList, RunJobMetrics
+
+# ru_maxrss is in kilobytes on Linux, in bytes on macOS.
+_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def _proc_io():
+    # Linux only: bytes passed to read() and write() syscalls, including cached ones.
+    try:
+        with open("/proc/self/io") as f:
+            counters = dict(line.split(":", 1) for line in f if ":" in line)
+        return int(counters["rchar"]), int(counters["wchar"])
+    except (IOError, OSError, KeyError, ValueError):
+        return None, None
+
+
+def _file_size(name):
+    if not name:
+        return None
+    try:
+        return default_storage.size(name)
+    except (IOError, OSError):
+        return None
+
+
+def resource_sizes(uuids):
+    """
+    Returns the size in bytes of the files of the given `Resource`s and `ResourceList`s
+    (the sum of their `Resource`s), keyed by UUID string. Missing files are omitted.
+    """
+    sizes = {}
+    for uuid, name in Resource.objects.filter(uuid__in=uuids).values_list(
+        "uuid", "resource_file"
+    ):
+        size = _file_size(name)
+        if size is not None:
+            sizes[str(uuid)] = size
+    through = ResourceList.resources.through
+    for list_uuid, name in through.objects.filter(resourcelist_id__in=uuids).values_list(
+        "resourcelist_id", "resource__resource_file"
+    ):
+        size = _file_size(name)
+        if size is not None:
+            sizes[str(list_uuid)] = sizes.get(str(list_uuid), 0) + size
+    return sizes
+
+
+def usage(reset_peak_rss=False):
+    """
+    Snapshot the resource usage of the worker process. With `reset_peak_rss`, first reset
+    the high-water mark of its RSS, so that the `peak_rss` of a later snapshot is the peak
+    since this one.
+    """
+    peak_rss_reset = reset_peak_rss and _reset_peak_rss()
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    children_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    bytes_read, bytes_written = _proc_io()
+    return {
+        "started": timezone.now(),
+        "time": time.time(),
+        "cpu_time": (
+            self_usage.ru_utime + self_usage.ru_stime
+            + children_usage.ru_utime + children_usage.ru_stime
+        ),
+        "peak_rss_reset": peak_rss_reset,
+        "peak_rss": self_usage.ru_maxrss * _MAXRSS_UNIT,
+        "peak_children_rss": children_usage.ru_maxrss * _MAXRSS_UNIT,
+        "bytes_read": bytes_read,
+        "bytes_written": bytes_written,
+    }
+
+
+@tracing.traced("metrics.record")
+def record(runjob, status, before, queued_at=None, worker_host=None):
+    """
+    Record the metrics of the automatic phase of `runjob` that started with the `before`
+    snapshot and ended with `status`. `queued_at` is when the RunJob was dispatched.
+    """
+    after = usage()
+
+    def delta(key):
+        if before[key] is None or after[key] is None:
+            return None
+        return after[key] - before[key]
+
+    if queued_at is not None:
+        queue_wait_time = max((before["started"] - queued_at).total_seconds(), 0)
+    else:
+        queue_wait_time = None
+
+    inputs = [
+        str(r or rl)
+        for r, rl in Input.objects.filter(run_job=runjob).values_list(
+            "resource_id", "resource_list_id"
+        )
+    ]
+    outputs = [
+        str(r or rl)
+        for r, rl in Output.objects.filter(run_job=runjob).values_list(
+            "resource_id", "resource_list_id"
+        )
+    ]
+    input_sizes = resource_sizes(inputs)
+    peak_rss = None
+    if before.get("peak_rss_reset"):
+        peak_rss = after["peak_rss"]
+        # The peak of the children cannot be reset: it is theirs only if it grew.
+        if after["peak_children_rss"] > before["peak_children_rss"]:
+            peak_rss = max(peak_rss, after["peak_children_rss"])
+    wall_time = after["time"] - before["time"]
+    monitoring.observe_runjob(runjob, queue_wait_time, wall_time)
+    return RunJobMetrics.objects.create(
+        run_job=runjob,
+        workflow_run_id=runjob.workflow_run_id,
+        job_name=runjob.job_name,
+        status=status,
+        worker_host=worker_host or socket.gethostname(),
+        started=before["started"],
+        queue_wait_time=queue_wait_time,
+        wall_time=wall_time,
+        cpu_time=delta("cpu_time"),
+        peak_rss=peak_rss,
+        bytes_read=delta("bytes_read"),
+        bytes_written=delta("bytes_written"),
+        input_bytes=sum(input_sizes.values()) if input_sizes else None,
+        inputs=inputs,
+        outputs=outputs,
+    )
+
+
+def summary(queryset, group_by):
+    """
+    Aggregate the metrics of the queryset per value of `group_by` (`job_name`,
+    `workflow_run` or `worker_host`).
+    """
+    return (
+        queryset.order_by()
+        .values(group_by)
+        .annotate(
+            count=Count("pk"),
+            wall_time_total=Sum("wall_time"),
+            wall_time_avg=Avg("wall_time"),
+            wall_time_max=Max("wall_time"),
+            cpu_time_total=Sum("cpu_time"),
+            cpu_time_avg=Avg("cpu_time"),
+            queue_wait_time_avg=Avg("queue_wait_time"),
+            queue_wait_time_max=Max("queue_wait_time"),
+            peak_rss_max=Max("peak_rss"),
+            bytes_read_total=Sum("bytes_read"),
+            bytes_written_total=Sum("bytes_written"),
+        )
+        .order_by(group_by)
+    )
@@ -0,0 +1,370 @@
+"""
+Metrics of the queues, the scheduler and the jobs, for monitoring.
+
+What can be counted is counted where it happens, in the Redis hash
+`rodan:monitoring:counters` (Prometheus series => value):
+
+- `metrics.record` observes the dispatch-to-start latency of every RunJob, by job
+  queue, and the wall time of its automatic phase, by job name, in histograms;
+- every Celery task that ends is counted by task name and state, with its seconds: the
+  throughput of `create_diva`, `package_results`, the master task and the jobs.
+
+Every `RODAN_METRICS_INTERVAL` seconds, Celery beat runs `rodan.core.collect_metrics`,
+which samples the rest:
+
+- the messages and consumers of the queues of the broker: `celery` and the queues that
+  the live workers consume from (see `rodan.jobs.placement`);
+- the RunJobs that are scheduled, processing or waiting for input, by job queue, and the
+  WorkflowRuns held by admission control (see `rodan.jobs.admission`);
+- the replies of the workers to `inspect`: their active and scheduled tasks, and their
+  stats;
+
+and stores the sample in `rodan:monitoring:sample`. The API serves both from Redis,
+without asking anything of the broker or the workers: `api/metrics/` in the Prometheus
+text format, and the `api/taskqueue/` routes the replies of the workers of the last
+sample. Those routes used to broadcast to every worker and wait for the replies on
+every request, which they still do when there is no sample.
+"""
+import json
+import logging
+import time
+
+from celery import current_app
+from celery import Task
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.db.models import Count
+import redis
+
+from rodan.cache import get_redis_connection
+from rodan.constants import task_status
+from rodan.jobs import admission
+from rodan.jobs import placement
+from rodan.models import RunJob
+
+logger = logging.getLogger("rodan")
+
+COUNTERS_KEY = "rodan:monitoring:counters"
+SAMPLE_KEY = "rodan:monitoring:sample"
+LOCK_KEY = "rodan:monitoring:lock"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds of the buckets of the histograms, in seconds.
+LATENCY_BUCKETS = (0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600)
+DURATION_BUCKETS = (1, 5, 15, 60, 300, 900, 3600, 14400)
+
+# RunJobs counted by the collector, with their label.
+ACTIVE_STATUSES = {
+    task_status.SCHEDULED: "scheduled",
+    task_status.PROCESSING: "processing",
+    task_status.WAITING_FOR_INPUT: "waiting_for_input",
+}
+
+# Metric families, in the order of the exposition: name, type, help.
+METRICS = (
+    ("rodan_queue_messages", "gauge", "Messages ready in the queue of the broker."),
+    ("rodan_queue_consumers", "gauge", "Consumers of the queue of the broker."),
+    ("rodan_runjobs", "gauge", "Unfinished RunJobs, by job queue and status."),
+    (
+        "rodan_held_workflow_runs",
+        "gauge",
+        "WorkflowRuns with RunJobs held by admission control.",
+    ),
+    ("rodan_worker_active_tasks", "gauge", "Tasks being executed, by worker."),
+    ("rodan_worker_scheduled_tasks", "gauge", "Tasks with an ETA, by worker."),
+    ("rodan_metrics_sample_age_seconds", "gauge", "Age of the last sample."),
+    (
+        "rodan_runjob_queue_wait_seconds",
+        "histogram",
+        "Seconds from the dispatch of a RunJob to its start, by job queue.",
+    ),
+    (
+        "rodan_runjob_duration_seconds",
+        "histogram",
+        "Wall time of the automatic phase of the RunJobs, by job name.",
+    ),
+    ("rodan_celery_tasks_total", "counter", "Celery tasks that ended, by task and state."),
+    (
+        "rodan_celery_task_seconds_total",
+        "counter",
+        "Seconds spent in the Celery tasks that ended, by task.",
+    ),
+)
+_TYPES = dict((name, type_) for name, type_, _ in METRICS)
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def series(name, **labels):
+    """
+    The name of a series in the Prometheus text format: `name{label="value",...}`.
+    """
+    if not labels:
+        return name
+    return "{0}{{{1}}}".format(
+        name,
+        ",".join('{0}="{1}"'.format(k, _escape(v)) for k, v in sorted(labels.items())),
+    )
+
+
+def _family(name):
+    name = name.split("{", 1)[0]
+    for suffix in ("_bucket", "_sum", "_count"):
+        if name.endswith(suffix) and name[: -len(suffix)] in _TYPES:
+            return name[: -len(suffix)]
+    return name
+
+
+def _format(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+# Counters
+
+def _observe(pipe, name, buckets, value, **labels):
+    # Every bucket is created, so that the histogram is complete from the first value.
+    for bound in buckets:
+        pipe.hincrby(
+            COUNTERS_KEY,
+            series(name + "_bucket", le="{0:g}".format(bound), **labels),
+            1 if value <= bound else 0,
+        )
+    pipe.hincrby(COUNTERS_KEY, series(name + "_bucket", le="+Inf", **labels), 1)
+    pipe.hincrbyfloat(COUNTERS_KEY, series(name + "_sum", **labels), value)
+    pipe.hincrby(COUNTERS_KEY, series(name + "_count", **labels), 1)
+
+
+def observe_runjob(runjob, queue_wait_time, wall_time):
+    """
+    Count the automatic phase of `runjob` (see `rodan.jobs.metrics.record`).
+    """
+    try:
+        pipe = get_redis_connection().pipeline(transaction=False)
+        if queue_wait_time is not None:
+            _observe(
+                pipe,
+                "rodan_runjob_queue_wait_seconds",
+                LATENCY_BUCKETS,
+                queue_wait_time,
+                job_queue=runjob.job_queue,
+            )
+        _observe(
+            pipe,
+            "rodan_runjob_duration_seconds",
+            DURATION_BUCKETS,
+            wall_time,
+            job_name=runjob.job_name,
+        )
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning("Cannot count RunJob %s: %s", runjob.uuid, e)
+
+
+_task_started = {}  # Celery task ID => time
+
+
+@task_prerun.connect
+def on_task_prerun(sender=None, task_id=None, **kwargs):
+    _task_started[task_id] = time.time()
+
+
+@task_postrun.connect
+def on_task_postrun(sender=None, task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    try:
+        pipe = get_redis_connection().pipeline(transaction=False)
+        pipe.hincrby(
+            COUNTERS_KEY,
+            series("rodan_celery_tasks_total", task=task.name, state=state or "UNKNOWN"),
+            1,
+        )
+        if started is not None:
+            pipe.hincrbyfloat(
+                COUNTERS_KEY,
+                series("rodan_celery_task_seconds_total", task=task.name),
+                time.time() - started,
+            )
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning("Cannot count task %s: %s", task_id, e)
+
+
+def counters():
+    return dict(
+        (_decode(k), float(_decode(v)))
+        for k, v in get_redis_connection().hgetall(COUNTERS_KEY).items()
+    )
+
+
+# Sample
+
+def queue_depths(queues):
+    """
+    Returns queue => {"messages", "consumers"}, for the queues declared on the broker.
+    """
+    depths = {}
+    with current_app.connection() as conn:
+        for queue in sorted(queues):
+            # Declaring a queue that does not exist closes the channel: one per queue.
+            channel = conn.channel()
+            try:
+                _, messages, consumers = channel.queue_declare(queue=queue, passive=True)
+                depths[queue] = {"messages": messages, "consumers": consumers}
+            except conn.channel_errors:
+                pass
+            finally:
+                try:
+                    channel.close()
+                except Exception:
+                    pass
+    return depths
+
+
+def runjob_counts():
+    """
+    Returns the RunJobs that are scheduled, processing or waiting for input: a list of
+    {"job_queue", "status", "count"}.
+    """
+    return [
+        {"job_queue": job_queue, "status": ACTIVE_STATUSES[status], "count": count}
+        for job_queue, status, count in RunJob.objects.filter(
+            status__in=list(ACTIVE_STATUSES)
+        )
+        .values_list("job_queue", "status")
+        .annotate(count=Count("uuid"))
+        .order_by()
+    ]
+
+
+def inspect_workers():
+    inspect = current_app.control.inspect(
+        timeout=getattr(settings, "RODAN_METRICS_INSPECT_TIMEOUT", 1.0)
+    )
+    return {
+        "active": inspect.active(),
+        "scheduled": inspect.scheduled(),
+        "stats": inspect.stats(),
+    }
+
+
+def collect():
+    """
+    Sample what is not counted, and store the sample. A source that fails is left out
+    of the sample.
+    """
+    sample = {"sampled": time.time()}
+    try:
+        sample["runjobs"] = runjob_counts()
+    except Exception:
+        logger.warning("Cannot count the RunJobs", exc_info=True)
+    try:
+        sample["held_workflow_runs"] = len(admission.held_workflow_runs())
+        queues = set(["celery"])
+        for worker in placement.workers().values():
+            queues.update(worker["queues"])
+    except redis.RedisError as e:
+        logger.warning("Cannot read the live workers: %s", e)
+    else:
+        try:
+            sample["queues"] = queue_depths(queues)
+        except Exception:
+            logger.warning("Cannot measure the queues of the broker", exc_info=True)
+    try:
+        sample["workers"] = inspect_workers()
+    except Exception:
+        logger.warning("Cannot inspect the workers", exc_info=True)
+
+    interval = getattr(settings, "RODAN_METRICS_INTERVAL", 15)
+    get_redis_connection().set(
+        SAMPLE_KEY, json.dumps(sample, default=str), ex=int(interval * 5)
+    )
+    return sample
+
+
+def last_sample():
+    """
+    Returns the last sample, or None if it is too old (is Celery beat running?).
+    """
+    try:
+        value = get_redis_connection().get(SAMPLE_KEY)
+    except redis.RedisError as e:
+        logger.warning("Cannot read the metrics sample: %s", e)
+        return None
+    return json.loads(_decode(value)) if value else None
+
+
+def render():
+    """
+    The counters and the last sample, in the Prometheus text format.
+    """
+    families = dict((name, []) for name in _TYPES)
+    sample = last_sample() or {}
+    if "sampled" in sample:
+        families["rodan_metrics_sample_age_seconds"].append(
+            ("rodan_metrics_sample_age_seconds", time.time() - sample["sampled"])
+        )
+    for queue, depth in sample.get("queues", {}).items():
+        families["rodan_queue_messages"].append(
+            (series("rodan_queue_messages", queue=queue), depth["messages"])
+        )
+        families["rodan_queue_consumers"].append(
+            (series("rodan_queue_consumers", queue=queue), depth["consumers"])
+        )
+    for row in sample.get("runjobs", []):
+        families["rodan_runjobs"].append(
+            (
+                series("rodan_runjobs", job_queue=row["job_queue"], status=row["status"]),
+                row["count"],
+            )
+        )
+    if "held_workflow_runs" in sample:
+        families["rodan_held_workflow_runs"].append(
+            ("rodan_held_workflow_runs", sample["held_workflow_runs"])
+        )
+    workers = sample.get("workers", {})
+    for key in ("active", "scheduled"):
+        name = "rodan_worker_{0}_tasks".format(key)
+        for worker, tasks in (workers.get(key) or {}).items():
+            families[name].append((series(name, worker=worker), len(tasks)))
+    try:
+        for name, value in counters().items():
+            if _family(name) in families:
+                families[_family(name)].append((name, value))
+    except redis.RedisError as e:
+        logger.warning("Cannot read the metrics counters: %s", e)
+
+    lines = []
+    for name, type_, help_ in METRICS:
+        lines.append("# HELP {0} {1}".format(name, help_))
+        lines.append("# TYPE {0} {1}".format(name, type_))
+        for s, value in sorted(families[name]):
+            lines.append("{0} {1}".format(s, _format(value)))
+    return "\n".join(lines) + "\n"
+
+
+class collect_metrics(Task):
+    name = "rodan.core.collect_metrics"
+    queue = "celery"
+    ignore_result = True
+
+    def run(self):
+        interval = getattr(settings, "RODAN_METRICS_INTERVAL", 15)
+        try:
+            collector_lock = get_redis_connection().lock(LOCK_KEY, timeout=interval)
+            if not collector_lock.acquire(blocking=False):
+                return None  # the previous sample is still being taken
+            try:
+                collect()
+            finally:
+                collector_lock.release()
+        except redis.RedisError as e:
+            logger.warning("Cannot collect the metrics: %s", e)
+        return None
@@ -0,0 +1,260 @@
+"""
+Capacity-aware placement of RunJobs on Celery workers.
+
+Jobs may declare resource hints as a class attribute (persisted on `Job`):
+
+    resource_hints = {"memory": 4096, "cpu": 4, "scratch": 10240}
+
+that is, the expected peak memory (MiB), the number of CPU threads and the scratch disk
+space (MiB) of one RunJob.
+
+Each worker advertises its capacity (`RODAN_WORKER_CAPACITY`, or what the machine
+has) and the queues it consumes in the Redis hash `rodan:workers` when it starts, and
+refreshes it with its heartbeats. When the master task dispatches a RunJob with hints,
+`place` picks a live worker that consumes its job queue and whose remaining budget
+(capacity minus the hints of the RunJobs already placed on it, kept in
+`rodan:placement:reserved`) fits the hints, and the RunJob is sent to the direct queue
+of that worker (`CELERY_WORKER_DIRECT`). If none fits, the RunJob is held like the
+RunJobs held by admission control (see `rodan.jobs.admission`) until a reservation is
+released.
+
+RunJobs without hints, or whose job queue no worker advertises, take the usual route
+through their job queue. Because heavy RunJobs are only sent to workers that have room
+for them, the concurrency of the workers can be raised for light jobs.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+
+from celery.signals import heartbeat_sent, worker_ready, worker_shutdown
+from django.conf import settings
+import redis
+
+from rodan.cache import get_redis_connection
+from rodan.jobs import catalogue
+
+logger = logging.getLogger("rodan")
+
+WORKERS_KEY = "rodan:workers"
+RESERVED_KEY = "rodan:placement:reserved"
+HINTS = ("memory", "cpu", "scratch")
+
+
+def default_capacity():
+    """
+    The capacity of this machine: physical memory and free scratch space in MiB, and
+    the number of CPUs.
+    """
+    capacity = {"cpu": multiprocessing.cpu_count()}
+    try:
+        capacity["memory"] = (
+            os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+        )
+    except (AttributeError, ValueError, OSError):
+        pass
+    try:
+        st = os.statvfs(tempfile.gettempdir())
+        capacity["scratch"] = st.f_bavail * st.f_frsize // (1024 * 1024)
+    except (AttributeError, OSError):
+        pass
+    return capacity
+
+
+def advertise(hostname, queues, capacity=None):
+    if capacity is None:
+        capacity = getattr(settings, "RODAN_WORKER_CAPACITY", None) or default_capacity()
+    worker = {"queues": sorted(queues), "capacity": capacity, "seen": time.time()}
+    get_redis_connection().hset(WORKERS_KEY, hostname, json.dumps(worker))
+
+
+def withdraw(hostname):
+    get_redis_connection().hdel(WORKERS_KEY, hostname)
+
+
+def workers():
+    """
+    Returns the live workers: hostname => {"queues", "capacity", "seen"}.
+    """
+    ttl = getattr(settings, "RODAN_WORKER_CAPACITY_TTL", 120)
+    live = {}
+    for hostname, value in get_redis_connection().hgetall(WORKERS_KEY).items():
+        worker = json.loads(value.decode() if isinstance(value, bytes) else value)
+        if time.time() - worker["seen"] < ttl:
+            live[hostname.decode() if isinstance(hostname, bytes) else hostname] = worker
+    return live
+
+
+def reservations():
+    """
+    Returns the RunJobs placed on workers and not finished: RunJob UUID =>
+    {"worker", hints...}.
+    """
+    return dict(
+        (
+            k.decode() if isinstance(k, bytes) else k,
+            json.loads(v.decode() if isinstance(v, bytes) else v),
+        )
+        for k, v in get_redis_connection().hgetall(RESERVED_KEY).items()
+    )
+
+
+def _fits(hints, free):
+    return all(hints.get(h, 0) <= free.get(h, float("inf")) for h in HINTS)
+
+
+def applies(runjobs):
+    """
+    Whether `place` may send some of `runjobs` to a worker: their jobs have hints and
+    workers advertise their capacity.
+    """
+    if not any(
+        job.resource_hints
+        for job in catalogue.cache.jobs(rj["job_name"] for rj in runjobs).values()
+    ):
+        return False
+    try:
+        return bool(workers())
+    except redis.RedisError as e:
+        logger.warning("Cannot place RunJobs on workers: %s", e)
+        return False
+
+
+def place(runjobs):
+    """
+    Split `runjobs` (dictionaries with at least `uuid`, `job_name` and `job_queue`, in
+    order of preference) into the ones that can be dispatched, with a `worker` key
+    (None for the usual route), and the ones that must wait. Must be called under
+    `admission.lock()`.
+    """
+    for rj in runjobs:
+        rj["worker"] = None
+    try:
+        live = workers()
+        if not live or not runjobs:
+            return runjobs, []
+        used = dict((hostname, dict.fromkeys(HINTS, 0)) for hostname in live)
+        for r in reservations().values():
+            if r["worker"] in used:
+                for h in HINTS:
+                    used[r["worker"]][h] += r.get(h, 0)
+    except redis.RedisError as e:
+        logger.warning("Cannot place RunJobs on workers: %s", e)
+        return runjobs, []
+
+    hints = dict(
+        (name, job.resource_hints)
+        for name, job in catalogue.cache.jobs(rj["job_name"] for rj in runjobs).items()
+    )
+    placed, waiting, reserved = [], [], {}
+    for rj in runjobs:
+        rj_hints = hints.get(rj["job_name"]) or {}
+        candidates = [
+            hostname for hostname, w in live.items()
+            if rj["job_queue"] in w["queues"] and _fits(rj_hints, w["capacity"])
+        ]
+        if not any(rj_hints.get(h) for h in HINTS) or not candidates:
+            placed.append(rj)  # the usual route
+            continue
+
+        def free(hostname):
+            capacity = live[hostname]["capacity"]
+            return dict(
+                (h, capacity.get(h, float("inf")) - used[hostname][h]) for h in HINTS
+            )
+
+        fitting = [hostname for hostname in candidates if _fits(rj_hints, free(hostname))]
+        if not fitting:
+            waiting.append(rj)
+            continue
+        # Worst fit: the worker with the most free memory, then CPUs.
+        worker = max(fitting, key=lambda hostname: (
+            free(hostname)["memory"], free(hostname)["cpu"]
+        ))
+        for h in HINTS:
+            used[worker][h] += rj_hints.get(h, 0)
+        rj["worker"] = worker
+        reserved[str(rj["uuid"])] = json.dumps(dict(rj_hints, worker=worker))
+        placed.append(rj)
+
+    if reserved:
+        try:
+            get_redis_connection().hmset(RESERVED_KEY, reserved)
+        except redis.RedisError as e:
+            logger.warning("Cannot reserve worker capacity: %s", e)
+    return placed, waiting
+
+
+def unreserve(runjob_ids):
+    """
+    Release the capacity reserved for the RunJobs.
+    """
+    runjob_ids = [str(rj_id) for rj_id in runjob_ids]
+    if not runjob_ids:
+        return
+    try:
+        get_redis_connection().hdel(RESERVED_KEY, *runjob_ids)
+    except redis.RedisError as e:
+        logger.warning("Cannot release worker capacity: %s", e)
+
+
+def snapshot():
+    """
+    Live workers with their capacity and the hints of the RunJobs placed on them.
+    """
+    try:
+        live = workers()
+        reserved = reservations()
+    except redis.RedisError as e:
+        logger.warning("Cannot read worker capacity: %s", e)
+        return {}
+    for w in live.values():
+        w["used"] = dict.fromkeys(HINTS, 0)
+        w["runjobs"] = 0
+    for r in reserved.values():
+        if r["worker"] in live:
+            live[r["worker"]]["runjobs"] += 1
+            for h in HINTS:
+                live[r["worker"]]["used"][h] += r.get(h, 0)
+    return live
+
+
+# Worker side
+
+_advertised = {}
+
+
+@worker_ready.connect
+def on_worker_ready(sender=None, **kwargs):
+    try:
+        queues = list(sender.app.amqp.queues.consume_from.keys())
+    except AttributeError:
+        queues = list(sender.app.amqp.queues.keys())
+    _advertised.update(hostname=sender.hostname, queues=queues, refreshed=time.time())
+    try:
+        advertise(sender.hostname, queues)
+    except redis.RedisError as e:
+        logger.warning("Cannot advertise the capacity of the worker: %s", e)
+
+
+@heartbeat_sent.connect
+def on_heartbeat_sent(sender=None, **kwargs):
+    ttl = getattr(settings, "RODAN_WORKER_CAPACITY_TTL", 120)
+    if not _advertised or time.time() - _advertised["refreshed"] < ttl / 4.0:
+        return
+    _advertised["refreshed"] = time.time()
+    try:
+        advertise(_advertised["hostname"], _advertised["queues"])
+    except redis.RedisError as e:
+        logger.warning("Cannot advertise the capacity of the worker: %s", e)
+
+
+@worker_shutdown.connect
+def on_worker_shutdown(sender=None, **kwargs):
+    if _advertised:
+        try:
+            withdraw(_advertised["hostname"])
+        except redis.RedisError as e:
+            logger.warning("Cannot withdraw the capacity of the worker: %s", e)
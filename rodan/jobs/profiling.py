@@ -0,0 +1,166 @@
+"""
+On-demand profiling of RunJobs.
+
+`WorkflowRun.profile` -- or, for the RunJobs of one WorkflowJob, `WorkflowJob.profile`
+-- is copied to `RunJob.profile` when the RunJobs are created. `RodanTask.run` then
+runs the RunJob in a `Profiler`:
+
+- `job` -- around `run_my_task` only: the code of the job package;
+- `task` -- around the whole of `RodanTask.run`: the job and the bookkeeping of Rodan
+  around it (the queries of the inputs and outputs, the ingestion of the outputs, the
+  status, progress and metrics writes).
+
+The profiler is the deterministic `cProfile`. Along with it, the `Profiler` tracks the
+memory high-water marks of the block: the peak of the Python allocations (with
+`tracemalloc`, on Python 3) and the peak RSS of the worker process (reset before the
+block, on Linux) and of its subprocesses.
+
+The profile is saved as a `Resource` of the project (`RunJob.profile_resource`), so that
+it can be downloaded through the API: a `pstats` dump, to open with `python -m pstats`
+or any viewer of `cProfile` dumps. Its description has the memory high-water marks and
+the functions with the most cumulative time.
+
+With profiling off, `RodanTask.run` only compares `RunJob.profile` to the modes.
+"""
+import cProfile
+import logging
+import marshal
+import pstats
+import resource
+import sys
+import time
+
+from django.core.files.base import ContentFile
+from six import StringIO
+
+from rodan.constants import profiling as modes, task_status
+from rodan.jobs import catalogue
+from rodan.models import Resource, RunJob, WorkflowRun
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+logger = logging.getLogger("rodan")
+
+# Modes, for `from rodan.jobs import profiling`.
+OFF, JOB, TASK = modes.OFF, modes.JOB, modes.TASK
+
+# ru_maxrss is in kilobytes on Linux, in bytes on macOS.
+_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+# Functions listed in the description of the profile.
+TOP_FUNCTIONS = 30
+
+
+def _reset_peak_rss():
+    # Linux 4.0+: reset the high-water mark of the RSS of the process, so that the peak
+    # measured after the block is the peak of the block, not of the life of the worker.
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except (IOError, OSError):
+        return False
+
+
+def _cpu_time():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _peak_rss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_UNIT
+
+
+def _format_bytes(n):
+    if n is None:
+        return "unknown"
+    return "{0:.1f} MiB".format(n / 1048576.0)
+
+
+class Profiler(object):
+    """
+    Profile the block of a `with` statement, then save the profile as the
+    `profile_resource` of the RunJob. Saving never raises: a profile is not worth
+    failing the RunJob for.
+    """
+
+    def __init__(self, runjob):
+        self.runjob = runjob
+        self.profiler = cProfile.Profile()
+
+    def __enter__(self):
+        self.peak_rss_reset = _reset_peak_rss()
+        self.tracing_memory = tracemalloc is not None and not tracemalloc.is_tracing()
+        if self.tracing_memory:
+            tracemalloc.start()
+        self.started = time.time()
+        self.cpu_started = _cpu_time()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.disable()
+        self.wall_time = time.time() - self.started
+        self.cpu_time = _cpu_time() - self.cpu_started
+        self.peak_rss = _peak_rss() if self.peak_rss_reset else None
+        self.peak_children_rss = (
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * _MAXRSS_UNIT
+        )
+        self.peak_python = None
+        if self.tracing_memory:
+            self.peak_python = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        self.error = None
+        if exc_type is not None:
+            self.error = "{0}: {1}".format(exc_type.__name__, exc_value)
+        try:
+            self.save()
+        except Exception:
+            logger.warning("Cannot save the profile of %s", self.runjob, exc_info=True)
+        return False
+
+    def summary(self):
+        stream = StringIO()
+        stats = pstats.Stats(self.profiler, stream=stream)
+        stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+        lines = [
+            "Profile of RunJob {0} ({1}), mode: {2}".format(
+                self.runjob.uuid, self.runjob.job_name, self.runjob.profile
+            ),
+            "Wall time: {0:.3f}s, CPU time of the worker: {1:.3f}s".format(
+                self.wall_time, self.cpu_time
+            ),
+            "Peak RSS: {0}, of the subprocesses of the worker: {1}".format(
+                _format_bytes(self.peak_rss), _format_bytes(self.peak_children_rss)
+            ),
+            "Peak of the Python allocations: {0}".format(_format_bytes(self.peak_python)),
+        ]
+        if self.error:
+            lines.append("Ended with {0}".format(self.error))
+        return "\n".join(lines) + "\n" + stream.getvalue()
+
+    def save(self):
+        # What `cProfile.Profile.dump_stats` writes, without a temporary file.
+        self.profiler.create_stats()
+        data = marshal.dumps(self.profiler.stats)
+
+        project_id, creator_id = WorkflowRun.objects.filter(
+            uuid=self.runjob.workflow_run_id
+        ).values_list("project_id", "creator_id")[0]
+        r = Resource(
+            project_id=project_id,
+            creator_id=creator_id,
+            resource_type=catalogue.cache.resource_type("application/octet-stream"),
+            name="profile-{0}-{1}.prof".format(
+                self.runjob.job_name.split(".")[-1], self.runjob.uuid.hex
+            ),
+            description=self.summary(),
+            processing_status=task_status.NOT_APPLICABLE,
+        )
+        r.save()
+        r.resource_file.save(r.name, ContentFile(data), save=False)
+        r.save(update_fields=["resource_file"])
+        RunJob.objects.filter(uuid=self.runjob.uuid).update(profile_resource=r)
+        return r
@@ -0,0 +1,164 @@
+"""
+Progress counters of WorkflowRuns.
+
+For each WorkflowRun, a Redis hash counts its RunJobs per status and job name
+(field `<status>:<job_name>`). The counters are updated incrementally wherever a
+RunJob changes status, and rebuilt from the database after bulk operations
+(creation, cancel, retry, redo) or whenever they are missing.
+
+Every change also publishes the new snapshot to the websocket facility of the
+WorkflowRun (see rodan/websocket.py), as a message `{"model": "progress", ...}`.
+"""
+from collections import OrderedDict
+import json
+import logging
+import uuid
+
+from django.conf import settings
+from django.db.models import Count
+import redis
+
+from rodan.cache import get_redis_connection
+from rodan.constants import task_status
+from rodan.jobs import tracing
+from rodan.models import RunJob
+from rodan.websocket import workflowrun_facility
+
+logger = logging.getLogger("rodan")
+
+# Counters of finished runs are not needed for long; they are rebuilt on demand anyway.
+PROGRESS_EXPIRE = 7 * 24 * 3600
+
+STATUS_NAMES = OrderedDict([
+    (task_status.SCHEDULED, "scheduled"),
+    (task_status.PROCESSING, "processing"),
+    (task_status.WAITING_FOR_INPUT, "waiting_for_input"),
+    (task_status.FINISHED, "finished"),
+    (task_status.FAILED, "failed"),
+    (task_status.CANCELLED, "cancelled"),
+])
+
+
+def _key(wfrun_id):
+    return "rodan:progress:{0}".format(uuid.UUID(str(wfrun_id)).hex)
+
+
+def _field(status, job_name):
+    return "{0}:{1}".format(status, job_name)
+
+
+@tracing.traced("progress.rebuild")
+def rebuild(wfrun_id, publish=True):
+    """
+    Recount the RunJobs of the WorkflowRun from the database.
+    """
+    rows = (
+        RunJob.objects.filter(workflow_run_id=wfrun_id)
+        .values_list("status", "job_name")
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    counters = dict((_field(s, name), c) for s, name, c in rows)
+    try:
+        pipe = get_redis_connection().pipeline()
+        pipe.delete(_key(wfrun_id))
+        # An empty marker field, so that a run without RunJobs still has counters.
+        pipe.hmset(_key(wfrun_id), dict(counters, **{"": 0}))
+        pipe.expire(_key(wfrun_id), PROGRESS_EXPIRE)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning("Cannot store the progress of WorkflowRun %s: %s", wfrun_id, e)
+        return counters
+    if publish:
+        _publish(wfrun_id, counters)
+    return counters
+
+
+@tracing.traced("progress.record")
+def record(wfrun_id, changes):
+    """
+    Record status changes of RunJobs of the WorkflowRun, after they are written to
+    the database. `changes` is a list of `(job_name, old_status, new_status)`.
+    """
+    if not changes:
+        return
+    try:
+        r = get_redis_connection()
+        if not r.exists(_key(wfrun_id)):
+            rebuild(wfrun_id)
+            return
+        pipe = r.pipeline()
+        for job_name, old_status, new_status in changes:
+            if old_status != new_status:
+                pipe.hincrby(_key(wfrun_id), _field(old_status, job_name), -1)
+                pipe.hincrby(_key(wfrun_id), _field(new_status, job_name), 1)
+        pipe.expire(_key(wfrun_id), PROGRESS_EXPIRE)
+        pipe.hgetall(_key(wfrun_id))
+        counters = pipe.execute()[-1]
+    except redis.RedisError as e:
+        logger.warning("Cannot record the progress of WorkflowRun %s: %s", wfrun_id, e)
+        return
+    _publish(wfrun_id, _decode(counters))
+
+
+def _decode(raw):
+    return dict((k.decode("utf-8"), int(v)) for k, v in raw.items() if k)
+
+
+def _counters(wfrun_id):
+    try:
+        raw = get_redis_connection().hgetall(_key(wfrun_id))
+    except redis.RedisError as e:
+        logger.warning("Cannot read the progress of WorkflowRun %s: %s", wfrun_id, e)
+        raw = None
+    if not raw:
+        return rebuild(wfrun_id, publish=False)
+    return _decode(raw)
+
+
+def _summarize(counters):
+    totals = OrderedDict((name, 0) for name in STATUS_NAMES.values())
+    jobs = {}
+    for field, count in counters.items():
+        status, _, job_name = field.partition(":")
+        name = STATUS_NAMES.get(int(status))
+        if name is None or count <= 0:
+            continue
+        totals[name] += count
+        if job_name not in jobs:
+            jobs[job_name] = OrderedDict((n, 0) for n in STATUS_NAMES.values())
+        jobs[job_name][name] += count
+    return totals, OrderedDict(sorted(jobs.items()))
+
+
+def snapshot(wfrun):
+    """
+    Return the progress of a WorkflowRun: RunJob counts per status, in total and per
+    job name.
+    """
+    totals, jobs = _summarize(_counters(wfrun.uuid))
+    return OrderedDict([
+        ("workflow_run", str(wfrun.uuid)),
+        ("status", wfrun.status),
+        ("total", sum(totals.values())),
+        ("counts", totals),
+        ("jobs", jobs),
+    ])
+
+
+def _publish(wfrun_id, counters):
+    totals, jobs = _summarize(counters)
+    message = OrderedDict([
+        ("model", "progress"),
+        ("workflow_run", uuid.UUID(str(wfrun_id)).hex),
+        ("total", sum(totals.values())),
+        ("counts", totals),
+        ("jobs", jobs),
+    ])
+    channel = "{0}:broadcast:{1}".format(
+        settings.WS4REDIS_PREFIX, workflowrun_facility(wfrun_id)
+    )
+    try:
+        get_redis_connection().publish(channel, json.dumps(message))
+    except redis.RedisError as e:
+        logger.warning("Cannot publish the progress of WorkflowRun %s: %s", wfrun_id, e)
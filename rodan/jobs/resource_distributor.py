@@ -3,6 +3,10 @@ import shutil
 from rodan.jobs.base import RodanTask
 from rodan.models import ResourceType
 
+# Evaluated once at import. The settings refer to the mimetypes by their index: keep the
+# order of the database.
+MIMETYPES = [str(mimetype) for mimetype in ResourceType.objects.values_list("mimetype", flat=True)]
+
 
 class ResourceDistributor(RodanTask):
     name = 'Resource Distributor'
@@ -13,7 +17,7 @@ class ResourceDistributor(RodanTask):
         'type': 'object',
         'properties': {
             'Resource type': {
-                'enum': map(lambda rt: str(rt.mimetype), ResourceType.objects.all()),
+                'enum': MIMETYPES,
                 'type': 'string',
                 'default': 'application/octet-stream',
                 'description': 'Specifies the eligible resource types for input'
@@ -23,6 +27,7 @@ class ResourceDistributor(RodanTask):
     enabled = True
     category = "Miscellaneous"
     interactive = False
+    fusible = True
     error_summary = ""
     error_details = ""
 
@@ -31,7 +36,7 @@ class ResourceDistributor(RodanTask):
             'name': 'Resource input',
             'minimum': 1,
             'maximum': 1,
-            'resource_types': map(lambda rt: str(rt.mimetype), ResourceType.objects.all())
+            'resource_types': MIMETYPES
         },
     )
     output_port_types = (
@@ -39,7 +44,7 @@ class ResourceDistributor(RodanTask):
             'name': 'Resource output',
             'minimum': 1,
             'maximum': 1,
-            'resource_types': map(lambda rt: str(rt.mimetype), ResourceType.objects.all())
+            'resource_types': MIMETYPES
         },
     )
 
@@ -0,0 +1,305 @@
+"""
+Supervision of the RunJobs being executed.
+
+`RodanTask.run` records each execution of a RunJob (a copy) in the Redis hash
+`rodan:supervisor:copies`: Celery task id => RunJob, worker and start time. Every
+`RODAN_SUPERVISOR_INTERVAL` seconds, Celery beat runs `rodan.core.supervise_runjobs`,
+which:
+
+- requeues the PROCESSING RunJobs whose copies all ran on workers that stopped
+  advertising themselves (see `rodan.jobs.placement`): the worker died and took the
+  Celery task with it. The RunJob goes back to SCHEDULED and the master task dispatches
+  it again;
+- launches a speculative copy of the RunJobs that have been running for longer than
+  `RODAN_SUPERVISOR_STRAGGLER_FACTOR` times the `RODAN_SUPERVISOR_STRAGGLER_PERCENTILE`
+  percentile of the wall time of their job (see `rodan.jobs.estimator`), and at least
+  `RODAN_SUPERVISOR_STRAGGLER_MIN_TIME` seconds. At most one copy is launched per
+  RunJob, and none for jobs with resource hints, as the copy would need a second
+  reservation on a worker;
+- releases the worker capacity reserved for RunJobs that are no longer running, and the
+  WorkflowRuns held waiting for it (see `rodan.jobs.admission`).
+
+The first copy to end wins: before it writes its outputs or its failure, a copy must
+`claim` the RunJob, which atomically marks it with the id of its Celery task. The other
+copies then discard their results. A claim also requires the RunJob to still be
+PROCESSING in the dispatch the copy started in -- the `updated` time the master task
+set when it dispatched the RunJob: once the winner has ended the phase (even by waiting
+for input), or the RunJob has been requeued and dispatched again, the copies of the
+previous dispatch cannot claim it.
+"""
+from collections import defaultdict
+import json
+import logging
+import time
+import uuid
+
+from celery import registry
+from celery import Task
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+import redis
+
+from rodan.cache import get_redis_connection
+from rodan.constants import task_status
+from rodan.jobs import admission
+from rodan.jobs import catalogue
+from rodan.jobs import placement
+from rodan.jobs import progress
+from rodan.jobs.estimator import Estimator
+from rodan.models import RunJob
+
+logger = logging.getLogger("rodan")
+
+COPIES_KEY = "rodan:supervisor:copies"
+LOCK_KEY = "rodan:supervisor:lock"
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+_dispatches = {}  # (Celery task id, RunJob UUID) => `updated` of the RunJob at start
+
+
+def started(runjob_id, task_id, worker, dispatched=None):
+    """
+    Record that the Celery task `task_id` started a copy of the RunJob on `worker`, in
+    the dispatch of the RunJob at `dispatched` (its `updated` time).
+    """
+    if task_id is None:  # called outside of Celery
+        return
+    _dispatches[(task_id, str(runjob_id))] = dispatched
+    copy = {"runjob": str(runjob_id), "worker": worker, "started": time.time()}
+    try:
+        get_redis_connection().hset(COPIES_KEY, task_id, json.dumps(copy))
+    except redis.RedisError as e:
+        logger.warning("Cannot record the copy of RunJob %s: %s", runjob_id, e)
+
+
+def ended(*task_ids):
+    task_ids = [t for t in task_ids if t is not None]
+    if not task_ids:
+        return
+    for key in [k for k in _dispatches if k[0] in task_ids]:
+        del _dispatches[key]
+    try:
+        get_redis_connection().hdel(COPIES_KEY, *task_ids)
+    except redis.RedisError as e:
+        logger.warning("Cannot forget the copies %s: %s", task_ids, e)
+
+
+def copies():
+    """
+    Returns the recorded copies: Celery task id => {"runjob", "worker", "started"}.
+    `worker` and `started` are None for the copies that have not started yet.
+    """
+    return dict(
+        (_decode(task_id), json.loads(_decode(copy)))
+        for task_id, copy in get_redis_connection().hgetall(COPIES_KEY).items()
+    )
+
+
+def copies_of(runjob_ids):
+    """
+    Returns the Celery task ids of the recorded copies of the RunJobs.
+    """
+    runjob_ids = set(str(rj_id) for rj_id in runjob_ids)
+    try:
+        return [t for t, copy in copies().items() if copy["runjob"] in runjob_ids]
+    except redis.RedisError as e:
+        logger.warning("Cannot read the copies of RunJobs: %s", e)
+        return []
+
+
+def claim(runjob_id, task_id):
+    """
+    Make the copy run by the Celery task `task_id` the one whose results are kept.
+    Returns False if another copy ended first, if the RunJob is no longer PROCESSING
+    (it ended, was cancelled or waits for input), or if it has been dispatched again
+    since the copy started.
+    """
+    query = RunJob.objects.filter(
+        Q(uuid=runjob_id)
+        & Q(status=task_status.PROCESSING)
+        & (Q(lock__isnull=True) | Q(lock=task_id))
+    )
+    dispatched = _dispatches.get((task_id, str(runjob_id)))
+    if dispatched is not None:
+        query = query.filter(updated=dispatched)
+    return query.update(lock=task_id) == 1
+
+
+def requeue(runjob_ids):
+    """
+    Send the PROCESSING RunJobs back to the master task.
+    """
+    wfrun_ids = set()
+    for runjob_id, job_name, wfrun_id in RunJob.objects.filter(
+        uuid__in=runjob_ids
+    ).values_list("uuid", "job_name", "workflow_run_id"):
+        if RunJob.objects.filter(uuid=runjob_id, status=task_status.PROCESSING).update(
+            status=task_status.SCHEDULED, lock=None, celery_task_id=None,
+            updated=timezone.now(),
+        ):
+            logger.warning("Requeuing RunJob %s: its worker is gone", runjob_id)
+            progress.record(
+                wfrun_id, [(job_name, task_status.PROCESSING, task_status.SCHEDULED)]
+            )
+            wfrun_ids.add(wfrun_id)
+    placement.unreserve(runjob_ids)
+    master_task = registry.tasks["rodan.core.master_task"]
+    for wfrun_id in wfrun_ids:
+        master_task.si(str(wfrun_id)).apply_async(queue="celery")
+
+
+def speculate(runjob_id, job_name, job_queue):
+    """
+    Launch a copy of the RunJob, with the highest priority.
+    """
+    task_id = str(uuid.uuid4())
+    copy = {"runjob": str(runjob_id), "worker": None, "started": None}
+    # Recorded first: the copy may start (and end) before apply_async returns.
+    get_redis_connection().hset(COPIES_KEY, task_id, json.dumps(copy))
+    logger.warning("Launching a speculative copy of RunJob %s", runjob_id)
+    registry.tasks[str(job_name)].si(str(runjob_id)).apply_async(
+        queue=str(job_queue),
+        priority=getattr(settings, "RODAN_MAX_TASK_PRIORITY", 9),
+        task_id=task_id,
+    )
+
+
+def straggler_threshold(estimator, job_name):
+    """
+    Returns the runtime in seconds beyond which a RunJob of the job is a straggler, or
+    None if the job does not have enough history.
+    """
+    wall_time = estimator.percentile(
+        job_name, getattr(settings, "RODAN_SUPERVISOR_STRAGGLER_PERCENTILE", 95)
+    )
+    if wall_time is None:
+        return None
+    return max(
+        wall_time * getattr(settings, "RODAN_SUPERVISOR_STRAGGLER_FACTOR", 2),
+        getattr(settings, "RODAN_SUPERVISOR_STRAGGLER_MIN_TIME", 300),
+    )
+
+
+def supervise():
+    """
+    One round of supervision. Returns the numbers of requeued RunJobs, speculative
+    copies and released reservations.
+    """
+    live = placement.workers()
+    by_runjob = defaultdict(dict)
+    for task_id, copy in copies().items():
+        by_runjob[copy["runjob"]][task_id] = copy
+    runjobs = dict(
+        (str(rj[0]), rj[1:])
+        for rj in RunJob.objects.filter(uuid__in=list(by_runjob)).values_list(
+            "uuid", "status", "lock", "job_name", "job_queue"
+        )
+    )
+
+    # Copies of RunJobs that have ended are left behind by dead workers, or still
+    # running after another copy won.
+    forgotten = [
+        task_id
+        for runjob_id, rj_copies in by_runjob.items()
+        if runjob_id not in runjobs or runjobs[runjob_id][0] != task_status.PROCESSING
+        for task_id in rj_copies
+    ]
+    if forgotten:
+        get_redis_connection().hdel(COPIES_KEY, *forgotten)
+
+    lost = []
+    stragglers = []
+    for runjob_id, rj_copies in by_runjob.items():
+        if runjob_id not in runjobs or runjobs[runjob_id][0] != task_status.PROCESSING:
+            continue
+        # Without any live worker, Redis has been flushed or the workers cannot reach
+        # it: no copy is considered lost.
+        if live and all(
+            copy["worker"] is not None and copy["worker"] not in live
+            for copy in rj_copies.values()
+        ):
+            lost.append(runjob_id)
+        elif len(rj_copies) == 1 and runjobs[runjob_id][1] is None:
+            copy = list(rj_copies.values())[0]
+            if copy["started"] is not None:
+                stragglers.append((runjob_id, time.time() - copy["started"]))
+
+    if lost:
+        get_redis_connection().hdel(
+            COPIES_KEY, *[task_id for rj_id in lost for task_id in by_runjob[rj_id]]
+        )
+        requeue(lost)
+
+    speculated = 0
+    if stragglers:
+        estimator = Estimator()
+        job_names = set(runjobs[runjob_id][2] for runjob_id, _ in stragglers)
+        hinted = set(
+            name for name, job in catalogue.cache.jobs(job_names).items() if job.resource_hints
+        )
+        # The longest running first.
+        for runjob_id, elapsed in sorted(stragglers, key=lambda s: -s[1]):
+            if speculated >= getattr(settings, "RODAN_SUPERVISOR_MAX_SPECULATIONS", 10):
+                break
+            _, _, job_name, job_queue = runjobs[runjob_id]
+            threshold = straggler_threshold(estimator, job_name)
+            if job_name in hinted or threshold is None or elapsed < threshold:
+                continue
+            speculate(runjob_id, job_name, job_queue)
+            speculated += 1
+
+    # Under the admission lock: the master task reserves capacity before it sets the
+    # RunJobs to PROCESSING.
+    with admission.lock():
+        reserved = placement.reservations()
+        running = set(
+            str(rj_id)
+            for rj_id in RunJob.objects.filter(
+                uuid__in=list(reserved), status=task_status.PROCESSING
+            ).values_list("uuid", flat=True)
+        )
+        stale = [
+            rj_id for rj_id, r in reserved.items()
+            if rj_id not in running or (live and r["worker"] not in live)
+        ]
+        placement.unreserve(stale)
+    # Sent to the direct queue of a worker that died before it started them.
+    orphaned = [
+        rj_id for rj_id in stale
+        if rj_id in running and rj_id not in by_runjob
+    ]
+    if orphaned:
+        requeue(orphaned)
+
+    if stale:
+        admission.release(slots=len(stale))
+    return {
+        "requeued": len(lost) + len(orphaned),
+        "speculated": speculated,
+        "unreserved": len(stale),
+    }
+
+
+class supervise_runjobs(Task):
+    name = "rodan.core.supervise_runjobs"
+    queue = "celery"
+    ignore_result = True
+
+    def run(self):
+        interval = getattr(settings, "RODAN_SUPERVISOR_INTERVAL", 60)
+        try:
+            supervisor_lock = get_redis_connection().lock(LOCK_KEY, timeout=interval)
+            if not supervisor_lock.acquire(blocking=False):
+                return None  # the previous round is still going
+            try:
+                return supervise()
+            finally:
+                supervisor_lock.release()
+        except redis.RedisError as e:
+            logger.warning("Cannot supervise RunJobs: %s", e)
+            return None
@@ -0,0 +1,316 @@
+"""
+Tracing of WorkflowRuns across the web process, the scheduler and the job workers.
+
+A trace is started when a WorkflowRun is created (`WorkflowRunList.perform_create`) and
+is identified by the UUID of the WorkflowRun. It is a tree of spans -- timed operations
+-- in the processes that take part in the run:
+
+- every Celery task sent while a span is open carries the trace context (the trace and
+  the span that sent it) in its message, and runs in a span that is a child of that
+  span: `create_workflowrun`, every pass of the master task, every job task;
+- within a task, `span` times a phase: the database-heavy phases of `RodanTask.run`
+  (`_inputs`, `_outputs`, the ingestion of the outputs), the writes of the progress and
+  of the metrics snapshots, `run_my_task`, and the subprocesses of `create_diva`.
+
+Spans are buffered in the process, and handed to the exporter named by
+`RODAN_TRACE_EXPORTER` when the outermost span of the process ends: `FileExporter`
+(JSON lines) or `DatabaseExporter` (`TraceSpan`s), or any class with the same
+`export(spans)` and `spans(trace_id)` methods. Without an exporter, nothing is traced.
+`manage.py trace_run` renders the timeline and the critical path of a WorkflowRun.
+"""
+from contextlib import contextmanager
+import datetime
+import functools
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+from celery.signals import before_task_publish, task_postrun, task_prerun
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger("rodan")
+
+# Name of the trace context in the Celery messages.
+CONTEXT_FIELD = "rodan_trace"
+
+_local = threading.local()
+_exporters = {}  # dotted path => exporter
+
+
+def enabled():
+    return bool(getattr(settings, "RODAN_TRACE_EXPORTER", None))
+
+
+def exporter():
+    path = settings.RODAN_TRACE_EXPORTER
+    if path not in _exporters:
+        _exporters[path] = import_string(path)()
+    return _exporters[path]
+
+
+def _state():
+    if not hasattr(_local, "stack"):
+        _local.stack = []  # open spans, innermost last
+        _local.buffer = []  # finished spans, not exported yet
+        _local.tasks = {}  # Celery task ID => its span
+    return _local
+
+
+class Span(object):
+    def __init__(self, name, trace_id, parent_id, attributes):
+        self.name = name
+        self.trace_id = trace_id
+        self.parent_id = parent_id
+        self.span_id = uuid.uuid4().hex
+        self.attributes = attributes
+        self.started = time.time()
+        self.duration = None
+
+    def context(self):
+        return {"trace_id": self.trace_id, "parent_id": self.span_id}
+
+    def record(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "started": self.started,
+            "duration": self.duration,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "attributes": self.attributes,
+        }
+
+
+def context():
+    """
+    Returns the trace context of the current span, or None.
+    """
+    stack = _state().stack
+    return stack[-1].context() if stack else None
+
+
+def start_span(name, context=None, **attributes):
+    """
+    Open a span, child of the current span, or of the remote span of `context` (a trace
+    context received from another process). Returns None if there is nothing to trace.
+    """
+    if not enabled():
+        return None
+    state = _state()
+    if context is not None:
+        trace_id, parent_id = context["trace_id"], context.get("parent_id")
+    elif state.stack:
+        trace_id, parent_id = state.stack[-1].trace_id, state.stack[-1].span_id
+    else:
+        return None
+    s = Span(name, trace_id, parent_id, attributes)
+    state.stack.append(s)
+    return s
+
+
+def finish_span(s):
+    if s is None:
+        return
+    s.duration = time.time() - s.started
+    state = _state()
+    if s in state.stack:
+        # Along with the spans it left open, if any.
+        del state.stack[state.stack.index(s):]
+    state.buffer.append(s.record())
+    if not state.stack:
+        flush()
+
+
+def flush():
+    state = _state()
+    spans, state.buffer = state.buffer, []
+    if not spans or not enabled():
+        return
+    try:
+        exporter().export(spans)
+    except Exception:
+        # Tracing must never break what it traces.
+        logger.warning("Cannot export %d trace spans", len(spans), exc_info=True)
+
+
+@contextmanager
+def span(name, context=None, **attributes):
+    """
+    Time the block as a child of the current span, if any (see `start_span`).
+    """
+    s = start_span(name, context=context, **attributes)
+    try:
+        yield s
+    except Exception as e:
+        if s is not None:
+            s.attributes["error"] = "{0}: {1}".format(type(e).__name__, e)
+        raise
+    finally:
+        finish_span(s)
+
+
+@contextmanager
+def trace(trace_id, name, **attributes):
+    """
+    Start the trace `trace_id` (the UUID of a WorkflowRun) with a root span.
+    """
+    with span(name, context={"trace_id": uuid.UUID(str(trace_id)).hex}, **attributes) as s:
+        yield s
+
+
+def traced(name):
+    """
+    Decorator: time every call of the function with `span`.
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _state().stack:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@before_task_publish.connect
+def inject_context(sender=None, body=None, headers=None, **kwargs):
+    ctx = context()
+    if ctx is None:
+        return
+    # With the message protocol of Celery 3.1, the fields of the body become attributes
+    # of `task.request`; later protocols do the same with the headers.
+    if isinstance(body, dict):
+        body[CONTEXT_FIELD] = ctx
+    if headers is not None:
+        headers[CONTEXT_FIELD] = ctx
+
+
+@task_prerun.connect
+def start_task_span(sender=None, task_id=None, task=None, args=None, **kwargs):
+    if not enabled():
+        return
+    state = _state()
+    received = None
+    if not state.stack:
+        # Not run eagerly from a traced process: take the context of the message.
+        request = task.request
+        received = getattr(request, CONTEXT_FIELD, None) or (
+            getattr(request, "headers", None) or {}
+        ).get(CONTEXT_FIELD)
+        if received is None:
+            return
+    s = start_span(task.name, context=received, task_id=task_id)
+    if s is not None:
+        state.tasks[task_id] = s
+
+
+@task_postrun.connect
+def finish_task_span(sender=None, task_id=None, state=None, **kwargs):
+    s = _state().tasks.pop(task_id, None)
+    if s is not None:
+        if state:
+            s.attributes["state"] = state
+        finish_span(s)
+
+
+class FileExporter(object):
+    """
+    Appends the spans to the file `RODAN_TRACE_FILE`, one JSON object per line.
+    """
+
+    def __init__(self):
+        self.path = settings.RODAN_TRACE_FILE
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        data = "".join(json.dumps(s, sort_keys=True) + "\n" for s in spans)
+        with self._lock:
+            # One write per batch, so that processes do not interleave their lines.
+            with open(self.path, "a") as f:
+                f.write(data)
+
+    def spans(self, trace_id):
+        trace_id = uuid.UUID(str(trace_id)).hex
+        result = []
+        if not os.path.exists(self.path):
+            return result
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    s = json.loads(line)
+                except ValueError:
+                    continue  # a line being written
+                if s["trace_id"] == trace_id:
+                    result.append(s)
+        return result
+
+
+class DatabaseExporter(object):
+    """
+    Records the spans as `TraceSpan`s.
+    """
+
+    def export(self, spans):
+        from rodan.models import TraceSpan
+
+        TraceSpan.objects.bulk_create(
+            TraceSpan(
+                uuid=s["span_id"],
+                trace_id=s["trace_id"],
+                parent_id=s["parent_id"],
+                name=s["name"][:255],
+                started=datetime.datetime.fromtimestamp(s["started"], timezone.utc),
+                duration=s["duration"],
+                host=s["host"],
+                pid=s["pid"],
+                attributes=s["attributes"],
+            )
+            for s in spans
+        )
+
+    def spans(self, trace_id):
+        from rodan.models import TraceSpan
+
+        epoch = datetime.datetime.fromtimestamp(0, timezone.utc)
+        return [
+            {
+                "trace_id": s.trace_id.hex,
+                "span_id": s.uuid.hex,
+                "parent_id": s.parent_id.hex if s.parent_id else None,
+                "name": s.name,
+                "started": (s.started - epoch).total_seconds(),
+                "duration": s.duration,
+                "host": s.host,
+                "pid": s.pid,
+                "attributes": s.attributes,
+            }
+            for s in TraceSpan.objects.filter(trace_id=trace_id)
+        ]
+
+
+def critical_path(spans):
+    """
+    Returns the critical path of a trace: the chain of spans, from the root, that led to
+    the span that ended last. Each span of the chain caused the next one, directly or
+    by sending it as a Celery task.
+    """
+    if not spans:
+        return []
+    by_id = dict((s["span_id"], s) for s in spans)
+    last = max(spans, key=lambda s: s["started"] + s["duration"])
+    path = [last]
+    while path[-1]["parent_id"] in by_id:
+        path.append(by_id[path[-1]["parent_id"]])
+    return list(reversed(path))
@@ -0,0 +1,414 @@
+"""
+Validation of Workflows (`PATCH valid=true` on a Workflow).
+
+`WorkflowGraph` loads the graph of a Workflow -- its WorkflowJobs with their Jobs, the
+port types of the Jobs with their ResourceTypes, the ports and the Connections -- in a
+fixed number of queries, whatever its size, and runs every check in memory:
+
+1. the WorkflowJobs: the numbers of ports of each type, and the settings, with the
+   jsonschema validator of the Job kept by `rodan.jobs.catalogue.cache`;
+2. the InputPorts and the OutputPorts: their types, the number of Connections of the
+   InputPorts, and the list-typedness and the ResourceTypes of both ends of every
+   Connection;
+3. the graph: not empty, without cycles, connected.
+
+The first check that fails raises a `WorkflowValidationError`, with the same error
+codes, in the same order, as when each check queried the database.
+
+Validation is incremental: a WorkflowJob that passes is marked `validated` with the
+catalogue it was checked against, and touching it, its ports or its Connections clears
+the mark (see the `save` methods of the models). As long as the catalogue is the same,
+only the WorkflowJobs without the mark are checked again, with their ports and the
+OutputPorts connected to them: `WorkflowGraph` only loads them and their neighbours.
+The checks of the graph need all of it, but only its skeleton -- the WorkflowJobs and
+the pairs of WorkflowJobs that are connected, in two queries -- and the search for
+cycles only starts from the WorkflowJobs without the mark: the rest of the graph had
+none. The cost of `PATCH valid=true` after an edit thus follows the size of the edit,
+not of the Workflow, and the editor can check the Workflow after every edit.
+"""
+from collections import defaultdict
+
+import jsonschema
+from django.db.models import Q
+
+from rodan.jobs import catalogue
+from rodan.models import (
+    CatalogueManifest,
+    Connection,
+    InputPort,
+    InputPortType,
+    OutputPort,
+    OutputPortType,
+    WorkflowJob,
+)
+
+
+class WorkflowValidationError(Exception):
+    def __init__(self, error_code, details, associated_objects=[]):
+        super(WorkflowValidationError, self).__init__()
+        self.error_code = error_code
+        self.details = details
+        self.associated_objects = associated_objects
+
+
+class DisjointSet(object):
+    def __init__(self, xs):
+        self._parent = {}
+        # MakeSet
+        for x in xs:
+            self._parent[x] = x
+
+    def find(self, x):
+        parent = self._parent[x]
+        if parent is x:
+            return x
+        else:
+            new_parent = self.find(parent)
+            self._parent[x] = new_parent
+            return new_parent
+
+    def union(self, x, y):
+        x_root = self.find(x)
+        y_root = self.find(y)
+        self._parent[x_root] = y_root
+
+
+class WorkflowGraph(object):
+    """
+    The graph of a Workflow, in memory: all of it, or the WorkflowJobs `workflow_job_ids`
+    (UUIDs) with their ports and the Connections of their ports.
+    """
+
+    def __init__(self, workflow, workflow_job_ids=None):
+        self.workflow = workflow
+        workflow_jobs = workflow.workflow_jobs.select_related("job")
+        input_ports = InputPort.objects.filter(workflow_job__workflow=workflow)
+        output_ports = OutputPort.objects.filter(workflow_job__workflow=workflow)
+        connections = Connection.objects.filter(
+            Q(input_port__workflow_job__workflow=workflow)
+            | Q(output_port__workflow_job__workflow=workflow)
+        )
+        if workflow_job_ids is not None:
+            workflow_job_ids = list(workflow_job_ids)
+            workflow_jobs = workflow_jobs.filter(uuid__in=workflow_job_ids)
+            input_ports = input_ports.filter(workflow_job_id__in=workflow_job_ids)
+            output_ports = output_ports.filter(workflow_job_id__in=workflow_job_ids)
+            connections = Connection.objects.filter(
+                Q(input_port__workflow_job_id__in=workflow_job_ids)
+                | Q(output_port__workflow_job_id__in=workflow_job_ids)
+            )
+
+        self.workflow_jobs = list(workflow_jobs)
+        job_ids = set(wfjob.job_id for wfjob in self.workflow_jobs)
+
+        # Port types of the Jobs, with the UUIDs of their ResourceTypes.
+        self.input_port_types = dict(
+            (ipt.uuid, ipt)
+            for ipt in InputPortType.objects.filter(job_id__in=job_ids).prefetch_related(
+                "resource_types"
+            )
+        )
+        self.output_port_types = dict(
+            (opt.uuid, opt)
+            for opt in OutputPortType.objects.filter(job_id__in=job_ids).prefetch_related(
+                "resource_types"
+            )
+        )
+        self.resource_types = dict(
+            (pt.uuid, set(rt.uuid for rt in pt.resource_types.all()))
+            for pt in list(self.input_port_types.values())
+            + list(self.output_port_types.values())
+        )
+        self.input_port_types_of = defaultdict(list)  # Job UUID => InputPortTypes
+        for ipt in self.input_port_types.values():
+            self.input_port_types_of[ipt.job_id].append(ipt)
+        self.output_port_types_of = defaultdict(list)  # Job UUID => OutputPortTypes
+        for opt in self.output_port_types.values():
+            self.output_port_types_of[opt.job_id].append(opt)
+
+        self.input_ports = list(input_ports)
+        self.output_ports = list(output_ports)
+        self.connections = list(connections)
+        self._index()
+
+    def _index(self):
+        self.workflow_job = dict((wfjob.uuid, wfjob) for wfjob in self.workflow_jobs)
+        self.input_port = dict((ip.uuid, ip) for ip in self.input_ports)
+        self.output_port = dict((op.uuid, op) for op in self.output_ports)
+        self.input_ports_of = defaultdict(list)  # WorkflowJob UUID => InputPorts
+        for ip in self.input_ports:
+            self.input_ports_of[ip.workflow_job_id].append(ip)
+        self.output_ports_of = defaultdict(list)  # WorkflowJob UUID => OutputPorts
+        for op in self.output_ports:
+            self.output_ports_of[op.workflow_job_id].append(op)
+        self.connections_of = defaultdict(list)  # port UUID => Connections
+        for conn in self.connections:
+            self.connections_of[conn.input_port_id].append(conn)
+            self.connections_of[conn.output_port_id].append(conn)
+
+    # Checks
+
+    def check_workflow_job(self, wfjob):
+        if not self.output_ports_of[wfjob.uuid] and wfjob.job.name != "Labeler":
+            raise WorkflowValidationError(
+                "WFJ_NO_OP",
+                "The WorkflowJob {0} has no OutputPort.".format(wfjob.job_name),
+                [wfjob],
+            )
+
+        number_of_input_ports = defaultdict(int)
+        for ip in self.input_ports_of[wfjob.uuid]:
+            number_of_input_ports[ip.input_port_type_id] += 1
+        for ipt in self.input_port_types_of[wfjob.job_id]:
+            if number_of_input_ports[ipt.uuid] < ipt.minimum:
+                raise WorkflowValidationError(
+                    "WFJ_TOO_FEW_IP",
+                    "The WorkflowJob {0} has too few InputPorts of type {1}.".format(
+                        wfjob.job_name, ipt.name
+                    ),
+                    [wfjob, ipt],
+                )
+            elif number_of_input_ports[ipt.uuid] > ipt.maximum:
+                raise WorkflowValidationError(
+                    "WFJ_TOO_MANY_IP",
+                    "The WorkflowJob {0} has too many InputPorts of type {1}.".format(
+                        wfjob.job_name, ipt.name
+                    ),
+                    [wfjob, ipt],
+                )
+
+        number_of_output_ports = defaultdict(int)
+        for op in self.output_ports_of[wfjob.uuid]:
+            number_of_output_ports[op.output_port_type_id] += 1
+        for opt in self.output_port_types_of[wfjob.job_id]:
+            if number_of_output_ports[opt.uuid] < opt.minimum:
+                raise WorkflowValidationError(
+                    "WFJ_TOO_FEW_OP",
+                    "The WorkflowJob {0} has too few OutputPorts of type {1}.".format(
+                        wfjob.job_name, opt.name
+                    ),
+                    [wfjob, opt],
+                )
+            elif number_of_output_ports[opt.uuid] > opt.maximum:
+                raise WorkflowValidationError(
+                    "WFJ_TOO_MANY_OP",
+                    "The WorkflowJob {0} has too many OutputPorts of type {1}.".format(
+                        wfjob.job_name, opt.name
+                    ),
+                    [wfjob, opt],
+                )
+
+        try:
+            catalogue.cache.settings_validator(wfjob.job).validate(wfjob.job_settings)
+        except jsonschema.exceptions.ValidationError:
+            raise WorkflowValidationError(
+                "WFJ_INVALID_SETTINGS",
+                "The WorkflowJob {0} has invalid settings.".format(wfjob.job_name),
+                [wfjob],
+            )
+
+    def check_input_port(self, ip):
+        ipt = self.input_port_types.get(ip.input_port_type_id)
+        if ipt is None or ipt.job_id != self.workflow_job[ip.workflow_job_id].job_id:
+            raise WorkflowValidationError(
+                "IP_TYPE_MISMATCH",
+                (
+                    "The type of InputPort {0} is incompatible with its associated "
+                    "WorkflowJob."
+                ).format(ip.label),
+                [ip],
+            )
+
+        if len(self.connections_of[ip.uuid]) > 1:
+            raise WorkflowValidationError(
+                "IP_TOO_MANY_CONNECTIONS",
+                "The InputPort {0} has more than one Connections".format(ip.label),
+                [ip],
+            )
+
+    def check_output_port(self, op):
+        opt = self.output_port_types.get(op.output_port_type_id)
+        if opt is None or opt.job_id != self.workflow_job[op.workflow_job_id].job_id:
+            raise WorkflowValidationError(
+                "OP_TYPE_MISMATCH",
+                (
+                    "The type of OutputPort {0} is incompatible with its associated "
+                    "WorkflowJob."
+                ).format(op.label),
+                [op],
+            )
+
+        resource_type_set = set(self.resource_types[opt.uuid])
+        ips = [self.input_port[conn.input_port_id] for conn in self.connections_of[op.uuid]]
+        for ip in ips:
+            # The InputPorts have been checked: their type is one of the port types.
+            ipt = self.input_port_types[ip.input_port_type_id]
+            # check list-typed
+            if ipt.is_list and not opt.is_list:
+                raise WorkflowValidationError(
+                    "RESOURCETYPE_LIST_CONFLICT",
+                    (
+                        "InputPort {0} accepts a list of resources but OutputPort {1} is not "
+                        "list-typed."
+                    ).format(ip.label, op.label),
+                    [op, ip],
+                )
+            elif not ipt.is_list and opt.is_list:
+                raise WorkflowValidationError(
+                    "RESOURCETYPE_LIST_CONFLICT",
+                    "OutputPort {0} is list-typed but InputPort {1} is not.".format(
+                        op.label, ip.label
+                    ),
+                    [op, ip],
+                )
+
+            # then check common resource types
+            resource_type_set.intersection_update(self.resource_types[ipt.uuid])
+            if not resource_type_set:
+                raise WorkflowValidationError(
+                    "NO_COMMON_RESOURCETYPE",
+                    (
+                        "There is no common ResourceType between OutputPort {0} and its "
+                        "connected InputPorts."
+                    ).format(op.label),
+                    [op] + ips,
+                )
+
+    def edges(self):
+        """
+        The pairs of connected WorkflowJobs (UUIDs): (output, input).
+        """
+        return [
+            (
+                self.output_port[conn.output_port_id].workflow_job_id,
+                self.input_port[conn.input_port_id].workflow_job_id,
+            )
+            for conn in self.connections
+            if conn.output_port_id in self.output_port and conn.input_port_id in self.input_port
+        ]
+
+    def check(self, workflow_job_ids=None):
+        """
+        Run the checks of all the WorkflowJobs, or of `workflow_job_ids` (UUIDs), with
+        the checks of their ports and of the OutputPorts connected to them.
+        """
+        if workflow_job_ids is None:
+            workflow_job_ids = set(self.workflow_job)
+        for wfjob in self.workflow_jobs:
+            if wfjob.uuid in workflow_job_ids:
+                self.check_workflow_job(wfjob)
+
+        upstream_ops = set()
+        for ip in self.input_ports:
+            if ip.workflow_job_id in workflow_job_ids:
+                self.check_input_port(ip)
+                upstream_ops.update(conn.output_port_id for conn in self.connections_of[ip.uuid])
+        for op in self.output_ports:
+            if op.workflow_job_id in workflow_job_ids or op.uuid in upstream_ops:
+                self.check_output_port(op)
+
+    def validate(self):
+        self.check()
+        check_graph([wfjob.uuid for wfjob in self.workflow_jobs], self.edges())
+
+
+def check_graph(workflow_jobs, edges, roots=None):
+    """
+    Check that the graph of `workflow_jobs` and `edges` (pairs of them) is not empty,
+    has no cycles and is connected. If `roots`, only look for the cycles that go through
+    them.
+    """
+    # Step 0
+    if len(workflow_jobs) == 0:
+        raise WorkflowValidationError("WF_EMPTY", "The Workflow is empty.", [])
+
+    node = dict((wfjob, wfjob) for wfjob in workflow_jobs)  # one object per WorkflowJob
+    edges = [(node[u], node[v]) for u, v in edges if u in node and v in node]
+    adjacency = defaultdict(list)
+    for u, v in edges:
+        adjacency[u].append(v)
+
+    # Steps 1-4: a depth-first search, which finds the cycles (a WorkflowJob reached
+    # again while it is being visited). Iterative, for deep Workflows.
+    permanent_marks = set()
+    temporary_marks = set()
+    for root in workflow_jobs if roots is None else [node[r] for r in roots if r in node]:
+        if root in permanent_marks:
+            continue
+        temporary_marks.add(root)
+        stack = [(root, iter(adjacency[root]))]
+        while stack:
+            wfjob, adjacent = stack[-1]
+            for adj_wfjob in adjacent:
+                if adj_wfjob in temporary_marks:
+                    raise WorkflowValidationError(
+                        "WF_HAS_CYCLES", "There is a cycle in the Workflow.", []
+                    )
+                if adj_wfjob not in permanent_marks:
+                    temporary_marks.add(adj_wfjob)
+                    stack.append((adj_wfjob, iter(adjacency[adj_wfjob])))
+                    break
+            else:
+                stack.pop()
+                temporary_marks.remove(wfjob)
+                permanent_marks.add(wfjob)
+
+    # Step 5
+    disjoint_set = DisjointSet(workflow_jobs)
+    for u, v in edges:
+        disjoint_set.union(u, v)
+    one_set = disjoint_set.find(workflow_jobs[0])
+    for wfjob in workflow_jobs:
+        if disjoint_set.find(wfjob) is not one_set:
+            raise WorkflowValidationError(
+                "WF_NOT_CONNECTED", "The Workflow is not connected."
+            )
+
+
+def label_extern(workflow):
+    """
+    Label the InputPorts and OutputPorts without Connections as `extern`.
+    """
+    InputPort.objects.filter(workflow_job__workflow=workflow).update(extern=False)
+    OutputPort.objects.filter(workflow_job__workflow=workflow).update(extern=False)
+    InputPort.objects.filter(
+        workflow_job__workflow=workflow, connections__isnull=True
+    ).update(extern=True)
+    OutputPort.objects.filter(
+        workflow_job__workflow=workflow, connections__isnull=True
+    ).update(extern=True)
+
+
+def validate(workflow):
+    """
+    Validate the Workflow, and label its extern ports. Raises a
+    `WorkflowValidationError` if it is not valid.
+    """
+    catalogue_version = (
+        CatalogueManifest.objects.order_by("-created").values_list("uuid", flat=True).first()
+    )
+    workflow_jobs = []
+    unchecked = set()  # WorkflowJobs touched since they were validated
+    for wfjob, validated in workflow.workflow_jobs.values_list("uuid", "validated"):
+        workflow_jobs.append(wfjob)
+        if catalogue_version is None or validated != catalogue_version:
+            unchecked.add(wfjob)
+
+    if len(unchecked) == len(workflow_jobs):
+        WorkflowGraph(workflow).validate()
+    else:
+        edges = list(
+            Connection.objects.filter(
+                output_port__workflow_job__workflow=workflow
+            ).values_list("output_port__workflow_job_id", "input_port__workflow_job_id")
+        )
+        # The checks of an OutputPort need all the InputPorts connected to it.
+        upstream = unchecked.union(u for u, v in edges if v in unchecked)
+        neighbourhood = upstream.union(v for u, v in edges if u in upstream)
+        WorkflowGraph(workflow, neighbourhood).check(unchecked)
+        check_graph(workflow_jobs, edges, roots=unchecked)
+
+    label_extern(workflow)
+    if unchecked and catalogue_version is not None:
+        WorkflowJob.objects.filter(uuid__in=unchecked).update(validated=catalogue_version)
+    return True
@@ -0,0 +1,432 @@
+"""
+End-to-end benchmark of the scheduling of WorkflowRuns, with jobs that do (almost)
+nothing, to measure the orchestration overhead of Rodan apart from the job compute.
+
+The benchmark generates a synthetic Workflow of `--depth` layers of `--width`
+WorkflowJobs. Every WorkflowJob after the first layer has `--fan-in` InputPorts,
+connected to the OutputPorts of as many WorkflowJobs of the previous layer; the first
+InputPort of the first layer takes a collection of `--collection` Resources, so the
+WorkflowRun has width x depth x collection RunJobs. For every run, it measures:
+
+- `validate` -- seconds to validate the Workflow;
+- `create_workflowrun` -- seconds spent in `rodan.core.create_workflowrun` itself;
+- `master_task` -- number of passes of the master task, and seconds per pass;
+- `queries_per_runjob` -- queries of the job tasks, and of the orchestration
+  (`create_workflowrun` and the master task), per RunJob;
+- `dispatch_latency` -- seconds between the dispatch of a RunJob by the master task and
+  the start of its job task (`RunJobMetrics.queue_wait_time`);
+- `compute` -- seconds spent in the jobs (`RunJobMetrics.wall_time`), in total;
+- `makespan` -- seconds from the call of `create_workflowrun` to the end of the
+  WorkflowRun.
+
+By default, Celery tasks run eagerly (`CELERY_ALWAYS_EAGER`) in a throwaway test
+database, with the dummy jobs of `rodan.test.dummy_jobs`: task times and queries are
+those of this process. With `--broker`, the WorkflowRuns are sent to the configured
+broker and database, to be run by the workers (with the `helloworld` jobs, as workers
+do not define the dummy jobs); only what this process and the `RunJobMetrics` see is
+measured then, and the project of the benchmark is deleted at the end.
+
+The results are written as JSON, with the parameters, the Rodan version and the git
+commit, so that those of two commits can be compared.
+"""
+from collections import defaultdict
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from celery import registry
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+import six
+
+import rodan
+from rodan.constants import task_status
+from rodan.models import (
+    Connection,
+    InputPort,
+    Job,
+    OutputPort,
+    Project,
+    Resource,
+    ResourceType,
+    RunJob,
+    RunJobMetrics,
+    Workflow,
+    WorkflowJob,
+    WorkflowRun,
+)
+
+# Job profiles: the job of every WorkflowJob, the types of its ports and of the Resources.
+JOBS = {
+    "dummy": {
+        "name": "rodan.jobs.devel.dummy_automatic_job",
+        "input_port_type": "in_typeA",
+        "output_port_type": "out_typeA",
+        "mimetype": "test/a1",
+        "settings": {"a": 1, "b": [0.4]},
+    },
+    "helloworld": {
+        "name": "Hello World Multiple Ports",
+        "input_port_type": "Text input",
+        "output_port_type": "Text output",
+        "mimetype": "text/plain",
+        "settings": {},
+    },
+}
+CREATE_WORKFLOWRUN = "rodan.core.create_workflowrun"
+MASTER_TASK = "rodan.core.master_task"
+ENDED = (task_status.FINISHED, task_status.FAILED, task_status.CANCELLED)
+
+
+def mean(values):
+    return sum(values) / float(len(values)) if values else None
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * p / 100.0), len(values) - 1)]
+
+
+def median(values):
+    return percentile(values, 50)
+
+
+class Recorder(object):
+    """
+    Records the time and the queries of the Celery tasks run eagerly in this process,
+    exclusive of the tasks they run in turn: task name => list of (seconds, queries),
+    one per call.
+    """
+
+    def __init__(self):
+        self.calls = defaultdict(list)
+        self._stack = []  # [task name, seconds, queries] of the running tasks
+        self._mark = None
+
+    def _account(self):
+        now = time.time()
+        # Drained at every step, so that the bounded log never overflows.
+        queries = len(connection.queries_log)
+        connection.queries_log.clear()
+        if self._stack:
+            self._stack[-1][1] += now - self._mark
+            self._stack[-1][2] += queries
+        self._mark = now
+
+    def push(self, name):
+        self._account()
+        self._stack.append([name, 0.0, 0])
+
+    def pop(self):
+        self._account()
+        name, seconds, queries = self._stack.pop()
+        self.calls[name].append((seconds, queries))
+
+    def prerun(self, sender=None, **kwargs):
+        self.push(sender.name)
+
+    def postrun(self, sender=None, **kwargs):
+        self.pop()
+
+    def __enter__(self):
+        self._force_debug_cursor = connection.force_debug_cursor
+        connection.force_debug_cursor = True
+        task_prerun.connect(self.prerun, weak=False)
+        task_postrun.connect(self.postrun, weak=False)
+        return self
+
+    def __exit__(self, *exc_info):
+        task_prerun.disconnect(self.prerun)
+        task_postrun.disconnect(self.postrun)
+        connection.force_debug_cursor = self._force_debug_cursor
+
+    def seconds(self, name):
+        return [c[0] for c in self.calls[name]]
+
+    def queries(self, names):
+        return sum(c[1] for name in names for c in self.calls[name])
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the orchestration overhead of Rodan (create_workflowrun, master task, "
+        "queries, dispatch latency, makespan) on synthetic Workflows of trivial jobs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--width", type=int, default=4, help="Number of WorkflowJobs per layer"
+        )
+        parser.add_argument("--depth", type=int, default=4, help="Number of layers")
+        parser.add_argument(
+            "--fan-in", type=int, default=2,
+            help="Number of InputPorts of the WorkflowJobs after the first layer",
+        )
+        parser.add_argument(
+            "--collection", type=int, default=1,
+            help="Number of Resources of the collection given to the Workflow",
+        )
+        parser.add_argument(
+            "-n", "--runs", type=int, default=3, help="Number of WorkflowRuns"
+        )
+        parser.add_argument(
+            "--job", choices=sorted(JOBS),
+            help="Job of the WorkflowJobs (default: dummy, or helloworld with --broker)",
+        )
+        parser.add_argument(
+            "--sleep", type=float, default=0,
+            help="Seconds that every dummy job sleeps, to simulate compute",
+        )
+        parser.add_argument(
+            "--broker", action="store_true",
+            help="Send the tasks to the broker and the workers instead of running them "
+            "eagerly, with the configured database",
+        )
+        parser.add_argument(
+            "--timeout", type=float, default=600,
+            help="Seconds to wait for a WorkflowRun to end, with --broker",
+        )
+        parser.add_argument("-o", "--output", help="Write the results to this file")
+
+    def handle(self, *args, **options):
+        job = options["job"] or ("helloworld" if options["broker"] else "dummy")
+        if options["broker"] and job == "dummy":
+            raise CommandError("The workers do not define the dummy jobs: use --job helloworld.")
+        if min(options["width"], options["depth"], options["fan_in"], options["collection"]) < 1:
+            raise CommandError("--width, --depth, --fan-in and --collection must be positive.")
+        if options["fan_in"] > 10:
+            raise CommandError("The jobs take at most 10 inputs: --fan-in must be at most 10.")
+        profile = dict(JOBS[job])
+        profile["settings"] = dict(profile["settings"])
+        if options["sleep"]:
+            if job != "dummy":
+                raise CommandError("--sleep only applies to the dummy jobs.")
+            profile["settings"]["sleep"] = options["sleep"]
+
+        if options["broker"]:
+            runs = self.benchmark(profile, options)
+        else:
+            runs = self.benchmark_eagerly(profile, options)
+
+        metrics = sorted(set(k for run in runs for k in run))
+        results = {
+            "rodan": rodan.__version__,
+            "commit": self.commit(),
+            "mode": "broker" if options["broker"] else "eager",
+            "params": {
+                "width": options["width"],
+                "depth": options["depth"],
+                "fan_in": options["fan_in"],
+                "collection": options["collection"],
+                "job": job,
+                "sleep": options["sleep"],
+            },
+            "runs": runs,
+            # The median of every metric over the runs.
+            "summary": dict(
+                (k, median([run[k] for run in runs if run.get(k) is not None]))
+                for k in metrics
+            ),
+        }
+        encoded = json.dumps(results, indent=2, sort_keys=True)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(encoded + "\n")
+        else:
+            self.stdout.write(encoded)
+
+    def commit(self):
+        try:
+            return subprocess.check_output(
+                ["git", "rev-parse", "HEAD"],
+                cwd=os.path.dirname(rodan.__file__),
+                stderr=subprocess.STDOUT,
+            ).decode("utf-8").strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def benchmark_eagerly(self, profile, options):
+        from django.test.runner import DiscoverRunner
+        from django.test.utils import setup_test_environment, teardown_test_environment
+
+        from rodan.celery import app
+
+        # The dummy jobs, and the Rodan code paths they exercise, require TEST.
+        test = settings.TEST
+        settings.TEST = True
+        eager = (app.conf.CELERY_ALWAYS_EAGER, app.conf.CELERY_EAGER_PROPAGATES_EXCEPTIONS)
+        app.conf.CELERY_ALWAYS_EAGER = True
+        app.conf.CELERY_EAGER_PROPAGATES_EXCEPTIONS = True
+        media_root = tempfile.mkdtemp() + "/"
+        setup_test_environment()
+        runner = DiscoverRunner(interactive=False, verbosity=0)
+        old_config = runner.setup_databases()
+        try:
+            with override_settings(MEDIA_ROOT=media_root):
+                if profile["name"] == JOBS["dummy"]["name"]:
+                    for mimetype in ("test/a1", "test/a2", "test/b"):
+                        ResourceType.objects.get_or_create(
+                            mimetype=mimetype,
+                            defaults={"description": "", "extension": mimetype[5:]},
+                        )
+                    import rodan.test.dummy_jobs
+
+                    # Registers the dummy jobs in the test database.
+                    six.moves.reload_module(rodan.test.dummy_jobs)
+                return self.benchmark(profile, options)
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+            shutil.rmtree(media_root, ignore_errors=True)
+            app.conf.CELERY_ALWAYS_EAGER, app.conf.CELERY_EAGER_PROPAGATES_EXCEPTIONS = eager
+            settings.TEST = test
+
+    def benchmark(self, profile, options):
+        try:
+            job = Job.objects.get(name=profile["name"])
+        except Job.DoesNotExist:
+            raise CommandError("The job {0} is not installed.".format(profile["name"]))
+        user, created = User.objects.get_or_create(username="rodan_benchmark")
+        project = Project.objects.create(name="Scheduler benchmark", creator=user)
+        try:
+            return [
+                self.run(project, job, profile, options) for _ in range(options["runs"])
+            ]
+        finally:
+            project.delete()
+            if created and not user.projects.exists():
+                user.delete()
+
+    def generate(self, project, job, profile, options):
+        """
+        Returns a new valid Workflow and its resource assignments.
+        """
+        from rodan.views.workflow import WorkflowDetail, WorkflowValidationError
+
+        ipt = job.input_port_types.get(name=profile["input_port_type"])
+        opt = job.output_port_types.get(name=profile["output_port_type"])
+        resource_type = ResourceType.objects.get(mimetype=profile["mimetype"])
+        workflow = Workflow.objects.create(
+            name="Scheduler benchmark", project=project, creator=project.creator
+        )
+
+        def resource(i):
+            r = Resource.objects.create(
+                name="benchmark_{0}".format(i),
+                project=project,
+                resource_type=resource_type,
+                creator=project.creator,
+            )
+            r.resource_file.save("benchmark_{0}.txt".format(i), ContentFile("benchmark"))
+            return r
+
+        collection = [str(resource(i).uuid) for i in range(options["collection"])]
+        single = collection[:1]
+        assignments = {}
+        previous = []  # OutputPorts of the previous layer
+        for depth in range(options["depth"]):
+            layer = []
+            for j in range(options["width"]):
+                wfjob = WorkflowJob.objects.create(
+                    workflow=workflow, job=job, job_settings=profile["settings"]
+                )
+                if not previous:
+                    ip = InputPort.objects.create(workflow_job=wfjob, input_port_type=ipt)
+                    assignments[str(ip.uuid)] = single if j else collection
+                for k in range(options["fan_in"] if previous else 0):
+                    ip = InputPort.objects.create(workflow_job=wfjob, input_port_type=ipt)
+                    Connection.objects.create(
+                        output_port=previous[(j + k) % len(previous)], input_port=ip
+                    )
+                layer.append(
+                    OutputPort.objects.create(workflow_job=wfjob, output_port_type=opt)
+                )
+            previous = layer
+
+        started = time.time()
+        try:
+            WorkflowDetail()._validate(workflow)
+        except WorkflowValidationError as e:
+            raise CommandError("Invalid Workflow: {0}".format(e.details))
+        validate = time.time() - started
+        workflow.valid = True
+        workflow.save(update_fields=["valid"])
+        return workflow, assignments, validate
+
+    def run(self, project, job, profile, options):
+        workflow, assignments, validate = self.generate(project, job, profile, options)
+        wfrun = WorkflowRun.objects.create(
+            workflow=workflow,
+            project=project,
+            creator=project.creator,
+            status=task_status.REQUEST_PROCESSING,
+        )
+        create_workflowrun = registry.tasks[CREATE_WORKFLOWRUN]
+        args = (str(workflow.uuid), str(wfrun.uuid), assignments)
+
+        if options["broker"]:
+            started = time.time()
+            create_workflowrun.run(*args)
+            created = time.time() - started
+            while WorkflowRun.objects.get(uuid=wfrun.uuid).status not in ENDED:
+                if time.time() - started > options["timeout"]:
+                    raise CommandError(
+                        "WorkflowRun {0} did not end in {1}s.".format(
+                            wfrun.uuid, options["timeout"]
+                        )
+                    )
+                time.sleep(0.1)
+            makespan = time.time() - started
+            recorded = None
+        else:
+            with Recorder() as recorder:
+                started = time.time()
+                recorder.push(CREATE_WORKFLOWRUN)
+                try:
+                    create_workflowrun.run(*args)
+                finally:
+                    recorder.pop()
+                makespan = time.time() - started
+            created = recorder.seconds(CREATE_WORKFLOWRUN)[0]
+            recorded = recorder
+
+        wfrun = WorkflowRun.objects.get(uuid=wfrun.uuid)
+        runjobs = RunJob.objects.filter(workflow_run=wfrun).count()
+        run_metrics = RunJobMetrics.objects.filter(workflow_run=wfrun)
+        waits = [
+            w for w in run_metrics.values_list("queue_wait_time", flat=True) if w is not None
+        ]
+        result = {
+            "status": wfrun.status,
+            "runjobs": runjobs,
+            "validate": validate,
+            "create_workflowrun": created,
+            "dispatch_latency_mean": mean(waits),
+            "dispatch_latency_p95": percentile(waits, 95),
+            "compute": sum(run_metrics.values_list("wall_time", flat=True)),
+            "makespan": makespan,
+        }
+        if recorded is not None:
+            passes = recorded.seconds(MASTER_TASK)
+            orchestration = (CREATE_WORKFLOWRUN, MASTER_TASK)
+            job_tasks = [name for name in recorded.calls if name not in orchestration]
+            result.update({
+                "master_task_passes": len(passes),
+                "master_task_mean": mean(passes),
+                "master_task_max": max(passes) if passes else None,
+                "queries_per_runjob": recorded.queries(job_tasks) / float(max(runjobs, 1)),
+                "orchestration_queries_per_runjob": (
+                    recorded.queries(orchestration) / float(max(runjobs, 1))
+                ),
+            })
+        return result
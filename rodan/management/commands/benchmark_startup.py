@@ -0,0 +1,76 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from .alter_resource_type import print_table
+
+# Run in a fresh interpreter: what a Celery worker or the web process does at startup.
+PROBE = """
+import json, resource, sys, time
+started = time.time()
+import django
+django.setup()
+import rodan.celery  # noqa
+import rodan.jobs.load  # noqa
+from django.conf import settings
+print(json.dumps({
+    "load": time.time() - started,
+    "max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "packages": len([p for p in settings.RODAN_JOB_PACKAGES if p in sys.modules]),
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the startup time and the baseline memory of a process loading the Rodan "
+        "jobs, with eager and lazy loading of the job packages (RODAN_LAZY_JOB_LOADING)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-n", "--repeat", type=int, default=3, help="Number of processes per mode"
+        )
+        parser.add_argument(
+            "-m", "--mode", choices=("eager", "lazy"), action="append",
+            help="Only measure this mode (default: both)",
+        )
+
+    def probe(self, lazy):
+        env = dict(os.environ, RODAN_LAZY_JOB_LOADING=str(lazy))
+        started = time.time()
+        proc = subprocess.Popen(
+            [sys.executable, "-c", PROBE], env=env,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+        out, err = proc.communicate()
+        elapsed = time.time() - started
+        if proc.returncode != 0:
+            raise CommandError(err.decode("utf-8", "replace"))
+        result = json.loads(out.decode("utf-8").strip().splitlines()[-1])
+        result["total"] = elapsed
+        return result
+
+    def handle(self, *args, **options):
+        table = [["mode", "startup (s)", "load (s)", "max RSS (MB)", "packages imported"]]
+        for mode in options["mode"] or ["eager", "lazy"]:
+            results = [self.probe(mode == "lazy") for _ in range(options["repeat"])]
+            # The median process, by startup time.
+            result = sorted(results, key=lambda r: r["total"])[len(results) // 2]
+            table.append([
+                mode,
+                "{0:.2f}".format(result["total"]),
+                "{0:.2f}".format(result["load"]),
+                # ru_maxrss is in kilobytes on Linux
+                "{0:.1f}".format(result["max_rss"] / 1024.0),
+                str(result["packages"]),
+            ])
+        print_table(table)
+        print(
+            "Lazy loading needs the catalogue manifest of the job packages, recorded by an "
+            "eager process or `manage.py migrate`; without it, it loads them eagerly."
+        )
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from rodan.celery import app
+from rodan.models import Job
+from .alter_resource_type import print_table
+
+
+class Command(BaseCommand):
+    help = "Check the job queues (CELERY_QUEUES) against the job_queue of the Jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-r",
+            "--redeclare",
+            action="store_true",
+            help="Delete the job queues, dropping their messages, and declare them again "
+            "with their x-max-priority. Stop all the Rodan processes first.",
+        )
+
+    def handle(self, *arg, **options):
+        queues = dict((q.name, q) for q in settings.CELERY_QUEUES)
+        jobs = dict(
+            Job.objects.values_list("job_queue").annotate(Count("uuid")).order_by()
+        )
+
+        if options["redeclare"]:
+            with app.connection() as conn:
+                channel = conn.default_channel
+                for name in sorted(queues):
+                    channel.queue_delete(name)
+                    queues[name](channel).declare()
+                    print("Redeclared {0}.".format(name))
+
+        table = [["queue", "x-max-priority", "jobs"]]
+        for name in sorted(set(queues) | set(jobs)):
+            priority = queues[name].queue_arguments["x-max-priority"] if name in queues else None
+            table.append([name, str(priority), str(jobs.get(name, 0))])
+        print_table(table)
+
+        undeclared = sorted(set(jobs) - set(queues))
+        if undeclared:
+            raise CommandError(
+                "Jobs use queues that are not in RODAN_JOB_QUEUES: {0}".format(
+                    ", ".join(undeclared)
+                )
+            )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from rodan.notify_relay import NotificationRelay
+
+
+class Command(BaseCommand):
+    help = "Relay database change notifications to the websocket clients (runs forever)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "-w",
+            "--window",
+            type=float,
+            default=None,
+            help="Seconds to collect notifications before publishing them "
+            "(default: RODAN_NOTIFY_RELAY_WINDOW)",
+        )
+
+    def handle(self, *arg, **options):
+        relay = NotificationRelay(window=options["window"])
+        print("Relaying database change notifications every {0}s...".format(relay.window))
+        relay.run_forever()
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from rodan.cache import response_cache
+from .alter_resource_type import print_table
+
+
+class Command(BaseCommand):
+    help = "Inspect or clear the REST API response cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument("-s", "--stats", action="store_true", help="Print hit/miss counters")
+        parser.add_argument("-c", "--clear", action="store_true", help="Remove all entries")
+
+    def handle(self, *arg, **options):
+        if options["stats"]:
+            stats = response_cache.stats()
+            table = [["counter", "value"]]
+            [table.append([k, str(stats[k])]) for k in sorted(stats.keys())]
+            print_table(table)
+
+        elif options["clear"]:
+            response_cache.clear()
+            print("Response cache cleared.")
+
+        else:
+            self.print_help("manage.py", "response_cache")
@@ -0,0 +1,92 @@
+from collections import defaultdict
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from rodan.jobs import tracing
+
+from .alter_resource_type import print_table
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the timeline and the critical path of the trace of a WorkflowRun "
+        "(see rodan/jobs/tracing.py)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("workflowrun", help="UUID of the WorkflowRun")
+        parser.add_argument(
+            "--exporter",
+            help="Dotted path of the exporter to read the spans from "
+            "(default: RODAN_TRACE_EXPORTER)",
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Print the spans as JSON instead"
+        )
+
+    def handle(self, *args, **options):
+        path = options["exporter"] or getattr(settings, "RODAN_TRACE_EXPORTER", None)
+        if not path:
+            raise CommandError("Tracing is disabled: set RODAN_TRACE_EXPORTER.")
+        try:
+            spans = import_string(path)().spans(options["workflowrun"])
+        except ValueError:
+            raise CommandError("Invalid UUID: {0}".format(options["workflowrun"]))
+        if not spans:
+            raise CommandError("No trace of WorkflowRun {0}.".format(options["workflowrun"]))
+        if options["json"]:
+            self.stdout.write(json.dumps(spans, indent=2, sort_keys=True))
+            return
+
+        by_id = dict((s["span_id"], s) for s in spans)
+        children = defaultdict(list)
+        for s in spans:
+            children[s["parent_id"] if s["parent_id"] in by_id else None].append(s)
+        start = min(s["started"] for s in spans)
+        end = max(s["started"] + s["duration"] for s in spans)
+
+        def row(s, depth=0):
+            return [
+                "{0:+.3f}".format(s["started"] - start),
+                "{0:.3f}".format(s["duration"]),
+                "  " * depth + s["name"],
+                "{0}:{1}".format(s["host"], s["pid"]),
+                " ".join(
+                    "{0}={1}".format(k, v) for k, v in sorted(s["attributes"].items())
+                ),
+            ]
+
+        # Timeline: the spans in tree order, the children of a span by start time.
+        table = [["start (s)", "duration (s)", "span", "process", "attributes"]]
+
+        def visit(parent_id, depth):
+            for s in sorted(children[parent_id], key=lambda s: s["started"]):
+                table.append(row(s, depth))
+                visit(s["span_id"], depth + 1)
+
+        visit(None, 0)
+        print_table(table)
+
+        # Critical path, with the time each span waited after its parent had ended
+        # (in a queue, for a Celery task).
+        print("")
+        print("Critical path:")
+        table = [["start (s)", "duration (s)", "span", "process", "waited (s)"]]
+        waited = 0
+        for s in tracing.critical_path(spans):
+            parent = by_id.get(s["parent_id"])
+            wait = 0
+            if parent is not None:
+                wait = max(s["started"] - (parent["started"] + parent["duration"]), 0)
+            waited += wait
+            table.append(row(s)[:4] + ["{0:.3f}".format(wait)])
+        print_table(table)
+        print("")
+        print(
+            "Makespan: {0:.3f}s, of which {1:.3f}s waiting on the critical path.".format(
+                end - start, waited
+            )
+        )
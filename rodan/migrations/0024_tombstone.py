@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('rodan', '0023_auto_20200915_1923'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='tombstoned',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='resource',
+            name='tombstoned',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='workflowrun',
+            name='tombstoned',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('model', models.CharField(choices=[('project', 'Project'), ('workflowrun', 'WorkflowRun'), ('resource', 'Resource')], db_index=True, max_length=20)),
+                ('object_uuid', models.UUIDField(db_index=True)),
+                ('object_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('status', models.IntegerField(choices=[(0, 'Scheduled'), (1, 'Processing'), (4, 'Finished'), (-1, 'Failed')], db_index=True, default=0)),
+                ('revoked_tasks', models.IntegerField(default=0)),
+                ('deleted_rows', models.IntegerField(default=0)),
+                ('removed_directories', models.IntegerField(default=0)),
+                ('error_summary', models.TextField(blank=True, default='', null=True)),
+                ('error_details', models.TextField(blank=True, default='', null=True)),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updated', models.DateTimeField(auto_now=True, db_index=True)),
+                ('creator', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tombstones', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'permissions': (('view_tombstone', 'View Tombstone'),),
+            },
+        ),
+    ]
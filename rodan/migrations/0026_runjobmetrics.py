@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+import jsonfield.fields
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rodan', '0025_workflowrun_base_workflow_run'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RunJobMetrics',
+            fields=[
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('job_name', models.CharField(db_index=True, max_length=200)),
+                ('status', models.IntegerField(choices=[(2, 'Waiting for input'), (4, 'Finished')], db_index=True)),
+                ('worker_host', models.CharField(blank=True, db_index=True, max_length=255, null=True)),
+                ('started', models.DateTimeField(db_index=True)),
+                ('queue_wait_time', models.FloatField(blank=True, null=True)),
+                ('wall_time', models.FloatField()),
+                ('cpu_time', models.FloatField(blank=True, null=True)),
+                ('peak_rss', models.BigIntegerField(blank=True, null=True)),
+                ('bytes_read', models.BigIntegerField(blank=True, null=True)),
+                ('bytes_written', models.BigIntegerField(blank=True, null=True)),
+                ('inputs', jsonfield.fields.JSONField(default=[])),
+                ('outputs', jsonfield.fields.JSONField(default=[])),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('run_job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metrics', to='rodan.RunJob')),
+                ('workflow_run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='runjob_metrics', to='rodan.WorkflowRun')),
+            ],
+            options={
+                'permissions': (('view_runjobmetrics', 'View RunJobMetrics'),),
+            },
+        ),
+    ]
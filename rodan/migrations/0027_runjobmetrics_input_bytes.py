@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rodan', '0026_runjobmetrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='runjobmetrics',
+            name='input_bytes',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
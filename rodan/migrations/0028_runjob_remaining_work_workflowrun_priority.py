@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rodan', '0027_runjobmetrics_input_bytes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='runjob',
+            name='remaining_work',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workflowrun',
+            name='priority',
+            field=models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(9)]),
+        ),
+    ]
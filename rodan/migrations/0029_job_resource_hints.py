@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+import jsonfield.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rodan', '0028_runjob_remaining_work_workflowrun_priority'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='resource_hints',
+            field=jsonfield.fields.JSONField(default={}),
+        ),
+    ]
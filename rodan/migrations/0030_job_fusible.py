@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rodan', '0029_job_resource_hints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='fusible',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import jsonfield.fields
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rodan', '0030_job_fusible'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogueManifest',
+            fields=[
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('package_versions', jsonfield.fields.JSONField(default={})),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
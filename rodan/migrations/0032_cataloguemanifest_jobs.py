@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+import jsonfield.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rodan', '0031_cataloguemanifest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cataloguemanifest',
+            name='jobs',
+            field=jsonfield.fields.JSONField(default={}),
+        ),
+    ]
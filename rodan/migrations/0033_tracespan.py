@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import jsonfield.fields
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rodan', '0032_cataloguemanifest_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TraceSpan',
+            fields=[
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('trace_id', models.UUIDField(db_index=True)),
+                ('parent_id', models.UUIDField(blank=True, null=True)),
+                ('name', models.CharField(max_length=255)),
+                ('started', models.DateTimeField(db_index=True)),
+                ('duration', models.FloatField()),
+                ('host', models.CharField(blank=True, max_length=255, null=True)),
+                ('pid', models.IntegerField(blank=True, null=True)),
+                ('attributes', jsonfield.fields.JSONField(default={})),
+            ],
+        ),
+    ]
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+PROFILE_CHOICES = [('', 'Off'), ('job', 'Job'), ('task', 'Task')]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rodan', '0033_tracespan'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflowrun',
+            name='profile',
+            field=models.CharField(blank=True, choices=PROFILE_CHOICES, default='', max_length=8),
+        ),
+        migrations.AddField(
+            model_name='workflowjob',
+            name='profile',
+            field=models.CharField(blank=True, choices=PROFILE_CHOICES, default='', max_length=8),
+        ),
+        migrations.AddField(
+            model_name='runjob',
+            name='profile',
+            field=models.CharField(blank=True, choices=PROFILE_CHOICES, default='', max_length=8),
+        ),
+        migrations.AddField(
+            model_name='runjob',
+            name='profile_resource',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='rodan.Resource'),
+        ),
+    ]
@@ -1,8 +1,4 @@
-import os
-import sys
 import traceback
-import getpass
-import subprocess
 
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth.models import Permission, User, Group
@@ -34,6 +30,7 @@ from rodan.models.workflow import Workflow
 from rodan.models.workflowjobgroup import WorkflowJobGroup
 from rodan.models.workflowrun import WorkflowRun
 from rodan.models.runjob import RunJob
+from rodan.models.runjobmetrics import RunJobMetrics
 from rodan.models.resultspackage import ResultsPackage
 from rodan.models.resource import Resource
 from rodan.models.resourcelabel import ResourceLabel
@@ -41,10 +38,24 @@ from rodan.models.resourcelist import ResourceList
 from rodan.models.resourcetype import ResourceType
 from rodan.models.connection import Connection
 from rodan.models.tempauthtoken import Tempauthtoken
-
-
-if sys.version_info.major == 2:
-    input = raw_input  # noqa
+from rodan.models.tombstone import Tombstone
+from rodan.models.cataloguemanifest import CatalogueManifest
+from rodan.models.tracespan import TraceSpan
+
+# Channel of the change notifications sent by the `object_notify` database trigger, one
+# line per row, in payloads of less than that many bytes (PostgreSQL allows 8000).
+NOTIFY_CHANNEL = "rodan_object_notify"
+NOTIFY_PAYLOAD_SIZE = 7900
+# Tables without the trigger: the uuid of a Tempauthtoken is the token itself, and the
+# other rows are private to a user or internal, while the notifications of rows without
+# a project go to every user (see rodan/websocket.py).
+NOTIFY_EXCLUDED_TABLES = (
+    "rodan_tempauthtoken",
+    "rodan_userpreference",
+    "rodan_tombstone",
+    "rodan_tracespan",
+    "rodan_cataloguemanifest",
+)
 
 
 @receiver(post_migrate)
@@ -87,9 +98,13 @@ def update_database_trigger(sender, **kwargs):
     This function is executed after the post-migrate signal.
     It first connects to the Postgres database using psycopg2.
     It then loops through all tables that begin with 'rodan_',
-    destroys triggers if they already exist in that table, and then creates the triggers.
-    After each INSERT, UPDATE, or DELETE action, a message containing information with the
-    status, the model name and the uuid will be published through Redis.
+    destroys triggers if they already exist in that table, and then creates the triggers,
+    except on `NOTIFY_EXCLUDED_TABLES`.
+    After each INSERT, UPDATE, or DELETE statement, notifications containing the status,
+    the table name, the uuid, and the project and workflow run uuids (if the table has
+    such columns) of each row are sent on the `rodan_object_notify` channel with
+    `pg_notify`. Notifications are delivered when the transaction commits; the relay (`manage.py notify_relay`, see
+    rodan/notify_relay.py) LISTENs to them and publishes them through Redis.
     """
     if sender.name != "rodan":
         return
@@ -108,94 +123,90 @@ def update_database_trigger(sender, **kwargs):
 
     curs = conn.cursor()
 
-    # Python function to add message to redis
-    publish_message = '''
-        CREATE OR REPLACE LANGUAGE plpythonu;
-        CREATE OR REPLACE FUNCTION publish_message(notify text) RETURNS void AS $$
-            import json
-            import redis
-            info = notify.split('/')
-            status = info[0]
-            if len(info) > 3:
-                project = info[3]
-            else:
-                project = None
-            model = info[1].replace('rodan_','')
-            uuid = info[2].replace('-','')
-            if project is not None:
-                data = {{
-                    'status': status,
-                    'project': project,
-                    'model': model,
-                    'uuid': uuid
-                }}
-            else:
-                 data = {{
-                    'status': status,
-                    'model': model,
-                    'uuid': uuid
-                }}
-            r = redis.StrictRedis("{0}", {1}, db={2})
-            r.publish('rodan:broadcast:rodan', json.dumps(data))
-        $$ LANGUAGE plpythonu;
-        GRANT EXECUTE ON FUNCTION publish_message(notify text) TO {3};
-    '''.format(
-        settings.WS4REDIS_CONNECTION['host'],
-        settings.WS4REDIS_CONNECTION['port'],
-        settings.WS4REDIS_CONNECTION['db'],
-        settings.DATABASES['default']['USER']
-    )
-
-    # Testing publish_message function
-    test_publish_message = '''
-        SELECT "publish_message"('test/test/00000000000000000000000000000000');
-    '''
-
-    # Create trigger that sends information about the status, the table name, and the uuid of the modified element
+    # Create the triggers that send information about the status, the table name, and the
+    # uuid of the modified elements: 'status/table/uuid/project_uuid/workflow_run_uuid', one
+    # line per row. The row trigger is given 'project_id' and/or 'workflow_run_id' as
+    # arguments on tables that have these columns, so that information_schema is not queried
+    # for every row.
+    #
+    # Before PostgreSQL 13, pg_notify compares each payload with all the ones already sent
+    # in the transaction, which is quadratic in the number of rows. So the row trigger only
+    # queues its line in a temporary table (created by the statement trigger that runs
+    # before it), and the statement trigger that runs after it sends the lines of the
+    # statement, joined, in as few notifications as the 8000 bytes limit of a payload
+    # allows. Transition tables would do without the temporary table, from PostgreSQL 10.
     trigger = '''
+        CREATE OR REPLACE FUNCTION object_notify_begin() RETURNS trigger AS $$
+        BEGIN
+            IF to_regclass('pg_temp.rodan_notify_lines') IS NULL THEN
+                CREATE TEMPORARY TABLE rodan_notify_lines (id serial, line text)
+                    ON COMMIT DELETE ROWS;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
         CREATE OR REPLACE FUNCTION object_notify() RETURNS trigger AS $$
         DECLARE
             status text;
+            rec record;
             notify text;
         BEGIN
             IF (TG_OP = 'INSERT') THEN
                 status = 'created';
-                IF EXISTS (SELECT 1 FROM information_schema.columns WHERE TABLE_NAME=TG_TABLE_NAME AND COLUMN_NAME = 'project_id') THEN
-                    notify = status || '/' || CAST(TG_TABLE_NAME AS text) || '/' || CAST(NEW.uuid AS text) || '/' || CAST(NEW.project_id AS text);
-                ELSE
-                    notify = status || '/' || CAST(TG_TABLE_NAME AS text) || '/' || CAST(NEW.uuid AS text);
-                END IF;
-                PERFORM publish_message(notify);
-                RETURN NEW;
+                rec = NEW;
             ELSIF (TG_OP = 'UPDATE') THEN
                 status = 'updated';
-                IF EXISTS (SELECT 1 FROM information_schema.columns WHERE TABLE_NAME=TG_TABLE_NAME AND COLUMN_NAME = 'project_id') THEN
-                    notify = status || '/' || CAST(TG_TABLE_NAME AS text) || '/' || CAST(NEW.uuid AS text) || '/' || CAST(NEW.project_id AS text);
-                ELSE
-                    notify = status || '/' || CAST(TG_TABLE_NAME AS text) || '/' || CAST(NEW.uuid AS text);
-                END IF;
-                PERFORM publish_message(notify);
-                RETURN NEW;
-            ELSIF (TG_OP = 'DELETE') THEN
+                rec = NEW;
+            ELSE
                 status = 'deleted';
-                IF EXISTS (SELECT 1 FROM information_schema.columns WHERE TABLE_NAME=TG_TABLE_NAME AND COLUMN_NAME = 'project_id') THEN
-                    notify = status || '/' || CAST(TG_TABLE_NAME AS text) || '/' || CAST(OLD.uuid AS text) || '/' || CAST(OLD.project_id AS text);
-                ELSE
-                    notify = status || '/' || CAST(TG_TABLE_NAME AS text) || '/' || CAST(OLD.uuid AS text);
+                rec = OLD;
+            END IF;
+            notify = status || '/' || CAST(TG_TABLE_NAME AS text) || '/' || CAST(rec.uuid AS text) || '/';
+            IF ('project_id' = ANY(TG_ARGV)) THEN
+                notify = notify || COALESCE(CAST(rec.project_id AS text), '');
+            END IF;
+            notify = notify || '/';
+            IF ('workflow_run_id' = ANY(TG_ARGV)) THEN
+                notify = notify || COALESCE(CAST(rec.workflow_run_id AS text), '');
+            END IF;
+            INSERT INTO pg_temp.rodan_notify_lines (line) VALUES (notify);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE FUNCTION object_notify_end() RETURNS trigger AS $$
+        DECLARE
+            row_line text;
+            notify text = '';
+        BEGIN
+            FOR row_line IN
+                WITH sent AS (
+                    DELETE FROM pg_temp.rodan_notify_lines l RETURNING l.id, l.line
+                )
+                SELECT sent.line FROM sent ORDER BY sent.id
+            LOOP
+                IF length(notify) + length(row_line) >= {1} THEN
+                    PERFORM pg_notify('{0}', notify);
+                    notify = '';
                 END IF;
-                PERFORM publish_message(notify);
-                RETURN OLD;
+                notify = notify || CASE WHEN notify = '' THEN '' ELSE E'\\n' END || row_line;
+            END LOOP;
+            IF notify <> '' THEN
+                PERFORM pg_notify('{0}', notify);
             END IF;
+            RETURN NULL;
         END;
         $$ LANGUAGE plpgsql;
-    '''
+    '''.format(NOTIFY_CHANNEL, NOTIFY_PAYLOAD_SIZE)
 
-    # Loop through selected models to create trigger, if the trigger already exists, it gets destroyed before a new one
-    # is created
+    # Loop through selected models to create the triggers; if they already exist, they get
+    # destroyed before new ones are created.
     create_trigger = '''
         CREATE OR REPLACE FUNCTION name() RETURNS void AS $$
         DECLARE
             tablename name;
+            args text;
         BEGIN
             FOR tablename IN
                 SELECT table_name FROM information_schema.tables
@@ -203,119 +214,35 @@ def update_database_trigger(sender, **kwargs):
                 AND table_name SIMILAR TO 'rodan_[a-z]+'
             LOOP
                 EXECUTE format('DROP TRIGGER IF EXISTS object_post_insert_notify ON %I', tablename);
-                EXECUTE format('CREATE TRIGGER object_post_insert_notify AFTER INSERT OR UPDATE OR DELETE ON %I FOR EACH ROW EXECUTE PROCEDURE object_notify()', tablename);
+                EXECUTE format('DROP TRIGGER IF EXISTS object_notify_begin ON %I', tablename);
+                EXECUTE format('DROP TRIGGER IF EXISTS object_notify_end ON %I', tablename);
+                CONTINUE WHEN tablename = ANY(ARRAY[{0}]::name[]);
+                SELECT string_agg(quote_literal(column_name), ', ') INTO args
+                    FROM information_schema.columns
+                    WHERE table_name = tablename AND column_name IN ('project_id', 'workflow_run_id');
+                EXECUTE format('CREATE TRIGGER object_notify_begin BEFORE INSERT OR UPDATE OR DELETE ON %I FOR EACH STATEMENT EXECUTE PROCEDURE object_notify_begin()', tablename);
+                EXECUTE format('CREATE TRIGGER object_post_insert_notify AFTER INSERT OR UPDATE OR DELETE ON %I FOR EACH ROW EXECUTE PROCEDURE object_notify(%s)', tablename, COALESCE(args, ''));
+                EXECUTE format('CREATE TRIGGER object_notify_end AFTER INSERT OR UPDATE OR DELETE ON %I FOR EACH STATEMENT EXECUTE PROCEDURE object_notify_end()', tablename);
             END LOOP;
         END;
         $$ LANGUAGE plpgsql;
         SELECT name();
         DROP FUNCTION name();
-    '''
-
-    try:
-        curs.execute(publish_message)
-    except psycopg2.ProgrammingError as e:
-        if 'superuser' in str(e):
-            # needs database superuser
-            traceback.print_exc()
-            solved = False
-
-            while not solved:
-                choice = '?'
-
-                # If there are environment variables, don't ask from user due to stdin reading issue of Python
-                # raw_input.
-                if 'RODAN_PSQL_SUPERUSER_USERNAME' in os.environ and 'RODAN_PSQL_SUPERUSER_PASSWORD' in os.environ:
-                    print("Environment variables RODAN_PSQL_SUPERUSER_USERNAME and RODAN_PSQL_SUPERUSER_PASSWORD detected.")  # noqa
-                    choice = '1'
-                elif 'RODAN_PSQL_SUPERUSER_COMMAND' in os.environ:
-                    print("Environment variables RODAN_PSQL_SUPERUSER_COMMAND detected.")
-                    choice = '2'
-
-                while choice not in ('1', '2'):
-                    print("================================================================")
-                    print("Rodan needs PostgreSQL superuser permission to proceed. Options:")
-                    print("  1. Provide the username and password of a superuser.")
-                    print("  2. Provide the shell command to log in PostgreSQL console as a superuser (typically `sudo -u postgres psql --dbname={0}`)".format(settings.DATABASES['default']['NAME']))  # noqa
-                    print("(Please inform Rodan developers if there is another way of connecting to PostgreSQL.)")
-                    choice = input("Choice: ")
-
-                if choice == '1':
-                    if 'RODAN_PSQL_SUPERUSER_USERNAME' in os.environ:
-                        username = os.environ['RODAN_PSQL_SUPERUSER_USERNAME']
-                        del os.environ['RODAN_PSQL_SUPERUSER_USERNAME']
-                    else:
-                        username = input("Username: ")
-
-                    if 'RODAN_PSQL_SUPERUSER_PASSWORD' in os.environ:
-                        password = os.environ['RODAN_PSQL_SUPERUSER_PASSWORD']
-                        del os.environ['RODAN_PSQL_SUPERUSER_PASSWORD']
-                    else:
-                        password = getpass.getpass("Password: ")
-
-                    try:
-                        conn_sudo = psycopg2.connect(
-                            database=settings.DATABASES['default']['NAME'],
-                            user=username,
-                            password=password,
-                            host=settings.DATABASES['default']['HOST'],
-                            port=settings.DATABASES['default']['PORT']
-                        )
-                        conn_sudo.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
-                        cur_sudo = conn_sudo.cursor()
-                        cur_sudo.execute(publish_message)
-                        solved = True
-                    except Exception as e:
-                        traceback.print_exc(e)
-                        continue
-
-                elif choice == '2':
-                    try:
-                        if 'RODAN_PSQL_SUPERUSER_COMMAND' in os.environ:
-                            cmd = os.environ['RODAN_PSQL_SUPERUSER_COMMAND']
-                            del os.environ['RODAN_PSQL_SUPERUSER_COMMAND']
-                        else:
-                            cmd = input("Command: ")
-                        p = subprocess.Popen(
-                            cmd,
-                            shell=True,
-                            stdout=subprocess.PIPE,
-                            stdin=subprocess.PIPE,
-                            stderr=subprocess.STDOUT
-                        )
-                        grep_stdout = p.communicate(input=publish_message)[0]
-                        rc = p.returncode
-                        print(grep_stdout)
-                        if "ERROR:" in grep_stdout or rc != 0:
-                            continue
-                        else:
-                            solved = True
-                    except Exception as e:
-                        traceback.print_exc(e)
-                        continue
-        else:
-            raise
+    '''.format(", ".join("'{0}'".format(t) for t in NOTIFY_EXCLUDED_TABLES))
 
-    try:
-        curs.execute(test_publish_message)
-    except psycopg2.InternalError as e:
-        if 'No module named redis' in str(e):
-            traceback.print_exc()
-            print("================================================================")
-            print("Please execute `pip install redis` as a system package (not in virtualenv) on the database server {0}.".format(settings.DATABASES['default']['HOST']))  # noqa
-        elif 'redis' in str(e):
-            traceback.print_exc()
-            print("================================================================")
-            print("Please start redis-server at {0}:{1}.".format(
-                settings.WS4REDIS_CONNECTION['host'],
-                settings.WS4REDIS_CONNECTION['port'])
-            )
-        else:
-            raise
-        sys.exit(2)
+    # Older versions published to Redis from a plpythonu function, called by the trigger.
+    drop_publish_message = '''
+        DROP FUNCTION IF EXISTS publish_message(text);
+    '''
 
     print("Registering Rodan database triggers...",)
     curs.execute(trigger)
     curs.execute(create_trigger)
+    try:
+        curs.execute(drop_publish_message)
+    except psycopg2.ProgrammingError:
+        # Owned by a database superuser: harmless, as nothing calls it anymore.
+        traceback.print_exc()
 
     # Prevent multiple execution of post-migrate signal (not sure why it happens)
     global update_database_trigger
@@ -351,6 +278,7 @@ def assign_perms_project(sender, instance, created, raw, using, update_fields, *
 @receiver(post_save, sender=OutputPort)
 @receiver(post_save, sender=Connection)
 @receiver(post_save, sender=RunJob)
+@receiver(post_save, sender=RunJobMetrics)
 @receiver(post_save, sender=ResultsPackage)
 @receiver(post_save, sender=Input)
 @receiver(post_save, sender=Output)
@@ -369,7 +297,7 @@ def assign_perms_others(sender, instance, created, raw, using, update_fields, **
         #     project = instance.workflow_job_group.workflow.project
         elif sender in (Connection, ):
             project = instance.input_port.workflow_job.workflow.project
-        elif sender in (RunJob, ResultsPackage):
+        elif sender in (RunJob, RunJobMetrics, ResultsPackage):
             project = instance.workflow_run.project
         elif sender in (Input, Output, ):
             project = instance.run_job.workflow_run.project
@@ -388,6 +316,14 @@ def assign_perms_others(sender, instance, created, raw, using, update_fields, **
         assign_perm('delete_{0}'.format(model_name), worker_group, instance)
 
 
+@receiver(post_save, sender=Tombstone)
+def assign_perms_tombstone(sender, instance, created, raw, using, update_fields, **kwargs):
+    # The deleted object, and the groups of its project, may already be gone: only the
+    # user who deleted it can follow the collection.
+    if created and instance.creator is not None:
+        assign_perm('view_tombstone', instance.creator, instance)
+
+
 @receiver(post_save, sender=UserPreference)
 @receiver(post_save, sender=User)
 def assign_perms_user_userpreference(sender, instance, created, raw, using, update_fields, **kwargs):
@@ -0,0 +1,35 @@
+import uuid
+from django.db import models
+from jsonfield import JSONField
+
+
+class CatalogueManifest(models.Model):
+    """
+    A `CatalogueManifest` records that the database was found to match a catalogue of
+    ResourceTypes and Jobs defined in the code. `rodan.jobs.load` computes the digest of
+    the catalogue it loads: if a `CatalogueManifest` with this digest exists, the
+    integrity checks of the ResourceTypes and Jobs are skipped (see
+    `rodan.jobs.catalogue`). `manage.py migrate` replaces all of them by the manifest of
+    the catalogue it has just checked.
+
+    **Fields**
+
+    - `uuid`
+    - `digest` -- the SHA-256 digest of the catalogue (hexadecimal).
+    - `package_versions` -- the versions of the job packages of the catalogue.
+    - `jobs` -- the package of each Job of the catalogue: Job name => package name (see
+      `rodan.jobs.lazy`).
+    - `created`
+    """
+
+    class Meta:
+        app_label = "rodan"
+
+    uuid = models.UUIDField(primary_key=True, editable=False, default=uuid.uuid4)
+    digest = models.CharField(max_length=64, unique=True)
+    package_versions = JSONField(default={})
+    jobs = JSONField(default={})
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __unicode__(self):
+        return u"<CatalogueManifest {0}>".format(self.digest)
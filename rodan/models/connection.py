@@ -1,6 +1,8 @@
 import uuid
 from django.db import models
+from django.db.models import Q
 from rodan.models.workflow import Workflow
+from rodan.models.workflowjob import WorkflowJob
 
 
 class Connection(models.Model):
@@ -26,7 +28,9 @@ class Connection(models.Model):
 
     **Methods**
 
-    - `save` and `delete` -- invalidate the associated `Workflow`.
+    - `save` and `delete` -- invalidate the associated `Workflow`. `save` also clears
+      `validated` on the `WorkflowJob`s at both ends. Removing a `Connection` cannot
+      make a port invalid: only the checks of the graph, which always run, see it.
     """
 
     class Meta:
@@ -78,6 +82,11 @@ class Connection(models.Model):
             Workflow.objects.filter(
                 pk__in=list(set([wf_original_id, wf_new_id]))
             ).update(valid=False)
+            input_port_ids = [pk for pk in (self.input_port_id, old.input_port_id) if pk]
+            output_port_ids = [pk for pk in (self.output_port_id, old.output_port_id) if pk]
+            WorkflowJob.objects.filter(
+                Q(input_ports__in=input_port_ids) | Q(output_ports__in=output_port_ids)
+            ).update(validated=None)
 
     def delete(self, *args, **kwargs):
         wf_id = self.input_port.workflow_job.workflow_id
@@ -1,6 +1,7 @@
 from django.db import models
 import uuid
 from rodan.models.workflow import Workflow
+from rodan.models.workflowjob import WorkflowJob
 
 
 class InputPort(models.Model):
@@ -23,7 +24,8 @@ class InputPort(models.Model):
 
     **Methods**
 
-    - `save` and `delete` -- invalidate the associated `Workflow`.
+    - `save` and `delete` -- invalidate the associated `Workflow`, and clear `validated`
+      on the `WorkflowJob`.
     - `save` -- set `label` to the name of its associated `InputPortType` as a
       default value.
     """
@@ -67,11 +69,16 @@ class InputPort(models.Model):
             Workflow.objects.filter(
                 pk__in=list(set([wf_original_id, wf_new_id]))
             ).update(valid=False)
+            WorkflowJob.objects.filter(
+                pk__in=[pk for pk in (self.workflow_job_id, old.workflow_job_id) if pk]
+            ).update(validated=None)
 
     def delete(self, *args, **kwargs):
         wf_id = self.workflow_job.workflow_id
+        wfjob_id = self.workflow_job_id
         super(InputPort, self).delete(*args, **kwargs)
         Workflow.objects.filter(pk=wf_id).update(valid=False)
+        WorkflowJob.objects.filter(pk=wfjob_id).update(validated=None)
 
     def __unicode__(self):
         return u"<InputPort {0}>".format(str(self.uuid))
@@ -22,8 +22,14 @@ class Job(models.Model):
     - `description` -- documentation.
     - `enabled`
     - `interactive` -- whether the `Job` has manual phases.
+    - `fusible` -- whether the automatic phase is cheap enough for its `RunJob`s to run
+      back to back with the ones before and after them in one Celery task (see
+      `rodan.jobs.fusion`).
     - `settings` -- description of `Job` settings.
     - `job_queue` -- group of celery workers that can execute this `Job`.
+    - `resource_hints` -- expected peak `memory` (MiB), `cpu` threads and `scratch`
+      disk space (MiB) of one execution, declared by the job class. Used to place
+      `RunJob`s on workers with enough capacity (see `rodan.jobs.placement`).
 
     See also: https://github.com/DDMAL/Rodan/wiki/Introduction-to-job-modules
     """
@@ -46,8 +52,11 @@ class Job(models.Model):
     # schema for any specific job, otherwise it will take the default route.
     job_queue = models.CharField(max_length=15, default="celery")
 
+    resource_hints = JSONField(default={})
+
     enabled = models.BooleanField(default=False, db_index=True)
     interactive = models.BooleanField(default=False, db_index=True)
+    fusible = models.BooleanField(default=False)
 
     def __unicode__(self):
         return u"<Job {0}>".format(self.name)
@@ -1,7 +1,5 @@
 import os
 import logging
-import shutil
-import traceback
 import uuid
 from django.conf import settings
 from django.contrib.auth.models import User, Group
@@ -24,6 +22,8 @@ class Project(models.Model):
     - `description`
     - `creator` -- a foreign key to the `User` who created the `Project`. Considered
       as the superuser of the `Project`.
+    - `tombstoned` -- whether the `Project` has been deleted and waits for the garbage
+      collector (see `rodan.jobs.garbage`).
     - `created`
     - `updated`
 
@@ -36,7 +36,8 @@ class Project(models.Model):
     **Methods**
 
     - `save` -- create the project directory if it does not exist.
-    - `delete` -- delete the whole project directory.
+    - `delete` -- delete the `Project`, its `WorkflowRun`s and `Resource`s in chunks, and
+      the whole project directory.
     """
 
     class Meta:
@@ -58,6 +59,7 @@ class Project(models.Model):
 
     admin_group = models.ForeignKey(Group, related_name="project_as_admin")
     worker_group = models.ForeignKey(Group, related_name="project_as_worker")
+    tombstoned = models.BooleanField(default=False, db_index=True)
 
     created = models.DateTimeField(auto_now_add=True, db_index=True)
     updated = models.DateTimeField(auto_now=True, db_index=True)
@@ -93,34 +95,9 @@ class Project(models.Model):
             os.makedirs(self.project_path)
 
     def delete(self, *args, **kwargs):
-        from rodan.models import RunJob
+        from rodan.jobs.garbage import Collector
 
-        # logger.debug(RunJob.objects.filter(workflow_run__project=self))
-        # RunJob.objects.filter(workflow_run__project=self).delete()
-        for i in RunJob.objects.filter(workflow_run__project=self):
-            i.delete()
-
-        # remove protected links from input/output to resource by deleting all
-        # workflowruns prior to resources
-        from rodan.models import WorkflowRun
-
-        WorkflowRun.objects.filter(project=self).delete()
-
-        # delete project, project folder, and project groups
-        proj_path = self.project_path
-        ag = self.admin_group
-        wg = self.worker_group
-        super(Project, self).delete(*args, **kwargs)  # cascade deletion of resources
-        ag.delete()
-        wg.delete()
-        logger.info("Deleting: {}".format(proj_path))
-
-        try:
-            shutil.rmtree(proj_path)
-        except Exception as e:
-            logger.warning("Deleting folder failed: {}".format(proj_path))
-            logger.warning(e)
-            traceback.print_exc()
+        Collector().collect_project(self.uuid)
 
     @property
     def workflow_count(self):
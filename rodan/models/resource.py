@@ -46,6 +46,8 @@ class Resource(models.Model):
     - `origin` -- a reference to the `Output` model associated with the `RunJob`
       that produced the `Resource`. This can be null, if the `Resource` was uploaded
       by user, and not produced as an output file of a `RunJob`.
+    - `tombstoned` -- whether the `Resource` has been deleted and waits for the garbage
+      collector (see `rodan.jobs.garbage`).
     - `created`
     - `updated`
 
@@ -136,6 +138,7 @@ class Resource(models.Model):
         on_delete=models.SET_NULL,
         db_index=True,
     )  # no backward reference
+    tombstoned = models.BooleanField(default=False, db_index=True)
 
     created = models.DateTimeField(auto_now_add=True, db_index=True)
     updated = models.DateTimeField(auto_now=True, db_index=True)
@@ -156,12 +159,10 @@ class Resource(models.Model):
     def delete(self, *args, **kwargs):
         if os.path.exists(self.resource_path):
             shutil.rmtree(self.resource_path)
-        previous_labels = list(self.labels.all())
+        previous_label_ids = list(self.labels.values_list("pk", flat=True))
         super(Resource, self).delete(*args, **kwargs)
-        for label in previous_labels:
-            # Delete labels that no longer are associated to any resource
-            if label.resource_set.count() == 0:
-                label.delete()
+        # Delete labels that no longer are associated to any resource
+        ResourceLabel.objects.filter(pk__in=previous_label_ids, resource__isnull=True).delete()
 
     @property
     def resource_file_path(self):
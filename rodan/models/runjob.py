@@ -2,7 +2,7 @@ import uuid
 from django.db import models
 from jsonfield import JSONField
 from rodan.models.job import Job
-from rodan.constants import task_status
+from rodan.constants import profiling, task_status
 from django.contrib.auth.models import User
 
 
@@ -29,6 +29,9 @@ class RunJob(models.Model):
     - `job_settings` -- the settings associated with the `WorkflowJob` that is
       being executed in the `RunJob`.
     - `status` -- an integer indicating the status of `RunJob`.
+    - `remaining_work` -- the estimated duration in seconds of the longest chain of
+      `RunJob`s from the start of this one to the end of the `WorkflowRun`. The master
+      task dispatches the `RunJob`s with the most remaining work first.
     - `celery_task_id` -- the corresponding Celery Task. This field is set after the
       `RunJob` starts running.
     - `error_summary` -- summary of error when the `RunJob` fails.
@@ -37,6 +40,10 @@ class RunJob(models.Model):
     - `updated`
     - `interactive_timings` -- a JSON list that tracks the start and end of every manual
       phase of the job.
+    - `profile` -- profiling mode, copied from the `WorkflowRun` or else the `WorkflowJob`
+      (see `rodan.jobs.profiling`).
+    - `profile_resource` -- a nullable reference to the `Resource` of the profile of the
+      automatic phase, once it has run with a profiling mode.
 
     - `working_user` -- a nullable field indicating the working user of an interactive
       job. If it is None, or the time is after the expiry time, there are no user working
@@ -48,7 +55,8 @@ class RunJob(models.Model):
 
     - `lock` -- (internal use) stores the thread identifier of one of Celery workers, or
       None. For a worker thread to lock the RunJobs and avoid competition. (see
-      `rodan.jobs.master_task`)
+      `rodan.jobs.master_task`) While the `RunJob` is running, it stores the Celery task
+      of the copy that ended first and writes the results (see `rodan.jobs.supervisor`).
 
     **Properties**
 
@@ -95,6 +103,7 @@ class RunJob(models.Model):
     job_queue = models.CharField(max_length=15, default="celery")
     job_settings = JSONField(default={})
     status = models.IntegerField(choices=STATUS_CHOICES, default=0, db_index=True)
+    remaining_work = models.FloatField(default=0)
     celery_task_id = models.CharField(max_length=255, blank=True, null=True)
 
     error_summary = models.TextField(default="", blank=True, null=True)
@@ -106,6 +115,16 @@ class RunJob(models.Model):
     interactive_timings = JSONField(
         default=[]
     )  # track when a person starts and submits the job
+    profile = models.CharField(
+        max_length=8, choices=profiling.CHOICES, default=profiling.OFF, blank=True
+    )
+    profile_resource = models.ForeignKey(
+        "rodan.Resource",
+        related_name="+",
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+    )
 
     working_user = models.ForeignKey(
         User,
@@ -125,8 +144,10 @@ class RunJob(models.Model):
 
     @property
     def job(self):
+        from rodan.jobs.catalogue import cache
+
         try:
-            return Job.objects.get(name=self.job_name)
+            return cache.job(self.job_name)
         except Job.DoesNotExist:
             return None
 
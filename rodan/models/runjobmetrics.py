@@ -0,0 +1,80 @@
+import uuid
+from django.db import models
+from jsonfield import JSONField
+from rodan.constants import task_status
+
+
+class RunJobMetrics(models.Model):
+    """
+    Execution metrics and provenance of one automatic phase of a `RunJob`, recorded by
+    the worker when the phase ends. A `RunJob` gets one record per execution (an
+    interactive job has one per automatic phase, and a redone job one per run).
+
+    **Fields**
+
+    - `uuid`
+    - `run_job` -- a reference to the `RunJob`.
+    - `workflow_run` -- a reference to the `WorkflowRun` of the `RunJob`.
+    - `job_name` -- the name of the `Job`, copied from the `RunJob`.
+    - `status` -- the status of the `RunJob` at the end of the phase (`FINISHED` or
+      `WAITING_FOR_INPUT`).
+    - `worker_host` -- the Celery worker that ran the phase.
+    - `started` -- when the worker started the phase.
+    - `queue_wait_time` -- seconds between the dispatch of the `RunJob` by the master task
+      and the start of the phase.
+    - `wall_time` -- seconds.
+    - `cpu_time` -- user and system CPU seconds of the worker process and of the
+      processes it waited for.
+    - `peak_rss` -- peak resident set size of the worker process during the phase, or
+      of the processes it waited for if larger, in bytes. Null if the platform cannot
+      reset the high-water mark of the RSS (Linux 4.0+ can).
+    - `bytes_read` -- bytes read by the worker process. Null if the platform does not
+      report it.
+    - `bytes_written` -- bytes written by the worker process. Null if the platform does
+      not report it.
+    - `input_bytes` -- total size of the files of the inputs, in bytes. Used by the
+      runtime estimator (`rodan.jobs.estimator`).
+    - `inputs` -- a list of the UUIDs of the input `Resource`s and `ResourceList`s.
+    - `outputs` -- a list of the UUIDs of the output `Resource`s and `ResourceList`s.
+    - `created`
+    """
+
+    class Meta:
+        app_label = "rodan"
+        permissions = (("view_runjobmetrics", "View RunJobMetrics"),)
+
+    STATUS_CHOICES = [
+        (task_status.WAITING_FOR_INPUT, "Waiting for input"),
+        (task_status.FINISHED, "Finished"),
+    ]
+
+    uuid = models.UUIDField(primary_key=True, editable=False, default=uuid.uuid4)
+    run_job = models.ForeignKey(
+        "rodan.RunJob", related_name="metrics", on_delete=models.CASCADE, db_index=True
+    )
+    workflow_run = models.ForeignKey(
+        "rodan.WorkflowRun",
+        related_name="runjob_metrics",
+        on_delete=models.CASCADE,
+        db_index=True,
+    )
+    job_name = models.CharField(max_length=200, db_index=True)
+    status = models.IntegerField(choices=STATUS_CHOICES, db_index=True)
+    worker_host = models.CharField(max_length=255, blank=True, null=True, db_index=True)
+
+    started = models.DateTimeField(db_index=True)
+    queue_wait_time = models.FloatField(blank=True, null=True)
+    wall_time = models.FloatField()
+    cpu_time = models.FloatField(blank=True, null=True)
+    peak_rss = models.BigIntegerField(blank=True, null=True)
+    bytes_read = models.BigIntegerField(blank=True, null=True)
+    bytes_written = models.BigIntegerField(blank=True, null=True)
+    input_bytes = models.BigIntegerField(blank=True, null=True)
+
+    inputs = JSONField(default=[])
+    outputs = JSONField(default=[])
+
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __unicode__(self):
+        return u"<RunJobMetrics {0}>".format(str(self.run_job_id))
@@ -0,0 +1,77 @@
+import uuid
+from django.db import models
+from django.contrib.auth.models import User
+from rodan.constants import task_status
+
+
+class Tombstone(models.Model):
+    """
+    A `Tombstone` records the deletion of a `Project`, `WorkflowRun` or `Resource`.
+    Deleting them through the API only flags them as `tombstoned` (they disappear from
+    the API at once) and creates a `Tombstone`; the garbage collector
+    (`rodan.core.collect_garbage`) then revokes their Celery tasks, deletes their
+    rows and removes their files in the background.
+
+    **Fields**
+
+    - `uuid`
+    - `model` -- the model name of the deleted object (`project`, `workflowrun` or
+      `resource`).
+    - `object_uuid` -- the UUID of the deleted object.
+    - `object_name` -- the name of the deleted object, for display.
+    - `status` -- an integer indicating the status of the collection.
+    - `creator` -- the `User` who deleted the object.
+    - `revoked_tasks` -- the number of Celery tasks revoked so far.
+    - `deleted_rows` -- the number of database rows deleted so far.
+    - `removed_directories` -- the number of directories removed so far.
+    - `error_summary` -- summary of error when the collection fails.
+    - `error_details` -- details of error when the collection fails.
+    - `created`
+    - `updated`
+    """
+
+    class Meta:
+        app_label = "rodan"
+        permissions = (("view_tombstone", "View Tombstone"),)
+
+    STATUS_CHOICES = [
+        (task_status.SCHEDULED, "Scheduled"),
+        (task_status.PROCESSING, "Processing"),
+        (task_status.FINISHED, "Finished"),
+        (task_status.FAILED, "Failed"),
+    ]
+
+    MODEL_CHOICES = [
+        ("project", "Project"),
+        ("workflowrun", "WorkflowRun"),
+        ("resource", "Resource"),
+    ]
+
+    uuid = models.UUIDField(primary_key=True, editable=False, default=uuid.uuid4)
+    model = models.CharField(max_length=20, choices=MODEL_CHOICES, db_index=True)
+    object_uuid = models.UUIDField(db_index=True)
+    object_name = models.CharField(max_length=255, blank=True, null=True)
+    status = models.IntegerField(
+        choices=STATUS_CHOICES, default=task_status.SCHEDULED, db_index=True
+    )
+    creator = models.ForeignKey(
+        User,
+        related_name="tombstones",
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        db_index=True,
+    )
+
+    revoked_tasks = models.IntegerField(default=0)
+    deleted_rows = models.IntegerField(default=0)
+    removed_directories = models.IntegerField(default=0)
+
+    error_summary = models.TextField(default="", blank=True, null=True)
+    error_details = models.TextField(default="", blank=True, null=True)
+
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __unicode__(self):
+        return u"<Tombstone {0} {1}>".format(self.model, str(self.object_uuid))
@@ -0,0 +1,41 @@
+import uuid
+from django.db import models
+from jsonfield import JSONField
+
+
+class TraceSpan(models.Model):
+    """
+    A timed operation in the trace of a `WorkflowRun`, recorded by
+    `rodan.jobs.tracing.DatabaseExporter`: a Celery task, or a phase of one. Spans form
+    a tree across the web process and the workers (see `rodan.jobs.tracing`).
+
+    **Fields**
+
+    - `uuid` -- the identifier of the span.
+    - `trace_id` -- the UUID of the `WorkflowRun`. Not a foreign key: spans are written
+      while the `WorkflowRun` is being created, and are only diagnostics.
+    - `parent_id` -- the identifier of the parent span, or null for the root span.
+    - `name` -- the Celery task or the phase.
+    - `started` -- when the operation started.
+    - `duration` -- seconds.
+    - `host` -- the host name of the process.
+    - `pid` -- the process ID.
+    - `attributes` -- details of the operation, e.g. the UUID of the `RunJob`, or the
+      exception that ended it.
+    """
+
+    class Meta:
+        app_label = "rodan"
+
+    uuid = models.UUIDField(primary_key=True, editable=False, default=uuid.uuid4)
+    trace_id = models.UUIDField(db_index=True)
+    parent_id = models.UUIDField(blank=True, null=True)
+    name = models.CharField(max_length=255)
+    started = models.DateTimeField(db_index=True)
+    duration = models.FloatField()
+    host = models.CharField(max_length=255, blank=True, null=True)
+    pid = models.IntegerField(blank=True, null=True)
+    attributes = JSONField(default={})
+
+    def __unicode__(self):
+        return u"<TraceSpan {0}>".format(self.name)
@@ -1,6 +1,7 @@
 from django.db import models
 import uuid
 from jsonfield import JSONField
+from rodan.constants import profiling
 from rodan.jobs.deep_eq import deep_eq
 from rodan.models.workflow import Workflow
 
@@ -22,6 +23,13 @@ class WorkflowJob(models.Model):
     - `name` -- user-defined name. Default: the same as `job_name`.
 
     - `group` -- a nullable reference to the `WorkflowGroup` object.
+    - `profile` -- profiling mode of its `RunJob`s, unless the `WorkflowRun` has one
+        (see `rodan.jobs.profiling`): "" (off, default), "job" or "task". Changing it
+        does not invalidate the `Workflow`.
+    - `validated` -- a nullable reference to the `CatalogueManifest` of the catalogue
+        against which it last passed the validation of its `Workflow`, with its ports
+        and Connections. Cleared when they are touched, so that the next validation
+        checks them again (see `rodan.jobs.validation`).
     - `appearance` -- a JSON field including:
         `x` -- coordinate of the center position (% of the canvas size);
         `y` -- `y` coordinate of the center position (% of the canvas size);
@@ -37,7 +45,7 @@ class WorkflowJob(models.Model):
     **Methods**
 
     - `save` and `delete` -- invalidate the referenced `Workflow` if `workflow`,
-        `job`, or `job_settings` are touched.
+        `job`, or `job_settings` are touched. `save` also clears `validated`.
     """
 
     class Meta:
@@ -68,6 +76,16 @@ class WorkflowJob(models.Model):
         on_delete=models.SET_NULL,
         db_index=True,
     )
+    profile = models.CharField(
+        max_length=8, choices=profiling.CHOICES, default=profiling.OFF, blank=True
+    )
+    validated = models.ForeignKey(
+        "rodan.CatalogueManifest",
+        related_name="+",
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+    )
     created = models.DateTimeField(auto_now_add=True, db_index=True)
     updated = models.DateTimeField(auto_now=True, db_index=True)
 
@@ -89,6 +107,8 @@ class WorkflowJob(models.Model):
         cond1 = self.workflow_id != old.workflow_id
         cond2 = self.job_id != old.job_id
         cond3 = not deep_eq(self.job_settings, old.job_settings)
+        if cond1 or cond2 or cond3:
+            self.validated = None
         super(WorkflowJob, self).save(*args, **kwargs)
         if cond1 or cond2 or cond3:
             wf_id = self.workflow_id
@@ -1,8 +1,9 @@
 # import os
 import logging
 import uuid
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
-from rodan.constants import task_status
+from rodan.constants import profiling, task_status
 # import shutil
 
 
@@ -23,12 +24,22 @@ class WorkflowRun(models.Model):
       field will be set to None.
     - `creator` -- a reference to the `User`.
     - `status` -- indicating the status of the `WorkflowRun`.
+    - `priority` -- from 0 (default) to 9. The `RunJob`s of `WorkflowRun`s with a higher
+      priority are consumed first by the workers.
 
     - `name` -- user's name to the `WorkflowRun`.
     - `description` -- user's description of the `WorkflowRun`.
 
     - `last_redone_runjob_tree` -- a nullable reference to `RunJob`, indicating the root
       of `RunJob` tree last redone.
+    - `base_workflow_run` -- a nullable reference to a previous `WorkflowRun` of the same
+      `Workflow`. If set, the `RunJob`s whose settings and inputs did not change since
+      the base run reuse its `Output`s instead of running again.
+    - `profile` -- profiling mode of all the `RunJob`s (see `rodan.jobs.profiling`):
+      "" (off, default), "job" or "task".
+
+    - `tombstoned` -- whether the `WorkflowRun` has been deleted and waits for the garbage
+      collector (see `rodan.jobs.garbage`).
 
     - `created`
     - `updated`
@@ -80,6 +91,10 @@ class WorkflowRun(models.Model):
         choices=STATUS_CHOICES, default=task_status.PROCESSING, db_index=True
     )
 
+    priority = models.IntegerField(
+        default=0, validators=[MinValueValidator(0), MaxValueValidator(9)]
+    )
+
     name = models.CharField(max_length=100, blank=True, null=True, db_index=True)
     description = models.TextField(blank=True, null=True)
 
@@ -90,6 +105,17 @@ class WorkflowRun(models.Model):
         null=True,
         on_delete=models.SET_NULL,
     )
+    base_workflow_run = models.ForeignKey(
+        "rodan.WorkflowRun",
+        related_name="incremental_runs",
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+    )
+    profile = models.CharField(
+        max_length=8, choices=profiling.CHOICES, default=profiling.OFF, blank=True
+    )
+    tombstoned = models.BooleanField(default=False, db_index=True)
 
     created = models.DateTimeField(auto_now_add=True, db_index=True)
     updated = models.DateTimeField(auto_now=True, db_index=True)
@@ -102,18 +128,9 @@ class WorkflowRun(models.Model):
         return u"<WorkflowRun {0}>".format(str(self.uuid))
 
     def delete(self, *args, **kwargs):
-        # remove protected links from runjobs to workflowrun by deleting the jobruns
-        from rodan.models import RunJob
+        # remove protected links from runjobs to workflowrun by deleting the runjobs first,
+        # revoking their Celery tasks in one broadcast
+        from rodan.jobs.garbage import Collector
 
         logger.info("Stopping workflow run: {}".format(self))
-
-        # Funny these don't work... django version? celery version?
-        # RunJob.objects.filter(workflow_run=self).delete()
-        # RunJob.objects.filter(workflow_run=self.uuid).delete()
-        for i in RunJob.objects.filter(workflow_run=self.uuid):
-            logger.info("Stopping RunJob: {}".format(i))
-            i.delete()
-
-        # if os.path.exists(self.resource_path):
-        #     shutil.rmtree(self.resource_path)
-        super(WorkflowRun, self).delete(*args, **kwargs)
+        Collector().collect_workflowrun(self.uuid)
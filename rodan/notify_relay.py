@@ -0,0 +1,253 @@
+"""
+Relay of the database change notifications to the websocket clients.
+
+The `object_notify` triggers (see `update_database_trigger` in rodan/models/__init__.py)
+only call `pg_notify`, once per statement, which costs nothing until the transaction
+commits. This relay LISTENs to the notifications, collects them for
+`RODAN_NOTIFY_RELAY_WINDOW` seconds, merges the ones about the same object, and publishes
+the result to ws4redis in one Redis round-trip, to the channels of the Project and
+WorkflowRun they concern (see rodan/websocket.py). It also invalidates the REST API
+response cache (see rodan/cache.py).
+
+Run it with `manage.py notify_relay`.
+"""
+from collections import OrderedDict
+import json
+import logging
+import select
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+import psycopg2
+import psycopg2.extensions
+import redis
+
+from rodan.cache import get_redis_connection, response_cache
+from rodan.models import (
+    NOTIFY_CHANNEL,
+    NOTIFY_EXCLUDED_TABLES,
+    Connection,
+    Input,
+    InputPort,
+    Output,
+    OutputPort,
+    ResultsPackage,
+    RunJob,
+    WorkflowJob,
+    WorkflowJobGroup,
+)
+from rodan.websocket import GLOBAL_FACILITY, project_facility, workflowrun_facility
+
+logger = logging.getLogger("rodan")
+
+# Rows whose notification does not carry their project or workflow run: model =>
+# (model class, lookup of the project uuid, lookup of the workflow run uuid or None).
+_scope_lookups = {
+    "workflowjob": (WorkflowJob, "workflow__project", None),
+    "workflowjobgroup": (WorkflowJobGroup, "workflow__project", None),
+    "inputport": (InputPort, "workflow_job__workflow__project", None),
+    "outputport": (OutputPort, "workflow_job__workflow__project", None),
+    "connection": (Connection, "input_port__workflow_job__workflow__project", None),
+    "runjob": (RunJob, "workflow_run__project", "workflow_run"),
+    "resultspackage": (ResultsPackage, "workflow_run__project", "workflow_run"),
+    "input": (Input, "run_job__workflow_run__project", "run_job__workflow_run"),
+    "output": (Output, "run_job__workflow_run__project", "run_job__workflow_run"),
+}
+
+
+def broadcast_channel(facility):
+    return "{0}:broadcast:{1}".format(settings.WS4REDIS_PREFIX, facility)
+
+
+def parse_notification(payload):
+    """
+    Parse a trigger payload `status/table/uuid[/project_uuid[/workflow_run_uuid]]` into
+    the message published to the clients:
+    `{"status", "model", "uuid"[, "project"][, "workflow_run"]}`.
+    """
+    info = payload.split("/")
+    data = OrderedDict()
+    data["status"] = info[0]
+    data["model"] = info[1].replace("rodan_", "", 1)
+    data["uuid"] = info[2].replace("-", "")
+    if len(info) > 3 and info[3]:
+        data["project"] = info[3].replace("-", "")
+    if len(info) > 4 and info[4]:
+        data["workflow_run"] = info[4].replace("-", "")
+    if data["model"] == "project":
+        data["project"] = data["uuid"]
+    if data["model"] == "workflowrun":
+        data["workflow_run"] = data["uuid"]
+    return data
+
+
+def coalesce(events):
+    """
+    Merge the events about the same (model, uuid), keeping the order in which the
+    objects were first seen.
+
+    - An object that was created and then updated is reported as created.
+    - An object that was deleted is reported as deleted, whatever happened before.
+    - Otherwise the last status wins.
+    """
+    merged = OrderedDict()
+    for event in events:
+        key = (event["model"], event["uuid"])
+        previous = merged.get(key)
+        if previous is None:
+            merged[key] = event
+            continue
+        status = event["status"]
+        if previous["status"] == "created" and status == "updated":
+            status = "created"
+        merged[key] = OrderedDict(event, status=status)
+        for scope in ("project", "workflow_run"):
+            if scope not in merged[key] and scope in previous:
+                merged[key][scope] = previous[scope]
+    return list(merged.values())
+
+
+class NotificationRelay(object):
+    def __init__(self, window=None, connection=None):
+        if window is None:
+            window = getattr(settings, "RODAN_NOTIFY_RELAY_WINDOW", 0.2)
+        self.window = window
+        self.redis = connection or get_redis_connection()
+        self.received = 0
+        self.published = 0
+        # (model, uuid) => (project uuid, workflow run uuid) of the rows seen so far.
+        self._scopes = {}
+
+    def connect(self):
+        conn = psycopg2.connect(
+            database=settings.DATABASES["default"]["NAME"],
+            host=settings.DATABASES["default"]["HOST"],
+            port=settings.DATABASES["default"]["PORT"],
+            user=settings.DATABASES["default"]["USER"],
+            password=settings.DATABASES["default"]["PASSWORD"],
+        )
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        conn.cursor().execute("LISTEN {0};".format(NOTIFY_CHANNEL))
+        return conn
+
+    def collect(self, conn):
+        """
+        Block until a notification arrives, then keep collecting for `window`
+        seconds. Returns the parsed notifications.
+        """
+        while not conn.notifies:
+            if select.select([conn], [], [], 60) != ([], [], []):
+                conn.poll()
+        deadline = time.time() + self.window
+        remaining = self.window
+        while remaining > 0:
+            if select.select([conn], [], [], remaining) != ([], [], []):
+                conn.poll()
+            remaining = deadline - time.time()
+        payloads = [n.payload for n in conn.notifies]
+        del conn.notifies[:]
+        # One notification per statement, one line per row.
+        return [parse_notification(line) for p in payloads for line in p.split("\n")]
+
+    def resolve_scopes(self, messages):
+        """
+        Fill in the project and workflow run of the messages whose notification does not
+        carry them, with one query per model. Deleted rows cannot be looked up anymore,
+        unless they were seen before.
+        """
+        missing = {}
+        for m in messages:
+            if m["model"] == "workflowrun" and "project" in m:
+                self._scopes[("workflowrun", m["uuid"])] = (m["project"], m["uuid"])
+        for m in messages:
+            if m["model"] in _scope_lookups and "project" not in m:
+                key = (m["model"], m["uuid"])
+                wfrun_key = ("workflowrun", m.get("workflow_run"))
+                if wfrun_key in self._scopes:
+                    m["project"] = self._scopes[wfrun_key][0]
+                elif key in self._scopes:
+                    m["project"], wfrun = self._scopes[key]
+                    if wfrun:
+                        m["workflow_run"] = wfrun
+                elif m["status"] != "deleted":
+                    missing.setdefault(m["model"], []).append(m)
+
+        if len(self._scopes) > 100000:
+            self._scopes.clear()
+
+        for model_name, model_messages in missing.items():
+            model, project_lookup, wfrun_lookup = _scope_lookups[model_name]
+            lookups = ["uuid", project_lookup] + ([wfrun_lookup] if wfrun_lookup else [])
+            found = dict(
+                (row[0].hex, [v.hex if v else None for v in row[1:]])
+                for row in model.objects.filter(
+                    uuid__in=[m["uuid"] for m in model_messages]
+                ).values_list(*lookups)
+            )
+            for m in model_messages:
+                if m["uuid"] in found:
+                    scopes = found[m["uuid"]] + [None]
+                    m["project"] = scopes[0]
+                    if scopes[1]:
+                        m["workflow_run"] = scopes[1]
+                    self._scopes[(m["model"], m["uuid"])] = (scopes[0], scopes[1])
+
+    def publish(self, events):
+        # Left behind by a trigger registered before these tables were excluded.
+        messages = coalesce(
+            e for e in events if "rodan_" + e["model"] not in NOTIFY_EXCLUDED_TABLES
+        )
+        # First: clients that refetch on a message must not get a stale response, and a
+        # failed publish must not leave the cache stale.
+        response_cache.invalidate(*set(m["model"] for m in messages))
+        close_old_connections()
+        self.resolve_scopes(messages)
+        # Rows of a project whose scope is unknown (deleted before they were ever relayed)
+        # must not go to the clients of other projects.
+        scoped = [
+            m for m in messages
+            if m["model"] not in _scope_lookups or "project" in m or "workflow_run" in m
+        ]
+        if len(scoped) < len(messages):
+            logger.info(
+                "Notification relay drops %d notifications of unknown scope",
+                len(messages) - len(scoped),
+            )
+            messages = scoped
+        pipe = self.redis.pipeline(transaction=False)
+        for message in messages:
+            data = json.dumps(message)
+            if "project" in message:
+                pipe.publish(broadcast_channel(project_facility(message["project"])), data)
+            if "workflow_run" in message:
+                pipe.publish(
+                    broadcast_channel(workflowrun_facility(message["workflow_run"])), data
+                )
+            if "project" not in message and "workflow_run" not in message:
+                pipe.publish(broadcast_channel(GLOBAL_FACILITY), data)
+        pipe.execute()
+        self.received += len(events)
+        self.published += len(messages)
+        return messages
+
+    def run_forever(self):
+        while True:
+            try:
+                conn = self.connect()
+            except psycopg2.OperationalError as e:
+                logger.warning("Notification relay cannot connect to the database: %s", e)
+                time.sleep(5)
+                continue
+            try:
+                while True:
+                    events = self.collect(conn)
+                    try:
+                        self.publish(events)
+                    except redis.RedisError as e:
+                        # The events of this window are lost; clients catch up with later ones.
+                        logger.warning("Notification relay cannot publish: %s", e)
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                logger.warning("Notification relay lost the database connection: %s", e)
+            finally:
+                conn.close()
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from rodan.models.connection import Connection
+from rodan.models.inputport import InputPort
+from rodan.models.outputport import OutputPort
 from rodan.serializers.workflowjob import WorkflowJobSerializer
 from rodan.serializers.workflow import WorkflowSerializer
 
@@ -20,6 +22,18 @@ class ConnectionSerializer(serializers.HyperlinkedModelSerializer):
             "output_workflow_job",
             "workflow",
         )
+        extra_kwargs = {
+            "input_port": {
+                "queryset": InputPort.objects.filter(
+                    workflow_job__workflow__project__tombstoned=False
+                )
+            },
+            "output_port": {
+                "queryset": OutputPort.objects.filter(
+                    workflow_job__workflow__project__tombstoned=False
+                )
+            },
+        }
 
     def validate(self, data):
         if self.partial:
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from rodan.models.inputport import InputPort
+from rodan.models.workflowjob import WorkflowJob
 
 
 class InputPortSerializer(serializers.HyperlinkedModelSerializer):
@@ -15,3 +16,8 @@ class InputPortSerializer(serializers.HyperlinkedModelSerializer):
             "workflow_job",
             "connections",
         )
+        extra_kwargs = {
+            "workflow_job": {
+                "queryset": WorkflowJob.objects.filter(workflow__project__tombstoned=False)
+            }
+        }
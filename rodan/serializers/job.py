@@ -23,4 +23,6 @@ class JobSerializer(serializers.HyperlinkedModelSerializer):
             "category",
             "enabled",
             "interactive",
+            "fusible",
+            "resource_hints",
         )
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from rodan.models.outputport import OutputPort
+from rodan.models.workflowjob import WorkflowJob
 
 
 class OutputPortSerializer(serializers.HyperlinkedModelSerializer):
@@ -15,3 +16,8 @@ class OutputPortSerializer(serializers.HyperlinkedModelSerializer):
             "workflow_job",
             "connections",
         )
+        extra_kwargs = {
+            "workflow_job": {
+                "queryset": WorkflowJob.objects.filter(workflow__project__tombstoned=False)
+            }
+        }
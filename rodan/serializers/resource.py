@@ -1,3 +1,4 @@
+from rodan.models.project import Project
 from rodan.models.resource import Resource
 from rest_framework import serializers
 # from rodan.serializers.user import UserListSerializer
@@ -26,5 +27,7 @@ class ResourceSerializer(serializers.HyperlinkedModelSerializer):
             "error_details",
             "origin",
             "has_thumb",
+            "tombstoned",
         )  # The only updatable fields are: name, resource_type
         fields = "__all__"
+        extra_kwargs = {"project": {"queryset": Project.objects.filter(tombstoned=False)}}
@@ -1,4 +1,5 @@
 from rodan.models import (
+    Resource,
     ResourceList,
     # ResourceType,
     Project
@@ -33,6 +34,10 @@ class ResourceListSerializer(serializers.HyperlinkedModelSerializer):
             "updated",
             "creator",
         )
+        extra_kwargs = {
+            "project": {"queryset": Project.objects.filter(tombstoned=False)},
+            "resources": {"queryset": Resource.objects.filter(tombstoned=False)},
+        }
 
     def validate_resources(self, resources):
         if resources is not None and len(resources) > 0:
@@ -1,4 +1,4 @@
-from rodan.models import ResultsPackage
+from rodan.models import ResultsPackage, WorkflowRun
 from rest_framework import serializers
 from rodan.serializers import AbsoluteURLField
 
@@ -29,6 +29,13 @@ class ResultsPackageSerializer(serializers.HyperlinkedModelSerializer):
             "error_summary",
             "error_details",
         )
+        extra_kwargs = {
+            "workflow_run": {
+                "queryset": WorkflowRun.objects.filter(
+                    tombstoned=False, project__tombstoned=False
+                )
+            }
+        }
 
 
 class ResultsPackageListSerializer(serializers.HyperlinkedModelSerializer):
@@ -57,3 +64,10 @@ class ResultsPackageListSerializer(serializers.HyperlinkedModelSerializer):
             "error_summary",
             "error_details",
         )
+        extra_kwargs = {
+            "workflow_run": {
+                "queryset": WorkflowRun.objects.filter(
+                    tombstoned=False, project__tombstoned=False
+                )
+            }
+        }
@@ -46,6 +46,9 @@ class RunJobSerializer(serializers.HyperlinkedModelSerializer):
             "outputs",
             "job_settings",
             "status",
+            "remaining_work",
+            "profile",
+            "profile_resource",
             "created",
             "updated",
             "error_summary",
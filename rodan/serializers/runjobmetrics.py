@@ -0,0 +1,32 @@
+from rodan.models.runjobmetrics import RunJobMetrics
+from rest_framework import serializers
+from rodan.serializers import TransparentField
+
+
+class RunJobMetricsSerializer(serializers.HyperlinkedModelSerializer):
+    inputs = TransparentField(read_only=True)
+    outputs = TransparentField(read_only=True)
+
+    class Meta:
+        model = RunJobMetrics
+        fields = (
+            "url",
+            "uuid",
+            "run_job",
+            "workflow_run",
+            "job_name",
+            "status",
+            "worker_host",
+            "started",
+            "queue_wait_time",
+            "wall_time",
+            "cpu_time",
+            "peak_rss",
+            "bytes_read",
+            "bytes_written",
+            "input_bytes",
+            "inputs",
+            "outputs",
+            "created",
+        )
+        read_only_fields = fields
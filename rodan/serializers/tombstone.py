@@ -0,0 +1,26 @@
+from rodan.models import Tombstone
+from rest_framework import serializers
+
+
+class TombstoneSerializer(serializers.HyperlinkedModelSerializer):
+    creator = serializers.SlugRelatedField(slug_field="username", read_only=True)
+
+    class Meta:
+        model = Tombstone
+        fields = (
+            "url",
+            "uuid",
+            "model",
+            "object_uuid",
+            "object_name",
+            "status",
+            "creator",
+            "revoked_tasks",
+            "deleted_rows",
+            "removed_directories",
+            "error_summary",
+            "error_details",
+            "created",
+            "updated",
+        )
+        read_only_fields = fields
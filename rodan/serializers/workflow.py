@@ -80,6 +80,7 @@ class WorkflowListSerializer(serializers.HyperlinkedModelSerializer):
     class Meta:
         model = Workflow
         read_only_fields = ("creator", "created", "updated")
+        extra_kwargs = {"project": {"queryset": Project.objects.filter(tombstoned=False)}}
         fields = (
             "url",
             "uuid",
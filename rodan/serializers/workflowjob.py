@@ -1,3 +1,4 @@
+from rodan.models.workflow import Workflow
 from rodan.models.workflowjob import WorkflowJob
 from rodan.serializers.inputport import InputPortSerializer
 from rodan.serializers.outputport import OutputPortSerializer
@@ -33,7 +34,11 @@ class WorkflowJobSerializer(serializers.HyperlinkedModelSerializer):
             "job_settings",
             "name",
             "group",
+            "profile",
             "created",
             "updated",
             "appearance",
         )
+        extra_kwargs = {
+            "workflow": {"queryset": Workflow.objects.filter(project__tombstoned=False)}
+        }
@@ -1,4 +1,4 @@
-from rodan.models import WorkflowJobGroup
+from rodan.models import WorkflowJob, WorkflowJobGroup
 
 from rodan.serializers.workflow import version_map
 from django.conf import settings
@@ -24,6 +24,11 @@ class WorkflowJobGroupSerializer(serializers.HyperlinkedModelSerializer):
             "updated",
             "appearance",
         )
+        extra_kwargs = {
+            "workflow_jobs": {
+                "queryset": WorkflowJob.objects.filter(workflow__project__tombstoned=False)
+            }
+        }
 
     def validate_workflow_jobs(self, wfjs):
         if len(wfjs) == 0:
@@ -1,3 +1,4 @@
+from rodan.models.workflow import Workflow
 from rodan.models.workflowrun import WorkflowRun
 from rest_framework import serializers
 from rodan.serializers import TransparentField
@@ -23,8 +24,15 @@ class WorkflowRunSerializer(serializers.HyperlinkedModelSerializer):
             "updated",
             "origin_resources",
             "creator",
+            "tombstoned",
         )
-        extra_kwargs = {"workflow": {"allow_null": False, "required": True}}
+        extra_kwargs = {
+            "workflow": {
+                "allow_null": False,
+                "required": True,
+                "queryset": Workflow.objects.filter(project__tombstoned=False),
+            }
+        }
         fields = "__all__"
 
 
@@ -45,9 +53,16 @@ class WorkflowRunByPageSerializer(serializers.HyperlinkedModelSerializer):
             "name",
             "description",
             "last_redone_runjob_tree",
+            "profile",
             "created",
             "updated",
             "origin_resources",
             "creator",
         )
-        extra_kwargs = {"workflow": {"allow_null": False, "required": True}}
+        extra_kwargs = {
+            "workflow": {
+                "allow_null": False,
+                "required": True,
+                "queryset": Workflow.objects.filter(project__tombstoned=False),
+            }
+        }
@@ -3,6 +3,9 @@ Rodan settings. Remember to set your environment variables.
 """
 import os
 import sys
+from datetime import timedelta
+
+from kombu import Exchange, Queue
 
 # This is Django-Environ, not environ. (!= pip install environ)
 import environ
@@ -126,6 +129,64 @@ RODAN_WORKFLOW_SERIALIZATION_FORMAT_VERSION = 0.2
 RODAN_RESULTS_PACKAGE_AUTO_EXPIRY_SECONDS = 30 * 24 * 60 * 60
 # Default: 15 seconds before the authentication token expires.
 RODAN_RUNJOB_WORKING_USER_EXPIRY_SECONDS = 15
+# Deleted Projects, WorkflowRuns and Resources are collected in the background
+# (see rodan/jobs/garbage.py): rows are deleted this many at a time...
+RODAN_GC_CHUNK_SIZE = 500
+# ...and at most one resource directory is removed every that many seconds.
+RODAN_GC_REMOVAL_INTERVAL = 0.05 if not TEST else 0
+# Runtime estimates (see rodan/jobs/estimator.py) are based on the metrics of the last
+# that many finished runs of each job...
+RODAN_ESTIMATOR_HISTORY = 100
+# ...restricted to the runs with the same settings if there are at least that many...
+RODAN_ESTIMATOR_MIN_SAMPLES = 3
+# ...and jobs that never ran are assumed to take that many seconds.
+RODAN_ESTIMATOR_DEFAULT_DURATION = 60
+# The master task dispatches the runnable RunJobs with the longest estimated chain of
+# work ahead of them first, and sends them with a broker priority: the priority of their
+# WorkflowRun (0-9) plus up to that many levels for the RunJobs on its critical path...
+RODAN_CRITICAL_PATH_PRIORITY_LEVELS = 2
+# ...capped at that, which is the `x-max-priority` of the job queues (CELERY_QUEUES).
+RODAN_MAX_TASK_PRIORITY = 9
+# Admission control (see rodan/jobs/admission.py): at most that many in-flight RunJobs
+# per user and job queue (None: no limit)...
+RODAN_ADMISSION_USER_QUEUE_LIMIT = None
+# ...or that many for specific job queues, e.g. {"GPU": 4}...
+RODAN_ADMISSION_USER_QUEUE_LIMITS = {}
+# ...multiplied by the weight of the user, by username (default 1)...
+RODAN_ADMISSION_WEIGHTS = {}
+# ...and at most that many per project.
+RODAN_ADMISSION_PROJECT_LIMIT = None
+# Placement (see rodan/jobs/placement.py): the capacity a worker advertises, e.g.
+# {"memory": 16384, "cpu": 8, "scratch": 102400} (MiB, threads, MiB); empty: what the
+# machine has...
+RODAN_WORKER_CAPACITY = {}
+# ...and workers that have not refreshed it for that many seconds are left out.
+RODAN_WORKER_CAPACITY_TTL = 120
+# Supervision of running RunJobs (see rodan/jobs/supervisor.py), every that many
+# seconds: RunJobs of dead workers are requeued...
+RODAN_SUPERVISOR_INTERVAL = 60
+# ...and RunJobs running for longer than that factor times that percentile of the wall
+# time of their job...
+RODAN_SUPERVISOR_STRAGGLER_FACTOR = 2
+RODAN_SUPERVISOR_STRAGGLER_PERCENTILE = 95
+# ...and for at least that many seconds get a speculative copy...
+RODAN_SUPERVISOR_STRAGGLER_MIN_TIME = 300
+# ...at most that many per round.
+RODAN_SUPERVISOR_MAX_SPECULATIONS = 10
+# Chains of RunJobs of fusible jobs (see rodan/jobs/fusion.py) run in one Celery task, at
+# most that many RunJobs per chain.
+RODAN_FUSED_CHAIN_MAX_LENGTH = 10
+# Tracing of WorkflowRuns (see rodan/jobs/tracing.py): the exporter of the spans, e.g.
+# "rodan.jobs.tracing.DatabaseExporter" or "rodan.jobs.tracing.FileExporter" (empty: no
+# tracing)...
+RODAN_TRACE_EXPORTER = os.getenv("RODAN_TRACE_EXPORTER", "")
+# ...and the file that the FileExporter appends them to, one JSON object per line.
+RODAN_TRACE_FILE = os.getenv("RODAN_TRACE_FILE", "/tmp/rodan-traces.jsonl")
+# Metrics collector (see rodan/jobs/monitoring.py): it samples the queues, the RunJobs
+# and the workers every that many seconds...
+RODAN_METRICS_INTERVAL = 15
+# ...and waits that many seconds for the replies of the workers.
+RODAN_METRICS_INSPECT_TIMEOUT = 1.0
 
 ###############################################################################
 # 1.c  Rodan Job Package Registration
@@ -183,6 +244,10 @@ else:
         "An environment was not built for that specific rodan job-queue yet. " +
         "Build one and try again."
     )
+# Register stubs of the jobs, and import their packages only when the jobs are first used
+# (see rodan/jobs/lazy.py). Needs the catalogue manifest of the same packages, recorded by
+# `manage.py migrate` or by a process that loaded them eagerly.
+RODAN_LAZY_JOB_LOADING = bool(strtobool(os.environ.get("RODAN_LAZY_JOB_LOADING", "False")))
 
 # Jobs that depend on binaries.
 # If None, Rodan will call `which gm` to find it.
@@ -406,13 +471,14 @@ ANONYMOUS_USER_ID = -1
 CORS_ORIGIN_ALLOW_ALL = True
 # CORS_ORIGIN_WHITELIST = ('some domain or IP')
 CORS_ALLOW_CREDENTIALS = True
-CORS_EXPOSE_HEADERS = ["Set-Cookie", "Vary", "Date"]
+CORS_EXPOSE_HEADERS = ["Set-Cookie", "Vary", "Date", "ETag", "Last-Modified"]
 CORS_ALLOW_HEADERS = [
     'accept',
     'accept-encoding',
     'authorization',
     'content-type',
     'dnt',
+    'if-none-match',
     'origin',
     'user-agent',
     'x-csrftoken',
@@ -432,6 +498,13 @@ WS4REDIS_CONNECTION = {
 WS4REDIS_EXPIRE = 3600
 WS4REDIS_HEARTBEAT = "--heartbeat--"
 WS4REDIS_PREFIX = "rodan"
+# Authenticate websocket connections and only let users subscribe to the channels of the
+# Projects and WorkflowRuns they can view (see rodan/websocket.py).
+WS4REDIS_PROCESS_REQUEST = "rodan.websocket.process_request"
+WS4REDIS_ALLOWED_CHANNELS = "rodan.websocket.allowed_channels"
+# Seconds during which the relay of database change notifications (rodan/notify_relay.py)
+# collects and merges notifications before publishing them.
+RODAN_NOTIFY_RELAY_WINDOW = 0.2
 
 ###############################################################################
 # 2.d  IIPServer Configuration (if using Diva.js)
@@ -468,6 +541,25 @@ STATICFILES_FINDERS = [
     "django.contrib.staticfiles.finders.AppDirectoriesFinder",
 ]
 
+###############################################################################
+# 2.f  REST API Response Cache
+###############################################################################
+# Cache rendered data of read-heavy endpoints (jobs, resource types, workflows,
+# resources) in Redis (see rodan/cache.py). Entries are invalidated by the relay of
+# database change notifications (`manage.py notify_relay`).
+RODAN_RESPONSE_CACHE = bool(strtobool(os.getenv("RODAN_RESPONSE_CACHE", "True"))) and not TEST
+# Size bound. Least recently used entries are evicted first.
+RODAN_RESPONSE_CACHE_MAX_ENTRIES = 10000
+# Seconds. Upper bound on staleness if the invalidator is not running.
+RODAN_RESPONSE_CACHE_TIMEOUT = 3600
+# Process-level cache of the catalogue of Jobs, port types and ResourceTypes, and of the
+# API responses that list them (see rodan/jobs/catalogue.py). It checks the catalogue
+# manifest at most every that many seconds...
+RODAN_CATALOGUE_CACHE = not TEST
+RODAN_CATALOGUE_CACHE_TTL = 60
+# ...and holds at most that many API responses.
+RODAN_CATALOGUE_CACHE_MAX_RESPONSES = 1000
+
 ###############################################################################
 # 3.a  Rodan Worker Configuration
 ###############################################################################
@@ -482,6 +574,42 @@ BROKER_URL = os.getenv("RABBITMQ_URL")
 CELERY_RESULT_BACKEND = "amqp"
 CELERY_ENABLE_UTC = True
 CELERY_IMPORTS = ("rodan.jobs.load",)
+# Lets the master task send a RunJob to the worker chosen by rodan.jobs.placement.
+CELERY_WORKER_DIRECT = True
+# The job queues are declared with `x-max-priority`, so that RabbitMQ honours the
+# priorities the master task sends RunJobs with (see `task_priority` in
+# rodan/jobs/master_task.py); the direct queues of the workers are not. A worker started
+# without `-Q` consumes all of them. They must include the `job_queue` of every Job
+# (`manage.py job_queues` checks it), comma-separated in RODAN_JOB_QUEUES. RabbitMQ
+# refuses to declare an existing queue with other arguments: the queues declared by an
+# older version must be redeclared once with `manage.py job_queues --redeclare`, after
+# stopping all the Rodan processes and before starting the upgraded ones.
+RODAN_JOB_QUEUES = os.getenv("RODAN_JOB_QUEUES", "celery,Python2,Python3,GPU").split(",")
+CELERY_QUEUES = tuple(
+    Queue(
+        name,
+        Exchange(name),
+        routing_key=name,
+        queue_arguments={"x-max-priority": RODAN_MAX_TASK_PRIORITY},
+    )
+    for name in RODAN_JOB_QUEUES
+)
+# A worker reserves one message per process at a time: the messages it has prefetched are
+# not overtaken by the ones of higher priority.
+CELERYD_PREFETCH_MULTIPLIER = 1
+# Periodic tasks, sent by `celery beat`.
+CELERYBEAT_SCHEDULE = {
+    "supervise-runjobs": {
+        "task": "rodan.core.supervise_runjobs",
+        "schedule": timedelta(seconds=RODAN_SUPERVISOR_INTERVAL),
+    },
+    "collect-metrics": {
+        "task": "rodan.core.collect_metrics",
+        "schedule": timedelta(seconds=RODAN_METRICS_INTERVAL),
+        # A sample that waited in the queue for a whole interval is not worth taking.
+        "options": {"expires": RODAN_METRICS_INTERVAL},
+    },
+}
 if TEST:
     # Run Celery task synchronously, instead of sending into queue
     CELERY_ALWAYS_EAGER = True
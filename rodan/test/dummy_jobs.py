@@ -2,6 +2,7 @@ import os
 # import sys
 import shutil
 import json
+import time
 from rodan.jobs.base import RodanTask
 from django.template import Template
 
@@ -16,6 +17,7 @@ class dummy_automatic_job(RodanTask):
         "properties": {
             "a": {"type": "integer", "minimum": 0},
             "b": {"type": "array", "items": {"type": "number"}},
+            "sleep": {"type": "number", "minimum": 0},
         },
     }
     enabled = True
@@ -66,6 +68,8 @@ class dummy_automatic_job(RodanTask):
     )
 
     def run_my_task(self, inputs, settings, outputs):
+        if settings.get("sleep"):  # simulates a long job in scheduling tests
+            time.sleep(settings["sleep"])
         in_resources = []
         for ipt_name in inputs:
             for input in inputs[ipt_name]:
@@ -110,6 +114,44 @@ class dummy_automatic_job(RodanTask):
         return {"error_summary": "dummy automatic job error", "error_details": ""}
 
 
+class dummy_fusible_job(RodanTask):
+    name = "rodan.jobs.devel.dummy_fusible_job"
+    author = "Andrew Hankinson"
+    description = "A Dummy Job for testing the fusion of chains of RunJobs"
+    settings = {"type": "object"}
+    enabled = True
+    category = "Dummy"
+    interactive = False
+    fusible = True
+
+    input_port_types = (
+        {
+            "name": "in_typeA",
+            "minimum": 1,
+            "maximum": 1,
+            "resource_types": ("test/a1", "test/a2"),
+        },
+    )
+    output_port_types = (
+        {
+            "name": "out_typeA",
+            "minimum": 1,
+            "maximum": 1,
+            "resource_types": ("test/a1", "test/a2"),
+        },
+    )
+
+    input_paths = []  # where each run read its input, for the tests
+
+    def run_my_task(self, inputs, settings, outputs):
+        input_path = inputs["in_typeA"][0]["resource_path"]
+        self.input_paths.append(input_path)
+        with open(input_path, "r") as f:
+            content = f.read()
+        with open(outputs["out_typeA"][0]["resource_path"], "w") as g:
+            g.write(content + ".")
+
+
 class dummy_manual_job(RodanTask):
     name = "rodan.jobs.devel.dummy_manual_job"
     author = "Andrew Hankinson"
@@ -0,0 +1,137 @@
+from django.core.files.base import ContentFile
+from django.test.utils import override_settings
+from model_mommy import mommy
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from rodan.cache import get_redis_connection
+from rodan.constants import task_status
+from rodan.jobs import admission
+from rodan.models import ResourceType, WorkflowRun
+from rodan.test.helpers import RodanTestSetUpMixin, RodanTestTearDownMixin
+
+
+@override_settings(
+    RODAN_ADMISSION_USER_QUEUE_LIMIT=2,
+    RODAN_ADMISSION_USER_QUEUE_LIMITS={"GPU": 1},
+    RODAN_ADMISSION_PROJECT_LIMIT=None,
+    RODAN_ADMISSION_WEIGHTS={},
+)
+class AdmissionTestCase(RodanTestTearDownMixin, APITestCase, RodanTestSetUpMixin):
+    def setUp(self):
+        self.setUp_rodan()
+        self.setUp_user()
+        get_redis_connection().delete(admission.HELD_KEY)
+        self.test_project = mommy.make("rodan.Project")
+        self.test_wfrun = mommy.make(
+            "rodan.WorkflowRun",
+            project=self.test_project,
+            creator=self.test_user,
+            status=task_status.PROCESSING,
+        )
+        mommy.make(
+            "rodan.RunJob",
+            workflow_run=self.test_wfrun,
+            job_queue="celery",
+            status=task_status.PROCESSING,
+        )
+
+    def tearDown(self):
+        get_redis_connection().delete(admission.HELD_KEY)
+        super(AdmissionTestCase, self).tearDown()
+
+    def test_admit(self):
+        candidates = [
+            {"uuid": 1, "job_queue": "celery"},
+            {"uuid": 2, "job_queue": "celery"},
+            {"uuid": 3, "job_queue": "GPU"},
+            {"uuid": 4, "job_queue": "GPU"},
+        ]
+        with admission.lock():
+            admitted, held = admission.admit(self.test_wfrun.uuid, candidates)
+        self.assertEqual([rj["uuid"] for rj in admitted], [1, 3])
+        self.assertEqual([rj["uuid"] for rj in held], [2, 4])
+        self.assertEqual(admission.held_workflow_runs(), [self.test_wfrun.uuid])
+
+        with admission.lock():
+            admitted, held = admission.admit(self.test_wfrun.uuid, candidates[2:3])
+        self.assertEqual(held, [])
+        self.assertEqual(admission.held_workflow_runs(), [])
+
+    @override_settings(RODAN_ADMISSION_WEIGHTS={"ron": 2})
+    def test_weight(self):
+        self.assertEqual(admission.user_queue_limit("ron", "celery"), 4)
+        self.assertEqual(admission.user_queue_limit("ron", "GPU"), 2)
+        self.assertEqual(admission.user_queue_limit("someone", "celery"), 2)
+
+    def test_project_limit(self):
+        other_wfrun = mommy.make(
+            "rodan.WorkflowRun", project=self.test_project, creator=self.test_superuser
+        )
+        with self.settings(RODAN_ADMISSION_PROJECT_LIMIT=1):
+            admitted, held = admission.admit(other_wfrun.uuid, [{"job_queue": "celery"}])
+        self.assertEqual(admitted, [])
+
+    def test_release(self):
+        other_wfrun = mommy.make(
+            "rodan.WorkflowRun",
+            project=self.test_project,
+            creator=self.test_superuser,
+            status=task_status.PROCESSING,
+        )
+        admission.hold(self.test_wfrun.uuid)
+        admission.hold(other_wfrun.uuid)
+
+        # One slot: the user without in-flight RunJobs goes first, the other stays held.
+        admission.release(slots=1)
+        self.assertEqual(admission.held_workflow_runs(), [self.test_wfrun.uuid])
+        admission.release(exclude=self.test_wfrun.uuid)
+        self.assertEqual(admission.held_workflow_runs(), [self.test_wfrun.uuid])
+        admission.release(slots=0)
+        self.assertEqual(admission.held_workflow_runs(), [self.test_wfrun.uuid])
+
+    def test_snapshot(self):
+        self.client.force_authenticate(user=self.test_superuser)
+        admission.admit(self.test_wfrun.uuid, [{"job_queue": "GPU"}, {"job_queue": "GPU"}])
+        response = self.client.get(reverse("taskqueue-admission"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["in_flight"]["users"], {self.test_user.username: {"celery": 1}}
+        )
+        self.assertEqual(response.data["held"][0]["workflow_run"], str(self.test_wfrun.uuid))
+
+    @override_settings(RODAN_ADMISSION_USER_QUEUE_LIMIT=1)
+    def test_held_runjobs_released(self):
+        self.setUp_simple_dummy_workflow()
+        self.client.force_authenticate(user=self.test_superuser)
+        response = self.client.patch(
+            reverse("workflow-detail", kwargs={"pk": self.test_workflow.uuid}),
+            {"valid": True},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        resources = mommy.make(
+            "rodan.Resource",
+            _quantity=3,
+            project=self.test_project,
+            resource_type=ResourceType.objects.get(mimetype="test/a1"),
+        )
+        for r in resources:
+            r.resource_file.save("dummy.txt", ContentFile("dummy text"))
+        response = self.client.post(
+            reverse("workflowrun-list"),
+            {
+                "workflow": self.url(self.test_workflow),
+                "resource_assignments": {
+                    self.url(self.test_inputport_a): [self.url(r) for r in resources]
+                },
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        runjobs = WorkflowRun.objects.get(uuid=response.data["uuid"]).run_jobs
+        self.assertEqual(runjobs.filter(status=task_status.FINISHED).count(), 3)
+        self.assertEqual(runjobs.filter(status=task_status.WAITING_FOR_INPUT).count(), 3)
+        self.assertEqual(admission.held_workflow_runs(), [])
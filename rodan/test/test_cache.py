@@ -0,0 +1,82 @@
+from django.test.utils import override_settings
+import redis
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from rodan.cache import response_cache, GENERATION_KEY
+from rodan.models import ResourceType
+from rodan.notify_relay import NotificationRelay
+from rodan.test.helpers import RodanTestSetUpMixin, RodanTestTearDownMixin
+
+
+@override_settings(RODAN_RESPONSE_CACHE=True)
+class ResponseCacheTestCase(RodanTestTearDownMixin, APITestCase, RodanTestSetUpMixin):
+    def setUp(self):
+        self.setUp_rodan()
+        self.setUp_user()
+        response_cache.clear()
+        response_cache.redis.delete(GENERATION_KEY)
+        self.client.force_authenticate(user=self.test_superuser)
+
+    def tearDown(self):
+        response_cache.clear()
+        response_cache.redis.delete(GENERATION_KEY)
+        super(ResponseCacheTestCase, self).tearDown()
+
+    def test_hit_after_miss(self):
+        response = self.client.get(reverse("resourcetype-list"), format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response2 = self.client.get(reverse("resourcetype-list"), format="json")
+        self.assertEqual(response2.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, response2.data)
+
+        stats = response_cache.stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["hits:ResourceTypeList"], 1)
+        self.assertEqual(stats["entries"], 1)
+
+    def test_keyed_per_user(self):
+        self.client.get(reverse("resourcetype-list"), format="json")
+        self.client.force_authenticate(user=self.test_user)
+        self.client.get(reverse("resourcetype-list"), format="json")
+        self.assertEqual(response_cache.stats()["misses"], 2)
+
+    def test_invalidated_by_change_notification(self):
+        url = reverse("resourcetype-list")
+        count = self.client.get(url, format="json").data["count"]
+
+        ResourceType.objects.create(mimetype="test/c", description="", extension="ext_c")
+        # Without a notification the cached (stale) data is served...
+        self.assertEqual(self.client.get(url, format="json").data["count"], count)
+        # ...until the change notification of the new row is consumed.
+        response_cache.invalidate("resourcetype")
+        self.assertEqual(self.client.get(url, format="json").data["count"], count + 1)
+
+    def test_invalidated_when_publish_fails(self):
+        url = reverse("resourcetype-list")
+        count = self.client.get(url, format="json").data["count"]
+        ResourceType.objects.create(mimetype="test/c", description="", extension="ext_c")
+
+        relay = NotificationRelay(window=0, connection=redis.StrictRedis(port=1))
+        with self.assertRaises(redis.RedisError):
+            relay.publish([{"status": "created", "model": "resourcetype", "uuid": "a"}])
+        self.assertEqual(self.client.get(url, format="json").data["count"], count + 1)
+
+    def test_unrelated_notification_keeps_entry(self):
+        url = reverse("resourcetype-list")
+        self.client.get(url, format="json")
+        response_cache.invalidate("runjob")
+        self.client.get(url, format="json")
+        self.assertEqual(response_cache.stats()["hits"], 1)
+
+    @override_settings(RODAN_RESPONSE_CACHE_MAX_ENTRIES=2)
+    def test_size_bound(self):
+        for page_size in (1, 2, 3):
+            self.client.get(
+                reverse("resourcetype-list"), {"page_size": page_size}, format="json"
+            )
+        stats = response_cache.stats()
+        self.assertEqual(stats["entries"], 2)
+        self.assertEqual(stats["evictions"], 1)
@@ -0,0 +1,107 @@
+import copy
+
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from rodan.jobs import catalogue
+from rodan.models import CatalogueManifest, Job
+from rodan.test.helpers import RodanTestSetUpMixin, RodanTestTearDownMixin
+
+
+class CatalogueTestCase(RodanTestTearDownMixin, TestCase, RodanTestSetUpMixin):
+    def setUp(self):
+        self.setUp_rodan()
+        self.resourcetypes = {
+            "test/a1": [{"description": "", "extension": "", "package_name": "built-in"}],
+            "test/a2": [{"description": "", "extension": "", "package_name": "built-in"}],
+        }
+        self.attrs = {
+            "name": "test.job",
+            "_package_name": "rodan.jobs.test",
+            "author": "Rodan",
+            "description": "",
+            "settings": {"type": "object", "job_queue": "celery"},
+            "enabled": True,
+            "category": "Test",
+            "interactive": False,
+            "input_port_types": [{
+                "name": "in",
+                "minimum": 1,
+                "maximum": 1,
+                "resource_types": lambda mime: mime.startswith("test/"),
+            }],
+            "output_port_types": [{
+                "name": "out",
+                "minimum": 1,
+                "maximum": 1,
+                "resource_types": ["test/a1"],
+            }],
+        }
+        self.versions = {"rodan.jobs.test": "1.0"}
+
+    def _digest(self, attrs=None, versions=None):
+        return catalogue.digest(
+            self.resourcetypes, [attrs or self.attrs], versions or self.versions
+        )
+
+    def test_digest(self):
+        self.assertEqual(self._digest(), self._digest(copy.copy(self.attrs)))
+
+        changed = dict(self.attrs, description="Changed")
+        self.assertNotEqual(self._digest(changed), self._digest())
+        self.assertNotEqual(self._digest(versions={"rodan.jobs.test": "1.1"}), self._digest())
+
+        # A callable port type is resolved against the mimetypes of the catalogue.
+        mimetypes = catalogue._mimetypes
+        catalogue.set_resource_types(self.resourcetypes)
+        try:
+            digest = self._digest()
+            self.resourcetypes["test/b1"] = self.resourcetypes["test/a1"]
+            catalogue.set_resource_types(self.resourcetypes)
+            self.assertNotEqual(self._digest(), digest)
+            narrowed = dict(self.attrs, input_port_types=[dict(
+                self.attrs["input_port_types"][0],
+                resource_types=lambda mime: mime.startswith("test/a"),
+            )])
+            self.assertNotEqual(self._digest(narrowed), self._digest())
+        finally:
+            catalogue._mimetypes = mimetypes
+
+    def test_collect(self):
+        self.assertFalse(catalogue.collect(self.attrs))
+        with catalogue.collecting() as definitions:
+            self.assertTrue(catalogue.collect(self.attrs))
+            self.assertIn(self.attrs, definitions)
+            definitions.remove(self.attrs)
+        self.assertFalse(catalogue.collect(self.attrs))
+
+    def test_record(self):
+        digest = self._digest()
+        self.assertFalse(catalogue.verified(digest))
+        catalogue.record(digest, self.versions, [self.attrs])
+        self.assertTrue(catalogue.verified(digest))
+
+        catalogue.record("0" * 64, self.versions, [self.attrs])
+        self.assertTrue(catalogue.verified(digest))
+        catalogue.record("1" * 64, self.versions, [self.attrs], replace=True)
+        self.assertFalse(catalogue.verified(digest))
+        self.assertEqual(
+            list(CatalogueManifest.objects.values_list("digest", flat=True)), ["1" * 64]
+        )
+
+    @override_settings(RODAN_CATALOGUE_CACHE=True, RODAN_CATALOGUE_CACHE_TTL=0)
+    def test_cache(self):
+        from rodan.test.dummy_jobs import dummy_automatic_job
+
+        cache = catalogue.CatalogueCache()
+        name = dummy_automatic_job.name
+        self.assertEqual(cache.job(name).name, name)
+        with self.assertRaises(Job.DoesNotExist):
+            cache.job("test.missing")
+
+        # Served from the process until the catalogue manifest changes.
+        Job.objects.filter(name=name).update(description="Changed")
+        with self.assertNumQueries(1):  # the version
+            self.assertNotEqual(cache.job(name).description, "Changed")
+        catalogue.record(self._digest(), self.versions, [self.attrs], replace=True)
+        self.assertEqual(cache.job(name).description, "Changed")
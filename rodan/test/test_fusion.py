@@ -0,0 +1,122 @@
+from celery import registry
+from django.conf import settings
+from django.core.files.base import ContentFile
+from model_mommy import mommy
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from rodan.constants import task_status
+from rodan.jobs import fusion
+from rodan.models import Job, ResourceType, WorkflowRun
+from rodan.test.helpers import RodanTestSetUpMixin, RodanTestTearDownMixin
+
+
+class FusionTestCase(RodanTestTearDownMixin, APITestCase, RodanTestSetUpMixin):
+    """
+    Workflow: a chain of CHAIN fusible jobs.
+    """
+
+    CHAIN = 3
+
+    def setUp(self):
+        from rodan.test.dummy_jobs import dummy_fusible_job
+
+        self.setUp_rodan()
+        self.setUp_user()
+        self.client.force_authenticate(user=self.test_superuser)
+
+        self.job = Job.objects.get(name=dummy_fusible_job.name)
+        ipt = self.job.input_port_types.get(name="in_typeA")
+        opt = self.job.output_port_types.get(name="out_typeA")
+        self.test_project = mommy.make("rodan.Project")
+        self.test_workflow = mommy.make("rodan.Workflow", project=self.test_project)
+        self.wfjobs = []
+        upstream_op = None
+        for i in range(self.CHAIN):
+            wfjob = mommy.make("rodan.WorkflowJob", workflow=self.test_workflow, job=self.job)
+            ip = mommy.make("rodan.InputPort", workflow_job=wfjob, input_port_type=ipt)
+            op = mommy.make("rodan.OutputPort", workflow_job=wfjob, output_port_type=opt)
+            if upstream_op is None:
+                self.entry_ip = ip
+            else:
+                mommy.make("rodan.Connection", output_port=upstream_op, input_port=ip)
+            upstream_op = op
+            self.wfjobs.append(wfjob)
+        response = self.client.patch(
+            reverse("workflow-detail", kwargs={"pk": self.test_workflow.uuid}),
+            {"valid": True},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def _runjob(self, wfrun, upstream_resource=None, job_name=None):
+        rj = mommy.make(
+            "rodan.RunJob",
+            workflow_run=wfrun,
+            job_name=job_name or self.job.name,
+            status=task_status.SCHEDULED,
+        )
+        if upstream_resource is not None:
+            mommy.make("rodan.Input", run_job=rj, resource=upstream_resource)
+        resource = mommy.make("rodan.Resource", project=self.test_project)
+        mommy.make("rodan.Output", run_job=rj, resource=resource)
+        return rj, resource
+
+    def test_chains(self):
+        wfrun = mommy.make("rodan.WorkflowRun", project=self.test_project)
+        rj1, res1 = self._runjob(wfrun)
+        rj2, res2 = self._runjob(wfrun, res1)
+        rj3, res3 = self._runjob(wfrun, res2)
+        # rj3 has two consumers: the chain stops there.
+        rj4, _ = self._runjob(wfrun, res3)
+        rj5, _ = self._runjob(wfrun, res3)
+        # rj6 is not fusible.
+        rj6, res6 = self._runjob(wfrun, job_name="rodan.jobs.devel.dummy_automatic_job")
+        self._runjob(wfrun, res6)
+
+        chains = fusion.chains(wfrun.uuid, [
+            {"uuid": rj1.uuid, "job_name": rj1.job_name},
+            {"uuid": rj6.uuid, "job_name": rj6.job_name},
+        ])
+        self.assertEqual(chains, {rj1.uuid: [rj2.uuid, rj3.uuid], rj6.uuid: []})
+
+        with self.settings(RODAN_FUSED_CHAIN_MAX_LENGTH=2):
+            chains = fusion.chains(wfrun.uuid, [{"uuid": rj1.uuid, "job_name": rj1.job_name}])
+        self.assertEqual(chains, {rj1.uuid: [rj2.uuid]})
+
+    def test_run_chain(self):
+        input_paths = registry.tasks[self.job.name].input_paths
+        del input_paths[:]
+        resource = mommy.make(
+            "rodan.Resource",
+            project=self.test_project,
+            resource_type=ResourceType.objects.get(mimetype="test/a1"),
+        )
+        resource.resource_file.save("dummy.txt", ContentFile("dummy text"))
+        response = self.client.post(
+            reverse("workflowrun-list"),
+            {
+                "workflow": self.url(self.test_workflow),
+                "resource_assignments": {self.url(self.entry_ip): [self.url(resource)]},
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        wfrun = WorkflowRun.objects.get(uuid=response.data["uuid"])
+        self.assertEqual(wfrun.status, task_status.FINISHED)
+
+        # Every RunJob recorded its status, Outputs and metrics.
+        for wfjob in self.wfjobs:
+            rj = wfrun.run_jobs.get(workflow_job=wfjob)
+            self.assertEqual(rj.status, task_status.FINISHED)
+            self.assertEqual(rj.metrics.count(), 1)
+        last_output = wfrun.run_jobs.get(workflow_job=self.wfjobs[-1]).outputs.get()
+        with open(last_output.resource.resource_file.path) as f:
+            self.assertEqual(f.read(), "dummy text" + "." * self.CHAIN)
+
+        # The RunJobs after the first read their input from the temporary directory.
+        self.assertEqual(len(input_paths), self.CHAIN)
+        self.assertTrue(input_paths[0].startswith(settings.MEDIA_ROOT))
+        for path in input_paths[1:]:
+            self.assertFalse(path.startswith(settings.MEDIA_ROOT))
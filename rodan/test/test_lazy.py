@@ -0,0 +1,52 @@
+import sys
+
+from celery import registry
+from django.test import TestCase
+from model_mommy import mommy
+
+from rodan.jobs import lazy
+from rodan.test.helpers import RodanTestSetUpMixin, RodanTestTearDownMixin
+
+PACKAGE = "rodan.test.dummy_jobs"
+
+
+class LazyTestCase(RodanTestTearDownMixin, TestCase, RodanTestSetUpMixin):
+    def setUp(self):
+        from rodan.test.dummy_jobs import dummy_automatic_job
+
+        self.setUp_rodan()
+        self.job_name = dummy_automatic_job.name
+        self.task = registry.tasks[self.job_name]
+        self.module = sys.modules[PACKAGE]
+
+    def tearDown(self):
+        registry.tasks[self.job_name] = self.task
+        sys.modules[PACKAGE] = self.module
+        lazy._loaded.pop(PACKAGE, None)
+        super(LazyTestCase, self).tearDown()
+
+    def test_manifest(self):
+        mommy.make(
+            "rodan.CatalogueManifest", package_versions={"a": "1", "b": "1"}, jobs={"j": "a"}
+        )
+        latest = mommy.make(
+            "rodan.CatalogueManifest", package_versions={"a": "1", "b": "2"}, jobs={"j": "a"}
+        )
+        mommy.make("rodan.CatalogueManifest", package_versions={"a": "1"}, jobs={"j": "a"})
+        self.assertEqual(lazy.manifest(["b", "a"]), latest)
+        self.assertIsNone(lazy.manifest(["a", "c"]))
+
+    def test_job_task(self):
+        lazy.register({self.job_name: PACKAGE})
+        stub = registry.tasks[self.job_name]
+        self.assertIsInstance(stub, lazy.LazyJob)
+
+        # The package is imported on first use, and only then.
+        del sys.modules[PACKAGE]
+        task = lazy.job_task(self.job_name)
+        self.assertNotIsInstance(task, lazy.LazyJob)
+        self.assertEqual(task.name, self.job_name)
+        self.assertIn(PACKAGE, sys.modules)
+        self.assertIs(lazy.job_task(self.job_name), task)
+        # The stub stays registered.
+        self.assertIs(registry.tasks[self.job_name], stub)
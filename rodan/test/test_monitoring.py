@@ -0,0 +1,131 @@
+import json
+import time
+
+from model_mommy import mommy
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from rodan.cache import get_redis_connection
+from rodan.celery import app
+from rodan.constants import task_status
+from rodan.jobs import monitoring
+from rodan.test.helpers import RodanTestSetUpMixin, RodanTestTearDownMixin
+
+
+class MonitoringTestCase(RodanTestTearDownMixin, APITestCase, RodanTestSetUpMixin):
+    KEYS = (monitoring.COUNTERS_KEY, monitoring.SAMPLE_KEY)
+
+    def setUp(self):
+        self.setUp_rodan()
+        self.setUp_user()
+        get_redis_connection().delete(*self.KEYS)
+        self.client.force_authenticate(user=self.test_superuser)
+
+    def tearDown(self):
+        get_redis_connection().delete(*self.KEYS)
+        super(MonitoringTestCase, self).tearDown()
+
+    def _store(self, sample):
+        get_redis_connection().set(monitoring.SAMPLE_KEY, json.dumps(sample))
+
+    def test_counters(self):
+        self.setUp_simple_dummy_workflow()
+        response = self.client.patch(
+            reverse("workflow-detail", kwargs={"pk": self.test_workflow.uuid}),
+            {"valid": True},
+            format="json",
+        )
+        response = self.client.post(
+            reverse("workflowrun-list"),
+            {
+                "workflow": self.url(self.test_workflow),
+                "resource_assignments": self.setUp_resources_for_simple_dummy_workflow(),
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        counters = monitoring.counters()
+        job_name = self.dummy_a_wfjob.job.name
+        self.assertEqual(
+            counters[monitoring.series("rodan_runjob_duration_seconds_count", job_name=job_name)],
+            1,
+        )
+        self.assertEqual(
+            counters[
+                monitoring.series(
+                    "rodan_runjob_duration_seconds_bucket", job_name=job_name, le="+Inf"
+                )
+            ],
+            1,
+        )
+        self.assertGreaterEqual(
+            counters[
+                monitoring.series(
+                    "rodan_celery_tasks_total",
+                    task="rodan.core.create_workflowrun",
+                    state="SUCCESS",
+                )
+            ],
+            1,
+        )
+
+    def test_runjob_counts(self):
+        wfrun = mommy.make("rodan.WorkflowRun")
+        for s in (task_status.SCHEDULED, task_status.SCHEDULED, task_status.FINISHED):
+            mommy.make("rodan.RunJob", workflow_run=wfrun, job_queue="celery", status=s)
+        self.assertEqual(
+            monitoring.runjob_counts(),
+            [{"job_queue": "celery", "status": "scheduled", "count": 2}],
+        )
+
+    def test_render(self):
+        self._store({
+            "sampled": time.time(),
+            "queues": {"celery": {"messages": 3, "consumers": 1}},
+            "runjobs": [{"job_queue": "celery", "status": "processing", "count": 2}],
+            "workers": {"active": {"w@host": [{}, {}]}, "scheduled": {}, "stats": {}},
+        })
+        monitoring.on_task_prerun(task_id="t1")
+        monitoring.on_task_postrun(task_id="t1", task=type("T", (), {"name": "a"}))
+
+        lines = monitoring.render().splitlines()
+        self.assertIn("# TYPE rodan_runjob_duration_seconds histogram", lines)
+        self.assertIn('rodan_queue_messages{queue="celery"} 3', lines)
+        self.assertIn('rodan_runjobs{job_queue="celery",status="processing"} 2', lines)
+        self.assertIn('rodan_worker_active_tasks{worker="w@host"} 2', lines)
+        self.assertIn('rodan_celery_tasks_total{state="UNKNOWN",task="a"} 1', lines)
+
+    def test_taskqueue_views(self):
+        self._store({
+            "sampled": time.time(),
+            "workers": {"active": {"w@host": []}, "scheduled": None, "stats": {}},
+        })
+        response = self.client.get(reverse("taskqueue-active"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"w@host": []})
+        self.assertIn("Age", response)
+
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], monitoring.CONTENT_TYPE)
+
+        self.client.force_authenticate(user=self.test_user)
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_taskqueue_views_without_sample(self):
+        class Inspect(object):
+            def scheduled(self):
+                return {"w@host": [{"id": "a"}]}
+
+        # No sample stored: the view asks the workers.
+        app.control.inspect = Inspect
+        try:
+            response = self.client.get(reverse("taskqueue-scheduled"))
+        finally:
+            del app.control.inspect
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"w@host": [{"id": "a"}]})
+        self.assertNotIn("Age", response)
@@ -0,0 +1,106 @@
+import unittest
+
+from rodan.notify_relay import (
+    NotificationRelay,
+    broadcast_channel,
+    coalesce,
+    parse_notification,
+)
+from rodan.websocket import project_facility
+
+
+class _RecordingRedis(object):
+    "Redis connection that records what is published through its pipelines."
+
+    def __init__(self):
+        self.published = []
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def hincrby(self, *args):
+        pass
+
+    def publish(self, channel, data):
+        self.published.append(channel)
+
+    def execute(self):
+        pass
+
+
+class NotifyRelayTestCase(unittest.TestCase):
+    def test_parse_notification(self):
+        uuid = "0e5d1e1e-3a4b-4c5d-8e9f-0a1b2c3d4e5f"
+        project = "1e5d1e1e-3a4b-4c5d-8e9f-0a1b2c3d4e5f"
+        self.assertEqual(
+            dict(parse_notification("updated/rodan_runjob/{0}".format(uuid))),
+            {"status": "updated", "model": "runjob", "uuid": uuid.replace("-", "")},
+        )
+        self.assertEqual(
+            parse_notification("created/rodan_resource/{0}/{1}".format(uuid, project))[
+                "project"
+            ],
+            project.replace("-", ""),
+        )
+
+    def test_coalesce_updates(self):
+        events = [
+            {"status": "updated", "model": "runjob", "uuid": "a"},
+            {"status": "updated", "model": "runjob", "uuid": "b"},
+            {"status": "updated", "model": "runjob", "uuid": "a"},
+            {"status": "updated", "model": "workflowrun", "uuid": "a"},
+        ]
+        merged = coalesce(events)
+        self.assertEqual(
+            [(e["model"], e["uuid"]) for e in merged],
+            [("runjob", "a"), ("runjob", "b"), ("workflowrun", "a")],
+        )
+
+    def test_coalesce_created_then_updated(self):
+        events = [
+            {"status": "created", "model": "resource", "uuid": "a", "project": "p"},
+            {"status": "updated", "model": "resource", "uuid": "a", "project": "p"},
+        ]
+        merged = coalesce(events)
+        self.assertEqual(len(merged), 1)
+        self.assertEqual(merged[0]["status"], "created")
+        self.assertEqual(merged[0]["project"], "p")
+
+    def test_coalesce_deleted(self):
+        events = [
+            {"status": "created", "model": "output", "uuid": "a"},
+            {"status": "updated", "model": "output", "uuid": "a"},
+            {"status": "deleted", "model": "output", "uuid": "a"},
+        ]
+        self.assertEqual([e["status"] for e in coalesce(events)], ["deleted"])
+
+    def test_parse_notification_workflow_run(self):
+        uuid = "0e5d1e1e-3a4b-4c5d-8e9f-0a1b2c3d4e5f"
+        wfrun = "2e5d1e1e-3a4b-4c5d-8e9f-0a1b2c3d4e5f"
+        data = parse_notification("updated/rodan_runjob/{0}//{1}".format(uuid, wfrun))
+        self.assertNotIn("project", data)
+        self.assertEqual(data["workflow_run"], wfrun.replace("-", ""))
+
+        data = parse_notification("updated/rodan_workflowrun/{0}/{1}/".format(wfrun, uuid))
+        self.assertEqual(data["workflow_run"], wfrun.replace("-", ""))
+
+    def test_parse_notification_project(self):
+        project = "1e5d1e1e-3a4b-4c5d-8e9f-0a1b2c3d4e5f"
+        data = parse_notification("deleted/rodan_project/{0}//".format(project))
+        self.assertEqual(data["project"], project.replace("-", ""))
+
+    def test_publish_deleted_runjob(self):
+        connection = _RecordingRedis()
+        relay = NotificationRelay(window=0, connection=connection)
+        # Never relayed before: its project cannot be looked up anymore.
+        self.assertEqual(
+            relay.publish([{"status": "deleted", "model": "runjob", "uuid": "a"}]), []
+        )
+        self.assertEqual(connection.published, [])
+
+        project = "1e5d1e1e3a4b4c5d8e9f0a1b2c3d4e5f"
+        relay._scopes[("runjob", "b")] = (project, None)
+        relay.publish([{"status": "deleted", "model": "runjob", "uuid": "b"}])
+        self.assertEqual(
+            connection.published, [broadcast_channel(project_facility(project))]
+        )
@@ -0,0 +1,72 @@
+from model_mommy import mommy
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from rodan.cache import get_redis_connection
+from rodan.jobs import placement
+from rodan.test.helpers import RodanTestSetUpMixin, RodanTestTearDownMixin
+
+
+class PlacementTestCase(RodanTestTearDownMixin, APITestCase, RodanTestSetUpMixin):
+    def setUp(self):
+        self.setUp_rodan()
+        self.setUp_user()
+        get_redis_connection().delete(placement.WORKERS_KEY, placement.RESERVED_KEY)
+        mommy.make(
+            "rodan.Job", name="test.heavy", job_queue="celery",
+            resource_hints={"memory": 3000, "cpu": 2},
+        )
+        mommy.make("rodan.Job", name="test.light", job_queue="celery", resource_hints={})
+        placement.advertise("small@host", ["celery"], {"memory": 2048, "cpu": 8})
+        placement.advertise("big@host", ["celery"], {"memory": 8192, "cpu": 4})
+
+    def tearDown(self):
+        get_redis_connection().delete(placement.WORKERS_KEY, placement.RESERVED_KEY)
+        super(PlacementTestCase, self).tearDown()
+
+    def _runjob(self, n, job_name):
+        return {"uuid": n, "job_name": job_name, "job_queue": "celery"}
+
+    def test_place(self):
+        placed, waiting = placement.place([
+            self._runjob(1, "test.heavy"),
+            self._runjob(2, "test.light"),
+            self._runjob(3, "test.heavy"),
+            self._runjob(4, "test.heavy"),
+        ])
+        # Only big@host has the memory of two heavy RunJobs.
+        self.assertEqual(
+            [(rj["uuid"], rj["worker"]) for rj in placed],
+            [(1, "big@host"), (2, None), (3, "big@host")],
+        )
+        self.assertEqual([rj["uuid"] for rj in waiting], [4])
+        self.assertEqual(sorted(placement.reservations()), ["1", "3"])
+
+        placement.unreserve([1])
+        placed, waiting = placement.place([self._runjob(4, "test.heavy")])
+        self.assertEqual([rj["worker"] for rj in placed], ["big@host"])
+        self.assertEqual(waiting, [])
+
+    def test_place_without_workers(self):
+        get_redis_connection().delete(placement.WORKERS_KEY)
+        placed, waiting = placement.place([self._runjob(1, "test.heavy")])
+        self.assertEqual([rj["worker"] for rj in placed], [None])
+        self.assertEqual(waiting, [])
+
+    def test_place_other_queue(self):
+        placement.withdraw("big@host")
+        placement.advertise("big@host", ["GPU"], {"memory": 8192, "cpu": 4})
+        # No worker of its queue can ever fit it: take the usual route.
+        placed, waiting = placement.place([self._runjob(1, "test.heavy")])
+        self.assertEqual([rj["worker"] for rj in placed], [None])
+        self.assertEqual(waiting, [])
+
+    def test_workers_view(self):
+        placement.place([self._runjob(1, "test.heavy")])
+        self.client.force_authenticate(user=self.test_superuser)
+        response = self.client.get(reverse("taskqueue-workers"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(response.data), ["big@host", "small@host"])
+        self.assertEqual(response.data["big@host"]["used"]["memory"], 3000)
+        self.assertEqual(response.data["big@host"]["runjobs"], 1)
@@ -0,0 +1,75 @@
+import marshal
+
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from rodan.constants import profiling
+from rodan.models import RunJob, WorkflowJob, WorkflowRun
+from rodan.test.helpers import RodanTestSetUpMixin, RodanTestTearDownMixin
+
+
+class ProfilingTestCase(RodanTestTearDownMixin, APITestCase, RodanTestSetUpMixin):
+    def setUp(self):
+        self.setUp_rodan()
+        self.setUp_user()
+        self.setUp_simple_dummy_workflow()
+        self.client.force_authenticate(user=self.test_superuser)
+        response = self.client.patch(
+            reverse("workflow-detail", kwargs={"pk": self.test_workflow.uuid}),
+            {"valid": True},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def _run(self, **kwargs):
+        ra = self.setUp_resources_for_simple_dummy_workflow()
+        data = {"workflow": self.url(self.test_workflow), "resource_assignments": ra}
+        data.update(kwargs)
+        response = self.client.post(reverse("workflowrun-list"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return WorkflowRun.objects.get(uuid=response.data["uuid"])
+
+    def _runjob(self, wfrun):
+        return RunJob.objects.get(workflow_run=wfrun, workflow_job=self.dummy_a_wfjob)
+
+    def test_off(self):
+        runjob = self._runjob(self._run())
+        self.assertEqual(runjob.profile, profiling.OFF)
+        self.assertIsNone(runjob.profile_resource)
+
+    def test_workflowrun_profile(self):
+        wfrun = self._run(profile=profiling.JOB)
+        runjob = self._runjob(wfrun)
+        self.assertEqual(runjob.profile, profiling.JOB)
+        profile = runjob.profile_resource
+        self.assertEqual(profile.project_id, self.test_project.pk)
+        self.assertIn("Profile of RunJob {0}".format(runjob.uuid), profile.description)
+        self.assertIn("Peak RSS", profile.description)
+        with open(profile.resource_file.path, "rb") as f:
+            stats = marshal.loads(f.read())
+        self.assertTrue(any(name == "run_my_task" for (_, _, name) in stats))
+
+        response = self.client.get(reverse("runjob-detail", kwargs={"pk": runjob.uuid}))
+        self.assertEqual(response.data["profile"], profiling.JOB)
+        self.assertTrue(
+            response.data["profile_resource"].endswith(
+                "/api/resource/{0}/".format(profile.uuid)
+            )
+        )
+
+    def test_workflowjob_profile(self):
+        # The bookkeeping around the job is profiled too.
+        WorkflowJob.objects.filter(pk=self.dummy_a_wfjob.pk).update(profile=profiling.TASK)
+        runjob = self._runjob(self._run())
+        self.assertEqual(runjob.profile, profiling.TASK)
+        with open(runjob.profile_resource.resource_file.path, "rb") as f:
+            stats = marshal.loads(f.read())
+        names = set(name for (_, _, name) in stats)
+        self.assertIn("run_my_task", names)
+        self.assertIn("_outputs", names)
+
+        m_runjob = RunJob.objects.get(
+            workflow_run=runjob.workflow_run_id, workflow_job=self.dummy_m_wfjob
+        )
+        self.assertEqual(m_runjob.profile, profiling.OFF)
@@ -0,0 +1,244 @@
+"""
+Query-count and latency regression harness of the API.
+
+It seeds a dataset (projects with thousands of Resources, Workflows, WorkflowRuns and
+their RunJobs), then GETs every route of `rodan.urls` -- the list routes at several page
+sizes, with some of their filters -- and records the SQL queries and the time of every
+request. It fails if:
+
+- the number of queries of a list route grows with the page size (an N+1 pattern);
+- the number of queries of a route exceeds its baseline in `query_counts.json`, or the
+  route has no baseline. Until `query_counts.json` is committed, only the N+1 patterns
+  fail.
+
+It is slow, so it only runs with `RODAN_QUERY_HARNESS=1`:
+
+    RODAN_QUERY_HARNESS=1 python manage.py test rodan.test.test_query_counts
+
+Other environment variables:
+
+- `RODAN_QUERY_HARNESS_RESOURCES` -- number of Resources of the main project (2000). The
+  numbers of queries do not depend on it, only the seconds; CI uses 200;
+- `RODAN_QUERY_BASELINE=update` -- write the measured counts as the new baseline instead
+  of checking them (review the diff of `query_counts.json` like code);
+- `RODAN_QUERY_REPORT` -- path of a JSON report of the queries and the seconds of every
+  request.
+"""
+import json
+import os
+import time
+import unittest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from model_mommy import mommy
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from rodan.models import ResourceType, RunJob, WorkflowRun
+from rodan.test.helpers import RodanTestSetUpMixin, RodanTestTearDownMixin
+
+BASELINE = os.path.join(os.path.dirname(__file__), "query_counts.json")
+PAGE_SIZES = (1, 10, 50)
+# Routes that are not measured, with the reason.
+EXCLUDED = {
+    "taskqueue-active": "served from the sample of the metrics collector, or asks the workers",
+    "taskqueue-scheduled": "served from the sample of the metrics collector, or asks the workers",
+    "taskqueue-status": "served from the sample of the metrics collector, or asks the workers",
+    "taskqueue-workers": "asks the Celery workers",
+    "resource-archive": "archives files in a Celery task",
+    "resource-viewer": "needs a working user token",
+    "resource-viewer-acquire": "POST only",
+    "interactive-acquire": "POST only",
+    "interactive-working": "needs a working user token",
+    "^api/ht/": "health checks of the host",
+}
+
+
+@unittest.skipUnless(os.environ.get("RODAN_QUERY_HARNESS"), "set RODAN_QUERY_HARNESS=1")
+class QueryCountTestCase(RodanTestTearDownMixin, APITestCase, RodanTestSetUpMixin):
+    def setUp(self):
+        self.setUp_rodan()
+        self.setUp_user()
+        self.client.force_authenticate(user=self.test_superuser)
+
+        # WorkflowRuns of the complex workflow, with their RunJobs, Inputs and Outputs.
+        self.setUp_complex_dummy_workflow()
+        assignments = self.setUp_resources_for_complex_dummy_workflow()
+        response = self.client.patch(
+            reverse("workflow-detail", kwargs={"pk": self.test_workflow.uuid}),
+            {"valid": True},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for _ in range(3):
+            response = self.client.post(
+                reverse("workflowrun-list"),
+                {
+                    "workflow": self.url(self.test_workflow),
+                    "resource_assignments": dict(
+                        (ip, list(ress)) for ip, ress in assignments.items()
+                    ),
+                },
+                format="json",
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.test_workflowrun = WorkflowRun.objects.filter(
+            workflow=self.test_workflow
+        ).first()
+        for rj in RunJob.objects.all():
+            mommy.make(
+                "rodan.RunJobMetrics",
+                run_job=rj,
+                workflow_run=rj.workflow_run,
+                job_name=rj.job_name,
+            )
+
+        # The bulk: Resources with labels, and enough of everything else to fill pages.
+        resources = mommy.make(
+            "rodan.Resource",
+            _quantity=int(os.environ.get("RODAN_QUERY_HARNESS_RESOURCES", 2000)),
+            project=self.test_project,
+            resource_type=ResourceType.objects.get(mimetype="test/a1"),
+            creator=self.test_user,
+        )
+        labels = mommy.make("rodan.ResourceLabel", _quantity=10)
+        Through = resources[0].labels.through
+        Through.objects.bulk_create(
+            Through(resource=r, resourcelabel=labels[i % len(labels)])
+            for i, r in enumerate(resources)
+        )
+        mommy.make("rodan.ResourceList", _quantity=20, project=self.test_project)
+        mommy.make("rodan.Project", _quantity=20, creator=self.test_user)
+        mommy.make("rodan.Workflow", _quantity=20, project=self.test_project)
+        mommy.make(
+            "rodan.WorkflowRun",
+            _quantity=20,
+            project=self.test_project,
+            workflow=self.test_workflow,
+            creator=self.test_user,
+        )
+        mommy.make("rodan.WorkflowJobGroup", _quantity=5, workflow=self.test_workflow)
+        mommy.make("rodan.UserPreference", user=self.test_user)
+        mommy.make("rodan.ResultsPackage", _quantity=5, workflow_run=self.test_workflowrun)
+        mommy.make("rodan.Tombstone", _quantity=20, creator=self.test_user)
+
+    def variants(self, name):
+        """
+        The query parameters of the requests of a route, besides the page size.
+        """
+        filters = {
+            "resource-list": [
+                {"project": self.test_project.uuid},
+                {"result_of_workflow_run": self.test_workflowrun.uuid},
+                {"uploaded": "True"},
+            ],
+            "runjob-list": [{"workflow_run": self.test_workflowrun.uuid}],
+            "workflowrun-list": [{"project": self.test_project.uuid}],
+            "workflow-list": [{"project": self.test_project.uuid}],
+        }
+        return [{}] + filters.get(name, [])
+
+    def path(self, pattern):
+        """
+        Returns the path of a route, or None if it needs more than an object to show.
+        """
+        groups = set(pattern.regex.groupindex)
+        if not groups:
+            if pattern.name:
+                return reverse(pattern.name)
+            return "/" + pattern.regex.pattern.strip("^$")
+        if groups != {"pk"}:
+            return None
+        view_class = pattern.callback.view_class
+        queryset = getattr(view_class, "queryset", None)
+        if queryset is None:
+            queryset = view_class().get_queryset()
+        obj = queryset.first()
+        if obj is None:
+            return None
+        return reverse(pattern.name, kwargs={"pk": obj.pk})
+
+    def measure(self, path, params):
+        self.client.get(path, params, format="json")  # warm up
+        with CaptureQueriesContext(connection) as queries:
+            started = time.time()
+            response = self.client.get(path, params, format="json")
+            seconds = time.time() - started
+        return response.status_code, len(queries), seconds
+
+    def test_query_counts(self):
+        from rodan.urls import api_patterns
+
+        try:
+            with open(BASELINE) as f:
+                baseline = json.load(f)
+            strict = True
+        except IOError:
+            baseline = {}
+            strict = False
+        update = os.environ.get("RODAN_QUERY_BASELINE") == "update"
+
+        report = {}
+        failures = []
+        for pattern in api_patterns:
+            route = getattr(pattern, "name", None) or pattern.regex.pattern
+            if route in EXCLUDED:
+                continue
+            path = self.path(pattern)
+            if path is None:
+                failures.append(
+                    "{0}: no object to show; add it to EXCLUDED, with the reason".format(route)
+                )
+                continue
+            page_sizes = PAGE_SIZES if route.endswith("-list") else (None,)
+            for params in self.variants(route):
+                key = route + ("?" + "&".join(sorted(params)) if params else "")
+                counts = {}
+                for page_size in page_sizes:
+                    if page_size is not None:
+                        params = dict(params, page_size=page_size)
+                    code, count, seconds = self.measure(path, params)
+                    if code == status.HTTP_405_METHOD_NOT_ALLOWED:
+                        break  # not a GET route
+                    if code != status.HTTP_200_OK:
+                        failures.append("{0}: status {1}".format(key, code))
+                        break
+                    counts[page_size] = count
+                    report.setdefault(key, {})[str(page_size or "-")] = {
+                        "queries": count,
+                        "seconds": seconds,
+                    }
+                if not counts:
+                    continue
+                if len(set(counts.values())) > 1:
+                    failures.append(
+                        "{0}: the queries grow with the page size: {1}".format(
+                            key, sorted(counts.items())
+                        )
+                    )
+                if update:
+                    baseline[key] = max(counts.values())
+                elif key not in baseline:
+                    if strict:
+                        failures.append(
+                            "{0}: no baseline; run with RODAN_QUERY_BASELINE=update".format(
+                                key
+                            )
+                        )
+                elif max(counts.values()) > baseline[key]:
+                    failures.append(
+                        "{0}: {1} queries, above the baseline of {2}".format(
+                            key, max(counts.values()), baseline[key]
+                        )
+                    )
+
+        if update:
+            with open(BASELINE, "w") as f:
+                json.dump(baseline, f, indent=2, sort_keys=True)
+                f.write("\n")
+        if os.environ.get("RODAN_QUERY_REPORT"):
+            with open(os.environ["RODAN_QUERY_REPORT"], "w") as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+        self.assertEqual(failures, [], "\n".join(failures))
@@ -0,0 +1,127 @@
+import json
+import time
+
+from django.test.utils import override_settings
+from django.utils import timezone
+from model_mommy import mommy
+from rest_framework.test import APITestCase
+
+from rodan.cache import get_redis_connection
+from rodan.constants import task_status
+from rodan.jobs import placement, supervisor
+from rodan.models import RunJob
+from rodan.test.helpers import RodanTestSetUpMixin, RodanTestTearDownMixin
+
+
+@override_settings(
+    RODAN_SUPERVISOR_STRAGGLER_PERCENTILE=95,
+    RODAN_SUPERVISOR_STRAGGLER_FACTOR=2,
+    RODAN_SUPERVISOR_STRAGGLER_MIN_TIME=10,
+)
+class SupervisorTestCase(RodanTestTearDownMixin, APITestCase, RodanTestSetUpMixin):
+    KEYS = (supervisor.COPIES_KEY, placement.WORKERS_KEY, placement.RESERVED_KEY)
+
+    def setUp(self):
+        from rodan.test.dummy_jobs import dummy_automatic_job
+
+        self.setUp_rodan()
+        self.setUp_user()
+        get_redis_connection().delete(*self.KEYS)
+        self.test_wfrun = mommy.make(
+            "rodan.WorkflowRun",
+            project=mommy.make("rodan.Project"),
+            creator=self.test_user,
+            status=task_status.PROCESSING,
+        )
+        self.test_runjob = mommy.make(
+            "rodan.RunJob",
+            workflow_run=self.test_wfrun,
+            job_name=dummy_automatic_job.name,
+            job_settings={"a": 1, "b": [0.4]},
+            status=task_status.PROCESSING,
+        )
+        placement.advertise("alive@host", ["celery"], {"memory": 1024})
+
+    def tearDown(self):
+        get_redis_connection().delete(*self.KEYS)
+        super(SupervisorTestCase, self).tearDown()
+
+    def _copy(self, task_id, worker, elapsed=0):
+        copy = {
+            "runjob": str(self.test_runjob.uuid),
+            "worker": worker,
+            "started": time.time() - elapsed,
+        }
+        get_redis_connection().hset(supervisor.COPIES_KEY, task_id, json.dumps(copy))
+
+    def _status(self):
+        return RunJob.objects.get(uuid=self.test_runjob.uuid).status
+
+    def test_claim(self):
+        self.assertTrue(supervisor.claim(self.test_runjob.uuid, "task-1"))
+        self.assertFalse(supervisor.claim(self.test_runjob.uuid, "task-2"))
+        self.assertTrue(supervisor.claim(self.test_runjob.uuid, "task-1"))
+        RunJob.objects.filter(uuid=self.test_runjob.uuid).update(
+            status=task_status.CANCELLED, lock=None
+        )
+        self.assertFalse(supervisor.claim(self.test_runjob.uuid, "task-1"))
+
+    def test_claim_fenced(self):
+        # The winner waits for input: the other copies cannot claim the RunJob...
+        supervisor.started(self.test_runjob.uuid, "task-1", "alive@host", self.test_runjob.updated)
+        RunJob.objects.filter(uuid=self.test_runjob.uuid).update(
+            status=task_status.WAITING_FOR_INPUT, lock=None
+        )
+        self.assertFalse(supervisor.claim(self.test_runjob.uuid, "task-1"))
+        # ...nor once it is dispatched again.
+        RunJob.objects.filter(uuid=self.test_runjob.uuid).update(
+            status=task_status.PROCESSING, updated=timezone.now()
+        )
+        self.assertFalse(supervisor.claim(self.test_runjob.uuid, "task-1"))
+        supervisor.ended("task-1")
+        self.assertTrue(supervisor.claim(self.test_runjob.uuid, "task-2"))
+
+    def test_requeue_lost(self):
+        self._copy("task-1", "dead@host")
+        result = supervisor.supervise()
+        self.assertEqual(result["requeued"], 1)
+        # The master task dispatched it again, and it ran (eagerly).
+        self.assertEqual(self._status(), task_status.FINISHED)
+        self.assertEqual(supervisor.copies(), {})
+
+    def test_not_lost_without_live_workers(self):
+        placement.withdraw("alive@host")
+        self._copy("task-1", "dead@host")
+        self.assertEqual(supervisor.supervise()["requeued"], 0)
+        self.assertEqual(self._status(), task_status.PROCESSING)
+
+    def test_speculate_straggler(self):
+        mommy.make(
+            "rodan.RunJobMetrics",
+            run_job=self.test_runjob,
+            workflow_run=self.test_wfrun,
+            job_name=self.test_runjob.job_name,
+            status=task_status.FINISHED,
+            wall_time=1,
+            _quantity=5,
+        )
+        self._copy("task-1", "alive@host", elapsed=5)
+        self.assertEqual(supervisor.supervise()["speculated"], 0)
+
+        self._copy("task-1", "alive@host", elapsed=60)
+        self.assertEqual(supervisor.supervise()["speculated"], 1)
+        # The copy ran (eagerly) and won: the original discards its results.
+        self.assertEqual(self._status(), task_status.FINISHED)
+        self.assertFalse(supervisor.claim(self.test_runjob.uuid, "task-1"))
+
+    def test_unreserve_stale(self):
+        get_redis_connection().hset(
+            placement.RESERVED_KEY,
+            str(self.test_runjob.uuid),
+            json.dumps({"worker": "dead@host", "memory": 512}),
+        )
+        RunJob.objects.filter(uuid=self.test_runjob.uuid).update(
+            status=task_status.FINISHED
+        )
+        self.assertEqual(supervisor.supervise()["unreserved"], 1)
+        self.assertEqual(placement.reservations(), {})
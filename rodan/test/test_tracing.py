@@ -0,0 +1,89 @@
+from django.test.utils import override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from rodan.jobs import tracing
+from rodan.models import TraceSpan
+from rodan.test.helpers import RodanTestSetUpMixin, RodanTestTearDownMixin
+
+
+@override_settings(RODAN_TRACE_EXPORTER="rodan.jobs.tracing.DatabaseExporter")
+class TracingTestCase(RodanTestTearDownMixin, APITestCase, RodanTestSetUpMixin):
+    def setUp(self):
+        self.setUp_rodan()
+        self.setUp_user()
+        self.setUp_simple_dummy_workflow()
+        self.client.force_authenticate(user=self.test_superuser)
+        response = self.client.patch(
+            reverse("workflow-detail", kwargs={"pk": self.test_workflow.uuid}),
+            {"valid": True},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_workflowrun_trace(self):
+        ra = self.setUp_resources_for_simple_dummy_workflow()
+        response = self.client.post(
+            reverse("workflowrun-list"),
+            {"workflow": self.url(self.test_workflow), "resource_assignments": ra},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        spans = tracing.DatabaseExporter().spans(response.data["uuid"])
+        self.assertEqual(len(spans), TraceSpan.objects.count())
+        names = set(s["name"] for s in spans)
+        for name in (
+            "WorkflowRunList.perform_create",
+            "rodan.core.create_workflowrun",
+            "rodan.core.master_task",
+            "RodanTask.run_my_task",
+        ):
+            self.assertIn(name, names)
+
+        # One tree, rooted at the creation of the WorkflowRun.
+        span_ids = set(s["span_id"] for s in spans)
+        roots = [s for s in spans if s["parent_id"] is None]
+        self.assertEqual([s["name"] for s in roots], ["WorkflowRunList.perform_create"])
+        for s in spans:
+            if s["parent_id"] is not None:
+                self.assertIn(s["parent_id"], span_ids)
+        self.assertEqual(tracing.critical_path(spans)[0], roots[0])
+
+    def test_untraced(self):
+        with self.settings(RODAN_TRACE_EXPORTER=""):
+            with tracing.trace(self.test_workflow.uuid, "root") as s:
+                self.assertIsNone(s)
+                self.assertIsNone(tracing.context())
+        self.assertFalse(TraceSpan.objects.exists())
+
+    def test_inject_context(self):
+        body, headers = {}, {}
+        tracing.inject_context(body=body, headers=headers)
+        self.assertEqual(body, {})
+        with tracing.trace(self.test_workflow.uuid, "root") as s:
+            tracing.inject_context(body=body, headers=headers)
+        self.assertEqual(body[tracing.CONTEXT_FIELD], s.context())
+        self.assertEqual(headers[tracing.CONTEXT_FIELD], s.context())
+        self.assertEqual(s.context()["trace_id"], self.test_workflow.uuid.hex)
+
+    def test_critical_path(self):
+        def span(span_id, parent_id, started, duration):
+            return {
+                "span_id": span_id,
+                "parent_id": parent_id,
+                "started": started,
+                "duration": duration,
+            }
+
+        spans = [
+            span("root", None, 0, 1),
+            span("a", "root", 0.5, 1),
+            span("b", "root", 0.6, 4),
+            span("a1", "a", 2, 1),
+            span("b1", "b", 1, 2),
+        ]
+        path = tracing.critical_path(spans)
+        self.assertEqual([s["span_id"] for s in path], ["root", "b"])
+        self.assertEqual(tracing.critical_path([]), [])
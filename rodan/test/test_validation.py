@@ -0,0 +1,62 @@
+from model_mommy import mommy
+from rest_framework.test import APITestCase
+
+from rodan.jobs import validation
+from rodan.jobs.validation import WorkflowValidationError
+from rodan.models import WorkflowJob
+from rodan.test.helpers import RodanTestSetUpMixin, RodanTestTearDownMixin
+
+
+class IncrementalValidationTestCase(RodanTestTearDownMixin, APITestCase, RodanTestSetUpMixin):
+    def setUp(self):
+        self.setUp_rodan()
+        self.setUp_complex_dummy_workflow()
+        self.manifest = mommy.make("rodan.CatalogueManifest")
+        validation.validate(self.test_workflow)
+
+    def _validated(self):
+        return dict(
+            WorkflowJob.objects.filter(workflow=self.test_workflow).values_list(
+                "uuid", "validated"
+            )
+        )
+
+    def _assertInvalid(self, error_code):
+        with self.assertRaises(WorkflowValidationError) as cm:
+            validation.validate(self.test_workflow)
+        self.assertEqual(cm.exception.error_code, error_code)
+
+    def test_validated(self):
+        self.assertEqual(set(self._validated().values()), set([self.manifest.uuid]))
+
+    def test_settings(self):
+        self.test_wfjob_E.job_settings = {"a": "not an integer"}
+        self.test_wfjob_E.save()
+        validated = self._validated()
+        self.assertIsNone(validated[self.test_wfjob_E.uuid])
+        self.assertEqual(validated[self.test_wfjob_D.uuid], self.manifest.uuid)
+        self._assertInvalid("WFJ_INVALID_SETTINGS")
+
+        self.test_wfjob_E.job_settings = {"a": 1, "b": [0.4]}
+        self.test_wfjob_E.save()
+        self.assertTrue(validation.validate(self.test_workflow))
+        self.assertEqual(set(self._validated().values()), set([self.manifest.uuid]))
+
+    def test_connection(self):
+        mommy.make("rodan.Connection", output_port=self.test_Eop, input_port=self.test_Dip1)
+        validated = self._validated()
+        self.assertIsNone(validated[self.test_wfjob_D.uuid])
+        self.assertIsNone(validated[self.test_wfjob_E.uuid])
+        self.assertEqual(validated[self.test_wfjob_A.uuid], self.manifest.uuid)
+        self._assertInvalid("WF_HAS_CYCLES")
+
+    def test_deleted_connection(self):
+        # Nothing to check again but the graph.
+        self.test_conn_Dop_Fip2.delete()
+        self.assertEqual(set(self._validated().values()), set([self.manifest.uuid]))
+        self._assertInvalid("WF_NOT_CONNECTED")
+
+    def test_catalogue(self):
+        manifest = mommy.make("rodan.CatalogueManifest")
+        self.assertTrue(validation.validate(self.test_workflow))
+        self.assertEqual(set(self._validated().values()), set([manifest.uuid]))
@@ -0,0 +1,43 @@
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase
+from model_mommy import mommy
+
+from rodan.test.helpers import RodanTestSetUpMixin, RodanTestTearDownMixin
+from rodan.websocket import (
+    GLOBAL_FACILITY,
+    can_subscribe,
+    project_facility,
+    workflowrun_facility,
+)
+
+
+class WebsocketSubscriptionTestCase(RodanTestTearDownMixin, TestCase, RodanTestSetUpMixin):
+    def setUp(self):
+        self.setUp_rodan()
+        self.setUp_user()
+        self.test_project = mommy.make("rodan.Project", creator=self.test_user)
+        self.other_project = mommy.make("rodan.Project")
+        self.test_workflowrun = mommy.make(
+            "rodan.WorkflowRun", project=self.test_project, workflow__project=self.test_project
+        )
+
+    def test_project_channel(self):
+        self.assertTrue(can_subscribe(self.test_user, project_facility(self.test_project.uuid)))
+        self.assertFalse(can_subscribe(self.test_user, project_facility(self.other_project.uuid)))
+        self.assertTrue(
+            can_subscribe(self.test_superuser, project_facility(self.other_project.uuid))
+        )
+
+    def test_workflowrun_channel(self):
+        facility = workflowrun_facility(self.test_workflowrun.uuid.hex)
+        self.assertTrue(can_subscribe(self.test_user, facility))
+        self.test_project.admin_group.user_set.remove(self.test_user)
+        self.assertFalse(can_subscribe(self.test_user, facility))
+
+    def test_anonymous_and_unknown(self):
+        self.assertFalse(
+            can_subscribe(AnonymousUser(), project_facility(self.test_project.uuid))
+        )
+        self.assertTrue(can_subscribe(self.test_user, GLOBAL_FACILITY))
+        self.assertFalse(can_subscribe(self.test_user, "project-1234"))
+        self.assertFalse(can_subscribe(self.test_user, "user-{0}".format(self.test_user.pk)))
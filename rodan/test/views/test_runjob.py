@@ -0,0 +1,89 @@
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework.reverse import reverse
+from model_mommy import mommy
+
+from rodan.constants import task_status
+from rodan.models import RunJob
+from rodan.test.helpers import RodanTestSetUpMixin, RodanTestTearDownMixin
+
+
+class RunJobConditionalGetTestCase(
+    RodanTestTearDownMixin, APITestCase, RodanTestSetUpMixin
+):
+    def setUp(self):
+        self.setUp_rodan()
+        self.setUp_user()
+        self.setUp_simple_dummy_workflow()
+        self.test_workflowrun = mommy.make(
+            "rodan.WorkflowRun",
+            workflow=self.test_workflow,
+            project=self.test_project,
+            creator=self.test_superuser,
+        )
+        self.test_runjob = mommy.make(
+            "rodan.RunJob",
+            workflow_run=self.test_workflowrun,
+            workflow_job=self.dummy_a_wfjob,
+            job_settings={},
+            status=task_status.SCHEDULED,
+        )
+        self.client.force_authenticate(user=self.test_superuser)
+
+    def test_detail_not_modified(self):
+        url = reverse("runjob-detail", kwargs={"pk": self.test_runjob.uuid})
+        response = self.client.get(url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+
+        response = self.client.get(url, format="json", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_detail_modified_by_queryset_update(self):
+        url = reverse("runjob-detail", kwargs={"pk": self.test_runjob.uuid})
+        etag = self.client.get(url, format="json")["ETag"]
+
+        RunJob.objects.filter(uuid=self.test_runjob.uuid).update(
+            status=task_status.PROCESSING
+        )
+        response = self.client.get(url, format="json", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], task_status.PROCESSING)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list_not_modified(self):
+        url = reverse("runjob-list")
+        params = {"workflow_run": str(self.test_workflowrun.uuid)}
+        response = self.client.get(url, params, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+
+        response = self.client.get(url, params, format="json", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_modified_by_new_runjob(self):
+        url = reverse("runjob-list")
+        params = {"workflow_run": str(self.test_workflowrun.uuid)}
+        etag = self.client.get(url, params, format="json")["ETag"]
+
+        mommy.make(
+            "rodan.RunJob",
+            workflow_run=self.test_workflowrun,
+            workflow_job=self.dummy_a_wfjob,
+            job_settings={},
+        )
+        response = self.client.get(url, params, format="json", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 2)
+
+    def test_etag_depends_on_user(self):
+        url = reverse("runjob-detail", kwargs={"pk": self.test_runjob.uuid})
+        etag = self.client.get(url, format="json")["ETag"]
+
+        self.test_user.is_superuser = True
+        self.test_user.save()
+        self.client.force_authenticate(user=self.test_user)
+        response = self.client.get(url, format="json", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,80 @@
+from rest_framework.test import APITestCase
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from rodan.constants import task_status
+from rodan.jobs import metrics
+from rodan.models import RunJob, RunJobMetrics
+from rodan.test.helpers import RodanTestSetUpMixin, RodanTestTearDownMixin
+
+
+class RunJobMetricsViewTestCase(RodanTestTearDownMixin, APITestCase, RodanTestSetUpMixin):
+    def setUp(self):
+        self.setUp_rodan()
+        self.setUp_user()
+        self.setUp_simple_dummy_workflow()
+        self.client.force_authenticate(user=self.test_superuser)
+        response = self.client.patch(
+            reverse("workflow-detail", kwargs={"pk": self.test_workflow.uuid}),
+            {"valid": True},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ra = self.setUp_resources_for_simple_dummy_workflow()
+        response = self.client.post(
+            reverse("workflowrun-list"),
+            {"workflow": self.url(self.test_workflow), "resource_assignments": ra},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.test_wfrun_id = response.data["uuid"]
+
+    def test_recorded(self):
+        m = RunJobMetrics.objects.get(
+            workflow_run_id=self.test_wfrun_id, run_job__workflow_job=self.dummy_a_wfjob
+        )
+        self.assertEqual(m.status, task_status.FINISHED)
+        self.assertEqual(m.job_name, m.run_job.job_name)
+        self.assertGreaterEqual(m.wall_time, 0)
+        self.assertEqual(m.inputs, [str(self.test_resource.uuid)])
+        self.assertEqual(len(m.outputs), 1)
+
+        m = RunJobMetrics.objects.get(
+            workflow_run_id=self.test_wfrun_id, run_job__workflow_job=self.dummy_m_wfjob
+        )
+        self.assertEqual(m.status, task_status.WAITING_FOR_INPUT)
+
+    def test_peak_rss(self):
+        runjob = RunJob.objects.get(
+            workflow_run_id=self.test_wfrun_id, workflow_job=self.dummy_a_wfjob
+        )
+        reset_peak_rss = metrics._reset_peak_rss
+        try:
+            metrics._reset_peak_rss = lambda: True
+            m = metrics.record(runjob, task_status.FINISHED, metrics.usage(reset_peak_rss=True))
+            self.assertGreater(m.peak_rss, 0)
+            # Without a reset, the high-water mark is the one of the whole worker.
+            metrics._reset_peak_rss = lambda: False
+            m = metrics.record(runjob, task_status.FINISHED, metrics.usage(reset_peak_rss=True))
+            self.assertIsNone(m.peak_rss)
+        finally:
+            metrics._reset_peak_rss = reset_peak_rss
+
+    def test_list_filter(self):
+        response = self.client.get(
+            reverse("runjobmetrics-list"), {"workflow_run": self.test_wfrun_id}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 2)
+
+    def test_summary(self):
+        response = self.client.get(
+            reverse("runjobmetrics-summary"), {"group_by": "workflow_run"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["count"], 2)
+
+    def test_summary_invalid_group_by(self):
+        response = self.client.get(reverse("runjobmetrics-summary"), {"group_by": "inputs"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,154 @@
+import os
+
+from model_mommy import mommy
+from rest_framework.test import APITestCase
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from rodan.constants import task_status
+from rodan.models import (
+    Connection,
+    Project,
+    Resource,
+    RunJob,
+    Tombstone,
+    WorkflowRun,
+)
+from rodan.test.helpers import RodanTestSetUpMixin, RodanTestTearDownMixin
+
+
+class TombstoneViewTestCase(RodanTestTearDownMixin, APITestCase, RodanTestSetUpMixin):
+    def setUp(self):
+        self.setUp_rodan()
+        self.setUp_user()
+        self.setUp_simple_dummy_workflow()
+        self.client.force_authenticate(user=self.test_superuser)
+        response = self.client.patch(
+            reverse("workflow-detail", kwargs={"pk": self.test_workflow.uuid}),
+            {"valid": True},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def _run_workflow(self):
+        ra = self.setUp_resources_for_simple_dummy_workflow()
+        response = self.client.post(
+            reverse("workflowrun-list"),
+            {"workflow": self.url(self.test_workflow), "resource_assignments": ra},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data["uuid"]
+
+    def test_delete_project(self):
+        self._run_workflow()
+        project_path = self.test_project.project_path
+        response = self.client.delete(
+            reverse("project-detail", kwargs={"pk": self.test_project.uuid})
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        response = self.client.get(response["Location"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["model"], "project")
+        self.assertEqual(response.data["status"], task_status.FINISHED)
+        self.assertGreater(response.data["deleted_rows"], 0)
+
+        self.assertFalse(Project.objects.filter(uuid=self.test_project.uuid).exists())
+        self.assertFalse(RunJob.objects.filter(workflow_run__project=self.test_project).exists())
+        self.assertFalse(os.path.exists(project_path))
+
+    def test_delete_workflowrun(self):
+        wfrun_id = self._run_workflow()
+        response = self.client.delete(reverse("workflowrun-detail", kwargs={"pk": wfrun_id}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(WorkflowRun.objects.filter(uuid=wfrun_id).exists())
+        self.assertFalse(RunJob.objects.filter(workflow_run_id=wfrun_id).exists())
+        tombstone = Tombstone.objects.get(object_uuid=wfrun_id)
+        self.assertEqual(tombstone.status, task_status.FINISHED)
+        self.assertEqual(tombstone.creator, self.test_superuser)
+
+    def test_delete_protected_resource(self):
+        self._run_workflow()
+        response = self.client.delete(
+            reverse("resource-detail", kwargs={"pk": self.test_resource.uuid})
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Resource.objects.get(uuid=self.test_resource.uuid).tombstoned)
+        self.assertFalse(Tombstone.objects.exists())
+
+    def test_tombstoned_hidden(self):
+        self.setUp_resources_for_simple_dummy_workflow()
+        Resource.objects.filter(uuid=self.test_resource.uuid).update(tombstoned=True)
+        response = self.client.get(
+            reverse("resource-detail", kwargs={"pk": self.test_resource.uuid})
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tombstoned_project_hides_children(self):
+        wfrun_id = self._run_workflow()
+        Project.objects.filter(uuid=self.test_project.uuid).update(tombstoned=True)
+        for name, pk in (
+            ("workflow-detail", self.test_workflow.uuid),
+            ("workflowjob-detail", self.dummy_a_wfjob.uuid),
+            ("runjob-detail", RunJob.objects.filter(workflow_run_id=wfrun_id)[0].uuid),
+        ):
+            response = self.client.get(reverse(name, kwargs={"pk": pk}))
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(reverse("workflow-list"))
+        self.assertEqual(response.data["count"], 0)
+
+    def test_tombstoned_project_hides_workflow_parts(self):
+        wfrun_id = self._run_workflow()
+        connection = Connection.objects.get(input_port__workflow_job=self.dummy_m_wfjob)
+        resourcelist = mommy.make("rodan.ResourceList", project=self.test_project)
+        workflowjobgroup = mommy.make("rodan.WorkflowJobGroup", workflow=self.test_workflow)
+        resultspackage = mommy.make(
+            "rodan.ResultsPackage",
+            workflow_run=WorkflowRun.objects.get(uuid=wfrun_id),
+            status=task_status.SCHEDULED,
+        )
+        Project.objects.filter(uuid=self.test_project.uuid).update(tombstoned=True)
+        for name, pk in (
+            ("connection", connection.uuid),
+            ("inputport", connection.input_port_id),
+            ("outputport", connection.output_port_id),
+            ("workflowjobgroup", workflowjobgroup.uuid),
+            ("resourcelist", resourcelist.uuid),
+            ("resultspackage", resultspackage.uuid),
+        ):
+            response = self.client.get(reverse(name + "-detail", kwargs={"pk": pk}))
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, name)
+            response = self.client.get(reverse(name + "-list"))
+            self.assertEqual(response.data["count"], 0, name)
+
+    def test_tombstoned_workflowrun_hides_resultspackage(self):
+        wfrun_id = self._run_workflow()
+        resultspackage = mommy.make(
+            "rodan.ResultsPackage",
+            workflow_run=WorkflowRun.objects.get(uuid=wfrun_id),
+            status=task_status.SCHEDULED,
+        )
+        WorkflowRun.objects.filter(uuid=wfrun_id).update(tombstoned=True)
+        response = self.client.get(
+            reverse("resultspackage-detail", kwargs={"pk": resultspackage.uuid})
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_create_on_tombstoned_parent(self):
+        ra = self.setUp_resources_for_simple_dummy_workflow()
+        Project.objects.filter(uuid=self.test_project.uuid).update(tombstoned=True)
+        response = self.client.post(
+            reverse("workflowrun-list"),
+            {"workflow": self.url(self.test_workflow), "resource_assignments": ra},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("workflow", response.data)
+        response = self.client.post(
+            reverse("workflow-list"),
+            {"project": self.url(self.test_project), "name": "new"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("project", response.data)
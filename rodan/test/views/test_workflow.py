@@ -1,4 +1,8 @@
 from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rodan.constants import task_status
+from rodan.jobs import validation
 from rodan.models import Workflow, InputPort, OutputPort, ResourceType
 
 from rest_framework import status
@@ -787,3 +791,81 @@ class WorkflowExternPortsTestCase(
         self.assertFalse(Fip2.extern)
         Fop = OutputPort.objects.get(uuid=self.test_Fop.uuid)
         self.assertTrue(Fop.extern)
+
+    def test_number_of_queries(self):
+        # The graph is loaded in a fixed number of queries, whatever its size.
+        self.setUp_simple_dummy_workflow()
+        with CaptureQueriesContext(connection) as simple:
+            validation.validate(self.test_workflow)
+        self.setUp_complex_dummy_workflow()
+        with CaptureQueriesContext(connection) as complex_:
+            validation.validate(self.test_workflow)
+        self.assertEqual(len(simple), len(complex_))
+
+
+class WorkflowEstimateTestCase(RodanTestTearDownMixin, APITestCase, RodanTestSetUpMixin):
+    def setUp(self):
+        self.setUp_rodan()
+        self.setUp_user()
+        self.setUp_simple_dummy_workflow()
+        self.client.force_authenticate(user=self.test_superuser)
+        response = self.client.patch(
+            reverse("workflow-detail", kwargs={"pk": self.test_workflow.uuid}),
+            {"valid": True},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        wfrun = mommy.make(
+            "rodan.WorkflowRun", workflow=self.test_workflow, project=self.test_project
+        )
+        for wall_time in (1, 3, 2):
+            runjob = mommy.make(
+                "rodan.RunJob",
+                workflow_run=wfrun,
+                workflow_job=self.dummy_a_wfjob,
+                job_name=self.dummy_a_wfjob.job.name,
+                job_settings=self.dummy_a_wfjob.job_settings,
+            )
+            mommy.make(
+                "rodan.RunJobMetrics",
+                run_job=runjob,
+                workflow_run=wfrun,
+                job_name=runjob.job_name,
+                status=task_status.FINISHED,
+                wall_time=wall_time,
+            )
+
+    def test_estimate(self):
+        ra = self.setUp_resources_for_simple_dummy_workflow()
+        response = self.client.post(
+            reverse("workflow-estimate", kwargs={"pk": self.test_workflow.uuid}),
+            {"resource_assignments": ra},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        url_a = reverse(
+            "workflowjob-detail", args=[self.dummy_a_wfjob.uuid], request=response.wsgi_request
+        )
+        url_m = reverse(
+            "workflowjob-detail", args=[self.dummy_m_wfjob.uuid], request=response.wsgi_request
+        )
+        self.assertEqual(response.data["critical_path"], [url_a, url_m])
+        self.assertEqual(response.data["workflow_jobs"][url_a]["duration"], 2)
+        self.assertEqual(response.data["workflow_jobs"][url_a]["basis"], "settings")
+        self.assertEqual(
+            response.data["workflow_jobs"][url_m]["duration"],
+            settings.RODAN_ESTIMATOR_DEFAULT_DURATION,
+        )
+        self.assertEqual(
+            response.data["duration"], 2 + settings.RODAN_ESTIMATOR_DEFAULT_DURATION
+        )
+
+    def test_estimate_invalid_assignments(self):
+        response = self.client.post(
+            reverse("workflow-estimate", kwargs={"pk": self.test_workflow.uuid}),
+            {"resource_assignments": []},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("resource_assignments", response.data)
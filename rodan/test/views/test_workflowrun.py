@@ -5,12 +5,14 @@ from rest_framework.test import APITestCase
 from rest_framework import status
 from rest_framework.reverse import reverse
 
-from rodan.models import WorkflowRun, ResourceType
+from rodan.models import Job, WorkflowRun, WorkflowJob, ResourceType
 from model_mommy import mommy
 from rodan.test.helpers import RodanTestSetUpMixin, RodanTestTearDownMixin
 import uuid
 from django.core.files.base import ContentFile
 from rodan.constants import task_status
+from rodan.jobs import progress
+from rodan.jobs.core import _downstream_runjobs
 
 
 class WorkflowRunViewTest(RodanTestTearDownMixin, APITestCase, RodanTestSetUpMixin):
@@ -633,6 +635,92 @@ class WorkflowRunSimpleExecutionTest(
             WorkflowRun.objects.get(uuid=wfrun_id).status, task_status.FINISHED
         )
 
+    def test_progress(self):
+        ra = self.setUp_resources_for_simple_dummy_workflow()
+        workflowrun_obj = {
+            "workflow": "http://localhost:8000/api/workflow/{0}/".format(
+                self.test_workflow.uuid
+            ),
+            "resource_assignments": ra,
+        }
+        response = self.client.post(reverse("workflowrun-list"), workflowrun_obj, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        wfrun_id = response.data["uuid"]
+
+        response = self.client.get(reverse("workflowrun-progress", kwargs={"pk": wfrun_id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total"], 2)
+        self.assertEqual(response.data["counts"]["finished"], 1)
+        self.assertEqual(response.data["counts"]["waiting_for_input"], 1)
+        dummy_a_counts = response.data["jobs"][self.dummy_a_wfjob.job.name]
+        self.assertEqual(dummy_a_counts["finished"], 1)
+
+        # Counters kept incrementally must match the ones rebuilt from the database.
+        wfrun = WorkflowRun.objects.get(uuid=wfrun_id)
+        incremental = progress.snapshot(wfrun)
+        progress.rebuild(wfrun_id, publish=False)
+        self.assertEqual(progress.snapshot(wfrun), incremental)
+
+    def test_incremental_rerun(self):
+        ra = self.setUp_resources_for_simple_dummy_workflow()
+        workflowrun_obj = {"workflow": self.url(self.test_workflow), "resource_assignments": ra}
+        response = self.client.post(reverse("workflowrun-list"), workflowrun_obj, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        base_wfrun = WorkflowRun.objects.get(uuid=response.data["uuid"])
+        dummy_m_runjob = self.dummy_m_wfjob.run_jobs.get(workflow_run=base_wfrun)
+        response = self.client.post(
+            "/api/interactive/{0}/acquire/".format(str(dummy_m_runjob.uuid))
+        )
+        response = self.client.post(response.data["working_url"], ["any"], format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        base_a_output = self.dummy_a_wfjob.run_jobs.get(workflow_run=base_wfrun).outputs.get()
+
+        # Nothing changed: everything is reused.
+        workflowrun_obj["base_workflow_run"] = self.url(base_wfrun)
+        response = self.client.post(reverse("workflowrun-list"), workflowrun_obj, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        wfrun = WorkflowRun.objects.get(uuid=response.data["uuid"])
+        self.assertEqual(wfrun.status, task_status.FINISHED)
+        dummy_a_runjob = self.dummy_a_wfjob.run_jobs.get(workflow_run=wfrun)
+        self.assertEqual(dummy_a_runjob.status, task_status.FINISHED)
+        self.assertEqual(dummy_a_runjob.outputs.get().resource, base_a_output.resource)
+
+        # Only the settings of the manual job changed: the automatic job is reused.
+        WorkflowJob.objects.filter(uuid=self.dummy_m_wfjob.uuid).update(
+            job_settings={"a": 2, "b": [0.4]}
+        )
+        response = self.client.post(reverse("workflowrun-list"), workflowrun_obj, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        wfrun = WorkflowRun.objects.get(uuid=response.data["uuid"])
+        dummy_a_runjob = self.dummy_a_wfjob.run_jobs.get(workflow_run=wfrun)
+        dummy_m_runjob = self.dummy_m_wfjob.run_jobs.get(workflow_run=wfrun)
+        self.assertEqual(dummy_a_runjob.status, task_status.FINISHED)
+        self.assertEqual(dummy_a_runjob.outputs.get().resource, base_a_output.resource)
+        self.assertEqual(dummy_m_runjob.status, task_status.WAITING_FOR_INPUT)
+        self.assertEqual(dummy_m_runjob.inputs.get().resource, base_a_output.resource)
+
+        # Redoing the reused job gives it a Resource of its own: the base run keeps its result.
+        response = self.client.patch(
+            reverse("workflowrun-detail", kwargs={"pk": wfrun.uuid}),
+            {
+                "last_redone_runjob_tree": reverse(
+                    "runjob-detail", kwargs={"pk": dummy_a_runjob.uuid}
+                )
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        base_a_output.refresh_from_db()
+        self.assertEqual(base_a_output.run_job.workflow_run, base_wfrun)
+        dummy_a_output = dummy_a_runjob.outputs.get()
+        self.assertNotEqual(dummy_a_output.resource, base_a_output.resource)
+        self.assertEqual(dummy_a_output.resource.origin, dummy_a_output)
+        self.assertEqual(dummy_m_runjob.inputs.get().resource, dummy_a_output.resource)
+        self.assertEqual(
+            self.dummy_m_wfjob.run_jobs.get(workflow_run=base_wfrun).inputs.get().resource,
+            base_a_output.resource,
+        )
+
     def test_automatic_job_fail(self):
         with self.settings(
             CELERY_EAGER_PROPAGATES_EXCEPTIONS=False
@@ -1191,6 +1279,29 @@ class WorkflowRunComplexTest(RodanTestTearDownMixin, APITestCase, RodanTestSetUp
             WorkflowRun.objects.get(uuid=wfrun_id).status, task_status.FINISHED
         )
 
+    def test_downstream_runjobs(self):
+        ra = self.setUp_resources_for_complex_dummy_workflow()
+        workflowrun_obj = {
+            "workflow": reverse("workflow-detail", kwargs={"pk": self.test_workflow.uuid}),
+            "resource_assignments": ra,
+        }
+        response = self.client.post(reverse("workflowrun-list"), workflowrun_obj, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        wfrun = WorkflowRun.objects.get(uuid=response.data["uuid"])
+        rjB = self.test_wfjob_B.run_jobs.first()
+        response = self.client.post("/api/interactive/{0}/acquire/".format(str(rjB.uuid)))
+        response = self.client.post(response.data["working_url"], {"foo": "bar"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # A and B feed C, C feeds every D; E and F are still SCHEDULED and not followed.
+        rjA = self.test_wfjob_A.run_jobs.first()
+        rjC = self.test_wfjob_C.run_jobs.first()
+        rjDs = set(self.test_wfjob_D.run_jobs.values_list("uuid", flat=True))
+        self.assertEqual(len(rjDs), 10)
+        self.assertEqual(_downstream_runjobs(wfrun, rjA.uuid), {rjA.uuid, rjC.uuid} | rjDs)
+        self.assertEqual(_downstream_runjobs(wfrun, rjB.uuid), {rjB.uuid, rjC.uuid} | rjDs)
+        self.assertEqual(_downstream_runjobs(wfrun, rjC.uuid), {rjC.uuid} | rjDs)
+
 
 class WorkflowRunMultipleResourceCollectionsTest(
     RodanTestTearDownMixin, APITestCase, RodanTestSetUpMixin
@@ -1304,3 +1415,163 @@ class WorkflowRunMultipleResourceCollectionsTest(
 
             self.assertEqual(Ai.resource.name, Bi.resource.name)
             self.assertEqual(Ai.resource.name, Ci.resource.name)
+
+
+class WorkflowRunCriticalPathTest(RodanTestTearDownMixin, APITestCase, RodanTestSetUpMixin):
+    """
+    Wide-and-deep workflow: a root job feeds a chain of CHAIN jobs and WIDE independent
+    jobs. All jobs sleep for the same time.
+    """
+
+    CHAIN = 4
+    WIDE = 4
+    SLEEP = 0.01
+
+    def setUp(self):
+        from rodan.test.dummy_jobs import dummy_automatic_job
+
+        self.setUp_rodan()
+        self.setUp_user()
+        self.client.force_authenticate(user=self.test_superuser)
+
+        job = Job.objects.get(name=dummy_automatic_job.name)
+        ipt = job.input_port_types.get(name="in_typeA")
+        opt = job.output_port_types.get(name="out_typeA")
+        self.test_project = mommy.make("rodan.Project")
+        self.test_workflow = mommy.make("rodan.Workflow", project=self.test_project)
+
+        def make_wfjob(upstream_op=None):
+            wfjob = mommy.make(
+                "rodan.WorkflowJob",
+                workflow=self.test_workflow,
+                job=job,
+                job_settings={"a": 1, "b": [0.4], "sleep": self.SLEEP},
+            )
+            ip = mommy.make("rodan.InputPort", workflow_job=wfjob, input_port_type=ipt)
+            op = mommy.make("rodan.OutputPort", workflow_job=wfjob, output_port_type=opt)
+            if upstream_op is not None:
+                mommy.make("rodan.Connection", output_port=upstream_op, input_port=ip)
+            return wfjob, ip, op
+
+        self.root_wfjob, self.root_ip, root_op = make_wfjob()
+        self.chain_wfjobs = []
+        op = root_op
+        for i in range(self.CHAIN):
+            wfjob, _, op = make_wfjob(op)
+            self.chain_wfjobs.append(wfjob)
+        self.wide_wfjobs = [make_wfjob(root_op)[0] for i in range(self.WIDE)]
+
+        response = self.client.patch(
+            reverse("workflow-detail", kwargs={"pk": self.test_workflow.uuid}),
+            {"valid": True},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def _run(self, priority=0):
+        resource = mommy.make(
+            "rodan.Resource",
+            project=self.test_project,
+            resource_type=ResourceType.objects.get(mimetype="test/a1"),
+        )
+        resource.resource_file.save("dummy.txt", ContentFile("dummy text"))
+        response = self.client.post(
+            reverse("workflowrun-list"),
+            {
+                "workflow": self.url(self.test_workflow),
+                "resource_assignments": {self.url(self.root_ip): [self.url(resource)]},
+                "priority": priority,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return WorkflowRun.objects.get(uuid=response.data["uuid"])
+
+    def _run_recording(self):
+        """
+        Run the Workflow, and return the WorkflowRun and the WorkflowJobs of its RunJobs
+        in the order the master task dispatched them (the order they ran in, as tasks are
+        eager).
+        """
+        from celery.signals import task_prerun
+
+        started = []
+
+        def record(sender=None, args=None, **kwargs):
+            if sender.name == "rodan.core.run_fused_chain":
+                started.extend(str(rj_id) for rj_id in args[0])
+            elif args:
+                started.append(str(args[0]))
+
+        task_prerun.connect(record, weak=False)
+        try:
+            wfrun = self._run()
+        finally:
+            task_prerun.disconnect(record)
+        wfjobs = dict(
+            (str(rj_id), wfjob_id)
+            for rj_id, wfjob_id in wfrun.run_jobs.values_list("uuid", "workflow_job_id")
+        )
+        order = []
+        for rj_id in started:
+            if rj_id in wfjobs and wfjobs[rj_id] not in order:
+                order.append(wfjobs[rj_id])
+        return wfrun, order
+
+    def test_remaining_work(self):
+        wfrun = self._run()
+        self.assertEqual(wfrun.status, task_status.FINISHED)
+
+        root_rj = wfrun.run_jobs.get(workflow_job=self.root_wfjob)
+        chain_head_rj = wfrun.run_jobs.get(workflow_job=self.chain_wfjobs[0])
+        wide_rj = wfrun.run_jobs.get(workflow_job=self.wide_wfjobs[0])
+        # Without history, remaining work is proportional to the depth of the chain.
+        self.assertAlmostEqual(
+            chain_head_rj.remaining_work, self.CHAIN * wide_rj.remaining_work
+        )
+        self.assertAlmostEqual(
+            root_rj.remaining_work, chain_head_rj.remaining_work + wide_rj.remaining_work
+        )
+
+    def test_dispatch_order(self):
+        wfrun, order = self._run_recording()
+        self.assertEqual(wfrun.status, task_status.FINISHED)
+        # The chain, on the critical path, is dispatched before the independent jobs...
+        self.assertEqual(
+            order[:1 + self.CHAIN],
+            [self.root_wfjob.uuid] + [wfjob.uuid for wfjob in self.chain_wfjobs],
+        )
+        self.assertEqual(
+            set(order[1 + self.CHAIN:]), set(wfjob.uuid for wfjob in self.wide_wfjobs)
+        )
+
+        # ...and with a higher broker priority.
+        from rodan.jobs.master_task import task_priority
+
+        longest = wfrun.run_jobs.get(workflow_job=self.root_wfjob).remaining_work
+        chain_head_rj = wfrun.run_jobs.get(workflow_job=self.chain_wfjobs[0])
+        wide_rj = wfrun.run_jobs.get(workflow_job=self.wide_wfjobs[0])
+        with self.settings(RODAN_CRITICAL_PATH_PRIORITY_LEVELS=2):
+            self.assertGreater(
+                task_priority(0, chain_head_rj.remaining_work, longest),
+                task_priority(0, wide_rj.remaining_work, longest),
+            )
+
+    def test_task_priority(self):
+        from rodan.jobs.master_task import task_priority
+
+        with self.settings(RODAN_CRITICAL_PATH_PRIORITY_LEVELS=2, RODAN_MAX_TASK_PRIORITY=9):
+            self.assertEqual(task_priority(0, 0, 0), 0)
+            self.assertEqual(task_priority(3, 10, 10), 5)
+            self.assertEqual(task_priority(3, 1, 10), 3)
+            self.assertEqual(task_priority(9, 10, 10), 9)
+
+        wfrun = self._run(priority=7)
+        self.assertEqual(wfrun.priority, 7)
+        response = self.client.post(
+            reverse("workflowrun-list"),
+            {"workflow": self.url(self.test_workflow), "resource_assignments": {}, "priority": 10},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("priority", response.data)
@@ -21,20 +21,28 @@ from rodan.views.project import (
 )
 from rodan.views.workflow import WorkflowList
 from rodan.views.workflow import WorkflowDetail
+from rodan.views.workflow import WorkflowEstimate
 from rodan.views.workflowjob import WorkflowJobList
 from rodan.views.workflowjob import WorkflowJobDetail
 from rodan.views.workflowjobgroup import WorkflowJobGroupList
 from rodan.views.workflowjobgroup import WorkflowJobGroupDetail
 from rodan.views.workflowrun import WorkflowRunList
 from rodan.views.workflowrun import WorkflowRunDetail
+from rodan.views.workflowrun import WorkflowRunProgress
 from rodan.views.runjob import RunJobList
 from rodan.views.runjob import RunJobDetail
+from rodan.views.runjobmetrics import (
+    RunJobMetricsList,
+    RunJobMetricsDetail,
+    RunJobMetricsSummary,
+)
 from rodan.views.job import JobList
 from rodan.views.job import JobDetail
 from rodan.views.user import UserList
 from rodan.views.user import UserDetail
 from rodan.views.userpreference import UserPreferenceList, UserPreferenceDetail
 from rodan.views.resultspackage import ResultsPackageList, ResultsPackageDetail
+from rodan.views.tombstone import TombstoneList, TombstoneDetail
 from rodan.views.connection import ConnectionList, ConnectionDetail
 from rodan.views.outputport import OutputPortList, OutputPortDetail
 from rodan.views.outputporttype import OutputPortTypeList, OutputPortTypeDetail
@@ -53,9 +61,12 @@ from rodan.views.resourcetype import ResourceTypeList, ResourceTypeDetail
 from rodan.views.output import OutputList, OutputDetail
 from rodan.views.input import InputList, InputDetail
 from rodan.views.taskqueue import (
+    MetricsView,
     TaskQueueActiveView,
+    TaskQueueAdmissionView,
     TaskQueueScheduledView,
     TaskQueueStatusView,
+    TaskQueueWorkersView,
 )
 from rodan.views.interactive import (
     InteractiveAcquireView,
@@ -99,6 +110,17 @@ api_patterns = [
         TaskQueueStatusView.as_view(),
         name="taskqueue-status",
     ),
+    url(
+        r"^api/taskqueue/admission/$",
+        TaskQueueAdmissionView.as_view(),
+        name="taskqueue-admission",
+    ),
+    url(
+        r"^api/taskqueue/workers/$",
+        TaskQueueWorkersView.as_view(),
+        name="taskqueue-workers",
+    ),
+    url(r"^api/metrics/$", MetricsView.as_view(), name="metrics"),
     url(r"^api/projects/$", ProjectList.as_view(), name="project-list"),
     url(
         r"^api/project/(?P<pk>[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12})/$",
@@ -121,6 +143,11 @@ api_patterns = [
         WorkflowDetail.as_view(),
         name="workflow-detail",
     ),
+    url(
+        r"^api/workflow/(?P<pk>[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12})/estimate/$",  # noqa
+        WorkflowEstimate.as_view(),
+        name="workflow-estimate",
+    ),
     url(r"^api/workflowjobs/$", WorkflowJobList.as_view(), name="workflowjob-list"),
     url(
         r"^api/workflowjob/(?P<pk>[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12})/$",
@@ -161,12 +188,28 @@ api_patterns = [
         WorkflowRunDetail.as_view(),
         name="workflowrun-detail",
     ),
+    url(
+        r"^api/workflowrun/(?P<pk>[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12})/progress/$",  # noqa
+        WorkflowRunProgress.as_view(),
+        name="workflowrun-progress",
+    ),
     url(r"^api/runjobs/$", RunJobList.as_view(), name="runjob-list"),
     url(
         r"^api/runjob/(?P<pk>[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12})/$",
         RunJobDetail.as_view(),
         name="runjob-detail",
     ),
+    url(r"^api/runjobmetrics/$", RunJobMetricsList.as_view(), name="runjobmetrics-list"),
+    url(
+        r"^api/runjobmetrics/summary/$",
+        RunJobMetricsSummary.as_view(),
+        name="runjobmetrics-summary",
+    ),
+    url(
+        r"^api/runjobmetrics/(?P<pk>[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12})/$",  # noqa
+        RunJobMetricsDetail.as_view(),
+        name="runjobmetrics-detail",
+    ),
     url(
         r"^api/resultspackages/$",
         ResultsPackageList.as_view(),
@@ -177,6 +220,12 @@ api_patterns = [
         ResultsPackageDetail.as_view(),
         name="resultspackage-detail",
     ),
+    url(r"^api/tombstones/$", TombstoneList.as_view(), name="tombstone-list"),
+    url(
+        r"^api/tombstone/(?P<pk>[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12})/$",  # noqa
+        TombstoneDetail.as_view(),
+        name="tombstone-detail",
+    ),
     url(r"^api/connections/$", ConnectionList.as_view(), name="connection-list"),
     url(
         r"^api/connection/(?P<pk>[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12})/$",
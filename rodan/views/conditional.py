@@ -0,0 +1,162 @@
+import calendar
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+from rodan.cache import response_cache
+from rodan.jobs import catalogue
+
+
+def permission_context(request):
+    """
+    Identify what the requesting user is allowed to see: permission filtering makes
+    the same URL return different data for different users.
+    """
+    user = request.user
+    groups = sorted(str(pk) for pk in user.groups.values_list("pk", flat=True))
+    return [str(user.pk), ",".join(groups), request.accepted_renderer.format]
+
+
+class ConditionalGetMixin(object):
+    """
+    Answer `GET` requests with `304 Not Modified` when the client already holds
+    the current representation (`If-None-Match`), without running any serializer.
+
+    - Detail views fingerprint the concrete column values of the retrieved row.
+    - List views fingerprint the filtered queryset by its row count and its latest
+      `updated` timestamp (so deletions and status changes both change the ETag).
+
+    Both fingerprints include the requesting user and their groups, as permission
+    filtering makes the same URL return different data for different users. ETags
+    are weak, since the representation may be re-encoded (e.g. gzipped) on its way out.
+
+    Only put this mixin in front of views whose representation is derived from the
+    row itself; nested data of other models would not be reflected in the ETag.
+    """
+
+    def _make_etag(self, parts):
+        digest = hashlib.md5("|".join(parts).encode("utf-8")).hexdigest()
+        return 'W/"{0}"'.format(digest)
+
+    def _is_not_modified(self, request, etag):
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+        if not if_none_match:
+            return False
+        # Weak comparison: "W/" prefixes are ignored on both sides.
+        candidates = [e.strip() for e in if_none_match.split(",")]
+        candidates = [e[2:] if e.startswith("W/") else e for e in candidates]
+        return "*" in candidates or etag[2:] in candidates
+
+    def _conditional_response(self, request, etag, last_modified, get_response):
+        if self._is_not_modified(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = get_response()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(calendar.timegm(last_modified.utctimetuple()))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        fingerprint = queryset.order_by().aggregate(
+            count=Count("pk"), last_updated=Max("updated")
+        )
+        etag = self._make_etag(
+            [request.get_full_path(), str(fingerprint["count"]), str(fingerprint["last_updated"])]
+            + permission_context(request)
+        )
+        return self._conditional_response(
+            request,
+            etag,
+            fingerprint["last_updated"],
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = self._make_etag(
+            [instance._meta.label]
+            + [f.value_to_string(instance) for f in instance._meta.concrete_fields]
+            + permission_context(request)
+        )
+
+        def get_response():
+            serializer = self.get_serializer(instance)
+            return Response(serializer.data)
+
+        return self._conditional_response(
+            request, etag, getattr(instance, "updated", None), get_response
+        )
+
+
+class CachedResponseMixin(object):
+    """
+    Serve `GET` requests from the Redis response cache (see `rodan.cache`).
+
+    `cache_depends_on` lists the models (lowercase, as in the change notifications)
+    whose changes can alter the response; a change to any of them invalidates it.
+    """
+
+    cache_depends_on = ()
+
+    def _cached_response(self, request, get_response):
+        if not response_cache.enabled:
+            return get_response()
+        scope = self.__class__.__name__
+        key = response_cache.make_key(
+            scope,
+            [request.get_full_path()] + permission_context(request),
+            self.cache_depends_on,
+        )
+        data = response_cache.get(key, scope)
+        if data is not None:
+            return Response(data)
+        response = get_response()
+        if response.status_code == status.HTTP_200_OK:
+            response_cache.set(key, response.data)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(
+            request, lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(
+            request,
+            lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs),
+        )
+
+
+class CatalogueResponseMixin(object):
+    """
+    Serve `GET` requests for the catalogue (Jobs, port types, ResourceTypes) from the
+    process-level catalogue cache (see `rodan.jobs.catalogue`), in front of the Redis
+    response cache. Only for views that any user may see, as responses are not keyed
+    by the permission context.
+    """
+
+    def _catalogue_response(self, request, get_response):
+        key = (
+            self.__class__.__name__,
+            request.build_absolute_uri(),
+            request.accepted_renderer.format,
+        )
+        return catalogue.cache.response(key, get_response)
+
+    def list(self, request, *args, **kwargs):
+        return self._catalogue_response(
+            request, lambda: super(CatalogueResponseMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._catalogue_response(
+            request,
+            lambda: super(CatalogueResponseMixin, self).retrieve(request, *args, **kwargs),
+        )
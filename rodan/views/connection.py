@@ -16,7 +16,9 @@ class ConnectionList(generics.ListCreateAPIView):
 
     permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
     _ignore_model_permissions = True
-    queryset = Connection.objects.all()
+    queryset = Connection.objects.filter(
+        input_port__workflow_job__workflow__project__tombstoned=False
+    )
     serializer_class = ConnectionSerializer
 
     class filter_class(django_filters.FilterSet):
@@ -42,7 +44,9 @@ class ConnectionDetail(generics.RetrieveUpdateDestroyAPIView):
 
     permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
     _ignore_model_permissions = True
-    queryset = Connection.objects.all()
+    queryset = Connection.objects.filter(
+        input_port__workflow_job__workflow__project__tombstoned=False
+    )
     serializer_class = ConnectionSerializer
 
     def perform_update(self, conn_serializer):
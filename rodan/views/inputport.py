@@ -22,7 +22,7 @@ class InputPortList(generics.ListCreateAPIView):
 
     permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
     _ignore_model_permissions = True
-    queryset = InputPort.objects.all()
+    queryset = InputPort.objects.filter(workflow_job__workflow__project__tombstoned=False)
     serializer_class = InputPortSerializer
 
     class filter_class(django_filters.FilterSet):
@@ -42,7 +42,9 @@ class InputPortList(generics.ListCreateAPIView):
         elif has_connections and has_connections.lower() == "true":
             condition &= Q(connections__isnull=False)
 
-        queryset = InputPort.objects.filter(condition)
+        queryset = InputPort.objects.filter(
+            condition, workflow_job__workflow__project__tombstoned=False
+        )
         return queryset
 
 
@@ -53,7 +55,7 @@ class InputPortDetail(generics.RetrieveUpdateDestroyAPIView):
 
     permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
     _ignore_model_permissions = True
-    queryset = InputPort.objects.all()
+    queryset = InputPort.objects.filter(workflow_job__workflow__project__tombstoned=False)
     serializer_class = InputPortSerializer
 
     def perform_update(self, ip_serializer):
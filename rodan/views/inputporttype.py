@@ -3,9 +3,10 @@ from rest_framework import permissions, filters
 from rodan.models.inputporttype import InputPortType
 from rodan.serializers.inputporttype import InputPortTypeSerializer
 from rodan.paginators.pagination import CustomPaginationWithDisablePaginationOption
+from rodan.views.conditional import CachedResponseMixin, CatalogueResponseMixin
 
 
-class InputPortTypeList(generics.ListAPIView):
+class InputPortTypeList(CatalogueResponseMixin, CachedResponseMixin, generics.ListAPIView):
     """
     Returns a list of InputPortTypes. Does not accept POST requests, since
     InputPortTypes should be defined and loaded server-side.
@@ -14,6 +15,7 @@ class InputPortTypeList(generics.ListAPIView):
     permission_classes = (permissions.AllowAny,)
     queryset = InputPortType.objects.all()
     serializer_class = InputPortTypeSerializer
+    cache_depends_on = ("inputporttype", "resourcetype")
     pagination_class = CustomPaginationWithDisablePaginationOption
     filter_backends = (filters.DjangoFilterBackend, filters.OrderingFilter)
     filter_fields = {
@@ -26,7 +28,7 @@ class InputPortTypeList(generics.ListAPIView):
     }
 
 
-class InputPortTypeDetail(generics.RetrieveAPIView):
+class InputPortTypeDetail(CatalogueResponseMixin, CachedResponseMixin, generics.RetrieveAPIView):
     """
     Query a single InputPortType instance.
     """
@@ -34,4 +36,5 @@ class InputPortTypeDetail(generics.RetrieveAPIView):
     permission_classes = (permissions.AllowAny,)
     queryset = InputPortType.objects.all()
     serializer_class = InputPortTypeSerializer
+    cache_depends_on = ("inputporttype", "resourcetype")
     filter_backends = ()
@@ -24,6 +24,8 @@ from django.core.urlresolvers import reverse
 
 from rodan.constants import task_status
 from rodan.exceptions import CustomAPIException
+from rodan.jobs import lazy
+from rodan.jobs import progress
 from rodan.models import RunJob
 from rodan.permissions import CustomObjectPermissions
 
@@ -142,7 +144,7 @@ class InteractiveWorkingView(APIView):
 
     def get(self, request, run_job_uuid, working_user_token, additional_url, *a, **k):
         runjob = self._authenticate(run_job_uuid, working_user_token)
-        manual_task = registry.tasks[str(runjob.job_name)]
+        manual_task = lazy.job_task(runjob.job_name)
 
         if not additional_url:
             # request for the interface. Track the time
@@ -181,7 +183,7 @@ class InteractiveWorkingView(APIView):
         else:
             user_input = request.data
 
-        manual_task = registry.tasks[str(runjob.job_name)]
+        manual_task = lazy.job_task(runjob.job_name)
         try:
             setattr(
                 manual_task, "url", additional_url
@@ -204,6 +206,7 @@ class InteractiveWorkingView(APIView):
 
         else:
             settings_update = retval
+            previous_status = runjob.status
             runjob.status = task_status.SCHEDULED
             runjob.error_summary = ""
             runjob.error_details = ""
@@ -213,6 +216,10 @@ class InteractiveWorkingView(APIView):
             runjob.working_user_token = None
             runjob.working_user_expiry = None
             runjob.save()
+            progress.record(
+                runjob.workflow_run_id,
+                [(runjob.job_name, previous_status, task_status.SCHEDULED)],
+            )
             # call master_task to continue workflowrun
             registry.tasks["rodan.core.master_task"].apply_async(
                 (runjob.workflow_run.uuid,)
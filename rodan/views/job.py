@@ -3,9 +3,10 @@ from rest_framework import generics, permissions, filters
 from rodan.models.job import Job
 from rodan.serializers.job import JobSerializer
 from rodan.paginators.pagination import CustomPaginationWithDisablePaginationOption
+from rodan.views.conditional import CachedResponseMixin, CatalogueResponseMixin
 
 
-class JobList(generics.ListAPIView):
+class JobList(CatalogueResponseMixin, CachedResponseMixin, generics.ListAPIView):
     """
     Returns a list of all Jobs. Does not accept POST requests, since
     Jobs should be defined and loaded server-side.
@@ -14,6 +15,7 @@ class JobList(generics.ListAPIView):
     permission_classes = (permissions.AllowAny,)
     queryset = Job.objects.all()
     serializer_class = JobSerializer
+    cache_depends_on = ("job", "inputporttype", "outputporttype", "resourcetype")
     pagination_class = CustomPaginationWithDisablePaginationOption
     filter_backends = (filters.DjangoFilterBackend, filters.OrderingFilter)
     filter_fields = {
@@ -40,7 +42,7 @@ class JobList(generics.ListAPIView):
     #     return Job.objects.filter(**filter_dict)
 
 
-class JobDetail(generics.RetrieveAPIView):
+class JobDetail(CatalogueResponseMixin, CachedResponseMixin, generics.RetrieveAPIView):
     """
     Query a single Job instance.
     """
@@ -48,4 +50,5 @@ class JobDetail(generics.RetrieveAPIView):
     permission_classes = (permissions.AllowAny,)
     queryset = Job.objects.all()
     serializer_class = JobSerializer
+    cache_depends_on = ("job", "inputporttype", "outputporttype", "resourcetype")
     filter_backends = ()
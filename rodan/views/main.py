@@ -39,6 +39,12 @@ class APIRoot(APIView):
                     "workflowrun-list", request=request, format=format
                 ),
                 "runjobs": reverse("runjob-list", request=request, format=format),
+                "runjobmetrics": reverse(
+                    "runjobmetrics-list", request=request, format=format
+                ),
+                "runjobmetrics-summary": reverse(
+                    "runjobmetrics-summary", request=request, format=format
+                ),
                 "jobs": reverse("job-list", request=request, format=format),
                 "users": reverse("user-list", request=request, format=format),
                 "userpreferences": reverse(
@@ -47,6 +53,7 @@ class APIRoot(APIView):
                 "resultspackages": reverse(
                     "resultspackage-list", request=request, format=format
                 ),
+                "tombstones": reverse("tombstone-list", request=request, format=format),
                 "connections": reverse(
                     "connection-list", request=request, format=format
                 ),
@@ -80,6 +87,13 @@ class APIRoot(APIView):
                 "taskqueue-status": reverse(
                     "taskqueue-status", request=request, format=format
                 ),
+                "taskqueue-admission": reverse(
+                    "taskqueue-admission", request=request, format=format
+                ),
+                "taskqueue-workers": reverse(
+                    "taskqueue-workers", request=request, format=format
+                ),
+                "metrics": reverse("metrics", request=request, format=format),
                 # 'taskqueue-config': reverse('taskqueue-config', request=request, format=format),
                 "auth-me": reverse("auth-me", request=request, format=format),
                 "auth-register": reverse(
@@ -16,7 +16,7 @@ class OutputPortList(generics.ListCreateAPIView):
 
     permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
     _ignore_model_permissions = True
-    queryset = OutputPort.objects.all()
+    queryset = OutputPort.objects.filter(workflow_job__workflow__project__tombstoned=False)
     serializer_class = OutputPortSerializer
 
     class filter_class(django_filters.FilterSet):
@@ -35,7 +35,7 @@ class OutputPortDetail(generics.RetrieveUpdateDestroyAPIView):
 
     permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
     _ignore_model_permissions = True
-    queryset = OutputPort.objects.all()
+    queryset = OutputPort.objects.filter(workflow_job__workflow__project__tombstoned=False)
     serializer_class = OutputPortSerializer
 
     def perform_update(self, op_serializer):
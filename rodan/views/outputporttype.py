@@ -4,9 +4,10 @@ from rest_framework import permissions
 from rodan.models.outputporttype import OutputPortType
 from rodan.serializers.outputporttype import OutputPortTypeSerializer
 from rodan.paginators.pagination import CustomPaginationWithDisablePaginationOption
+from rodan.views.conditional import CachedResponseMixin, CatalogueResponseMixin
 
 
-class OutputPortTypeList(generics.ListAPIView):
+class OutputPortTypeList(CatalogueResponseMixin, CachedResponseMixin, generics.ListAPIView):
     """
     Returns a list of OutputPortTypes. Does not accept POST requests, since
     OutputPortTypes should be defined and loaded server-side.
@@ -15,6 +16,7 @@ class OutputPortTypeList(generics.ListAPIView):
     permission_classes = (permissions.AllowAny,)
     queryset = OutputPortType.objects.all()
     serializer_class = OutputPortTypeSerializer
+    cache_depends_on = ("outputporttype", "resourcetype")
     pagination_class = CustomPaginationWithDisablePaginationOption
     filter_backends = ()
     filter_fields = {
@@ -26,7 +28,7 @@ class OutputPortTypeList(generics.ListAPIView):
     }
 
 
-class OutputPortTypeDetail(generics.RetrieveAPIView):
+class OutputPortTypeDetail(CatalogueResponseMixin, CachedResponseMixin, generics.RetrieveAPIView):
     """
     Query a single OutputPortType instance.
     """
@@ -34,4 +36,5 @@ class OutputPortTypeDetail(generics.RetrieveAPIView):
     permission_classes = (permissions.AllowAny,)
     queryset = OutputPortType.objects.all()
     serializer_class = OutputPortTypeSerializer
+    cache_depends_on = ("outputporttype", "resourcetype")
     filter_backends = ()
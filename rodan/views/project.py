@@ -5,6 +5,7 @@ from django.contrib.auth.models import User
 from rodan.models.project import Project
 from rodan.serializers.project import ProjectListSerializer, ProjectDetailSerializer
 from rodan.permissions import CustomObjectPermissions
+from rodan.views.tombstone import BuryOnDestroyMixin
 
 
 class ProjectList(generics.ListCreateAPIView):
@@ -15,7 +16,7 @@ class ProjectList(generics.ListCreateAPIView):
     """
 
     permission_classes = (permissions.IsAuthenticated,)
-    queryset = Project.objects.all()
+    queryset = Project.objects.filter(tombstoned=False)
     serializer_class = ProjectListSerializer
     filter_fields = {
         "updated": ["lt", "gt"],
@@ -30,14 +31,14 @@ class ProjectList(generics.ListCreateAPIView):
         serializer.save(creator=self.request.user)
 
 
-class ProjectDetail(generics.RetrieveUpdateDestroyAPIView):
+class ProjectDetail(BuryOnDestroyMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Performs operations on a single Project instance.
     """
 
     permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
     _ignore_model_permissions = True
-    queryset = Project.objects.all()
+    queryset = Project.objects.filter(tombstoned=False)
     serializer_class = ProjectDetailSerializer
 
 
@@ -46,7 +47,7 @@ class ProjectDetailAdmins(generics.GenericAPIView):
     Retrieve and update project admin user list. Only open to project creator.
     """
 
-    queryset = Project.objects.all()
+    queryset = Project.objects.filter(tombstoned=False)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_serializer_class(self):
@@ -92,7 +93,7 @@ class ProjectDetailWorkers(generics.GenericAPIView):
     Retrieve and update project worker user list. Only open to project creator and admin.
     """
 
-    queryset = Project.objects.all()
+    queryset = Project.objects.filter(tombstoned=False)
 
     def get_serializer_class(self):
         # for rest browsable API displaying the PUT/PATCH form
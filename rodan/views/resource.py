@@ -12,7 +12,6 @@ from django.core.urlresolvers import (
     resolve,
     Resolver404,
 )
-from django.db.models import ProtectedError
 from django.db.models import Q
 from django.db.utils import DataError
 from django.http import (
@@ -44,9 +43,11 @@ from rodan.serializers.resource import ResourceSerializer
 from rodan.serializers.resourcelabel import ResourceLabelSerializer
 from rodan.permissions import CustomObjectPermissions
 from rodan.exceptions import CustomAPIException
+from rodan.views.conditional import ConditionalGetMixin, CachedResponseMixin
+from rodan.views.tombstone import BuryOnDestroyMixin
 
 
-class ResourceList(generics.ListCreateAPIView):
+class ResourceList(ConditionalGetMixin, CachedResponseMixin, generics.ListCreateAPIView):
     """
     Returns a list of Resources. Accepts a POST request with a data body with
     multiple files to create new Resource objects. It will return the newly
@@ -63,8 +64,16 @@ class ResourceList(generics.ListCreateAPIView):
     """
     permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
     _ignore_model_permissions = True
-    queryset = Resource.objects.all()
+    queryset = Resource.objects.filter(tombstoned=False, project__tombstoned=False)
     serializer_class = ResourceSerializer
+    cache_depends_on = (
+        "resource",
+        "resourcelabel",
+        "resourcetype",
+        "resourcelist",
+        "input",
+        "output",
+    )
 
     class filter_class(django_filters.FilterSet):
         # https://github.com/alex/django-filter/issues/273
@@ -109,7 +118,7 @@ class ResourceList(generics.ListCreateAPIView):
 
     def get_queryset(self):
         # [TODO] filter according to the user?
-        condition = Q()  # "ground" value of Q
+        condition = Q(tombstoned=False, project__tombstoned=False)  # "ground" value of Q
 
         wfrun_uuid = self.request.query_params.get('result_of_workflow_run', None)
         if wfrun_uuid:
@@ -214,13 +223,15 @@ class ResourceList(generics.ListCreateAPIView):
         return Response(new_resources, status=status.HTTP_201_CREATED)
 
 
-class ResourceDetail(generics.RetrieveUpdateDestroyAPIView):
+class ResourceDetail(
+    BuryOnDestroyMixin, ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView
+):
     """
     Perform operations on a single Resource instance.
     """
     permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions, )
     _ignore_model_permissions = True
-    queryset = Resource.objects.all()
+    queryset = Resource.objects.filter(tombstoned=False, project__tombstoned=False)
     serializer_class = ResourceSerializer
 
     def patch(self, request, *args, **kwargs):
@@ -266,13 +277,10 @@ class ResourceDetail(generics.RetrieveUpdateDestroyAPIView):
         return self.partial_update(request, *args, **kwargs)
 
     def delete(self, request, *args, **kwargs):
-
         resource = self.get_object()
-        old_data = ResourceSerializer(resource, context={'request': request}).data
 
-        try:
-            resource.delete()
-        except ProtectedError:
+        # Protected links are checked now: the garbage collector must be able to delete it.
+        if resource.inputs.exists() or resource.outputs.exists():
             # msg = "You can not delete the resource because it is currently Protected. "
             # msg += "A finished or pending runjob is referencing this resource."
             return Response(
@@ -287,7 +295,7 @@ class ResourceDetail(generics.RetrieveUpdateDestroyAPIView):
                 status=status.HTTP_409_CONFLICT
             )
 
-        return Response(old_data, status=status.HTTP_204_NO_CONTENT)
+        return self.destroy(request, *args, **kwargs)
 
 
 class ResourceViewer(APIView):
@@ -300,7 +308,7 @@ class ResourceViewer(APIView):
     """
     # permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions, )
     _ignore_model_permissions = True
-    queryset = Resource.objects.all()
+    queryset = Resource.objects.filter(tombstoned=False, project__tombstoned=False)
     serializer_class = ResourceSerializer
 
     # authentication_classes = ()
@@ -345,7 +353,7 @@ class ResourceAcquireView(generics.GenericAPIView):
     lookup_url_kwarg = "resource_uuid"  # for self.get_object()
     permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions, )
     _ignore_model_permissions = True
-    queryset = Resource.objects.all()
+    queryset = Resource.objects.filter(tombstoned=False, project__tombstoned=False)
 
     def get_serializer_class(self):
 
@@ -393,7 +401,7 @@ class ResourceArchive(generics.GenericAPIView):
     """
 
     permission_classes = (permissions.IsAuthenticated,)
-    queryset = Resource.objects.all()
+    queryset = Resource.objects.filter(tombstoned=False, project__tombstoned=False)
     serializer_class = ResourceSerializer
 
     def get(self, request, format=None):
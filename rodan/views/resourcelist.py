@@ -3,16 +3,17 @@ from rest_framework import permissions, status
 from rodan.models import ResourceList
 from rodan.serializers.resourcelist import ResourceListSerializer
 from rodan.permissions import CustomObjectPermissions
+from rodan.views.conditional import ConditionalGetMixin
 import django_filters
 from rest_framework.response import Response
 
 
-class ResourceListList(generics.ListCreateAPIView):
+class ResourceListList(ConditionalGetMixin, generics.ListCreateAPIView):
     """
     Returns a list of all ResourceLists.
     """
 
-    queryset = ResourceList.objects.all()
+    queryset = ResourceList.objects.filter(project__tombstoned=False)
     serializer_class = ResourceListSerializer
     filter_backends = (filters.DjangoFilterBackend, filters.OrderingFilter)
     permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
@@ -57,13 +58,13 @@ class ResourceListList(generics.ListCreateAPIView):
         return Response(d, status=status.HTTP_201_CREATED)
 
 
-class ResourceListDetail(generics.RetrieveUpdateDestroyAPIView):
+class ResourceListDetail(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Query a single ResourceList instance.
     """
 
     permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
-    queryset = ResourceList.objects.all()
+    queryset = ResourceList.objects.filter(project__tombstoned=False)
     serializer_class = ResourceListSerializer
     filter_backends = ()
 
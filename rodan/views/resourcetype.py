@@ -3,9 +3,10 @@ from rest_framework import permissions
 from rodan.models import ResourceType
 from rodan.serializers.resourcetype import ResourceTypeSerializer
 from rodan.paginators.pagination import CustomPaginationWithDisablePaginationOption
+from rodan.views.conditional import CachedResponseMixin, CatalogueResponseMixin
 
 
-class ResourceTypeList(generics.ListAPIView):
+class ResourceTypeList(CatalogueResponseMixin, CachedResponseMixin, generics.ListAPIView):
     """
     Returns a list of all ResourceTypes. Does not accept POST requests, since
     ResourceTypes should be defined and loaded server-side.
@@ -14,6 +15,7 @@ class ResourceTypeList(generics.ListAPIView):
     permission_classes = (permissions.AllowAny,)
     queryset = ResourceType.objects.all()
     serializer_class = ResourceTypeSerializer
+    cache_depends_on = ("resourcetype",)
     pagination_class = CustomPaginationWithDisablePaginationOption
     filter_backends = (filters.DjangoFilterBackend, filters.OrderingFilter)
     filter_fields = {
@@ -24,7 +26,7 @@ class ResourceTypeList(generics.ListAPIView):
     }
 
 
-class ResourceTypeDetail(generics.RetrieveAPIView):
+class ResourceTypeDetail(CatalogueResponseMixin, CachedResponseMixin, generics.RetrieveAPIView):
     """
     Query a single ResourceType instance.
     """
@@ -32,4 +34,5 @@ class ResourceTypeDetail(generics.RetrieveAPIView):
     permission_classes = (permissions.AllowAny,)
     queryset = ResourceType.objects.all()
     serializer_class = ResourceTypeSerializer
+    cache_depends_on = ("resourcetype",)
     filter_backends = ()
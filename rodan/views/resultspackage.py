@@ -31,7 +31,9 @@ class ResultsPackageList(generics.ListCreateAPIView):
 
     permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
     _ignore_model_permissions = True
-    queryset = ResultsPackage.objects.all()
+    queryset = ResultsPackage.objects.filter(
+        workflow_run__tombstoned=False, workflow_run__project__tombstoned=False
+    )
     serializer_class = ResultsPackageListSerializer
 
     class filter_class(django_filters.FilterSet):
@@ -100,7 +102,9 @@ class ResultsPackageDetail(generics.RetrieveDestroyAPIView):
 
     permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
     _ignore_model_permissions = True
-    queryset = ResultsPackage.objects.all()
+    queryset = ResultsPackage.objects.filter(
+        workflow_run__tombstoned=False, workflow_run__project__tombstoned=False
+    )
     serializer_class = ResultsPackageListSerializer
 
     def patch(self, request, *args, **kwargs):
@@ -6,9 +6,10 @@ import django_filters
 from rodan.models.runjob import RunJob
 from rodan.serializers.runjob import RunJobSerializer
 from rodan.permissions import CustomObjectPermissions
+from rodan.views.conditional import ConditionalGetMixin
 
 
-class RunJobList(generics.ListAPIView):
+class RunJobList(ConditionalGetMixin, generics.ListAPIView):
     """
     Returns a list of all RunJobs. Do not accept POST request as RunJobs are typically created by
     the server.
@@ -16,7 +17,9 @@ class RunJobList(generics.ListAPIView):
 
     permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
     _ignore_model_permissions = True
-    queryset = RunJob.objects.all()
+    queryset = RunJob.objects.filter(
+        workflow_run__tombstoned=False, workflow_run__project__tombstoned=False
+    )
     serializer_class = RunJobSerializer
 
     class filter_class(django_filters.FilterSet):
@@ -40,12 +43,14 @@ class RunJobList(generics.ListAPIView):
             }
 
 
-class RunJobDetail(generics.RetrieveAPIView):
+class RunJobDetail(ConditionalGetMixin, generics.RetrieveAPIView):
     """
     Performs operations on a single RunJob instance.
     """
 
     permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
     _ignore_model_permissions = True
-    queryset = RunJob.objects.all()
+    queryset = RunJob.objects.filter(
+        workflow_run__tombstoned=False, workflow_run__project__tombstoned=False
+    )
     serializer_class = RunJobSerializer
@@ -0,0 +1,84 @@
+from rest_framework import generics
+from rest_framework import permissions
+from rest_framework import status
+from rest_framework.response import Response
+
+import django_filters
+
+from rodan.exceptions import CustomAPIException
+from rodan.jobs import metrics
+from rodan.models.runjobmetrics import RunJobMetrics
+from rodan.serializers.runjobmetrics import RunJobMetricsSerializer
+from rodan.permissions import CustomObjectPermissions
+
+
+class RunJobMetricsFilter(django_filters.FilterSet):
+    project = django_filters.CharFilter(name="workflow_run__project")
+
+    class Meta:
+        model = RunJobMetrics
+        fields = {
+            "run_job": ["exact"],
+            "workflow_run": ["exact"],
+            "job_name": ["exact", "icontains"],
+            "worker_host": ["exact"],
+            "status": ["exact"],
+            "started": ["lt", "gt"],
+        }
+
+
+class RunJobMetricsList(generics.ListAPIView):
+    """
+    Returns a list of the execution metrics of RunJobs. They are recorded by the workers
+    at the end of each automatic phase of a RunJob.
+
+    #### Other Parameters
+    - `project` -- GET-only. UUID of a Project.
+    """
+
+    permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
+    _ignore_model_permissions = True
+    queryset = RunJobMetrics.objects.all()
+    serializer_class = RunJobMetricsSerializer
+    filter_class = RunJobMetricsFilter
+
+
+class RunJobMetricsDetail(generics.RetrieveAPIView):
+    """
+    Query a single RunJobMetrics instance.
+    """
+
+    permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
+    _ignore_model_permissions = True
+    queryset = RunJobMetrics.objects.all()
+    serializer_class = RunJobMetricsSerializer
+
+
+class RunJobMetricsSummary(generics.GenericAPIView):
+    """
+    Aggregates the execution metrics of RunJobs: count, total/average/maximum wall
+    time, total/average CPU time, average/maximum queue wait time, maximum peak RSS,
+    and total bytes read and written. Accepts the same filters as the list.
+
+    #### Other Parameters
+    - `group_by` -- GET-only. `job_name` (default), `workflow_run` or `worker_host`.
+    """
+
+    GROUP_BY = ("job_name", "workflow_run", "worker_host")
+
+    permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
+    _ignore_model_permissions = True
+    queryset = RunJobMetrics.objects.all()
+    filter_class = RunJobMetricsFilter
+
+    def get(self, request, *args, **kwargs):
+        group_by = request.query_params.get("group_by", "job_name")
+        if group_by not in self.GROUP_BY:
+            raise CustomAPIException(
+                {"group_by": ["Must be one of: {0}.".format(", ".join(self.GROUP_BY))]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(
+            {"group_by": group_by, "results": list(metrics.summary(queryset, group_by))}
+        )
@@ -1,19 +1,43 @@
+import time
+
+from django.http import HttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import permissions
 from rodan.celery import app
+from rodan.jobs import admission
+from rodan.jobs import monitoring
+from rodan.jobs import placement
 
 
-class TaskQueueActiveView(APIView):
+class SampledView(APIView):
     """
-    Returns the list of active Celery tasks.
+    Returns the replies of the Celery workers to `inspect().<inspected>()`, as of the
+    last sample of the metrics collector (see `rodan.jobs.monitoring`), instead of
+    broadcasting to every worker on every request. Without a sample (is Celery beat
+    running?), asks the workers.
     """
 
     permission_classes = (permissions.IsAdminUser,)
+    inspected = None
 
     def get(self, request, format=None):
-        inspect = app.control.inspect()
-        return Response(inspect.active())
+        sample = monitoring.last_sample()
+        if sample is None or "workers" not in sample:
+            inspect = app.control.inspect()
+            return Response(getattr(inspect, self.inspected)())
+        response = Response(sample["workers"][self.inspected])
+        response["Age"] = str(max(int(time.time() - sample["sampled"]), 0))
+        return response
+
+
+class TaskQueueActiveView(SampledView):
+    """
+    Returns the list of active Celery tasks, as of the last sample of the metrics
+    collector.
+    """
+
+    inspected = "active"
 
 
 class TaskQueueConfigView(APIView):
@@ -28,25 +52,55 @@ class TaskQueueConfigView(APIView):
         return Response(inspect.conf())
 
 
-class TaskQueueScheduledView(APIView):
+class TaskQueueScheduledView(SampledView):
     """
-    Returns the list of scheduled Celery tasks.
+    Returns the list of scheduled Celery tasks, as of the last sample of the metrics
+    collector.
+    """
+
+    inspected = "scheduled"
+
+
+class TaskQueueStatusView(SampledView):
+    """
+    Returns the status of Celery queue, as of the last sample of the metrics collector.
+    """
+
+    inspected = "stats"
+
+
+class TaskQueueAdmissionView(APIView):
+    """
+    Returns the limits of the admission control of RunJobs, the in-flight RunJobs per
+    user and job queue and per project, and the WorkflowRuns whose RunJobs are held.
     """
 
     permission_classes = (permissions.IsAdminUser,)
 
     def get(self, request, format=None):
-        inspect = app.control.inspect()
-        return Response(inspect.scheduled())
+        return Response(admission.snapshot())
 
 
-class TaskQueueStatusView(APIView):
+class TaskQueueWorkersView(APIView):
     """
-    Returns the status of Celery queue.
+    Returns the live workers with their job queues, their capacity and the resource
+    hints of the RunJobs placed on them.
     """
 
     permission_classes = (permissions.IsAdminUser,)
 
     def get(self, request, format=None):
-        inspect = app.control.inspect()
-        return Response(inspect.stats())
+        return Response(placement.snapshot())
+
+
+class MetricsView(APIView):
+    """
+    Returns the metrics of the queues, the RunJobs, the workers and the Celery tasks in
+    the Prometheus text format (see `rodan.jobs.monitoring`). Scrape it with the token
+    of an admin user (`Authorization: Token <token>`).
+    """
+
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request, format=None):
+        return HttpResponse(monitoring.render(), content_type=monitoring.CONTENT_TYPE)
@@ -0,0 +1,53 @@
+from rest_framework import generics
+from rest_framework import permissions
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+
+from rodan.jobs import garbage
+from rodan.models import Tombstone
+from rodan.serializers.tombstone import TombstoneSerializer
+from rodan.permissions import CustomObjectPermissions
+
+
+class BuryOnDestroyMixin(object):
+    """
+    Deleting the object flags it as tombstoned and returns at once; the garbage
+    collector deletes it in the background. The `Location` header of the response points
+    to the `Tombstone` that reports the progress of the collection.
+    """
+
+    def destroy(self, request, *args, **kwargs):
+        tombstone = garbage.bury(self.get_object(), request.user)
+        location = reverse("tombstone-detail", kwargs={"pk": tombstone.uuid}, request=request)
+        return Response(status=status.HTTP_204_NO_CONTENT, headers={"Location": location})
+
+
+class TombstoneList(generics.ListAPIView):
+    """
+    Returns a list of the Projects, WorkflowRuns and Resources deleted by the user,
+    with the progress of their garbage collection.
+    """
+
+    permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
+    _ignore_model_permissions = True
+    queryset = Tombstone.objects.all()
+    serializer_class = TombstoneSerializer
+    filter_fields = {
+        "model": ["exact"],
+        "object_uuid": ["exact"],
+        "status": ["exact"],
+        "created": ["lt", "gt"],
+        "updated": ["lt", "gt"],
+    }
+
+
+class TombstoneDetail(generics.RetrieveAPIView):
+    """
+    Query the garbage collection of a deleted Project, WorkflowRun or Resource.
+    """
+
+    permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
+    _ignore_model_permissions = True
+    queryset = Tombstone.objects.all()
+    serializer_class = TombstoneSerializer
@@ -16,7 +16,7 @@ class WorkflowJobList(generics.ListCreateAPIView):
 
     permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
     _ignore_model_permissions = True
-    queryset = WorkflowJob.objects.all()
+    queryset = WorkflowJob.objects.filter(workflow__project__tombstoned=False)
     serializer_class = WorkflowJobSerializer
     filter_fields = {
         "updated": ["lt", "gt"],
@@ -46,7 +46,7 @@ class WorkflowJobDetail(generics.RetrieveUpdateDestroyAPIView):
 
     permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
     _ignore_model_permissions = True
-    queryset = WorkflowJob.objects.all()
+    queryset = WorkflowJob.objects.filter(workflow__project__tombstoned=False)
     serializer_class = WorkflowJobSerializer
 
     def perform_update(self, wfj_serializer):
@@ -21,7 +21,9 @@ class WorkflowJobGroupList(generics.ListCreateAPIView):
     model = WorkflowJobGroup
     permission_classes = (permissions.IsAuthenticated,)
     filter_fields = ("origin",)
-    queryset = WorkflowJobGroup.objects.all()  # [TODO] filter according to the user?
+    queryset = WorkflowJobGroup.objects.filter(
+        workflow__project__tombstoned=False
+    )  # [TODO] filter according to the user?
 
     def get_serializer_class(self, *a, **k):
         if self.request.method == "POST" and "origin" in self.request.data:
@@ -52,4 +54,6 @@ class WorkflowJobGroupDetail(generics.RetrieveUpdateDestroyAPIView):
     model = WorkflowJobGroup
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = WorkflowJobGroupSerializer
-    queryset = WorkflowJobGroup.objects.all()  # [TODO] filter according to the user?
+    queryset = WorkflowJobGroup.objects.filter(
+        workflow__project__tombstoned=False
+    )  # [TODO] filter according to the user?
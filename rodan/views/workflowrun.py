@@ -3,6 +3,8 @@
 # import os
 # import shutil
 
+import uuid
+
 from celery import (
     registry,
     # chain
@@ -14,7 +16,7 @@ from rest_framework import generics
 from rest_framework import permissions
 from rest_framework import status
 # from rest_framework import mixins
-# from rest_framework.response import Response
+from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
 from rest_framework.relations import HyperlinkedIdentityField
 
@@ -40,81 +42,19 @@ from rodan.serializers.workflowrun import (
 
 from rodan.constants import task_status
 from rodan.exceptions import CustomAPIException
+from rodan.jobs import progress
+from rodan.jobs import tracing
 from rodan.permissions import CustomObjectPermissions
+from rodan.views.conditional import ConditionalGetMixin
+from rodan.views.tombstone import BuryOnDestroyMixin
 
 
-class WorkflowRunList(generics.ListCreateAPIView):
+class ResourceAssignmentMixin(object):
     """
-    Returns a list of all WorkflowRuns. Accepts a POST request with a data body to
-    create a new WorkflowRun. POST requests will return the newly-created WorkflowRun
-    object.
-
-    Creating a new WorkflowRun instance executes the workflow. Meanwhile, RunJobs,
-    Inputs, Outputs and Resources are created corresponding to the workflow.
-
-    #### Other Parameters
-    - `workflow` -- GET & POST. UUID(GET) or Hyperlink(POST) of a Workflow.
-    - `resource_assignments` -- POST-only. A JSON object. Keys are URLs of InputPorts
-      in the Workflow, and values are list of Resource URLs.
+    Validation of the `resource_assignments` of a run of a Workflow.
     """
 
-    permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
-    _ignore_model_permissions = True
-    queryset = WorkflowRun.objects.all()
-    serializer_class = WorkflowRunSerializer
-    filter_fields = {
-        "status": ["exact"],
-        "updated": ["lt", "gt"],
-        "uuid": ["exact"],
-        "workflow": ["exact"],
-        "created": ["lt", "gt"],
-        "project": ["exact"],
-        "creator": ["exact"],
-        "creator__username": ["icontains"],
-        "name": ["exact", "icontains"],
-    }
-
-    def perform_create(self, serializer):
-        wfrun_status = serializer.validated_data.get(
-            "status", task_status.REQUEST_PROCESSING
-        )
-        if wfrun_status != task_status.REQUEST_PROCESSING:
-            raise ValidationError(
-                {"status": ["Can only create a WorkflowRun that requests processing."]}
-            )
-
-        wfrun_lrrt = serializer.validated_data.get("last_redone_runjob_tree")
-        if wfrun_lrrt:
-            raise ValidationError(
-                {"last_redone_runjob_tree": ["Cannot set this field upon creation.."]}
-            )
-
-        wf = serializer.validated_data["workflow"]
-        if not wf.valid:
-            raise ValidationError(
-                {"workflow": ["Workflow must be valid before you can run it."]}
-            )
-
-        if "resource_assignments" not in self.request.data:
-            raise ValidationError({"resource_assignments": ["This field is required"]})
-        resource_assignment_dict = self.request.data["resource_assignments"]
-
-        try:
-            validated_resource_assignment_dict = self._validate_resource_assignments(
-                resource_assignment_dict, serializer
-            )
-        except ValidationError as e:
-            e.detail = {"resource_assignments": e.detail}
-            raise e
-
-        wfrun = serializer.save(creator=self.request.user, project=wf.project)
-        wf_id = str(wf.uuid)
-        wfrun_id = str(wfrun.uuid)
-        registry.tasks["rodan.core.create_workflowrun"].apply_async(
-            (wf_id, wfrun_id, validated_resource_assignment_dict)
-        )
-
-    def _validate_resource_assignments(self, resource_assignment_dict, serializer):
+    def _validate_resource_assignments(self, resource_assignment_dict, workflow):
         """
         Validates the resource assignments
 
@@ -126,9 +66,7 @@ class WorkflowRunList(generics.ListCreateAPIView):
 
         unsatisfied_ips = set(
             InputPort.objects.filter(
-                workflow_job__in=serializer.validated_data[
-                    "workflow"
-                ].workflow_jobs.all(),
+                workflow_job__in=workflow.workflow_jobs.all(),
                 connections__isnull=True,
             )
         )
@@ -162,7 +100,7 @@ class WorkflowRunList(generics.ListCreateAPIView):
                 )
 
             h_res = HyperlinkedIdentityField(view_name="resource-detail")
-            h_res.queryset = Resource.objects.all()
+            h_res.queryset = Resource.objects.filter(tombstoned=False, project__tombstoned=False)
             h_resl = HyperlinkedIdentityField(view_name="resourcelist-detail")
             h_resl.queryset = ResourceList.objects.all()
             ress = []
@@ -245,7 +183,7 @@ class WorkflowRunList(generics.ListCreateAPIView):
                                 }
                             })
 
-                if res.project != serializer.validated_data["workflow"].project:
+                if res.project != workflow.project:
                     raise ValidationError({
                         input_port: {
                             index: [
@@ -294,14 +232,110 @@ class WorkflowRunList(generics.ListCreateAPIView):
         return validated_resource_assignment_dict
 
 
-class WorkflowRunDetail(generics.RetrieveUpdateDestroyAPIView):
+class WorkflowRunList(
+    ResourceAssignmentMixin, ConditionalGetMixin, generics.ListCreateAPIView
+):
+    """
+    Returns a list of all WorkflowRuns. Accepts a POST request with a data body to
+    create a new WorkflowRun. POST requests will return the newly-created WorkflowRun
+    object.
+
+    Creating a new WorkflowRun instance executes the workflow. Meanwhile, RunJobs,
+    Inputs, Outputs and Resources are created corresponding to the workflow.
+
+    #### Other Parameters
+    - `workflow` -- GET & POST. UUID(GET) or Hyperlink(POST) of a Workflow.
+    - `resource_assignments` -- POST-only. A JSON object. Keys are URLs of InputPorts
+      in the Workflow, and values are list of Resource URLs.
+    - `base_workflow_run` -- POST-only, optional. Hyperlink of a previous WorkflowRun of
+      the same Workflow. RunJobs whose settings and inputs are unchanged since that run
+      reuse its outputs; only the affected downstream RunJobs are executed.
+    - `profile` -- POST-only, optional. "job" or "task" to profile the automatic phase
+      of every RunJob (see `rodan.jobs.profiling`); the profiles are downloaded through
+      the `profile_resource` of the RunJobs.
+    """
+
+    permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
+    _ignore_model_permissions = True
+    queryset = WorkflowRun.objects.filter(tombstoned=False, project__tombstoned=False)
+    serializer_class = WorkflowRunSerializer
+    filter_fields = {
+        "status": ["exact"],
+        "updated": ["lt", "gt"],
+        "uuid": ["exact"],
+        "workflow": ["exact"],
+        "created": ["lt", "gt"],
+        "project": ["exact"],
+        "creator": ["exact"],
+        "creator__username": ["icontains"],
+        "name": ["exact", "icontains"],
+    }
+
+    def perform_create(self, serializer):
+        # The trace of the WorkflowRun (see rodan.jobs.tracing) is named after its UUID.
+        wfrun_uuid = uuid.uuid4()
+        with tracing.trace(wfrun_uuid, "WorkflowRunList.perform_create"):
+            self._create(serializer, wfrun_uuid)
+
+    def _create(self, serializer, wfrun_uuid):
+        wfrun_status = serializer.validated_data.get(
+            "status", task_status.REQUEST_PROCESSING
+        )
+        if wfrun_status != task_status.REQUEST_PROCESSING:
+            raise ValidationError(
+                {"status": ["Can only create a WorkflowRun that requests processing."]}
+            )
+
+        wfrun_lrrt = serializer.validated_data.get("last_redone_runjob_tree")
+        if wfrun_lrrt:
+            raise ValidationError(
+                {"last_redone_runjob_tree": ["Cannot set this field upon creation.."]}
+            )
+
+        wf = serializer.validated_data["workflow"]
+        if not wf.valid:
+            raise ValidationError(
+                {"workflow": ["Workflow must be valid before you can run it."]}
+            )
+
+        if "resource_assignments" not in self.request.data:
+            raise ValidationError({"resource_assignments": ["This field is required"]})
+        resource_assignment_dict = self.request.data["resource_assignments"]
+
+        try:
+            validated_resource_assignment_dict = self._validate_resource_assignments(
+                resource_assignment_dict, wf
+            )
+        except ValidationError as e:
+            e.detail = {"resource_assignments": e.detail}
+            raise e
+
+        base_wfrun = serializer.validated_data.get("base_workflow_run")
+        if base_wfrun and (base_wfrun.workflow_id != wf.uuid or base_wfrun.tombstoned):
+            raise ValidationError(
+                {"base_workflow_run": ["Must be a WorkflowRun of the same Workflow."]}
+            )
+
+        wfrun = serializer.save(
+            uuid=wfrun_uuid, creator=self.request.user, project=wf.project
+        )
+        wf_id = str(wf.uuid)
+        wfrun_id = str(wfrun.uuid)
+        registry.tasks["rodan.core.create_workflowrun"].apply_async(
+            (wf_id, wfrun_id, validated_resource_assignment_dict)
+        )
+
+
+class WorkflowRunDetail(
+    BuryOnDestroyMixin, ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView
+):
     """
     Performs operations on a single WorkflowRun instance.
     """
 
     permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
     _ignore_model_permissions = True
-    queryset = WorkflowRun.objects.all()
+    queryset = WorkflowRun.objects.filter(tombstoned=False, project__tombstoned=False)
     serializer_class = WorkflowRunSerializer
 
     def patch(self, request, *args, **kwargs):
@@ -376,10 +410,25 @@ class WorkflowRunDetail(generics.RetrieveUpdateDestroyAPIView):
 
         if is_redoing_runjob_tree:
             wfrun.status = task_status.REQUEST_RETRYING
-            wfrun.save(update_fields=["status"])
+            wfrun.save(update_fields=["status", "updated"])
             registry.tasks["rodan.core.redo_runjob_tree"].apply_async(
                 (new_lrrt.uuid.hex,)
             )
 
         # HTTP response
         return response
+
+
+class WorkflowRunProgress(generics.GenericAPIView):
+    """
+    Returns the progress of a WorkflowRun: the number of its RunJobs in each status, in
+    total and per job. The same snapshot is pushed to the websocket facility
+    `workflowrun-<uuid>` (as `{"model": "progress", ...}`) whenever it changes.
+    """
+
+    permission_classes = (permissions.IsAuthenticated, CustomObjectPermissions)
+    _ignore_model_permissions = True
+    queryset = WorkflowRun.objects.filter(tombstoned=False, project__tombstoned=False)
+
+    def get(self, request, *args, **kwargs):
+        return Response(progress.snapshot(self.get_object()))
@@ -0,0 +1,92 @@
+"""
+Websocket channels.
+
+Change notifications are published (by rodan/notify_relay.py) to the broadcast
+facility of the Project and of the WorkflowRun they concern:
+
+- `project-<uuid>` -- all changes within a Project (uuid in its hyphenated form, as
+  shown by the API).
+- `workflowrun-<uuid>` -- changes of a WorkflowRun, its RunJobs, Inputs and Outputs,
+  and its ResultsPackages.
+- `rodan` -- changes that belong to no Project (Jobs, ResourceTypes...), which any
+  authenticated user may see. The tables of tokens and other private or internal rows
+  send no notifications (see `NOTIFY_EXCLUDED_TABLES` in rodan/models/__init__.py).
+
+Clients connect to `<WEBSOCKET_URL><facility>?subscribe-broadcast`, authenticated by
+their session cookie or by their API token (`&token=<key>`). The subscription is
+only accepted if the user can view the Project or WorkflowRun.
+"""
+from importlib import import_module
+import re
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import PermissionDenied
+from django.utils.functional import SimpleLazyObject
+from rest_framework.authtoken.models import Token
+
+from rodan.models import Project, WorkflowRun
+
+GLOBAL_FACILITY = "rodan"
+
+_facility_regex = re.compile(
+    r"^(?P<kind>project|workflowrun)-"
+    r"(?P<uuid>[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12})$"
+)
+_facility_models = {"project": Project, "workflowrun": WorkflowRun}
+
+
+def project_facility(project_uuid):
+    return "project-{0}".format(uuid.UUID(str(project_uuid)))
+
+
+def workflowrun_facility(workflowrun_uuid):
+    return "workflowrun-{0}".format(uuid.UUID(str(workflowrun_uuid)))
+
+
+def process_request(request):
+    """
+    `WS4REDIS_PROCESS_REQUEST`: authenticate the websocket request.
+    """
+    request.session = None
+    request.user = AnonymousUser()
+    token = request.GET.get("token")
+    if token:
+        token = Token.objects.select_related("user").filter(key=token).first()
+        if token is not None and token.user.is_active:
+            request.user = token.user
+        return
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if session_key is not None:
+        engine = import_module(settings.SESSION_ENGINE)
+        request.session = engine.SessionStore(session_key)
+        request.user = SimpleLazyObject(lambda: get_user(request))
+
+
+def can_subscribe(user, facility):
+    if not user.is_authenticated():
+        return False
+    if facility == GLOBAL_FACILITY:
+        return True
+    match = _facility_regex.match(facility)
+    if match is None:
+        return False
+    kind = match.group("kind")
+    obj = _facility_models[kind].objects.filter(uuid=match.group("uuid")).first()
+    return obj is not None and user.has_perm("view_{0}".format(kind), obj)
+
+
+def allowed_channels(request, channels):
+    """
+    `WS4REDIS_ALLOWED_CHANNELS`: clients may only subscribe to the broadcasts of a
+    facility they can view. Publishing is reserved to the server.
+
+    This runs once per connection; the permission lookup is the only database access
+    of the websocket server besides authentication.
+    """
+    facility = request.path_info.replace(settings.WEBSOCKET_URL, "", 1)
+    if not can_subscribe(request.user, facility):
+        raise PermissionDenied("You cannot subscribe to {0}.".format(facility))
+    return [c for c in channels if c == "subscribe-broadcast"]